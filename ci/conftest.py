@@ -0,0 +1,11 @@
+# ci/conftest.py
+"""
+sys.path setup for the ci/ tests: dora/dora-refactor for the DORA modules,
+and this directory for dora_testlib (the shared helpers).
+"""
+import sys
+from pathlib import Path
+
+CI = Path(__file__).parent
+sys.path.insert(0, str(CI / "dora" / "dora-refactor"))
+sys.path.insert(0, str(CI))
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# ci/dora/collect-events.py
+
+# CONTRACT-JSON-BEGIN
+# {
+#   "args": ["[OUT]", "--show-env"],
+#   "env": {
+#     "SCHEMA": "events/v1",
+#     "WINDOW_DAYS": "14",
+#     "MAIN_BRANCH": "main",
+#     "DEPLOY_SOURCE": "deployments | runs",
+#     "DEPLOY_ENV": "prod (used when DEPLOY_SOURCE=deployments)",
+#     "DEPLOY_WORKFLOW_NAME": "required when DEPLOY_SOURCE=runs and ID not provided",
+#     "DEPLOY_WORKFLOW_ID": "optional override for runs mode",
+#     "GITHUB_REPOSITORY": "owner/name (falls back to REPO or git remote)",
+#     "REPO": "owner/name fallback if GITHUB_REPOSITORY unset",
+#     "EVENT_SINK_URL": "optional HTTP endpoint; events POSTed in NDJSON batches (dora-refactor/dora_sink.py)",
+#     "EVENT_SINK_BATCH": "int events per POST, default 500; 1 = one JSON document per POST (application/json, the old format)",
+#     "EVENT_SINK_MAX_BYTES": "int max uncompressed body bytes per POST, default 1048576",
+#     "EVENT_SINK_GZIP": "true|false (default false); gzip bodies with Content-Encoding: gzip",
+#     "EVENT_SINK_SPOOL": "spool file for undelivered events, resent on the next run; default OUT.sink-spool, empty disables",
+#     "EVENTS_STORE": "optional date-partitioned store directory (dora-refactor/dora_store.py); the de-duped OUT is merged into it",
+#     "VERBOSE": "1 enables extra diagnostics to stderr",
+#     "GH_TOKEN": "API token (or GITHUB_TOKEN; else `gh auth token` when gh is installed)",
+#     "GITHUB_API_URL": "REST API base URL, default https://api.github.com (point at a local stand-in server to test)",
+#     "COLLECT_CONCURRENCY": "int requests in flight (= pooled keep-alive connections), default 8",
+#     "COLLECT_CACHE_DIR": "conditional-request cache (ETag/Last-Modified + body per URL); empty disables, default ~/.cache/dora-collect"
+#   },
+#   "reads": "GitHub REST over pooled HTTPS connections (repo, branches, rate_limit, pulls, deployments, workflows, workflow runs), list pages fetched concurrently; COLLECT_CACHE_DIR entries (unchanged pages come back as 304); local git config for remote URL",
+#   "writes": [
+#     "OUT NDJSON file (truncated then populated; defaults to events.ndjson)",
+#     "COLLECT_CACHE_DIR entries (one JSON file per cached URL)",
+#     "EVENTS_STORE partitions + manifest.json + dedupe.sqlite (only when set; events already stored are skipped by key lookup)",
+#     "stderr status lines (WARN/ERR/info, request and 304 counts)",
+#     "EVENT_SINK_SPOOL + EVENT_SINK_SPOOL.acked (only with EVENT_SINK_URL; emptied once the sink has taken everything); EVENT_SINK_SPOOL.rejected collects lines the sink refused with 400/413/422",
+#     "optional batched POSTs to EVENT_SINK_URL over one keep-alive connection (retried with backoff; a failure is a WARN, not an exit code)"
+#   ],
+#   "tools": ["python3", "git (remote fallback)", "gh (token fallback only)"],
+#   "exit": {
+#     "ok": 0,
+#     "show_env": 0,
+#     "bad_source": 64,
+#     "workflow_name_missing_or_ambiguous": 66,
+#     "generic_error": 1
+#   },
+#   "emits": {
+#     "pr_merged": {
+#       "schema": "events/v1",
+#       "fields": ["schema","type","repo","pr","head_sha","merge_commit_sha","sha","base_branch","merged_at"]
+#     },
+#     "deployment": {
+#       "schema": "events/v1",
+#       "fields": ["schema","type","repo","sha","status","finished_at"]
+#     }
+#   },
+#   "notes": "Drop-in for collect-events.sh: same env, filters, field mapping, de-dupe and OUT bytes. Pages of pulls/deployments/runs are requested concurrently once page 1's Link header names the last page. DEPLOY_SOURCE=runs emits one success event per run in the window. De-dupe key: pr|<merge_commit_sha> and dep|<sha>|<finished_at>."
+# }
+# CONTRACT-JSON-END
+
+import os, re, subprocess, sys, json, datetime as dt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dora-refactor"))
+from dora_github import API, Client, GitHubError
+import dora_store
+from dora_sink import Sink
+
+SCHEMA = os.environ.get("SCHEMA", "events/v1")
+WINDOW_DAYS = int(os.environ.get("WINDOW_DAYS", "14"))
+MAIN_BRANCH = os.environ.get("MAIN_BRANCH", "main")
+DEPLOY_SOURCE = os.environ.get("DEPLOY_SOURCE", "deployments")
+DEPLOY_ENV = os.environ.get("DEPLOY_ENV", "prod")
+DEPLOY_WORKFLOW_NAME = os.environ.get("DEPLOY_WORKFLOW_NAME", "")
+DEPLOY_WORKFLOW_ID = os.environ.get("DEPLOY_WORKFLOW_ID", "")
+EVENT_SINK_URL = os.environ.get("EVENT_SINK_URL", "")
+EVENT_SINK_BATCH = int(os.environ.get("EVENT_SINK_BATCH", "500"))
+EVENT_SINK_MAX_BYTES = int(os.environ.get("EVENT_SINK_MAX_BYTES", "1048576"))
+EVENT_SINK_GZIP = os.environ.get("EVENT_SINK_GZIP", "false").lower() in {"1", "true", "yes", "y"}
+EVENT_SINK_SPOOL = os.environ.get("EVENT_SINK_SPOOL")  # unset: OUT.sink-spool; empty: no spool
+EVENTS_STORE = os.environ.get("EVENTS_STORE", "")
+VERBOSE = os.environ.get("VERBOSE", "0") == "1"
+GITHUB_API_URL = os.environ.get("GITHUB_API_URL", API)
+COLLECT_CONCURRENCY = int(os.environ.get("COLLECT_CONCURRENCY", "8"))
+COLLECT_CACHE_DIR = os.environ.get("COLLECT_CACHE_DIR", "~/.cache/dora-collect")
+
+class Die(Exception):
+    def __init__(self, msg, code=1):
+        super().__init__(msg)
+        self.code = code
+
+def dump_env():
+    print("## ENV CONFIG")
+    for k in ("SCHEMA", "WINDOW_DAYS", "MAIN_BRANCH", "DEPLOY_SOURCE", "DEPLOY_ENV", "DEPLOY_WORKFLOW_NAME",
+              "DEPLOY_WORKFLOW_ID", "EVENT_SINK_URL", "EVENT_SINK_BATCH", "EVENT_SINK_MAX_BYTES",
+              "EVENT_SINK_GZIP", "EVENT_SINK_SPOOL", "EVENTS_STORE", "VERBOSE", "GITHUB_API_URL",
+              "COLLECT_CONCURRENCY", "COLLECT_CACHE_DIR"):
+        print(f"- {k}={globals()[k]}")
+
+def warn(msg):
+    print(f"WARN:{msg}", file=sys.stderr)
+
+# ---------- jq semantics (collect-events.sh filters) ----------
+def alt(*vals):
+    """jq `a // b // c`: the first value that is neither null nor false (else the last)."""
+    for v in vals[:-1]:
+        if v is not None and v is not False:
+            return v
+    return vals[-1]
+
+def ge(v, since):
+    """jq `v >= $since` for a string $since (null < false < true < numbers < strings < arrays < objects)."""
+    if isinstance(v, str):
+        return v >= since
+    return isinstance(v, (list, dict))
+
+def dig(obj, *keys):
+    """jq `.a.b.c` (null through missing keys or null parents)."""
+    for k in keys:
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(k)
+    return obj
+
+def tsv(*vals):
+    """jq @tsv (null -> empty)."""
+    return "\t".join("" if v is None else str(v) for v in vals)
+
+def line(e):
+    return json.dumps(e, ensure_ascii=False, separators=(",", ":"))
+
+# ---------- resolve ----------
+def token():
+    t = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+    if t:
+        return t
+    try:
+        out = subprocess.run(["gh", "auth", "token"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out.stdout.strip() or None
+
+def repo_from_git():
+    try:
+        url = subprocess.run(["git", "config", "--get", "remote.origin.url"],
+                             capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        return ""
+    m = re.match(r"^(?:git@|https://)[^/:]+[:/](.+?)(?:\.git)?/*$", url)
+    return m.group(1) if m else ""
+
+def resolve_repo(gh):
+    """(owner/name, main branch); the checks collect-events.sh's resolve_repo/assert_env make."""
+    repo = os.environ.get("GITHUB_REPOSITORY") or os.environ.get("REPO") or repo_from_git()
+    if not repo:
+        raise Die("repo_unresolved")
+    try:
+        meta = gh.get(f"repos/{repo}").json()
+    except GitHubError:
+        raise Die(f"repo_not_found:{repo}")
+    branch = MAIN_BRANCH
+    try:
+        gh.get(f"repos/{repo}/branches/{branch}")
+    except GitHubError:
+        branch = (meta or {}).get("default_branch") or ""
+        try:
+            gh.get(f"repos/{repo}/branches/{branch}")
+        except GitHubError:
+            raise Die(f"main_branch_missing:{branch}")
+    try:
+        rem = dig(gh.get("rate_limit", conditional=False).json(), "resources", "core", "remaining") or 0
+    except GitHubError:
+        rem = 0
+    if not rem > 5:
+        raise Die(f"rate_limit_low:{rem}")
+    return repo, branch
+
+def since_ts(now=None):
+    now = now or dt.datetime.now(dt.timezone.utc)
+    return (now - dt.timedelta(days=WINDOW_DAYS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+# ---------- collectors: page lists -> events (collect-events.sh's jq, in order) ----------
+def pr_requests(repo, branch):
+    return ("pulls", f"repos/{repo}/pulls", {"state": "closed", "base": branch, "per_page": 100})
+
+def pr_events(pages, since):
+    for page_no, data in enumerate(pages, 1):
+        if not isinstance(data, list):
+            raise Die("gh_pr_list_failed")
+        if VERBOSE:
+            print(f"== page:{page_no} total:{len(data)} ==", file=sys.stderr)
+            print("-- closed_not_merged --", file=sys.stderr)
+            for p in data:
+                if p.get("merged_at") is None:
+                    print(tsv(p.get("number"), p.get("state")), file=sys.stderr)
+            print("-- merged_but_no_merge_commit_sha (likely squash) --", file=sys.stderr)
+            for p in data:
+                if p.get("merged_at") is not None and alt(p.get("merge_commit_sha"), "") == "":
+                    print(tsv(p.get("number"), p.get("merged_at"), alt(dig(p, "head", "sha"), "")), file=sys.stderr)
+        bad = sum(1 for p in data if p.get("merged_at") is not None
+                  and alt(p.get("merge_commit_sha"), "") == "" and alt(dig(p, "head", "sha"), "") == "")
+        if bad:
+            warn(f"pr_merged_missing_sha_unusable:count={bad}")
+        for p in data:
+            merged = p.get("merged_at")
+            if merged is None or not ge(merged, since):
+                continue
+            sha = alt(p.get("merge_commit_sha"), dig(p, "head", "sha"))
+            if alt(sha, "") == "":
+                continue
+            yield {"schema": SCHEMA, "type": "pr_merged", "repo": dig(p, "base", "repo", "full_name"),
+                   "pr": p.get("number"), "head_sha": alt(dig(p, "head", "sha"), None),
+                   "merge_commit_sha": alt(p.get("merge_commit_sha"), None), "sha": sha,
+                   "base_branch": dig(p, "base", "ref"), "merged_at": merged}
+
+def deployment_requests(repo):
+    return ("deployments", f"repos/{repo}/deployments", {"environment": DEPLOY_ENV or "production", "per_page": 100})
+
+def deployment_events(pages, repo, since):
+    for data in pages:
+        if not isinstance(data, list):
+            raise Die("bad_json_deployments", 65)
+        for d in data:
+            if not ge(alt(d.get("created_at"), d.get("updated_at"), ""), since):
+                continue
+            status = alt(d.get("state"), d.get("statuses_url"), "success")
+            yield {"schema": "events/v1", "type": "deployment", "repo": repo, "sha": alt(d.get("sha"), ""),
+                   "status": status, "finished_at": alt(d.get("updated_at"), d.get("created_at"), "")}
+
+def workflow_id(gh, repo):
+    if DEPLOY_WORKFLOW_ID:
+        return DEPLOY_WORKFLOW_ID
+    if not DEPLOY_WORKFLOW_NAME:
+        raise Die("workflow_name_missing", 66)
+    want = DEPLOY_WORKFLOW_NAME.lower()
+    for page in gh.paginate(f"repos/{repo}/actions/workflows", {"per_page": 100}):
+        for w in (page or {}).get("workflows") or []:
+            if isinstance(w.get("name"), str) and w["name"].lower() == want:
+                return w.get("id")
+    raise Die("workflow_name_ambiguous_or_not_found", 66)
+
+def run_requests(repo, wid):
+    return ("runs", f"repos/{repo}/actions/workflows/{wid}/runs", {"status": "success", "per_page": 100})
+
+def run_events(pages, repo, since):
+    for data in pages:
+        for r in (data or {}).get("workflow_runs") or []:
+            if ge(r.get("updated_at"), since):
+                yield {"schema": "events/v1", "type": "deployment", "repo": repo, "sha": r.get("head_sha"),
+                       "status": "success", "finished_at": r.get("updated_at")}
+
+# ---------- de-dupe / sink (collect-events.sh's dedupe_file, forward_events) ----------
+def dedupe_key(e):
+    if e.get("type") == "pr_merged":
+        return "pr|" + alt(e.get("merge_commit_sha"), "")
+    if e.get("type") == "deployment":
+        return "dep|" + alt(e.get("sha"), "") + "|" + alt(e.get("finished_at"), "")
+    return line(e)
+
+def dedupe(events):
+    """jq `unique_by(key)`: sorted by key, the first event of each key kept."""
+    out, last = [], object()
+    for k, e in sorted(((dedupe_key(e), e) for e in events), key=lambda ke: ke[0]):
+        if k != last:
+            out.append(e)
+            last = k
+    return out
+
+def forward(url, lines, spool):
+    """Batched POSTs (dora_sink); a failure is reported, never fatal, and the spool keeps what was not taken."""
+    with Sink(url, max_events=EVENT_SINK_BATCH, max_bytes=EVENT_SINK_MAX_BYTES, gzip=EVENT_SINK_GZIP,
+              spool=spool or None) as sink:
+        for ln in lines:
+            sink.add(ln)
+        sink.flush()
+        print(f"sink:{sink.stats()}", file=sys.stderr)
+        if sink.blocked:
+            warn(f"sink_failed:{sink.error}")
+
+def collect(gh, repo, branch, since):
+    """All events in window, collect-events.sh's order: PR merges, then deploys."""
+    reqs = [pr_requests(repo, branch)]
+    if DEPLOY_SOURCE == "deployments":
+        reqs.append(deployment_requests(repo))
+    elif DEPLOY_SOURCE == "runs":
+        reqs.append(run_requests(repo, workflow_id(gh, repo)))
+    else:
+        raise Die(f"bad_source:{DEPLOY_SOURCE}", 64)
+    try:
+        pages = gh.paginate_many([(path, params) for _, path, params in reqs])
+    except GitHubError as err:
+        if err.url.split("?")[0].endswith("/pulls"):
+            raise Die("gh_pr_list_failed")
+        raise Die(f"gh_api_failed:{err}")
+    events = list(pr_events(pages[0], since))
+    if DEPLOY_SOURCE == "deployments":
+        events += deployment_events(pages[1], repo, since)
+    else:
+        events += run_events(pages[1], repo, since)
+    return events
+
+def main(argv):
+    if "--show-env" in argv:
+        dump_env()
+        return 0
+    args = [a for a in argv[1:] if not a.startswith("--")]
+    out = args[0] if args else "events.ndjson"
+    try:
+        with Client(GITHUB_API_URL, token(), workers=COLLECT_CONCURRENCY,
+                    cache_dir=COLLECT_CACHE_DIR or None) as gh:
+            repo, branch = resolve_repo(gh)
+            events = collect(gh, repo, branch, since_ts())
+            print(f"info:requests={gh.requests} not_modified={gh.not_modified} retried={gh.retried}",
+                  file=sys.stderr)
+        if not events:
+            raise Die("no_events_in_window")
+        lines = [line(e) for e in dedupe(events)]
+        with open(out, "w", encoding="utf-8") as f:
+            f.write("".join(ln + "\n" for ln in lines))
+        if EVENTS_STORE:
+            added, skipped = dora_store.append(EVENTS_STORE, (json.loads(ln) for ln in lines))
+            print(f"store:{EVENTS_STORE} added={added} duplicates={skipped}", file=sys.stderr)
+        if EVENT_SINK_URL:
+            forward(EVENT_SINK_URL, lines, out + ".sink-spool" if EVENT_SINK_SPOOL is None else EVENT_SINK_SPOOL)
+        print(f"wrote {len(lines)} events → {out}", file=sys.stderr)
+    except Die as err:
+        print(f"ERR:{err}", file=sys.stderr)
+        return err.code
+    except (OSError, ValueError) as err:
+        print(f"ERR:{err}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
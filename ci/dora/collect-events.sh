@@ -16,15 +16,22 @@
 #     "DEPLOY_WORKFLOW_ID": "optional override for runs mode",
 #     "GITHUB_REPOSITORY": "owner/name (falls back to REPO or git remote)",
 #     "REPO": "owner/name fallback if GITHUB_REPOSITORY unset",
-#     "EVENT_SINK_URL": "optional HTTP endpoint; each NDJSON line POSTed",
+#     "EVENT_SINK_URL": "optional HTTP endpoint; the de-duped OUT is POSTed in NDJSON batches via dora-refactor/dora_sink.py (one curl per line without python3)",
+#     "EVENT_SINK_BATCH": "int events per POST, default 500; 1 = one JSON document per POST (application/json, the old format)",
+#     "EVENT_SINK_MAX_BYTES": "int max uncompressed body bytes per POST, default 1048576",
+#     "EVENT_SINK_GZIP": "true|false (default false); gzip bodies with Content-Encoding: gzip",
+#     "EVENT_SINK_SPOOL": "spool file for undelivered events, resent on the next run; default OUT.sink-spool, empty disables",
+#     "EVENTS_STORE": "optional date-partitioned store directory (dora-refactor/dora_store.py); the de-duped OUT is merged into it",
 #     "VERBOSE": "1 enables extra diagnostics to stderr",
 #     "GH_TOKEN": "used by gh (or GITHUB_TOKEN)"
 #   },
 #   "reads": "GitHub REST via `gh api` (repo, branches, pulls, deployments, statuses, workflow runs); local git config for remote URL; the OUT file during de-dupe",
 #   "writes": [
 #     "OUT NDJSON file (truncated then populated; defaults to events.ndjson)",
+#     "EVENTS_STORE partitions + manifest.json + dedupe.sqlite (only when set; events already stored are skipped by key lookup)",
 #     "stderr status lines (WARN/ERR/info)",
-#     "optional POSTs to EVENT_SINK_URL (one per event)"
+#     "EVENT_SINK_SPOOL + EVENT_SINK_SPOOL.acked (only with EVENT_SINK_URL; emptied once the sink has taken everything); EVENT_SINK_SPOOL.rejected collects lines the sink refused with 400/413/422",
+#     "optional batched POSTs to EVENT_SINK_URL over one keep-alive connection (retried with backoff; a failure is a WARN, not an exit code)"
 #   ],
 #   "tools": ["bash","gh","jq","git","sed","curl","date|gdate","python3","wc","mktemp"],
 #   "exit": {
@@ -61,6 +68,13 @@ DEPLOY_WORKFLOW_NAME="${DEPLOY_WORKFLOW_NAME:-}"   # optional if using runs mode
 DEPLOY_WORKFLOW_ID="${DEPLOY_WORKFLOW_ID:-}"
 DEPLOY_SOURCE="${DEPLOY_SOURCE:-deployments}"  # deployments|runs
 DEPLOY_ENV="${DEPLOY_ENV:-prod}"
+EVENTS_STORE="${EVENTS_STORE:-}"
+STORE_PY="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")" && pwd)/dora-refactor/dora_store.py"
+SINK_PY="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")" && pwd)/dora-refactor/dora_sink.py"
+EVENT_SINK_BATCH="${EVENT_SINK_BATCH:-500}"
+EVENT_SINK_MAX_BYTES="${EVENT_SINK_MAX_BYTES:-1048576}"
+EVENT_SINK_GZIP="${EVENT_SINK_GZIP:-false}"
+EVENT_SINK_SPOOL="${EVENT_SINK_SPOOL-$OUT.sink-spool}"
 
 # ---------- utils ----------
 die()  { echo "ERR:$*" >&2; exit "${2:-1}"; }
@@ -74,7 +88,7 @@ api_obj(){ gh api "$@" 2>/dev/null || echo '{}'; }   # expect object
 is_arr(){ jq -e 'type=="array"' >/dev/null; }
 is_obj(){ jq -e 'type=="object"' >/dev/null; }
 
-emit(){ local j="$1"; echo "$j"; [[ -n "${EVENT_SINK_URL:-}" ]] && curl -fsS -X POST -H 'Content-Type: application/json' --data "$j" "$EVENT_SINK_URL" >/dev/null || true; }
+emit(){ echo "$1"; }   # the sink gets the de-duped OUT once, in forward_events
 
 # ---------- repo/branch resolve (robust) ----------
 resolve_repo() {
@@ -308,6 +322,13 @@ collect_deploy_runs() {
 forward_events() {
   local file="$1"
   [[ -z "${EVENT_SINK_URL:-}" ]] && return 0
+  if command -v python3 >/dev/null 2>&1; then
+    local args=(--batch "$EVENT_SINK_BATCH" --max-bytes "$EVENT_SINK_MAX_BYTES")
+    [[ -n "$EVENT_SINK_SPOOL" ]] && args+=(--spool "$EVENT_SINK_SPOOL")
+    case "${EVENT_SINK_GZIP,,}" in 1|true|yes|y) args+=(--gzip) ;; esac
+    python3 "$SINK_PY" send "$EVENT_SINK_URL" "$file" "${args[@]}" || echo "WARN:sink_failed" >&2
+    return 0
+  fi
   while IFS= read -r line; do
     curl -fsS -H "Content-Type: application/json" -d "$line" "$EVENT_SINK_URL" >/dev/null || true
   done < "$file"
@@ -347,6 +368,10 @@ esac
   jq -s 'length>0' "$OUT" >/dev/null
 
   dedupe_file "$OUT"
+  if [[ -n "$EVENTS_STORE" ]]; then
+    need python3
+    python3 "$STORE_PY" append "$EVENTS_STORE" "$OUT" || die "store_append_failed"
+  fi
   forward_events "$OUT"
   echo "wrote $(wc -l < "$OUT") events → $OUT" >&2
 }
@@ -3,7 +3,7 @@
 
 # CONTRACT-JSON-BEGIN
 # {
-#   "args": ["[PATH]","--show-env"],
+#   "args": ["[PATH]","--show-env","--profile"],
 #   "env": {
 #     "PCTL": "int percentile, default 90",
 #     "MIN_LEAD_SAMPLES": "int minimum pairs to report, default 2",
@@ -11,12 +11,27 @@
 #     "WINDOW_DAYS": "int lookback window; 0 disables, default 14",
 #     "LT_ALLOW_FALLBACK": "bool {1,true,yes,y} enables non-SHA fallback, default false",
 #     "LT_MIN_LEAD_SECONDS": "int minimum PR→deploy delta, default 300",
-#     "LEAD_UNIT": "hours|minutes|seconds for printed stats, default hours"
+#     "LEAD_UNIT": "hours|minutes|seconds for printed stats, default hours",
+#     "DORA_INCREMENTAL": "bool {1,true,yes,y} resumes from DORA_CHECKPOINT and reads only appended NDJSON lines, default false",
+#     "DORA_CHECKPOINT": "checkpoint path for DORA_INCREMENTAL, default dora.checkpoint.json",
+#     "LEAD_SKETCH": "bool {1,true,yes,y} computes lead-time percentiles from mergeable KLL sketches and serializes them into dora.json, default false (exact)",
+#     "LEAD_SKETCH_EPS": "float target rank error for LEAD_SKETCH, default 0.01",
+#     "DORA_CACHE": "off|read|build columnar sidecar PATH.dcache; read uses it only when current, build also (re)writes it, default read",
+#     "DORA_PROFILE": "bool {1,true,yes,y} (or --profile) records per-stage wall/CPU/peak-RSS/items, default false",
+#     "DORA_PROFILE_OUT": "profile sidecar path, default dora.profile.json",
+#     "DORA_PROFILE_EVENTS": "with DORA_PROFILE, append one events/v1-style tool_stage row per stage to this NDJSON file, default unset",
+#     "DORA_RESULT_CACHE": "result cache directory (dora-refactor/dora_results.py); a hit on the same input bytes, result settings, window and code replays dora.json/leadtime.csv/stdout; plain files only; default unset (off)",
+#     "DORA_RESULT_CACHE_MB": "float size cap of DORA_RESULT_CACHE, least recently used entries evicted first, default 256",
+#     "DORA_RESULT_CACHE_ENTRIES": "int entry cap of DORA_RESULT_CACHE, default 64"
 #   },
-#   "reads": "events file PATH (default events.ndjson); tolerant to NDJSON, multiline JSON objects, or single top-level array; no network",
+#   "reads": "events file PATH (default events.ndjson), streamed in fixed-size chunks; tolerant to NDJSON, multiline JSON objects, or single top-level array; or its current PATH.dcache sidecar (mmap); or, when PATH is a dora_store directory (EVENTS_STORE), only the partitions overlapping WINDOW_DAYS (DORA_INCREMENTAL/DORA_CACHE ignored); or, for PATH=sqlite:DB (dora-refactor/dora_sqlite.py), indexed queries over the window (DORA_INCREMENTAL/DORA_CACHE ignored); no network",
 #   "writes": [
+#     "PATH.dcache (only with DORA_CACHE=build and no current sidecar)",
+#     "DORA_RESULT_CACHE/<k[:2]>/<k>/ entries (only when set; on a hit the stored outputs are copied out and nothing is recomputed)",
 #     "stdout text sections: '## DORA (basics)', '## DORA (orthogonal)', summary lines",
 #     "dora.json (schema dora/v1)",
+#     "dora.checkpoint.json (only with DORA_INCREMENTAL; schema dora-checkpoint/v2)",
+#     "DORA_PROFILE_OUT (only with DORA_PROFILE; schema dora-profile/v1) and DORA_PROFILE_EVENTS rows",
 #     "leadtime.csv (only if at least one PR→deploy pair)"
 #   ],
 #   "tools": ["python3"],
@@ -33,7 +48,8 @@
 #         "lead_time.samples",
 #         "lead_time.median_h",
 #         "lead_time.pctl_h",
-#         "lead_time.pctl"
+#         "lead_time.pctl",
+#         "lead_time.sketch (LEAD_SKETCH only; kll, hours)"
 #       ]
 #     },
 #     "leadtime.csv": {
@@ -44,374 +60,213 @@
 # }
 # CONTRACT-JSON-END
 
-
-
-import os, sys, json, math, statistics, datetime as dt, csv
-from collections import defaultdict
-from datetime import timedelta
-from json import JSONDecoder
-
-# ---------- env config ----------
-PCTL = int(os.environ.get("PCTL", "90"))                         # percentile to report
-MIN_LEAD_SAMPLES = int(os.environ.get("MIN_LEAD_SAMPLES", "2")) # min PR→deploy pairs to report
-MAX_FALLBACK_HOURS = float(os.environ.get("MAX_FALLBACK_HOURS", "6"))  # 7d
-WINDOW_DAYS = int(os.environ.get("WINDOW_DAYS", "14"))            # 0 = no window filter
-LT_ALLOW_FALLBACK = os.getenv("LT_ALLOW_FALLBACK", "false").lower() in {"1","true","yes","y"}
-LT_MIN_LEAD_SECONDS = int(os.environ.get("LT_MIN_LEAD_SECONDS", "300"))    # min delta to count a pair
-LEAD_UNIT = os.environ.get("LEAD_UNIT", "hours").lower()       # hours|minutes|seconds
+import os, shutil, sys, datetime as dt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dora-refactor"))
+# the engine, config and report live in dora-refactor/dora_compute.py (importable);
+# this script is the CLI: env -> Config, file -> engine, print and write
+from dora_compute import Config, engine_for, finish
+from dora_engine import window_lo
+from dora_io import iter_events
+from dora_events import records
+from dora_profile import profiler
+import dora_checkpoint as ckpt
+import dora_cache
+import dora_store
+import dora_sqlite
+import dora_results
 
 # ---------- env dump ----------
-def dump_env():
-    envs = {
-        "PCTL": PCTL,
-        "MIN_LEAD_SAMPLES": MIN_LEAD_SAMPLES,
-        "MAX_FALLBACK_HOURS": MAX_FALLBACK_HOURS,
-        "WINDOW_DAYS": WINDOW_DAYS,
-        "LT_ALLOW_FALLBACK": LT_ALLOW_FALLBACK,
-        "LT_MIN_LEAD_SECONDS": LT_MIN_LEAD_SECONDS,
-        "LEAD_UNIT": LEAD_UNIT,
-    }
+def dump_env(cfg):
     print("## ENV CONFIG")
-    for k, v in envs.items():
+    for k, v in cfg.env_items():
         print(f"- {k}={v}")
 
-if __name__ == "__main__" and "--show-env" in sys.argv:
-    dump_env()
-    sys.exit(0)
-
-# ---------- IO: tolerant loader for NDJSON, multi-line objects, or a single top-level array ----------
-def load_events(path: str):
-    dec = JSONDecoder()
-    with open(path, "r", encoding="utf-8") as f:
-        s = f.read()
-    out, i, n = [], 0, len(s)
-    while True:
-        while i < n and s[i].isspace():
-            i += 1
-        if i >= n:
+# ---------- incremental: resume from checkpoint, read only the appended tail ----------
+def run_incremental(engine, cfg, path, now_s, prof):
+    params = {"window_days": cfg.window_days, "state": 3}
+    offset, st = ckpt.load(cfg.checkpoint, path, "compute-dora", params)
+    if st and st.get("now", float("inf")) <= now_s:
+        engine.restore(st)
+    else:
+        offset = 0
+    tail, pending = [], None
+    for e, end in prof.iter("decode", ckpt.read_tail(path, offset)):
+        if end is None:
+            pending = e
             break
-        obj, j = dec.raw_decode(s, i)
-        out.append(obj)
-        i = j
-    return out[0] if (len(out) == 1 and isinstance(out[0], list)) else out
-
-PATH = sys.argv[1] if len(sys.argv) > 1 else "events.ndjson"
-events = load_events(PATH)
-
-# ---------- helpers ----------
-NOW = dt.datetime.now(dt.timezone.utc)
-
-def parse_ts(s: str) -> dt.datetime | None:
-    if not isinstance(s, str) or not s:
-        return None
-    s = s.strip()
-    if s.endswith("Z"):
-        s = s[:-1] + "+00:00"
+        tail.append(e)
+        offset = end
+    engine.add(prof.iter("parse", records(tail)))
+    ckpt.save(cfg.checkpoint, path, "compute-dora", params, offset, {"now": now_s, **engine.to_state()})
+    if pending is not None:
+        engine.feed([pending])
+
+def run_full(engine, cfg, path, prof):
+    cache = dora_cache.open_for(path, cfg.cache)
+    if cache is None:
+        # == engine.feed(iter_events(path)); split so the profiler can time each layer
+        engine.add(prof.iter("parse", records(prof.iter("decode", iter_events(path))), inner="decode"))
+        return
+    with cache:
+        engine.add(prof.iter("cache.rows", cache.records()))  # sidecar rows are already records
+
+def run_store(engine, path, prof):
+    # only partitions reaching the window: older events never enter the flat engine
+    events = dora_store.iter_events(path, lo=engine.lo)
+    engine.add(prof.iter("parse", records(prof.iter("decode", events)), inner="decode"))
+
+def run_sqlite(engine, db, prof):
+    # window, histogram, failure counts and SHA normalization run as indexed queries
+    with prof.stage("sqlite") as st:
+        conn = dora_sqlite.connect(db)
+        try:
+            dora_sqlite.feed(engine, conn)
+        finally:
+            conn.close()
+        st["items"] = len(engine.deploys) + len(engine.merges)
+
+def load(cfg, path, now_s, prof):
+    """Single pass into one fused engine (dora-refactor/dora_engine.py)."""
+    engine = engine_for(cfg, now_s)
+    db = dora_sqlite.db_of(path)
+    if db is not None:
+        run_sqlite(engine, db, prof)
+        return engine
+    if dora_store.is_store(path):
+        run_store(engine, path, prof)
+        return engine
+    if not cfg.incremental:
+        run_full(engine, cfg, path, prof)
+        return engine
     try:
-        return dt.datetime.fromisoformat(s)
-    except Exception:
-        return None
-
-def in_window(ts: dt.datetime) -> bool:
-    if not WINDOW_DAYS:
-        return True
-    return (NOW - ts).days < WINDOW_DAYS
-
-def _ok_pr(e: dict) -> bool:
-    return (
-        isinstance(e, dict)
-        and e.get("type") == "pr_merged"
-        and isinstance(e.get("sha"), str) and bool(e["sha"])
-        and isinstance(e.get("merged_at"), str)
-    )
-
-def _ok_dep(e: dict) -> bool:
-    ts = e.get("finished_at") or e.get("deploy_at")
-    return (
-        isinstance(e, dict)
-        and e.get("type") == "deployment"
-        and isinstance(e.get("sha"), str) and bool(e["sha"])
-        and isinstance(ts, str)
-    )
-
-# keep only recognized shapes
-events = [e for e in events if _ok_pr(e) or _ok_dep(e)]
-
-# ---------- deployments aggregation ----------
-def aggregate_deployments(events):
-    deploy_success_times = defaultdict(list)  # sha -> [times]
-    per_day = defaultdict(lambda: {"succ": 0, "fail": 0})
-
-    for e in events:
-        if e.get("type") != "deployment":
-            continue
-        ts_str = e.get("finished_at") or e.get("deploy_at")
-        t = parse_ts(ts_str)
-        if not t or not in_window(t):
-            continue
-
-        status = (e.get("status") or "success").strip().lower()
-        if status in {"success", "succeeded"}:
-            sha = e.get("sha")
-            if sha:
-                deploy_success_times[sha].append(t)
-            per_day[t.date()]["succ"] += 1
-        elif status in {"failure", "failed", "cancelled", "timed_out", "neutral", "action_required"}:
-            per_day[t.date()]["fail"] += 1
-
-    deployments = sum(v["succ"] for v in per_day.values())
-    failed = sum(v["fail"] for v in per_day.values())
-    daily_df = {str(k): v["succ"] for k, v in sorted(per_day.items())}
-    return deploy_success_times, daily_df, deployments, failed
-
-deploy_success_times, daily_df, deployments, failed = aggregate_deployments(events)
-
-# ---------- lead time ----------
-import re
-
-HEX40 = re.compile(r"^[0-9a-f]{40}$")
-
-def compute_lead(events, success_times_by_sha, max_fallback_hours=168.0,
-                 allow_fallback=False, min_lead_seconds=0):
-    # normalize deploy keys to lowercase
-    norm = {(k or "").lower(): sorted(set(t for t in v if t))
-            for k, v in (success_times_by_sha or {}).items()}
-    any_times = sorted(t for lst in norm.values() for t in lst)
-    lead_seconds, details = [], []
-
-    for e in events:
-        if e.get("type") != "pr_merged":
-            continue
-        sha = (e.get("merge_commit_sha") or e.get("sha") or e.get("head_sha") or "").lower()
-        
-        m = parse_ts(e.get("merged_at"))
-        if not sha or not m or not in_window(m) or not HEX40.fullmatch(sha):
-            continue
-
-        exact = [t for t in norm.get(sha, []) if (t - m).total_seconds() > min_lead_seconds]
-        times, match = exact, "sha"
-        if not times and allow_fallback:
-            upper = m + timedelta(hours=max_fallback_hours)
-            times = [t for t in any_times if m < t <= upper and (t - m).total_seconds() > min_lead_seconds]
-            if times: match = "fallback"
-        if not times:
-            continue
-
-        first = min(times)
-        delta_s = (first - m).total_seconds()
-        if delta_s <= 0:
-            continue
-
-        lead_seconds.append(delta_s)
-        details.append({
-            "pr": e.get("pr"),
-            "sha": sha,
-            "merged_at": e.get("merged_at"),
-            "deployed_at": first.isoformat().replace("+00:00", "Z"),
-            "lead_seconds": int(delta_s),
-            "lead_minutes": round(delta_s / 60.0, 2),
-            "lead_hours": round(delta_s / 3600.0, 4),
-            "match": match,
-        })
-    return lead_seconds, details
-
-
-lead, details = compute_lead(
-    events, deploy_success_times, MAX_FALLBACK_HOURS,
-    allow_fallback=LT_ALLOW_FALLBACK, min_lead_seconds=LT_MIN_LEAD_SECONDS
-)
-
-# ---------- percentile ----------
-def percentile(data, p):  # p in [0,100]
-    if not data:
+        run_incremental(engine, cfg, path, now_s, prof)
+    except ckpt.TailError as err:
+        print(f"WARN:incremental_disabled:{err}", file=sys.stderr)
+        engine = engine_for(cfg, now_s)
+        engine.feed(iter_events(path))
+    return engine
+
+# ---------- result cache: same input bytes + settings + window -> replay the outputs ----------
+def open_results(cfg, path, lo, prof):
+    """(cache, key, input stat) when DORA_RESULT_CACHE is set and PATH is a plain file, else None."""
+    if not cfg.result_cache or not os.path.isfile(path):
         return None
-    xs = sorted(data)
-    if len(xs) == 1:
-        return xs[0]
-    k = (p / 100) * (len(xs) - 1)
-    f = math.floor(k)
-    c = math.ceil(k)
-    if f == c:
-        return xs[f]
-    return xs[f] + (xs[c] - xs[f]) * (k - f)
-
-def _unitify(seconds_list):
-    if LEAD_UNIT == "hours":
-        return [s/3600.0 for s in seconds_list], "hours", "{:.4f}"
-    if LEAD_UNIT == "minutes":
-        return [s/60.0 for s in seconds_list], "minutes", "{:.2f}"
-    return seconds_list, "seconds", "{:.0f}"
-
-# ---------- report ----------
-print("## DORA (basics)")
-print(f"- Deployments (window): {deployments}")
-print(f"- Daily deployment frequency: {json.dumps(daily_df)}")
-
-total_attempts = deployments + failed
-if total_attempts >= 5:
-    cfr_val = failed / total_attempts
-    print(f"- Change failure rate: {cfr_val:.2f}")
-else:
-    print(f"- Change failure rate: NA (deploys<5)")
-
-n = len(lead)
-if n >= MIN_LEAD_SAMPLES:
-    series, unit, fmt = _unitify(lead)
-    med = statistics.median(series)
-    pval = percentile(series, PCTL)
-    print(f"- Lead time (samples): {n}")
-    print(f"- Lead time (median {unit}): " + fmt.format(med))
-    print(f"- Lead time (p{PCTL} {unit}): " + fmt.format(pval))
-else:
-    print(f"- Lead time: NA (n={n} < {MIN_LEAD_SAMPLES}); collect more PR→deploy pairs")
-
- #-----------------------
-# per-SHA timeline index
-idx = defaultdict(dict)
-
-for e in events:
-    t = e.get("type"); sha = e.get("sha")
-    if not sha: 
-        continue
-    if t == "pr_merged":
-        ts = parse_ts(e.get("merged_at"))
-        if ts and in_window(ts): idx[sha]["merge"] = ts
-    elif t == "pipeline_started":
-        ts = parse_ts(e.get("started_at"))
-        if ts and in_window(ts): idx[sha]["ps"] = ts
-    elif t == "pipeline_finished":
-        ts = parse_ts(e.get("finished_at"))
-        if ts and in_window(ts): idx[sha]["pf"] = ts
-    elif t == "deployment":
-        ts = parse_ts(e.get("finished_at") or e.get("deploy_at"))
-        if ts and in_window(ts): idx[sha]["df"] = ts
-
-def _pos_s(a, b):
-    if a is None or b is None: return None
-    d = (b - a).total_seconds()
-    return d if d >= 0 else None
-
-# components in seconds
-comp = {"merge→pipeline_start": [], "pipeline_runtime": [], "pipeline→deploy": []}
-for sha, times in idx.items():
-    d1 = _pos_s(times.get("merge"), times.get("ps"))
-    d2 = _pos_s(times.get("ps"),    times.get("pf"))
-    d3 = _pos_s(times.get("pf"),    times.get("df"))
-    if d1 is not None: comp["merge→pipeline_start"].append(d1)
-    if d2 is not None: comp["pipeline_runtime"].append(d2)
-    if d3 is not None: comp["pipeline→deploy"].append(d3)
-
-print("## DORA (orthogonal)")
-have_components = any(len(v) > 0 for v in comp.values())
-if not have_components:
-    total_pairs = len(lead)  # aggregate merge→deploy already computed (seconds)
-    print(f"- merge→deploy (samples): {total_pairs}")
-    if total_pairs:
-        ys, unit, fmt = _unitify(lead)
-        med = statistics.median(ys)
-        pval = percentile(ys, PCTL)
-        print(f"- merge→deploy (median {unit}): " + fmt.format(med))
-        print(f"- merge→deploy (p{PCTL} {unit}): " + fmt.format(pval))
-else:
-    for name, xs in comp.items():
-        print(f"- {name} (samples): {len(xs)}")
-        if xs:
-            ys, unit, fmt = _unitify(xs)
-            print(f"  median {unit}=" + fmt.format(statistics.median(ys)) +
-                  f", p{PCTL}=" + fmt.format(percentile(ys, PCTL)))
-
-
-
-# --- assemble dora.json ---
-def safe_p50(xs):
-    if not xs: return None
-    xs = sorted(xs); n=len(xs)
-    return xs[n//2] if n%2 else 0.5*(xs[n//2-1]+xs[n//2])
-
-lead_hours = [s/3600.0 for s in lead]  # 'lead' is seconds list from your code
-
-days_with_deploys = len(daily_df)
-per_active = round(deployments / max(days_with_deploys, 1), 4)
-per_window = (round(deployments / float(WINDOW_DAYS), 4)
-              if WINDOW_DAYS and WINDOW_DAYS > 0 else None)
-
-dora = {
-  "schema": "dora/v1",
-  "window_days": int(WINDOW_DAYS) if WINDOW_DAYS else None,
-  "metrics": {
-    "deploys_total": deployments,
-    "deploy_failures": failed,
-    "days_with_deploys": days_with_deploys,
-    "deploys_per_window_day": per_window,   # uses full window
-    "deploys_per_active_day": per_active,   # uses only days present in histogram
-    "daily_histogram": daily_df             # activity-only map you already compute
-  },
-  "lead_time": {
-    "samples": len(lead_hours),
-    "median_h": round(statistics.median(lead_hours), 4) if lead_hours else None,
-    "pctl_h": round(percentile(lead_hours, PCTL), 4) if lead_hours else None,
-    "pctl": PCTL
-  }
-}
-
-# deploys_per_active_day
-
-# Operational planning: if
-# your team has “release
-# days,” this shows how
-# busy those days are.
-# E.g., instead of 39
-# deploys spread evenly
-# (≈3/day), it’s really
-# ~10 deploys per
-# deploy-day. That’s a lot
-# of load on the pipeline,
-# approvers, and
-# monitoring.
-
-# Capacity bottlenecks: if
-# deploys are clustered
-# into a few days, this
-# metric highlights
-# burstiness. Bursty
-# deploys mean reviewers,
-# on-call, or QA get
-# slammed.
-
-# Stability vs. risk: if
-# all deploys are packed
-# into “hot days,” the
-# blast radius of one bad
-# day is bigger. A flat
-# per-window rate hides
-# that risk.
-
-# Improvement experiments:
-# if you’re trying to move
-# from “release-day
-# culture” to “continuous
-# deployment,” you want
-# this metric to trend
-# down
-# (deploys_per_active_day
-# decreasing,
-# days_with_deploys
-# increasing).
-
-
- 
-with open("dora.json","w",encoding="utf-8") as f:
-    json.dump(dora, f, indent=2)
-print("- Wrote dora.json")
-
-
-# ---------- CSV ----------
-if details:
-    with open("leadtime.csv", "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=[
-            "pr","sha","merged_at","deployed_at","lead_seconds","lead_minutes","lead_hours","match"
-        ])
-        w.writeheader()
-        details_sorted = sorted(details, key=lambda r: (r["merged_at"], r["deployed_at"]))
-        w.writerows(details_sorted)
-    print("- Wrote leadtime.csv")
+    with prof.stage("result_cache.key"):
+        st = os.stat(path)
+        rc = dora_results.ResultCache(cfg.result_cache, int(cfg.result_cache_mb * (1 << 20)),
+                                      cfg.result_cache_entries)
+        key = dora_results.result_key(dora_results.input_digest(path), cfg.result_items(), lo,
+                                      dora_results.code_digest([__file__]))
+    return rc, key, (st.st_size, st.st_mtime_ns)
+
+def replay(hit):
+    print(hit["report"], end="")
+    for name in ("dora.json", "leadtime.csv"):
+        if name in hit["files"]:
+            shutil.copyfile(hit["files"][name], name)
+            print(f"- Wrote {name}")
+
+def main(argv):
+    cfg = Config.from_env(argv=argv)
+    if "--show-env" in argv:
+        dump_env(cfg)
+        return 0
+    args = [a for a in argv[1:] if a != "--profile"]
+    path = args[0] if args else "events.ndjson"
+    # per-stage timings; a no-op unless DORA_PROFILE / --profile
+    prof = profiler(cfg.profile, "compute-dora")
+    now_s = dt.datetime.now(dt.timezone.utc).timestamp()
+    lo = window_lo(now_s, cfg.window_days)
+
+    results = open_results(cfg, path, lo, prof)
+    if results is not None:
+        hit = results[0].get(results[1], lo)
+        if hit is not None:
+            print("info:result_cache=hit", file=sys.stderr)
+            with prof.stage("result_cache.replay"):
+                replay(hit)
+            if prof.enabled:
+                prof.write(cfg.profile_out, cfg.profile_events)
+                print(f"- Wrote {cfg.profile_out}")
+            return 0
+
+    with prof.stage("load"):
+        engine = load(cfg, path, now_s, prof)
+    res = finish(engine, cfg, prof)
+
+    # ---------- report ----------
+    with prof.stage("report"):
+        report = "\n".join(res.report()) + "\n"
+        print(report, end="")
+
+    # deploys_per_active_day
+
+    # Operational planning: if
+    # your team has “release
+    # days,” this shows how
+    # busy those days are.
+    # E.g., instead of 39
+    # deploys spread evenly
+    # (≈3/day), it’s really
+    # ~10 deploys per
+    # deploy-day. That’s a lot
+    # of load on the pipeline,
+    # approvers, and
+    # monitoring.
+
+    # Capacity bottlenecks: if
+    # deploys are clustered
+    # into a few days, this
+    # metric highlights
+    # burstiness. Bursty
+    # deploys mean reviewers,
+    # on-call, or QA get
+    # slammed.
+
+    # Stability vs. risk: if
+    # all deploys are packed
+    # into “hot days,” the
+    # blast radius of one bad
+    # day is bigger. A flat
+    # per-window rate hides
+    # that risk.
+
+    # Improvement experiments:
+    # if you’re trying to move
+    # from “release-day
+    # culture” to “continuous
+    # deployment,” you want
+    # this metric to trend
+    # down
+    # (deploys_per_active_day
+    # decreasing,
+    # days_with_deploys
+    # increasing).
+
+    with prof.stage("write.dora_json"):
+        res.write_dora_json("dora.json")
+    print("- Wrote dora.json")
+
+    # ---------- CSV ----------
+    if res.details:
+        with prof.stage("write.leadtime_csv") as st:
+            res.write_leadtime_csv("leadtime.csv")
+            st["items"] = len(res.details)
+        print("- Wrote leadtime.csv")
+
+    if results is not None:
+        rc, key, seen = results
+        st = os.stat(path)
+        if (st.st_size, st.st_mtime_ns) == seen:  # not appended to while we read it
+            with prof.stage("result_cache.put"):
+                files = {"dora.json": "dora.json", **({"leadtime.csv": "leadtime.csv"} if res.details else {})}
+                rc.put(key, lo, engine.earliest(), report, files)
+
+    if prof.enabled:
+        prof.write(cfg.profile_out, cfg.profile_events)
+        print(f"- Wrote {cfg.profile_out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
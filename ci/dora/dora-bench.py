@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+# ci/dora/dora-bench.py
+
+# CONTRACT-JSON-BEGIN
+# {
+#   "args": ["SIZE... (events per dataset: 10k, 1M, 10M; default 10k)", "--show-env",
+#            "--compare OLD.json NEW.json"],
+#   "env": {
+#     "BENCH_DIR": "scratch dir for datasets and runs, default .tmp.dora/bench",
+#     "BENCH_OUT": "results path, default dora.bench.json",
+#     "BENCH_SEED": "int generator seed, default 0",
+#     "BENCH_REPEAT": "int runs per measurement (best wall kept), default 1",
+#     "BENCH_ENTRIES": "comma list of entry points to run, default all",
+#     "BENCH_THRESHOLD": "float allowed wall-time growth for --compare (timings under 50ms ignored), default 0.10",
+#     "WINDOW_DAYS": "passed through to every entry point, default 14"
+#   },
+#   "reads": "synthetic events/v1 datasets (dora-refactor/dora_synth.py), generated into BENCH_DIR once per size/seed/day",
+#   "writes": [
+#     "stdout table",
+#     "BENCH_OUT (schema dora-bench/v1: commit, host, datasets, per-stage and per-entry wall/cpu/peak RSS/events per second)"
+#   ],
+#   "tools": ["python3", "git (optional, commit id)"],
+#   "exit": { "ok": 0, "show_env": 0, "regression": 1, "usage": 64 },
+#   "notes": "Stages run in one child per dataset (stream-fed, so 10M fits in memory); peak_rss_kb is the child's high-water mark after the stage. Entry points run as separate processes; peak RSS comes from wait4()."
+# }
+# CONTRACT-JSON-END
+
+import os, sys, json, time, platform, resource, subprocess, datetime as dt
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RF = os.path.join(HERE, "dora-refactor")
+sys.path.insert(0, RF)
+import dora_synth
+
+BENCH_DIR = os.environ.get("BENCH_DIR", ".tmp.dora/bench")
+BENCH_OUT = os.environ.get("BENCH_OUT", "dora.bench.json")
+BENCH_SEED = int(os.environ.get("BENCH_SEED", "0"))
+BENCH_REPEAT = max(1, int(os.environ.get("BENCH_REPEAT", "1")))
+BENCH_ENTRIES = os.environ.get("BENCH_ENTRIES", "")
+BENCH_THRESHOLD = float(os.environ.get("BENCH_THRESHOLD", "0.10"))
+WINDOW_DAYS = int(os.environ.get("WINDOW_DAYS", "14"))
+
+# name -> (argv after python3, extra env); PATH is the dataset
+ENTRIES = {
+    "compute-dora":        (["compute-dora.py", "PATH"], {"DORA_CACHE": "off"}),
+    "compute-dora.cached": (["compute-dora.py", "PATH"], {"DORA_CACHE": "build"}),
+    "dora-refactor/main":  (["dora-refactor/main.py", "PATH"], {"DORA_CACHE": "off"}),
+    "dora-refactor/main.cached": (["dora-refactor/main.py", "PATH"], {"DORA_CACHE": "build"}),
+    "dora-rollup":         (["dora-rollup.py", "PATH"], {}),
+    "dora-series":         (["dora-series.py", "PATH"], {"DORA_CACHE": "off"}),
+}
+
+NOISE_FLOOR_S = 0.05  # --compare skips timings this small on both sides
+
+def dump_env():
+    print("## ENV CONFIG")
+    for k in ("BENCH_DIR", "BENCH_OUT", "BENCH_SEED", "BENCH_REPEAT", "BENCH_ENTRIES",
+              "BENCH_THRESHOLD", "WINDOW_DAYS"):
+        print(f"- {k}={globals()[k]}")
+
+def _maxrss_kb(ru):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+
+# ---------- stages (run inside one child per dataset) ----------
+def run_stages(path):
+    from dora_io import iter_events
+    from dora_events import records
+    from dora_engine import Engine, flat_engine, window_lo
+    from dora_aggregate import FAILURES
+    import dora_cache
+
+    now = time.time()
+    lo = window_lo(now, WINDOW_DAYS)
+    out, keep = [], {}
+
+    def stage(name, fn):
+        w0, c0 = time.perf_counter(), time.process_time()
+        before = _maxrss_kb(resource.getrusage(resource.RUSAGE_SELF))
+        items = fn()
+        peak = _maxrss_kb(resource.getrusage(resource.RUSAGE_SELF))
+        out.append({"name": name, "wall_s": time.perf_counter() - w0,
+                    "cpu_s": time.process_time() - c0, "items": items,
+                    "peak_rss_kb": peak, "rss_growth_kb": peak - before})
+
+    def count(it):
+        n = 0
+        for _ in it:
+            n += 1
+        return n
+
+    def ingest_flat():
+        keep["flat"] = eng = flat_engine(lo)
+        eng.add(records(iter_events(path)))
+        return sum(eng.totals())
+
+    def pair_flat():
+        lead, _ = keep.pop("flat").pair_merges(300, max_fallback_hours=6)
+        return len(lead)
+
+    def ingest_rf():
+        keep["rf"] = eng = Engine(lo=lo, hi=now, fail=FAILURES, pr_index=True, validate=True)
+        eng.feed(iter_events(path))
+        return eng.n
+
+    def cache_read():
+        c = dora_cache.open_cache(path)
+        with c:
+            eng = flat_engine(lo)
+            eng.add(c.records())
+        return c.n
+
+    stage("decode", lambda: count(iter_events(path)))
+    stage("decode+parse", lambda: count(records(iter_events(path))))
+    stage("ingest.flat", ingest_flat)
+    stage("pair.flat", pair_flat)
+    stage("ingest.refactor", ingest_rf)
+    stage("pair.refactor.change", lambda: keep["rf"].lead_change(300, 90)["samples"])
+    stage("pair.refactor.deployment", lambda: keep.pop("rf").lead_deployment(300, 90)["samples"])
+    stage("cache.build", lambda: dora_cache.build(path) and None)
+    stage("ingest.cached", cache_read)
+    return out
+
+# ---------- harness ----------
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=HERE, capture_output=True, text=True,
+                              timeout=30).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return ""
+
+def _child(argv, env, cwd):
+    """Run to completion; (rc, wall_s, cpu_s, peak_rss_kb, stdout) from this child only."""
+    t0 = time.perf_counter()
+    p = subprocess.Popen(argv, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    stdout = p.stdout.read()
+    p.stdout.close()
+    _, status, ru = os.wait4(p.pid, 0)
+    p.returncode = os.waitstatus_to_exitcode(status)
+    return (p.returncode, time.perf_counter() - t0, ru.ru_utime + ru.ru_stime,
+            _maxrss_kb(ru), stdout)
+
+def dataset(size):
+    n = dora_synth.parse_count(size)
+    end = int(time.time()) // 86400 * 86400
+    path = os.path.join(BENCH_DIR, f"synth-{size}-s{BENCH_SEED}-{time.strftime('%Y%m%d', time.gmtime(end))}.ndjson")
+    info = {"name": size, "events": n, "seed": BENCH_SEED, "path": path}
+    if not os.path.exists(path):
+        t0 = time.perf_counter()
+        dora_synth.write(path + ".part", n, BENCH_SEED, end)
+        os.replace(path + ".part", path)
+        info["generate_s"] = round(time.perf_counter() - t0, 3)
+    info["bytes"] = os.path.getsize(path)
+    return info
+
+def _row(ds, kind, name, runs):
+    best = min(runs, key=lambda r: r["wall_s"])
+    return {"dataset": ds["name"], "kind": kind, "name": name,
+            "wall_s": round(best["wall_s"], 4), "cpu_s": round(best["cpu_s"], 4),
+            "peak_rss_kb": max(r["peak_rss_kb"] for r in runs),
+            "events_per_s": round(ds["events"] / best["wall_s"], 1) if best["wall_s"] else None,
+            "runs_wall_s": [round(r["wall_s"], 4) for r in runs],
+            **{k: best[k] for k in ("items", "rc") if k in best}}
+
+def bench(sizes):
+    os.makedirs(BENCH_DIR, exist_ok=True)
+    entries = [e for e in BENCH_ENTRIES.split(",") if e] or list(ENTRIES)
+    unknown = [e for e in entries if e not in ENTRIES]
+    if unknown:
+        raise SystemExit(f"ERR: unknown BENCH_ENTRIES {unknown}; known {sorted(ENTRIES)}")
+    env = {**os.environ, "WINDOW_DAYS": str(WINDOW_DAYS)}
+    datasets, results = [], []
+    for size in sizes:
+        ds = dataset(size)
+        datasets.append(ds)
+        path = os.path.abspath(ds["path"])
+        print(f"## {size}: {ds['events']} events, {ds['bytes']} bytes", flush=True)
+
+        stage_runs = {}
+        for _ in range(BENCH_REPEAT):
+            rc, *_, stdout = _child([sys.executable, os.path.abspath(__file__), "--stages", path],
+                                    env, BENCH_DIR)
+            if rc:
+                raise SystemExit(f"ERR: stage runner failed rc={rc}")
+            for s in json.loads(stdout):
+                stage_runs.setdefault(s["name"], []).append(s)
+        for name, runs in stage_runs.items():
+            row = _row(ds, "stage", name, runs)
+            row["rss_growth_kb"] = max(r["rss_growth_kb"] for r in runs)
+            results.append(row)
+
+        cwd = os.path.join(BENCH_DIR, "run")
+        os.makedirs(cwd, exist_ok=True)
+        for name in entries:
+            argv, extra = ENTRIES[name]
+            argv = [sys.executable] + [path if a == "PATH" else os.path.join(HERE, a) for a in argv]
+            if extra.get("DORA_CACHE") == "build":
+                _child(argv, {**env, **extra}, cwd)  # warm: build the sidecar outside the timing
+            runs = []
+            for _ in range(BENCH_REPEAT):
+                rc, wall, cpu, rss, _ = _child(argv, {**env, **extra}, cwd)
+                runs.append({"wall_s": wall, "cpu_s": cpu, "peak_rss_kb": rss, "rc": rc})
+            results.append(_row(ds, "entry", name, runs))
+
+        for r in results:
+            if r["dataset"] == size:
+                print(f"- {r['kind']:5} {r['name']:28} {r['wall_s']:9.3f}s "
+                      f"{r['peak_rss_kb'] / 1024:8.1f}MiB {r['events_per_s'] or 0:12.0f} ev/s"
+                      + (f"  rc={r['rc']}" if r.get("rc") else ""), flush=True)
+
+    return {
+        "schema": "dora-bench/v1",
+        "generated_at": dt.datetime.now(dt.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "commit": _git("rev-parse", "HEAD") or None,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "host": {"python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count()},
+        "window_days": WINDOW_DAYS,
+        "repeat": BENCH_REPEAT,
+        "datasets": datasets,
+        "results": results,
+    }
+
+def compare(old_path, new_path):
+    """Print wall-time ratios per (dataset, kind, name); 1 when any grew past BENCH_THRESHOLD."""
+    with open(old_path, encoding="utf-8") as f:
+        old = {(r["dataset"], r["kind"], r["name"]): r for r in json.load(f)["results"]}
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)["results"]
+    worse = 0
+    print(f"## compare {old_path} -> {new_path}")
+    for r in new:
+        o = old.get((r["dataset"], r["kind"], r["name"]))
+        if not o or max(o["wall_s"], r["wall_s"]) < NOISE_FLOOR_S:
+            continue
+        ratio = r["wall_s"] / o["wall_s"]
+        flag = "REGRESSION" if ratio > 1 + BENCH_THRESHOLD else ""
+        worse += bool(flag)
+        print(f"- {r['dataset']:5} {r['kind']:5} {r['name']:28} {o['wall_s']:9.3f}s -> "
+              f"{r['wall_s']:9.3f}s  x{ratio:5.2f} {flag}")
+    return 1 if worse else 0
+
+def main(argv):
+    if "--show-env" in argv:
+        dump_env()
+        return 0
+    if len(argv) >= 2 and argv[1] == "--stages":
+        print(json.dumps(run_stages(argv[2])))
+        return 0
+    if len(argv) >= 2 and argv[1] == "--compare":
+        if len(argv) != 4:
+            print("usage: dora-bench.py --compare OLD.json NEW.json", file=sys.stderr)
+            return 64
+        return compare(argv[2], argv[3])
+    sizes = argv[1:] or ["10k"]
+    out = bench(sizes)
+    with open(BENCH_OUT, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+    print(f"- Wrote {BENCH_OUT}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
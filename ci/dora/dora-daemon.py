@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# ci/dora/dora-daemon.py
+
+# CONTRACT-JSON-BEGIN
+# {
+#   "args": ["[PATH] (default events.ndjson)", "--show-env"],
+#   "env": {
+#     "PCTL": "int percentile, default 90",
+#     "MIN_LEAD_SAMPLES": "int minimum pairs to report, default 2",
+#     "MAX_FALLBACK_HOURS": "float fallback search window, default 6",
+#     "WINDOW_DAYS": "int lookback window; 0 disables, default 14",
+#     "LT_ALLOW_FALLBACK": "bool {1,true,yes,y} enables non-SHA fallback, default false",
+#     "LT_MIN_LEAD_SECONDS": "int minimum PR→deploy delta, default 300",
+#     "LEAD_UNIT": "hours|minutes|seconds for /report, default hours",
+#     "LEAD_SKETCH": "bool {1,true,yes,y} KLL lead-time percentiles, as compute-dora.py, default false",
+#     "LEAD_SKETCH_EPS": "float target rank error for LEAD_SKETCH, default 0.01",
+#     "DORA_DAEMON_LISTEN": "HOST:PORT or unix:/path/to.sock, default 127.0.0.1:8787",
+#     "DORA_DAEMON_POLL_MS": "int milliseconds between size checks of PATH, default 500",
+#     "DORA_DAEMON_STEP_S": "int seconds the window end advances by; 0 = every request, default 60",
+#     "DORA_DAEMON_LOG": "bool {1,true,yes,y} logs each request to stderr, default false"
+#   },
+#   "reads": "events file PATH, followed as it grows (NDJSON: only appended complete lines; other JSON layouts reloaded whole on change; truncation, replacement or an in-place rewrite (digest of the bytes before the offset) reloads from byte 0); no network",
+#   "writes": [
+#     "stdout startup lines (listen address, events loaded)",
+#     "HTTP: GET /dora.json (schema dora/v1, as compute-dora.py writes it), GET /report (compute-dora.py stdout sections), GET /status (schema dora-daemon-status/v1)"
+#   ],
+#   "tools": ["python3"],
+#   "exit": { "ok": 0, "show_env": 0, "usage": 64, "io_or_parse_error": 1 },
+#   "notes": "Runs until SIGINT/SIGTERM. /dora.json equals compute-dora.py run over the same complete lines with now at the last DORA_DAEMON_STEP_S boundary. Responses carry an ETag; If-None-Match gives 304 while nothing changed."
+# }
+# CONTRACT-JSON-END
+
+import os, sys, signal, threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dora-refactor"))
+from dora_compute import Config
+from dora_daemon import Follower, follow, make_server
+
+DORA_DAEMON_LISTEN = os.environ.get("DORA_DAEMON_LISTEN", "127.0.0.1:8787")
+DORA_DAEMON_POLL_MS = int(os.environ.get("DORA_DAEMON_POLL_MS", "500"))
+DORA_DAEMON_STEP_S = int(os.environ.get("DORA_DAEMON_STEP_S", "60"))
+DORA_DAEMON_LOG = os.getenv("DORA_DAEMON_LOG", "false").lower() in {"1","true","yes","y"}
+
+# compute-dora.py knobs that shape the served result (file loading knobs don't apply)
+METRIC_ENV = ("PCTL", "MIN_LEAD_SAMPLES", "MAX_FALLBACK_HOURS", "WINDOW_DAYS", "LT_ALLOW_FALLBACK",
+              "LT_MIN_LEAD_SECONDS", "LEAD_UNIT", "LEAD_SKETCH", "LEAD_SKETCH_EPS")
+
+def dump_env(cfg):
+    print("## ENV CONFIG")
+    for k, v in cfg.env_items():
+        if k in METRIC_ENV:
+            print(f"- {k}={v}")
+    for k in ("DORA_DAEMON_LISTEN", "DORA_DAEMON_POLL_MS", "DORA_DAEMON_STEP_S", "DORA_DAEMON_LOG"):
+        print(f"- {k}={globals()[k]}")
+
+def main(argv):
+    cfg = Config.from_env()
+    if "--show-env" in argv:
+        dump_env(cfg)
+        return 0
+    path = argv[1] if len(argv) > 1 else "events.ndjson"
+    if not os.path.isfile(path):
+        print(f"ERR: events file not found (a dora_store directory or sqlite: database cannot be followed): {path}", file=sys.stderr)
+        return 64
+    if DORA_DAEMON_POLL_MS <= 0 or DORA_DAEMON_STEP_S < 0:
+        print("ERR: DORA_DAEMON_POLL_MS must be > 0 and DORA_DAEMON_STEP_S >= 0", file=sys.stderr)
+        return 64
+
+    follower = Follower(path, cfg, step=DORA_DAEMON_STEP_S)
+    n = follower.poll()
+    try:
+        srv = make_server(follower, DORA_DAEMON_LISTEN, verbose=DORA_DAEMON_LOG)
+    except (OSError, ValueError) as err:
+        print(f"ERR: cannot listen on {DORA_DAEMON_LISTEN}: {err}", file=sys.stderr)
+        return 1
+
+    stop = threading.Event()
+    poller = threading.Thread(target=follow, args=(follower, DORA_DAEMON_POLL_MS / 1000.0, stop),
+                              name="dora-follow", daemon=True)
+    poller.start()
+    # serve_forever() runs in this thread; shutdown() must come from another
+    def on_signal(signum, frame):
+        stop.set()
+        threading.Thread(target=srv.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    where = DORA_DAEMON_LISTEN if DORA_DAEMON_LISTEN.startswith("unix:") \
+        else "http://%s:%d" % srv.server_address[:2]
+    print(f"## DORA daemon ({path}, window {cfg.window_days}d)")
+    print(f"- Loaded {n} events ({follower.status()['mode']})")
+    print(f"- Serving {where} (GET /dora.json, /report, /status)", flush=True)
+    try:
+        srv.serve_forever(poll_interval=0.5)
+    finally:
+        stop.set()
+        srv.server_close()
+        if DORA_DAEMON_LISTEN.startswith("unix:"):
+            try:
+                os.unlink(DORA_DAEMON_LISTEN[5:])
+            except OSError:
+                pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -7,7 +7,9 @@ from dora_io import load_ndjson, dump_json
 
 from dora_validate import warn_shape, warn_timestamps, assert_ndjson
 
-from dora_pair import lead_times_deployment, lead_times_change, to_dt
+from dora_pair import lead_times_deployment, lead_times_change
+
+from dora_events import EventType, records
 
 from dora_aggregate import deployments_in_window, daily_histogram, failure_count
 
@@ -44,12 +46,13 @@ def main():
     start = end - timedelta(days=WINDOW_DAYS)
 
     # limit deploy-side metrics to window, allow PRs from all time for pairing
-    deploys = deployments_in_window(events, start, end)
+    recs    = list(records(events))
+    deploys = deployments_in_window(recs, start.timestamp(), end.timestamp())
     daily   = daily_histogram(deploys)
     failed  = failure_count(deploys)
 
     # compose pairing input: all PRs + windowed deployments
-    pr_all = [e for e in events if e.get("type") == "pr_merged"]
+    pr_all = [r for r in recs if r.type is EventType.PR_MERGED]
     ev_for_lt = pr_all + deploys
 
     # ---- lead times ----
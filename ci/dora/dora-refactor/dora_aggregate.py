@@ -1,13 +1,15 @@
 from collections import Counter
-from dora_pair import to_dt
+from dora_events import EventType, Status, day
 
 def deployments_in_window(events, start, end):
-    return [e for e in events if e.get("type")=="deployment" and start<=to_dt(e["finished_at"])<=end]
+    # events: dora_events.Event records; start/end: epoch seconds
+    return [e for e in events if e.type is EventType.DEPLOYMENT and e.ts is not None and start<=e.ts<=end]
 
 def daily_histogram(deploys):
-    c=Counter(d["finished_at"][:10] for d in deploys)
+    c=Counter(day(d.ts) for d in deploys)
     return dict(sorted(c.items()))
     
+FAILURES = {Status.FAILURE, Status.FAILED, Status.CANCELLED, Status.CANCELED}
+
 def failure_count(deploys):
-    bad={"failure","failed","cancelled","canceled"}
-    return sum(1 for d in deploys if str(d.get("status","")).lower() in bad)
+    return sum(1 for d in deploys if d.status in FAILURES)
@@ -1,7 +1,68 @@
+import math, statistics
+
 from invariants import (
     assert_window, assert_metrics_consistency, assert_lead_section
 )
 
+from dora_sketch import KLL
+
+
+# ----- compute-dora.py flat dora/v1 (also used per repo by dora_rollup) -----
+def percentile(data, p):  # p in [0,100]
+    if not data:
+        return None
+    if isinstance(data, KLL):
+        return data.quantile(p / 100)
+    xs = sorted(data)
+    if len(xs) == 1:
+        return xs[0]
+    k = (p / 100) * (len(xs) - 1)
+    f = math.floor(k)
+    c = math.ceil(k)
+    if f == c:
+        return xs[f]
+    return xs[f] + (xs[c] - xs[f]) * (k - f)
+
+def scale(seconds, div):
+    return seconds.scaled(div) if isinstance(seconds, KLL) else [s/div for s in seconds]
+
+def median(data):
+    return data.quantile(0.5) if isinstance(data, KLL) else statistics.median(data)
+
+def assemble_dora_flat(*, daily, deployments, failed, lead, window_days, pctl):
+    """
+    daily: day -> successful deploys; lead: lead seconds (list or KLL).
+    With a KLL `lead`, the sketches (hours, like main.py's) are serialized for later merging.
+    """
+    lead_hours = scale(lead, 3600.0)
+    days_with_deploys = len(daily)
+    per_active = round(deployments / max(days_with_deploys, 1), 4)
+    per_window = (round(deployments / float(window_days), 4)
+                  if window_days and window_days > 0 else None)
+    out = {
+      "schema": "dora/v1",
+      "window_days": int(window_days) if window_days else None,
+      "metrics": {
+        "deploys_total": deployments,
+        "deploy_failures": failed,
+        "days_with_deploys": days_with_deploys,
+        "deploys_per_window_day": per_window,   # uses full window
+        "deploys_per_active_day": per_active,   # uses only days present in histogram
+        "daily_histogram": daily
+      },
+      "lead_time": {
+        "samples": len(lead_hours),
+        "median_h": round(median(lead_hours), 4) if lead_hours else None,
+        "pctl_h": round(percentile(lead_hours, pctl), 4) if lead_hours else None,
+        "pctl": pctl
+      }
+    }
+    if isinstance(lead, KLL):
+        # mergeable summaries in hours (dora_sketch.merge_all)
+        out["lead_time"]["sketch"] = lead_hours.to_dict()
+    return out
+
+
 
 def assemble_dora(*, events, deploys, failed, daily, window_days,
                   start, end, pctl, min_sec, pair_mode,
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# ci/dora/dora-refactor/dora_cache.py
+"""
+Columnar binary sidecar for an events file (events.ndjson -> events.ndjson.dcache).
+
+One row per JSON object, in file order, holding the dora_events.Event fields
+as fixed-width little-endian columns (ts as whole seconds + microseconds)
+plus a string dictionary for SHAs, repos and source timestamp strings.
+Readers mmap the sidecar and walk the columns through memoryviews; nothing is
+JSON-decoded or ISO-parsed. A small JSON meta block carries the validation
+summary (dora_validate) that dict-level consumers would otherwise recompute.
+
+A sidecar is used only while it matches its source: same size, and same
+mtime or (when the mtime moved, or verify=True) the same sha256 of content.
+
+usage: dora_cache.py <events.ndjson>   # (re)build the sidecar if stale
+"""
+import hashlib, json, mmap, os, struct, sys
+from array import array
+
+from dora_io import iter_events
+from dora_events import Event, EventType, Status, split_epoch, epoch
+from dora_validate import shape_counts, assert_ndjson
+
+SUFFIX = ".dcache"
+MAGIC = b"DORACOL1"
+VERSION = 2
+NULL = -(1 << 63)  # ts/pr column sentinel
+BATCH = 4096       # validation batch (rows)
+
+# magic, version, source size, source mtime_ns, source sha256, rows, strings, blob bytes, meta bytes
+HEADER = struct.Struct("<8sIqq32sQQQQ")
+
+_TYPES = tuple(EventType)
+_STATUSES = tuple(Status)
+
+def sidecar_path(path):
+    return path + SUFFIX
+
+def _pad(n):
+    return (n + 7) & ~7
+
+def _layout(n, k, blob, meta):
+    """Byte offsets of each column; every column starts 8-byte aligned."""
+    off, o = {}, _pad(HEADER.size)
+    for name, width in (("type", 1), ("status", 1), ("ts", 8), ("us", 4), ("pr", 8), ("sha", 4),
+                        ("merge_sha", 4), ("head_sha", 4), ("repo", 4), ("at", 4), ("offsets", 8)):
+        off[name] = o
+        o = _pad(o + width * (k + 1 if name == "offsets" else n))
+    off["blob"] = o
+    off["meta"] = _pad(o + blob)
+    off["end"] = off["meta"] + meta
+    return off
+
+def _sha256(path, size):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        left = size
+        while left > 0:
+            b = f.read(min(left, 1 << 20))
+            if not b:
+                break
+            h.update(b)
+            left -= len(b)
+    return h.digest()
+
+def build(path, out=None):
+    """Parse `path` once and atomically write its sidecar. Returns the sidecar path."""
+    out = out or sidecar_path(path)
+    st = os.stat(path)
+    digest = _sha256(path, st.st_size)
+
+    cols = {"type": array("B"), "status": array("B"), "ts": array("q"), "us": array("I"),
+            "pr": array("q"), "sha": array("I"), "merge_sha": array("I"), "head_sha": array("I"),
+            "repo": array("I"), "at": array("I")}
+    ids, strings = {None: 0}, [""]  # id 0 = missing
+
+    def sid(s):
+        i = ids.get(s)
+        if i is None:
+            i = ids[s] = len(strings)
+            strings.append(s)
+        return i
+
+    counts = dict.fromkeys(("bad_schema", "bad_type", "bad_merge", "bad_fin"), 0)
+    first_error, n, batch = None, 0, []
+
+    def check(batch, start):
+        nonlocal first_error
+        if first_error is None:
+            try:
+                assert_ndjson(batch, start)
+            except AssertionError as e:
+                first_error = str(e)
+        for k, v in shape_counts(batch).items():
+            counts[k] += v
+
+    for e in iter_events(path):
+        if not isinstance(e, dict):
+            if first_error is None:
+                first_error = f"[{n + len(batch)}] not an object"
+            continue
+        r = Event.from_dict(e)
+        cols["type"].append(r.type)
+        cols["status"].append(r.status)
+        secs, us = (NULL, 0) if r.ts is None else split_epoch(r.at)
+        cols["ts"].append(secs)
+        cols["us"].append(us)
+        pr = r.pr
+        cols["pr"].append(pr if type(pr) is int and -(1 << 63) < pr < (1 << 63) else NULL)
+        cols["sha"].append(sid(r.sha))
+        cols["merge_sha"].append(sid(r.merge_sha))
+        cols["head_sha"].append(sid(r.head_sha))
+        cols["repo"].append(sid(r.repo))
+        cols["at"].append(sid(r.at))
+        batch.append(e)
+        if len(batch) >= BATCH:
+            check(batch, n)
+            n += len(batch)
+            batch = []
+    if batch:
+        check(batch, n)
+        n += len(batch)
+
+    rows = len(cols["type"])
+    enc = [s.encode("utf-8") for s in strings]
+    offsets = array("Q", [0])
+    for b in enc:
+        offsets.append(offsets[-1] + len(b))
+    blob = b"".join(enc)
+    meta = json.dumps({"n": n, "first_error": first_error, "counts": counts},
+                      separators=(",", ":")).encode("utf-8")
+    lay = _layout(rows, len(strings), len(blob), len(meta))
+
+    tmp = f"{out}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, st.st_size, st.st_mtime_ns, digest,
+                            rows, len(strings), len(blob), len(meta)))
+        for name, data in [*cols.items(), ("offsets", offsets), ("blob", blob), ("meta", meta)]:
+            f.write(b"\0" * (lay[name] - f.tell()))
+            f.write(data if isinstance(data, bytes) else data.tobytes())
+    os.replace(tmp, out)
+    return out
+
+class ColumnCache:
+    """Read-only, zero-copy view over a sidecar. Columns are memoryviews into the mmap."""
+
+    def __init__(self, f, mm, rows, k, blob, meta):
+        self._f, self._mm = f, mm
+        mv = memoryview(mm)
+        lay = _layout(rows, k, blob, meta)
+        self.n = rows
+        self.type = mv[lay["type"]:lay["type"] + rows]
+        self.status = mv[lay["status"]:lay["status"] + rows]
+        self.ts = mv[lay["ts"]:lay["ts"] + 8 * rows].cast("q")
+        self.pr = mv[lay["pr"]:lay["pr"] + 8 * rows].cast("q")
+        self.us, self.sha, self.merge_sha, self.head_sha, self.repo, self.at = (
+            mv[lay[c]:lay[c] + 4 * rows].cast("I")
+            for c in ("us", "sha", "merge_sha", "head_sha", "repo", "at"))
+        self._offsets = mv[lay["offsets"]:lay["offsets"] + 8 * (k + 1)].cast("Q")
+        self._blob = mv[lay["blob"]:lay["blob"] + blob]
+        self.meta = json.loads(bytes(mv[lay["meta"]:lay["meta"] + meta]))
+        self._strings = None
+
+    @property
+    def strings(self):
+        """String dictionary (index 0 = missing -> None), decoded and interned on first use."""
+        if self._strings is None:
+            raw = bytes(self._blob)
+            text = raw.decode("utf-8")
+            o = self._offsets
+            if len(text) == len(raw):  # ascii: char offsets == byte offsets
+                out = [text[o[i]:o[i + 1]] for i in range(len(o) - 1)]
+            else:
+                out = [raw[o[i]:o[i + 1]].decode("utf-8") for i in range(len(o) - 1)]
+            self._strings = [None] + [sys.intern(s) for s in out[1:]]
+        return self._strings
+
+    def records(self):
+        """Yield Event records in file order."""
+        s = self.strings
+        for t, st, ts, us, pr, sha, msha, hsha, repo, at in zip(
+                self.type, self.status, self.ts, self.us, self.pr,
+                self.sha, self.merge_sha, self.head_sha, self.repo, self.at):
+            yield Event(_TYPES[t], _STATUSES[st], None if ts == NULL else epoch(ts, us), s[sha],
+                        s[msha], s[hsha], None if pr == NULL else pr, s[repo], s[at])
+
+    def close(self):
+        # drop exported views before unmapping
+        self.type = self.status = self.ts = self.us = self.pr = None
+        self.sha = self.merge_sha = self.head_sha = self.repo = self.at = None
+        self._offsets = self._blob = None
+        self._mm.close()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_cache(path, verify=False, sidecar=None):
+    """Return a ColumnCache for `path` if its sidecar is present and current; else None."""
+    sidecar = sidecar or sidecar_path(path)
+    try:
+        src = os.stat(path)
+        f = open(sidecar, "rb")
+    except OSError:
+        return None
+    try:
+        head = f.read(HEADER.size)
+        if len(head) < HEADER.size:
+            raise ValueError("short header")
+        magic, ver, size, mtime_ns, digest, rows, k, blob, meta = HEADER.unpack(head)
+        if magic != MAGIC or ver != VERSION or size != src.st_size:
+            raise ValueError("stale")
+        if (verify or mtime_ns != src.st_mtime_ns) and _sha256(path, size) != digest:
+            raise ValueError("stale")
+        if os.fstat(f.fileno()).st_size < _layout(rows, k, blob, meta)["end"]:
+            raise ValueError("truncated")
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        f.close()
+        return None
+    return ColumnCache(f, mm, rows, k, blob, meta)
+
+def open_for(path, mode="read", verify=False):
+    """
+    Consumer entry point. mode: off -> None; read -> current sidecar or None;
+    build -> (re)build a missing/stale sidecar first.
+    """
+    if mode == "off" or path == "-" or str(path).startswith("sqlite:") or os.path.isdir(path):
+        # stdin / dora_sqlite database / dora_store directory
+        return None
+    c = open_cache(path, verify)
+    if c is None and mode == "build":
+        try:
+            build(path)
+        except (OSError, ValueError) as err:
+            print(f"WARN:dcache_build_failed:{err}", file=sys.stderr)
+            return None
+        c = open_cache(path, verify)
+    return c
+
+def main(argv):
+    if len(argv) != 2:
+        print("usage: dora_cache.py <events.ndjson>", file=sys.stderr); return 64
+    path = argv[1]
+    c = open_cache(path)
+    if c is None:
+        build(path)
+        c = open_cache(path)
+    with c:
+        print(f"{sidecar_path(path)} rows={c.n}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,98 @@
+# ci/dora/dora-refactor/dora_checkpoint.py
+"""
+Resume point for append-only events files (see ci/dora/event-append.sh).
+
+A checkpoint records the byte offset just past the last complete NDJSON
+line that was folded into an engine's state, plus digests of the bytes
+before that offset. If the file was truncated or rewritten (collect-events.sh
+does `: > OUT`), the digests no longer match and the caller starts from 0.
+"""
+import hashlib, json, os
+
+SCHEMA = "dora-checkpoint/v2"
+ANCHOR_BYTES = 4096
+
+class TailError(ValueError):
+    """Input is not line-delimited JSON; incremental reads are not possible."""
+
+def _digest(f, start, end):
+    f.seek(start)
+    return hashlib.sha256(f.read(max(0, end - start))).hexdigest()
+
+def fingerprint(source, offset):
+    """Digests of the first and the last ANCHOR_BYTES before `offset`."""
+    with open(source, "rb") as f:
+        return {
+            "head": _digest(f, 0, min(offset, ANCHOR_BYTES)),
+            "anchor": _digest(f, max(0, offset - ANCHOR_BYTES), offset),
+        }
+
+def load(path, source, engine, params):
+    """
+    Return (offset, state) for a checkpoint that still matches `source`,
+    `engine` and `params`; (0, None) otherwise.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            ck = json.load(f)
+    except (OSError, ValueError):
+        return 0, None
+    if (not isinstance(ck, dict) or ck.get("schema") != SCHEMA
+            or ck.get("engine") != engine
+            or ck.get("source") != os.path.abspath(source)
+            or ck.get("params") != params):
+        return 0, None
+    offset = ck.get("offset")
+    try:
+        if not isinstance(offset, int) or offset > os.path.getsize(source):
+            return 0, None
+        fp = fingerprint(source, offset)
+    except OSError:
+        return 0, None
+    if fp["head"] != ck.get("head") or fp["anchor"] != ck.get("anchor"):
+        return 0, None
+    return offset, ck.get("state")
+
+def save(path, source, engine, params, offset, state):
+    """Atomically replace the checkpoint at `path`."""
+    ck = {
+        "schema": SCHEMA,
+        "engine": engine,
+        "source": os.path.abspath(source),
+        "params": params,
+        "offset": offset,
+        **fingerprint(source, offset),
+        "state": state,
+    }
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(ck, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def read_tail(source, offset):
+    """
+    Yield (event, end_offset) for each complete line after `offset`.
+    A final line without its newline (writer still appending, or a file
+    that simply lacks one) is yielded once as (event, None) so callers can
+    use it without committing past it. A line that parses to anything but
+    an object (e.g. a whole top-level array on one line) raises TailError:
+    only iter_events() can unwrap it.
+    """
+    with open(source, "rb") as f:
+        f.seek(offset)
+        pos = offset
+        for raw in f:
+            end = pos + len(raw)
+            line = raw.strip()
+            complete = raw.endswith(b"\n")
+            if line:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    if not complete:
+                        return  # half-written line: pick it up next run
+                    raise TailError(f"non-ndjson line at byte {pos}")
+                if not isinstance(e, dict):
+                    raise TailError(f"non-object line at byte {pos}")
+                yield e, (end if complete else None)
+            pos = end
@@ -0,0 +1,205 @@
+# ci/dora/dora-refactor/dora_compute.py
+"""
+Importable compute-dora.py: compute(events, config) -> Result.
+
+No import-time work: nothing reads sys.argv, the environment or files
+until called. A long-lived process can compute many windows/repos in
+memory:
+
+    cfg = Config(window_days=7, allow_fallback=True)
+    res = compute(events, cfg, now=ts)
+    res.dora                  # the dora/v1 dict compute-dora.py writes
+    res.details               # leadtime.csv rows
+    "\n".join(res.report())   # compute-dora.py's stdout sections
+
+compute-dora.py is the CLI shim: Config.from_env(), load the file
+(incremental / cached / streamed), finish(), print and write.
+"""
+import csv, json, os, time
+
+from dora_engine import flat_engine, flat_components, window_lo
+from dora_sketch import KLL, k_for_eps
+from dora_assemble import percentile, median, assemble_dora_flat
+from dora_profile import NULL
+
+_TRUE = {"1", "true", "yes", "y"}
+
+# env var -> (attribute, parser, default); order is --show-env's
+ENV = (
+    ("PCTL", "pctl", int, "90"),
+    ("MIN_LEAD_SAMPLES", "min_lead_samples", int, "2"),
+    ("MAX_FALLBACK_HOURS", "max_fallback_hours", float, "6"),
+    ("WINDOW_DAYS", "window_days", int, "14"),
+    ("LT_ALLOW_FALLBACK", "allow_fallback", lambda v: v.lower() in _TRUE, "false"),
+    ("LT_MIN_LEAD_SECONDS", "min_lead_seconds", int, "300"),
+    ("LEAD_UNIT", "lead_unit", str.lower, "hours"),
+    ("DORA_INCREMENTAL", "incremental", lambda v: v.lower() in _TRUE, "false"),
+    ("DORA_CHECKPOINT", "checkpoint", str, "dora.checkpoint.json"),
+    ("DORA_CACHE", "cache", str.lower, "read"),
+    ("LEAD_SKETCH", "lead_sketch", lambda v: v.lower() in _TRUE, "false"),
+    ("LEAD_SKETCH_EPS", "lead_sketch_eps", float, "0.01"),
+    ("DORA_PROFILE", "profile", lambda v: v.lower() in _TRUE, "false"),
+    ("DORA_PROFILE_OUT", "profile_out", str, "dora.profile.json"),
+    ("DORA_PROFILE_EVENTS", "profile_events", str, ""),
+    ("DORA_RESULT_CACHE", "result_cache", str, ""),
+    ("DORA_RESULT_CACHE_MB", "result_cache_mb", float, "256"),
+    ("DORA_RESULT_CACHE_ENTRIES", "result_cache_entries", int, "64"),
+)
+
+# knobs that change how a file is read or what is recorded, never the Result
+_IO_ONLY = {"incremental", "checkpoint", "cache", "profile", "profile_out", "profile_events",
+            "result_cache", "result_cache_mb", "result_cache_entries"}
+
+class Config:
+    """
+    compute-dora.py settings (one attribute per env knob in ENV). The metric
+    knobs drive compute(); incremental/checkpoint/cache/profile*/result_cache*
+    are for callers that load files (the CLI).
+    """
+    __slots__ = tuple(attr for _, attr, _, _ in ENV)
+
+    def __init__(self, **kw):
+        for _, attr, parse, default in ENV:
+            setattr(self, attr, kw.pop(attr) if attr in kw else parse(default))
+        if kw:
+            raise TypeError(f"unknown Config fields: {sorted(kw)}")
+
+    @classmethod
+    def from_env(cls, environ=None, argv=()):
+        environ = os.environ if environ is None else environ
+        cfg = cls(**{attr: parse(environ.get(name, default)) for name, attr, parse, default in ENV})
+        cfg.profile = cfg.profile or "--profile" in argv
+        return cfg
+
+    def env_items(self):
+        """(env name, value) pairs, as --show-env prints them."""
+        return [(name, getattr(self, attr)) for name, attr, _, _ in ENV]
+
+    def result_items(self):
+        """env_items() that can change the Result (what a result cache keys on)."""
+        return [(name, getattr(self, attr)) for name, attr, _, _ in ENV if attr not in _IO_ONLY]
+
+    def new_samples(self):
+        # exact: plain list; lead_sketch: mergeable KLL (seconds), O(k log n) memory
+        return KLL(k_for_eps(self.lead_sketch_eps)) if self.lead_sketch else []
+
+    def __repr__(self):
+        return "Config(" + ", ".join(f"{a}={getattr(self, a)!r}" for a in self.__slots__) + ")"
+
+def engine_for(config, now_s):
+    """Empty flat engine for `config`'s window ending at now_s (epoch seconds)."""
+    return flat_engine(window_lo(now_s, config.window_days))
+
+class Result:
+    """Everything compute-dora.py reports, writes or prints for one run."""
+    __slots__ = ("config", "daily", "deployments", "failed", "lead", "details", "comp", "dora")
+
+    def __init__(self, config, daily, deployments, failed, lead, details, comp, dora):
+        self.config = config
+        self.daily, self.deployments, self.failed = daily, deployments, failed
+        self.lead, self.details, self.comp = lead, details, comp
+        self.dora = dora
+
+    def _unitify(self, seconds_list):
+        unit = self.config.lead_unit
+        if isinstance(seconds_list, KLL):
+            if unit == "hours":
+                return seconds_list.scaled(3600.0), "hours", "{:.4f}"
+            if unit == "minutes":
+                return seconds_list.scaled(60.0), "minutes", "{:.2f}"
+            return seconds_list, "seconds", "{:.0f}"
+        if unit == "hours":
+            return [s/3600.0 for s in seconds_list], "hours", "{:.4f}"
+        if unit == "minutes":
+            return [s/60.0 for s in seconds_list], "minutes", "{:.2f}"
+        return seconds_list, "seconds", "{:.0f}"
+
+    def report(self):
+        """compute-dora.py's stdout sections, as lines."""
+        cfg, lead = self.config, self.lead
+        out = ["## DORA (basics)",
+               f"- Deployments (window): {self.deployments}",
+               f"- Daily deployment frequency: {json.dumps(self.daily)}"]
+
+        total_attempts = self.deployments + self.failed
+        if total_attempts >= 5:
+            out.append(f"- Change failure rate: {self.failed / total_attempts:.2f}")
+        else:
+            out.append(f"- Change failure rate: NA (deploys<5)")
+
+        n = len(lead)
+        if n >= cfg.min_lead_samples:
+            series, unit, fmt = self._unitify(lead)
+            out.append(f"- Lead time (samples): {n}")
+            out.append(f"- Lead time (median {unit}): " + fmt.format(median(series)))
+            out.append(f"- Lead time (p{cfg.pctl} {unit}): " + fmt.format(percentile(series, cfg.pctl)))
+        else:
+            out.append(f"- Lead time: NA (n={n} < {cfg.min_lead_samples}); collect more PR→deploy pairs")
+
+        out.append("## DORA (orthogonal)")
+        if not any(len(v) > 0 for v in self.comp.values()):
+            # aggregate merge→deploy already computed (seconds)
+            out.append(f"- merge→deploy (samples): {n}")
+            if n:
+                ys, unit, fmt = self._unitify(lead)
+                out.append(f"- merge→deploy (median {unit}): " + fmt.format(median(ys)))
+                out.append(f"- merge→deploy (p{cfg.pctl} {unit}): " + fmt.format(percentile(ys, cfg.pctl)))
+        else:
+            for name, xs in self.comp.items():
+                out.append(f"- {name} (samples): {len(xs)}")
+                if xs:
+                    ys, unit, fmt = self._unitify(xs)
+                    out.append(f"  median {unit}=" + fmt.format(median(ys)) +
+                               f", p{cfg.pctl}=" + fmt.format(percentile(ys, cfg.pctl)))
+        return out
+
+    def write_dora_json(self, path="dora.json"):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.dora, f, indent=2)
+
+    def write_leadtime_csv(self, path="leadtime.csv"):
+        """leadtime.csv rows sorted by merge then deploy time; False (nothing written) without pairs."""
+        if not self.details:
+            return False
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=[
+                "pr","sha","merged_at","deployed_at","lead_seconds","lead_minutes","lead_hours","match"
+            ])
+            w.writeheader()
+            w.writerows(sorted(self.details, key=lambda r: (r["merged_at"], r["deployed_at"])))
+        return True
+
+def finish(engine, config, prof=NULL):
+    """Derive a Result from a loaded flat engine (see engine_for)."""
+    with prof.stage("aggregate") as st:
+        daily = engine.histogram()
+        deployments, failed = engine.totals()
+        st["items"] = deployments + failed
+
+    with prof.stage("pair") as st:
+        lead, details = engine.pair_merges(
+            config.min_lead_seconds, allow_fallback=config.allow_fallback,
+            max_fallback_hours=config.max_fallback_hours, samples=config.new_samples()
+        )
+        st["items"] = len(lead)
+
+    # flat engines feed no pipeline rows: empty, so report() falls back to merge→deploy
+    comp = flat_components()
+
+    with prof.stage("assemble"):
+        dora = assemble_dora_flat(
+            daily=daily, deployments=deployments, failed=failed, lead=lead,
+            window_days=config.window_days, pctl=config.pctl,
+        )
+    return Result(config, daily, deployments, failed, lead, details, comp, dora)
+
+def compute(events, config=None, *, now=None, prof=NULL):
+    """
+    events: iterable of events/v1 dicts (non-dicts skipped). now: epoch
+    seconds closing the window (default: the current time).
+    """
+    config = config or Config()
+    engine = engine_for(config, time.time() if now is None else now)
+    with prof.stage("load"):
+        engine.feed(events)
+    return finish(engine, config, prof)
@@ -0,0 +1,253 @@
+# ci/dora/dora-refactor/dora_daemon.py
+"""
+Long-running compute-dora: follow a growing events file, serve dora/v1.
+
+A Follower keeps one flat engine (pairing index, daily histograms, merges)
+in memory and, on each poll(), folds in only the complete lines appended
+since the last one (dora_checkpoint.read_tail). Polling is one
+os.stat() (plus a digest of the 4 KiB before the offset once the file
+changed); a half-written last line stays pending until its newline lands.
+A file that shrank, was replaced or was rewritten in place (rotation,
+collect-events.sh's `: > OUT` then appends, even past the old offset) is
+reloaded from byte 0; a non-NDJSON file is reloaded whole whenever its size
+or mtime changes.
+
+The window end moves in `step`-second ticks: when a tick moves lo, the
+engine drops what fell out of the window in place (Engine.prune, the same
+state a DORA_INCREMENTAL checkpoint resume would rebuild). Between ticks
+and appends the last Result is reused, so reads cost nothing.
+
+make_server() exposes a Follower over HTTP on localhost or a Unix socket:
+
+    GET /dora.json   dora/v1, byte-identical to compute-dora.py's dora.json
+    GET /report      compute-dora.py's stdout sections (text/plain)
+    GET /status      offsets, event counts, reloads, window bounds
+
+Responses carry an ETag; If-None-Match answers 304 until something changes.
+"""
+import json, os, socket, socketserver, sys, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dora_compute import engine_for, finish
+from dora_engine import window_lo
+from dora_io import iter_events
+import dora_checkpoint as ckpt
+
+SCHEMA = "dora-daemon-status/v1"
+
+class Follower:
+    """
+    Tail-follow `path` into an in-memory engine for `config` (a
+    dora_compute.Config). clock: epoch seconds source (tests pin it).
+    """
+    __slots__ = ("path", "config", "step", "clock", "engine", "now", "offset", "anchor", "ident",
+                 "whole_file", "events", "reloads", "rebases", "version", "polled_at",
+                 "applied_at", "_result", "_result_key", "lock")
+
+    def __init__(self, path, config, *, step=60, clock=time.time):
+        self.path, self.config = path, config
+        self.step, self.clock = step, clock
+        self.lock = threading.RLock()
+        self.reloads = self.rebases = self.version = 0
+        self.polled_at = self.applied_at = None
+        self._result = self._result_key = None
+        self._reset()
+
+    # ---------- window ----------
+    def _tick(self):
+        t = self.clock()
+        return t - t % self.step if self.step else t
+
+    def _reset(self):
+        self.now = self._tick()
+        self.engine = engine_for(self.config, self.now)
+        self.offset, self.anchor, self.ident, self.whole_file, self.events = 0, None, None, False, 0
+
+    def rebase(self):
+        """Slide the window to the current tick; True if lo moved."""
+        with self.lock:
+            now = self._tick()
+            if now <= self.now:
+                return False
+            self.now = now
+            lo = window_lo(now, self.config.window_days)
+            if lo == self.engine.lo:
+                return False
+            self.engine.prune(lo)
+            self.rebases += 1
+            self.version += 1
+            return True
+
+    # ---------- follow ----------
+    def poll(self):
+        """Apply whatever was appended since the last poll; returns events applied."""
+        with self.lock:
+            self.polled_at = time.time()
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return 0  # mid-rotation: keep serving the last state
+            ident = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+            if ident == self.ident:
+                return 0
+            if self.whole_file:
+                self._reload(whole_file=True)
+                return self._load_whole()
+            if self.ident is not None and (ident[:2] != self.ident[:2] or st.st_size < self.offset or (
+                    self.offset and ckpt.fingerprint(self.path, self.offset)["anchor"] != self.anchor)):
+                self._reload()
+            self.ident = ident
+            if st.st_size == self.offset:
+                return 0
+            return self._apply_tail()
+
+    def _reload(self, whole_file=False):
+        self._reset()
+        self.whole_file = whole_file
+        self.reloads += 1
+        self.version += 1
+
+    def _apply_tail(self):
+        batch, offset = [], self.offset
+        try:
+            for e, end in ckpt.read_tail(self.path, offset):
+                if end is None:
+                    break  # no newline yet: the writer is mid-line
+                batch.append(e)
+                offset = end
+        except ckpt.TailError as err:
+            print(f"WARN:tail_disabled:{err}", file=sys.stderr)
+            self._reset()
+            self.whole_file = True
+            return self._load_whole()
+        if not batch and offset == self.offset:
+            return 0
+        self.engine.feed(batch)
+        self.offset = offset
+        self.anchor = ckpt.fingerprint(self.path, offset)["anchor"]
+        return self._applied(len(batch))
+
+    def _load_whole(self):
+        n = 0
+        def counted(events):
+            nonlocal n
+            for e in events:
+                n += 1
+                yield e
+        self.engine.feed(counted(iter_events(self.path)))
+        st = os.stat(self.path)
+        self.ident = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        self.offset = st.st_size
+        self.events = 0
+        return self._applied(n)
+
+    def _applied(self, n):
+        self.events += n
+        self.applied_at = time.time()
+        self.version += 1
+        return n
+
+    # ---------- read side ----------
+    def etag(self):
+        return f'"{self.version}-{self.engine.lo}"'
+
+    def result(self):
+        """Result for the events applied so far, in the current tick's window."""
+        with self.lock:
+            self.rebase()
+            key = (self.version, self.engine.lo)
+            if key != self._result_key:
+                self._result = finish(self.engine, self.config)
+                self._result_key = key
+            return self._result
+
+    def status(self):
+        with self.lock:
+            deploys, failed = self.engine.totals()
+            return {
+                "schema": SCHEMA,
+                "source": os.path.abspath(self.path),
+                "mode": "whole_file" if self.whole_file else "tail",
+                "offset": self.offset,
+                "events": self.events,
+                "reloads": self.reloads,
+                "rebases": self.rebases,
+                "window_days": self.config.window_days,
+                "window_lo": self.engine.lo,
+                "now": self.now,
+                "deploys_total": deploys,
+                "deploy_failures": failed,
+                "polled_at": self.polled_at,
+                "applied_at": self.applied_at,
+            }
+
+def follow(follower, interval, stop):
+    """Poll loop for a background thread; returns when `stop` (an Event) is set."""
+    while not stop.is_set():
+        try:
+            follower.poll()
+        except (OSError, ValueError) as err:
+            print(f"WARN:poll_failed:{err}", file=sys.stderr)
+        stop.wait(interval)
+
+# ---------- HTTP ----------
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "dora-daemon/1"
+
+    def do_GET(self):
+        f = self.server.follower
+        route = self.path.split("?", 1)[0]
+        if route == "/status":
+            return self._send(200, "application/json", json.dumps(f.status(), indent=2) + "\n")
+        if route not in ("/", "/dora.json", "/report"):
+            return self._send(404, "text/plain", "not found\n")
+        with f.lock:  # the tag must describe this result, not a poll that lands meanwhile
+            res, tag = f.result(), f.etag()
+        if self.headers.get("If-None-Match") == tag:
+            return self._send(304, None, None, tag)
+        if route == "/report":
+            return self._send(200, "text/plain; charset=utf-8", "\n".join(res.report()) + "\n", tag)
+        return self._send(200, "application/json", json.dumps(res.dora, indent=2), tag)
+
+    def _send(self, code, ctype, body, etag=None):
+        data = body.encode("utf-8") if body is not None else b""
+        self.send_response(code)
+        if ctype:
+            self.send_header("Content-Type", ctype)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if data and self.command != "HEAD":
+            self.wfile.write(data)
+
+    do_HEAD = do_GET
+
+    def address_string(self):
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+class _UnixServer(_Server):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)  # stale socket from a previous run
+        socketserver.TCPServer.server_bind(self)  # HTTPServer's wants (host, port)
+        self.server_name, self.server_port = "localhost", 0
+
+def make_server(follower, listen, verbose=False):
+    """listen: "HOST:PORT" (PORT 0 picks one) or "unix:/path/to.sock"."""
+    if listen.startswith("unix:"):
+        srv = _UnixServer(listen[5:], _Handler)
+    else:
+        host, _, port = listen.rpartition(":")
+        srv = _Server((host or "127.0.0.1", int(port)), _Handler)
+    srv.follower, srv.verbose = follower, verbose
+    return srv
@@ -0,0 +1,351 @@
+# ci/dora/dora-refactor/dora_dedupe.py
+"""
+Persistent de-duplication index for append-only events files.
+
+A SQLite sidecar (OUT.dedupe.sqlite; STORE/dedupe.sqlite for a dora_store)
+holds the canonical key of every event in its sources. A duplicate check
+is one primary-key lookup instead of a scan of OUT.
+
+The index is derived from the files and never the other way round. Per
+source it records the byte offset it covers plus the inode and a digest
+of the bytes before that offset (dora_checkpoint.fingerprint). sync()
+folds in lines appended since then, and re-reads a source from 0 when it
+was truncated or rewritten. A writer appends first and syncs after, so a
+crash in between leaves the index behind (caught up next time), never
+ahead. `rebuild` repairs an index by re-reading everything.
+
+Besides the de-dup keys, each deployment indexes depsha|<sha>, so
+event-append.sh's upsert rewrites the file only when the sha was
+deployed before.
+
+CLI (event-append.sh holds its OUT.lockdir around these):
+    dora_dedupe.py append OUT [FILE|-]    append NDJSON lines whose keys are new
+    dora_dedupe.py upsert OUT [FILE|-]    drop deployments with the same sha, then append
+    dora_dedupe.py rebuild OUT|STORE      re-read all sources into a fresh index
+    dora_dedupe.py verify OUT|STORE       exit 1 if the index and the files disagree
+"""
+import abc, json, os, sqlite3, sys
+
+import dora_checkpoint as ckpt
+
+SUFFIX = ".dedupe.sqlite"
+STORE_INDEX = "dedupe.sqlite"
+
+def dedupe_keys(e):
+    """Canonical keys: collect-events.sh's, scoped by repo; PRs also by number (event-append.sh)."""
+    t, repo = e.get("type"), e.get("repo") or ""
+    if t == "deployment":
+        return (f"dep|{repo}|{e.get('sha') or ''}|{e.get('finished_at') or ''}",)
+    if t == "pr_merged":
+        keys = []
+        m = e.get("merge_commit_sha") or e.get("sha")
+        if m:
+            keys.append(f"pr|{repo}|{m}")
+        if e.get("pr") is not None:
+            keys.append(f"prn|{repo}|{e['pr']}")
+        return tuple(keys)
+    return ("raw|" + json.dumps(e, sort_keys=True, separators=(",", ":")),)
+
+def index_keys(e):
+    keys = dedupe_keys(e)
+    if e.get("type") == "deployment" and e.get("sha"):
+        keys += (f"depsha|{e['sha']}",)
+    return keys
+
+def index_path(path):
+    """Sidecar for an events file; the store-wide index for a dora_store directory."""
+    return os.path.join(path, STORE_INDEX) if os.path.isdir(path) else path + SUFFIX
+
+class SourceIndex(abc.ABC):
+    """
+    Rows derived from the complete NDJSON lines of one or more source
+    files, kept current by sync(). Subclasses add their TABLES and say
+    which rows an event gives (_rows) and how to store / forget them.
+    Use as a context manager; every method commits before returning.
+    """
+    __slots__ = ("db", "path", "base")
+    TABLES = ""
+
+    def __init__(self, path):
+        self.path = path
+        self.base = os.path.dirname(os.path.abspath(path))
+        self.db = sqlite3.connect(path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")  # commits without fsync under synchronous=NORMAL
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL,
+                offset INTEGER NOT NULL, dev INTEGER, ino INTEGER, anchor TEXT);
+        """ + self.TABLES)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def _rel(self, path):
+        # relative to the index, so a store (or OUT + sidecar) can be moved
+        return os.path.relpath(os.path.abspath(path), self.base)
+
+    def _source(self, path):
+        rel = self._rel(path)
+        row = self.db.execute("SELECT id, offset, dev, ino, anchor FROM sources WHERE path=?",
+                              (rel,)).fetchone()
+        if row is None:
+            cur = self.db.execute("INSERT INTO sources (path, offset) VALUES (?, 0)", (rel,))
+            return cur.lastrowid, 0, None, None, None
+        return row
+
+    def sync(self, path):
+        """Fold `path`'s complete lines since the last sync into the index; returns lines read."""
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            src, offset, dev, ino, anchor = self._source(path)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                st = None
+            if st is None or (dev, ino) != (st.st_dev, st.st_ino) or st.st_size < offset or (
+                    offset and ckpt.fingerprint(path, offset)["anchor"] != anchor):
+                self._forget(src)  # rewritten or gone: start over
+                offset = 0
+            n = 0
+            if st is not None:
+                rows = []
+                for e, end in ckpt.read_tail(path, offset):
+                    if end is None:
+                        break  # partial last line: next sync
+                    if isinstance(e, dict):
+                        rows.extend(self._rows(e, src))
+                    offset, n = end, n + 1
+                self._insert(rows)
+            fp = ckpt.fingerprint(path, offset)["anchor"] if st is not None else None
+            db.execute("UPDATE sources SET offset=?, dev=?, ino=?, anchor=? WHERE id=?",
+                       (offset, st and st.st_dev, st and st.st_ino, fp, src))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return n
+
+    def known(self):
+        """Source paths synced so far (absolute)."""
+        return [os.path.join(self.base, p) for (p,) in self.db.execute("SELECT path FROM sources")]
+
+    @abc.abstractmethod
+    def _rows(self, e, src):
+        """Rows event `e` of source id `src` gives."""
+
+    @abc.abstractmethod
+    def _insert(self, rows):
+        """Store rows (inside sync()'s transaction)."""
+
+    @abc.abstractmethod
+    def _forget(self, src):
+        """Drop every row of source id `src` (its file was rewritten or is gone)."""
+
+class KeyIndex(SourceIndex):
+    """De-dup keys (index_keys) of the complete NDJSON lines of one or more source files."""
+    __slots__ = ()
+    TABLES = """
+        CREATE TABLE IF NOT EXISTS keys (
+            key TEXT NOT NULL, src INTEGER NOT NULL,
+            PRIMARY KEY (key, src)) WITHOUT ROWID;
+    """
+
+    def _rows(self, e, src):
+        return [(k, src) for k in index_keys(e)]
+
+    def _insert(self, rows):
+        self.db.executemany("INSERT OR IGNORE INTO keys (key, src) VALUES (?, ?)", rows)
+
+    def _forget(self, src):
+        self.db.execute("DELETE FROM keys WHERE src=?", (src,))
+
+    def rewritten(self, path, dropped, offset):
+        """
+        `path` was rewritten as its old lines minus the events in `dropped`,
+        with `offset` bytes of complete lines: forget their keys and adopt
+        the new file instead of re-reading it. Only for drops that share no
+        key with kept lines (e.g. every deployment of a sha).
+        """
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            src = self._source(path)[0]
+            db.executemany("DELETE FROM keys WHERE key=? AND src=?",
+                           [(k, src) for e in dropped for k in index_keys(e)])
+            st = os.stat(path)
+            db.execute("UPDATE sources SET offset=?, dev=?, ino=?, anchor=? WHERE id=?",
+                       (offset, st.st_dev, st.st_ino, ckpt.fingerprint(path, offset)["anchor"], src))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def seen(self, keys):
+        q = self.db.execute
+        return any(q("SELECT 1 FROM keys WHERE key=? LIMIT 1", (k,)).fetchone() for k in keys)
+
+    def sources_with(self, key):
+        """Source paths holding `key` (e.g. every partition a sha was deployed in)."""
+        return [os.path.join(self.base, p) for (p,) in self.db.execute(
+            "SELECT s.path FROM keys k JOIN sources s ON s.id = k.src WHERE k.key=?", (key,))]
+
+    def keys(self):
+        return {k for (k,) in self.db.execute("SELECT key FROM keys")}
+
+def sources(path):
+    """Files an index over `path` covers: the file itself, or a store's partitions."""
+    if os.path.isdir(path):
+        import dora_store
+        return dora_store.partitions(path)
+    return [path]
+
+# ---------- events file (OUT) ----------
+def _parse(lines):
+    for ln in lines:
+        ln = ln.strip()
+        if ln:
+            yield ln, json.loads(ln)
+
+def append_file(path, lines):
+    """
+    Append raw NDJSON lines (written verbatim) whose keys are not yet in
+    `path` or earlier in `lines`. The caller holds the writer lock.
+    Returns (added, skipped).
+    """
+    added = skipped = 0
+    with KeyIndex(index_path(path)) as idx:
+        idx.sync(path)
+        batch = set()
+        out = []
+        for ln, e in _parse(lines):
+            keys = dedupe_keys(e)
+            if idx.seen(keys) or any(k in batch for k in keys):
+                skipped += 1
+                continue
+            batch.update(keys)
+            out.append(ln)
+        if out:
+            _ensure_newline(path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(out) + "\n")
+            added = len(out)
+            idx.sync(path)
+    return added, skipped
+
+def upsert_file(path, lines):
+    """event-append.sh's deployment upsert; rewrites `path` only if a sha was deployed before."""
+    rows = list(_parse(lines))
+    shas = {e.get("sha") for _, e in rows if e.get("type") == "deployment" and e.get("sha")}
+    removed = 0
+    with KeyIndex(index_path(path)) as idx:
+        idx.sync(path)
+        if any(idx.seen((f"depsha|{s}",)) for s in shas):
+            dropped, done = drop_deployments(path, shas)
+            idx.rewritten(path, dropped, done)
+            removed = len(dropped)
+        _ensure_newline(path)
+        with open(path, "a", encoding="utf-8") as f:
+            for ln, _ in rows:
+                f.write(ln + "\n")
+        idx.sync(path)
+    return len(rows), removed
+
+def drop_deployments(path, shas):
+    """
+    Rewrite `path` without deployments of `shas`, other lines verbatim.
+    Returns (dropped events, bytes of complete lines kept).
+    """
+    dropped, done = [], 0
+    needles = [s.encode() for s in shas]
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(path, "rb") as src, open(tmp, "wb") as dst:
+        for ln in src:
+            if ln.endswith(b"\n") and any(s in ln for s in needles):  # parse only lines that can match
+                try:
+                    e = json.loads(ln)
+                except ValueError:
+                    e = None
+                if isinstance(e, dict) and e.get("type") == "deployment" and e.get("sha") in shas:
+                    dropped.append(e)
+                    continue
+            dst.write(ln)
+            if ln.endswith(b"\n"):
+                done += len(ln)
+    os.replace(tmp, path)
+    return dropped, done
+
+def _ensure_newline(path):
+    # a last line without "\n" would swallow the next append
+    try:
+        with open(path, "rb+") as f:
+            if f.seek(0, 2):
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+    except FileNotFoundError:
+        pass
+
+# ---------- maintenance ----------
+def rebuild(path):
+    """Replace the index over `path` (file or store); returns indexed lines."""
+    ix = index_path(path)
+    tmp = f"{ix}.tmp.{os.getpid()}"
+    if os.path.exists(tmp):
+        os.unlink(tmp)
+    with KeyIndex(tmp) as idx:
+        n = sum(idx.sync(p) for p in sources(path))
+    os.replace(tmp, ix)
+    return n
+
+def verify(path):
+    """(missing, stale): keys in the files but not the index, and the reverse."""
+    want = set()
+    for p in sources(path):
+        for e, end in ckpt.read_tail(p, 0):
+            if end is not None and isinstance(e, dict):
+                want.update(index_keys(e))
+    with KeyIndex(index_path(path)) as idx:
+        have = idx.keys()
+    return want - have, have - want
+
+def _read_input(src):
+    if src == "-":
+        return sys.stdin.read().splitlines()
+    with open(src, "r", encoding="utf-8") as f:
+        return f.read().splitlines()
+
+def main(argv):
+    cmds = ("append", "upsert", "rebuild", "verify")
+    if len(argv) < 3 or argv[1] not in cmds:
+        print("usage: dora_dedupe.py {append|upsert} OUT [FILE|-] | {rebuild|verify} OUT|STORE",
+              file=sys.stderr)
+        return 64
+    cmd, path = argv[1], argv[2]
+    try:
+        if cmd == "append":
+            added, skipped = append_file(path, _read_input(argv[3] if len(argv) > 3 else "-"))
+            print(f"dedupe:{path} added={added} duplicates={skipped}", file=sys.stderr)
+        elif cmd == "upsert":
+            added, removed = upsert_file(path, _read_input(argv[3] if len(argv) > 3 else "-"))
+            print(f"dedupe:{path} added={added} replaced={removed}", file=sys.stderr)
+        elif cmd == "rebuild":
+            print(f"dedupe:{index_path(path)} rebuilt lines={rebuild(path)}", file=sys.stderr)
+        else:
+            missing, stale = verify(path)
+            print(f"dedupe:{index_path(path)} missing={len(missing)} stale={len(stale)}", file=sys.stderr)
+            return 1 if missing or stale else 0
+    except (OSError, ValueError, sqlite3.Error) as err:
+        print(f"ERR:dedupe:{err}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,344 @@
+# ci/dora/dora-refactor/dora_engine.py
+"""
+Fused single-pass DORA engine.
+
+Every stage is an accumulator updated per event, so the input is walked
+once: validation counters (raw dicts only), windowing, the per-day
+deploy histogram, success/failure counts, the per-SHA deploy times that
+back the pairing index, windowed merges, the all-time PR maps used for
+head->merge SHA normalization, and the per-SHA timeline. Results are
+derived from the accumulators; nothing re-reads the events.
+
+compute-dora.py and dora-refactor/main.py are front-ends: each picks the
+policy (window bounds, status sets, which stages to keep) and renders.
+"""
+import re
+from collections import Counter, defaultdict
+
+from dora_events import Event, EventType, Status, elapsed, epoch, iso_echo, day
+from dora_validate import SHAPE_KEYS, violation, shape_flags
+from dora_pair import (DeployIndex, pair_first_deploy,
+                       lead_times_change_from, lead_times_deployment_from)
+
+HEX40 = re.compile(r"^[0-9a-f]{40}$")
+
+PR = EventType.PR_MERGED
+DEP = EventType.DEPLOYMENT
+TIMELINE_KEYS = {PR: "merge", EventType.PIPELINE_STARTED: "ps",
+                 EventType.PIPELINE_FINISHED: "pf", DEP: "df"}
+COMPONENTS = ("merge→pipeline_start", "pipeline_runtime", "pipeline→deploy")
+
+# compute-dora.py policy: missing status counts as success; only pr_merged/deployment
+# rows with a sha and a parseable timestamp; the window applies to merges and deploys
+FLAT_OK = frozenset({Status.NONE, Status.SUCCESS, Status.SUCCEEDED})
+FLAT_FAIL = frozenset({Status.FAILURE, Status.FAILED, Status.CANCELLED, Status.TIMED_OUT,
+                       Status.NEUTRAL, Status.ACTION_REQUIRED})
+
+def window_lo(now_s, window_days):
+    """
+    (now - ts) in whole days < window_days  <=>  ts > now - days*86400.
+    Timestamps carry whole microseconds, so the inclusive lo is that bound + 1 us.
+    """
+    if not window_days:
+        return None
+    us = round(now_s * 1e6) - window_days * 86400 * 1000000 + 1
+    return epoch(*divmod(us, 1000000))
+
+def flat_engine(lo):
+    # no timeline: pipeline rows are never fed, so its stage components would always be empty
+    return Engine(lo=lo, ok=FLAT_OK, fail=FLAT_FAIL, require_sha=True, window_prs=True, merges=True)
+
+def flat_components(new=list):
+    """Stage components of a flat engine: one empty collector per stage."""
+    return {name: new() for name in COMPONENTS}
+
+class Engine:
+    """
+    lo/hi: window bounds in epoch seconds (inclusive; None = open). Deploys
+    at/after lo are kept (hi only moves forward between incremental runs);
+    those also at/before hi are counted.
+    ok/fail: Status sets; ok=None means "anything not in fail". Deploys in
+    neither set are dropped.
+    require_sha: drop PR/deploy records without a sha.
+    window_prs: merges/timeline honour lo (PR maps are always all-time).
+    merges / pr_index / timeline / validate: enable those stages.
+    pipelines: also feed pipeline_started/finished into the timeline.
+    """
+    __slots__ = ("lo", "hi", "ok", "fail", "require_sha", "window_prs", "validate",
+                 "n", "first_error", "counts", "deploys", "daily_ok", "daily_fail",
+                 "ok_times", "merges", "pr_at", "head_to_merge", "pr_ts", "timeline", "pipelines")
+
+    def __init__(self, *, lo=None, hi=None, ok=None, fail=frozenset(), require_sha=False,
+                 window_prs=False, merges=False, pr_index=False, timeline=False,
+                 pipelines=False, validate=False):
+        self.lo, self.hi = lo, hi
+        self.ok, self.fail = ok, fail
+        self.require_sha, self.window_prs, self.validate = require_sha, window_prs, validate
+        self.pipelines = pipelines
+        self.n, self.first_error = 0, None
+        self.counts = dict.fromkeys(SHAPE_KEYS, 0)
+        self.deploys = []                 # (ts, sha, status, at) kept, in stream order
+        self.daily_ok = Counter()         # epoch day -> counted ok deploys
+        self.daily_fail = Counter()       # epoch day -> counted failed deploys
+        self.ok_times = defaultdict(list) # raw sha -> counted ok deploy times
+        self.merges = [] if merges else None  # (pr, lower sha, merged_at, source merged_at)
+        self.pr_at = {} if pr_index else None          # merge sha -> merged_at
+        self.head_to_merge = {} if pr_index else None  # head sha -> merge sha
+        self.pr_ts = {} if pr_index else None          # sha -> merged_at
+        self.timeline = defaultdict(dict) if timeline else None  # sha -> {merge|ps|pf|df: ts}
+
+    # ---------- ingest ----------
+    def feed(self, events):
+        """Raw dicts: validate (if enabled), parse once, accumulate."""
+        self.add(self._parsed(events))
+
+    def _parsed(self, events):
+        validate, counts = self.validate, self.counts
+        for e in events:
+            if not isinstance(e, dict):
+                continue
+            if validate:
+                if self.first_error is None:
+                    msg = violation(e)
+                    if msg:
+                        self.first_error = f"[{self.n}] {msg}"
+                for k, bad in zip(SHAPE_KEYS, shape_flags(e)):
+                    if bad:
+                        counts[k] += 1
+                self.n += 1
+            yield Event.from_dict(e)
+
+    def add(self, recs):
+        """Accumulate Event records; the one loop every stage shares."""
+        lo, hi, ok_set, fail = self.lo, self.hi, self.ok, self.fail
+        require_sha = self.require_sha
+        pr_lo = lo if self.window_prs else None
+        deploys, daily_ok, daily_fail, ok_times = self.deploys, self.daily_ok, self.daily_fail, self.ok_times
+        merges, timeline = self.merges, self.timeline
+        pipelines = timeline is not None and self.pipelines
+        pr_at, head_to_merge, pr_ts = self.pr_at, self.head_to_merge, self.pr_ts
+        hex40 = HEX40.fullmatch
+        for r in recs:
+            t, sha, ts = r.type, r.sha, r.ts
+            if t is DEP:
+                if require_sha and not sha:
+                    continue
+                if ts is None or (lo is not None and ts < lo):
+                    continue
+                if timeline is not None and sha:
+                    timeline[sha]["df"] = ts
+                st = r.status
+                if st in fail:
+                    good = False
+                elif ok_set is None or st in ok_set:
+                    good = True
+                else:
+                    continue
+                deploys.append((ts, sha, st, r.at))
+                if hi is None or ts <= hi:
+                    if good:
+                        daily_ok[int(ts // 86400)] += 1
+                        if sha:
+                            ok_times[sha].append(ts)
+                    else:
+                        daily_fail[int(ts // 86400)] += 1
+            elif t is PR:
+                if require_sha and not sha:
+                    continue
+                if pr_at is not None:
+                    pr_at[r.merge_sha] = ts
+                    head_to_merge[r.head_sha] = r.merge_sha
+                    pr_ts[sha] = ts
+                if ts is None or (pr_lo is not None and ts < pr_lo):
+                    continue
+                if merges is not None:
+                    m = (r.merge_sha or sha or r.head_sha or "").lower()
+                    if m and hex40(m):
+                        merges.append((r.pr, m, ts, r.at))
+                if timeline is not None and sha:
+                    timeline[sha]["merge"] = ts
+            elif pipelines and t in TIMELINE_KEYS and sha:
+                if ts is not None and (pr_lo is None or ts >= pr_lo):
+                    timeline[sha][TIMELINE_KEYS[t]] = ts
+
+    def prune(self, lo):
+        """
+        Move lo forward in place (a sliding window in a long-lived process).
+        Same accumulators as restore(to_state()) into an engine built with
+        the new lo, without rebuilding everything that stays.
+        """
+        if lo is None or (self.lo is not None and lo <= self.lo):
+            return
+        hi, fail = self.hi, self.fail
+        daily_ok, daily_fail, ok_times = self.daily_ok, self.daily_fail, self.ok_times
+        kept, stale_ok = [], set()
+        for d in self.deploys:
+            ts, sha, st, _ = d
+            if ts >= lo:
+                kept.append(d)
+                continue
+            if hi is None or ts <= hi:
+                counter = daily_fail if st in fail else daily_ok
+                if counter is daily_ok and sha:
+                    stale_ok.add(sha)
+                k = int(ts // 86400)
+                counter[k] -= 1
+                if not counter[k]:
+                    del counter[k]
+        self.deploys, self.lo = kept, lo
+        for sha in stale_ok:
+            times = [t for t in ok_times[sha] if t >= lo]
+            if times:
+                ok_times[sha] = times
+            else:
+                del ok_times[sha]
+        pr_lo = lo if self.window_prs else None
+        if self.merges is not None and pr_lo is not None:
+            self.merges = [m for m in self.merges if m[2] >= pr_lo]
+        timeline = self.timeline
+        if timeline is not None and pr_lo is not None:
+            lost_df = set()
+            for sha, keys in list(timeline.items()):
+                for k, t in list(keys.items()):
+                    if t < pr_lo:
+                        del keys[k]
+                        if k == "df":
+                            lost_df.add(sha)
+                if not keys:
+                    del timeline[sha]
+            # the last kept deploy of a SHA (stream order) stands in, as on restore
+            for ts, sha, _, _ in kept:
+                if sha in lost_df:
+                    timeline[sha]["df"] = ts
+
+    # ---------- results ----------
+    def totals(self):
+        """(counted ok deploys, counted failed deploys)."""
+        return sum(self.daily_ok.values()), sum(self.daily_fail.values())
+
+    def histogram(self, count_fail=False):
+        """UTC day -> counted deploys (ok only, or ok+failed); days with only failures map to 0 unless counted."""
+        days = sorted(set(self.daily_ok) | set(self.daily_fail))
+        fail = self.daily_fail if count_fail else {}
+        return {day(d * 86400): self.daily_ok.get(d, 0) + fail.get(d, 0) for d in days}
+
+    def window_deploys(self):
+        """(ts, sha) of counted deploys, in stream order."""
+        hi = self.hi
+        return [(ts, sha) for ts, sha, _, _ in self.deploys if hi is None or ts <= hi]
+
+    def earliest(self):
+        """
+        Smallest ts held by the windowed accumulators (None when empty).
+        Everything older was dropped at ingest, so moving lo forward up to
+        this ts changes no result.
+        """
+        ts = [min(d[0] for d in self.deploys)] if self.deploys else []
+        if self.merges:
+            ts.append(min(m[2] for m in self.merges))
+        for keys in (self.timeline or {}).values():
+            ts.extend(keys.values())
+        return min(ts) if ts else None
+
+    def success_index(self):
+        # deploy keys normalized to lowercase; sorted once, then bisected per PR
+        return DeployIndex({(k or "").lower(): v for k, v in self.ok_times.items()})
+
+    def pair_merges(self, min_lead_seconds=0, allow_fallback=False, max_fallback_hours=168.0,
+                    samples=None):
+        """
+        Windowed merges -> first successful deploy. Returns (lead_seconds, details);
+        lead_seconds is `samples` (e.g. a dora_sketch.KLL) when given. Details
+        echo the source merged_at; deployed_at is the deploy's own timestamp.
+        """
+        index = self.success_index()
+        hi, fail = self.hi, self.fail
+        deployed_at = {}  # counted ok deploy ts -> source string (first seen)
+        for ts, sha, st, at in self.deploys:
+            if sha and st not in fail and (hi is None or ts <= hi):
+                deployed_at.setdefault(ts, at)
+        lead_seconds = [] if samples is None else samples
+        details = []
+        for pr, sha, m, at in self.merges:
+            first, match = pair_first_deploy(index, sha, m, min_lead_seconds,
+                                             allow_fallback, max_fallback_hours)
+            if first is None:
+                continue
+            delta_s = elapsed(m, first)
+            if delta_s <= 0:
+                continue
+            lead_seconds.append(delta_s)
+            details.append({
+                "pr": pr,
+                "sha": sha,
+                "merged_at": at,
+                "deployed_at": iso_echo(deployed_at[first]),
+                "lead_seconds": int(delta_s),
+                "lead_minutes": round(delta_s / 60.0, 2),
+                "lead_hours": round(delta_s / 3600.0, 4),
+                "match": match,
+            })
+        return lead_seconds, details
+
+    def lead_change(self, min_sec, pctl, samples=None):
+        return lead_times_change_from(self.pr_at, self.head_to_merge, self.window_deploys(),
+                                      min_sec, pctl, samples)
+
+    def lead_deployment(self, min_sec, pctl, samples=None):
+        return lead_times_deployment_from(self.pr_ts, self.window_deploys(), min_sec, pctl, samples)
+
+    def components(self, new=list):
+        """
+        Per-SHA stage durations in seconds (merge->pipeline start, runtime, pipeline->deploy).
+        `new` builds each collector (list, or e.g. a sketch factory).
+        """
+        comp = {"merge→pipeline_start": new(), "pipeline_runtime": new(), "pipeline→deploy": new()}
+        for times in (self.timeline or {}).values():
+            for name, a, b in (("merge→pipeline_start", "merge", "ps"),
+                               ("pipeline_runtime", "ps", "pf"),
+                               ("pipeline→deploy", "pf", "df")):
+                x, y = times.get(a), times.get(b)
+                if x is not None and y is not None and y - x >= 0:
+                    comp[name].append(elapsed(x, y))
+        return comp
+
+    # ---------- checkpoint state ----------
+    def to_state(self):
+        st = {"n": self.n, "first_error": self.first_error, "counts": self.counts,
+              "deploys": [[ts, sha, int(s), at] for ts, sha, s, at in self.deploys]}
+        if self.merges is not None:
+            st["merges"] = [list(x) for x in self.merges]
+        if self.pr_at is not None:
+            # keys may be None: keep as pairs
+            st["pr_at"] = list(self.pr_at.items())
+            st["head_to_merge"] = list(self.head_to_merge.items())
+            st["pr_ts"] = list(self.pr_ts.items())
+        if self.timeline is not None:
+            st["timeline"] = self.timeline
+        return st
+
+    def restore(self, st):
+        """
+        Fold in to_state() output (additive: states of consecutive stream
+        segments restore in order). Anything now before lo is pruned.
+        """
+        lo = self.lo
+        if self.first_error is None and st["first_error"] is not None:
+            self.first_error = st["first_error"]
+        self.n += st["n"]
+        for k, v in st["counts"].items():
+            self.counts[k] += v
+        self.add(Event(DEP, Status(s), ts, sha, at=at) for ts, sha, s, at in st["deploys"])
+        pr_lo = lo if self.window_prs else None
+        if self.merges is not None:
+            self.merges.extend((pr, sha, m, at) for pr, sha, m, at in st["merges"]
+                               if pr_lo is None or m >= pr_lo)
+        if self.pr_at is not None:
+            self.pr_at.update(map(tuple, st["pr_at"]))
+            self.head_to_merge.update(map(tuple, st["head_to_merge"]))
+            self.pr_ts.update(map(tuple, st["pr_ts"]))
+        if self.timeline is not None:
+            for sha, ts in st["timeline"].items():
+                for k, t in ts.items():
+                    if pr_lo is None or t >= pr_lo:
+                        self.timeline[sha][k] = t
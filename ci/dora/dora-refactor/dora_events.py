@@ -0,0 +1,172 @@
+# ci/dora/dora-refactor/dora_events.py
+"""
+Compact, pre-parsed events/v1 record shared by compute-dora.py and the
+dora-refactor stages. Each raw dict is converted once at ingest: SHAs are
+interned, type/status become small enums and the event's primary timestamp
+becomes epoch seconds (UTC): an int, or a float when the source carries
+sub-second digits. Stages never re-parse ISO strings; the source string is
+kept as-is (`at`) for outputs that echo it.
+"""
+import math, sys, time
+from datetime import datetime, timezone
+from enum import IntEnum
+
+class EventType(IntEnum):
+    OTHER = 0
+    PR_MERGED = 1
+    DEPLOYMENT = 2
+    PIPELINE_STARTED = 3
+    PIPELINE_FINISHED = 4
+
+class Status(IntEnum):
+    NONE = 0          # missing/empty
+    SUCCESS = 1
+    SUCCEEDED = 2
+    FAILURE = 3
+    FAILED = 4
+    CANCELLED = 5
+    CANCELED = 6
+    TIMED_OUT = 7
+    NEUTRAL = 8
+    ACTION_REQUIRED = 9
+    OTHER = 10
+
+_TYPES = {t.name.lower(): t for t in EventType if t is not EventType.OTHER}
+_STATUSES = {s.name.lower(): s for s in Status if s not in (Status.NONE, Status.OTHER)}
+
+# which field carries the primary timestamp, per type
+_TS_FIELDS = {
+    EventType.PR_MERGED: ("merged_at",),
+    EventType.DEPLOYMENT: ("finished_at", "deploy_at"),
+    EventType.PIPELINE_STARTED: ("started_at",),
+    EventType.PIPELINE_FINISHED: ("finished_at",),
+}
+
+_intern = sys.intern
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def _parse(s):
+    if not isinstance(s, str) or not s:
+        return None
+    s = s.strip()
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    try:
+        d = datetime.fromisoformat(s)
+    except ValueError:
+        return None
+    return d.replace(tzinfo=timezone.utc) if d.tzinfo is None else d
+
+def split_epoch(s):
+    """ISO-8601 -> (whole epoch seconds, microseconds 0..999999), or None."""
+    d = _parse(s)
+    if d is None:
+        return None
+    dt = d - _EPOCH
+    return dt.days * 86400 + dt.seconds, dt.microseconds
+
+def epoch(secs, us):
+    """split_epoch() parts -> epoch seconds: int when whole, else float."""
+    return secs + us / 1e6 if us else secs
+
+def epoch_parts(t):
+    """
+    Inverse of epoch(): epoch seconds -> (whole seconds, microseconds).
+    Exact for any epoch() float before 2106 (half an ulp < 0.5 us).
+    """
+    if t.__class__ is int:
+        return t, 0
+    secs = math.floor(t)
+    return secs, round((t - secs) * 1e6)
+
+def elapsed(start, end):
+    """end - start in seconds, exact like timedelta.total_seconds() (float subtraction drifts ~1e-7 s)."""
+    if start.__class__ is int and end.__class__ is int:
+        return end - start
+    (es, eus), (ss, sus) = epoch_parts(end), epoch_parts(start)
+    return ((es - ss) * 1000000 + eus - sus) / 1e6
+
+def parse_epoch(s):
+    """ISO-8601 (trailing Z allowed; naive = UTC) -> epoch seconds (int unless sub-second), or None."""
+    p = split_epoch(s)
+    return None if p is None else epoch(*p)
+
+def iso_echo(s):
+    """
+    Source ISO string -> datetime.isoformat() with +00:00 written as Z
+    (offset and sub-second digits kept; naive = UTC).
+    """
+    d = _parse(s)
+    return None if d is None else d.isoformat().replace("+00:00", "Z")
+
+def iso_z(t):
+    """Epoch seconds -> 'YYYY-MM-DDTHH:MM:SSZ'."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t))
+
+def day(t):
+    """Epoch seconds -> UTC 'YYYY-MM-DD'."""
+    return time.strftime("%Y-%m-%d", time.gmtime(t))
+
+def _sha(v):
+    return _intern(v) if v and v.__class__ is str else None
+
+def status_of(v):
+    if v is None:
+        return Status.NONE
+    s = str(v).strip().lower()
+    if not s:
+        return Status.NONE
+    return _STATUSES.get(s, Status.OTHER)
+
+class Event:
+    __slots__ = ("type", "status", "ts", "sha", "merge_sha", "head_sha", "pr", "repo", "at")
+
+    def __init__(self, type, status, ts, sha, merge_sha=None, head_sha=None, pr=None, repo=None,
+                 at=None):
+        self.type = type
+        self.status = status
+        self.ts = ts
+        self.sha = sha
+        self.merge_sha = merge_sha
+        self.head_sha = head_sha
+        self.pr = pr
+        self.repo = repo
+        self.at = at  # source string ts was parsed from
+
+    @classmethod
+    def from_dict(cls, e):
+        g = e.get
+        t = _TYPES.get(g("type"), EventType.OTHER)
+        ts = at = None
+        for k in _TS_FIELDS.get(t, ()):
+            v = g(k)
+            if v:
+                ts = parse_epoch(v)
+                at = v if ts is not None else None
+                break
+        st = g("status")
+        status = _STATUSES.get(st) if st.__class__ is str else None
+        if status is None:  # not an exact lowercase name: normalize
+            status = status_of(st)
+        return cls(t, status, ts, _sha(g("sha")), _sha(g("merge_commit_sha")),
+                   _sha(g("head_sha")), g("pr"), _sha(g("repo")), at)
+
+    # flat list form for checkpoints and caches
+    def to_row(self):
+        return [int(self.type), int(self.status), self.ts, self.sha,
+                self.merge_sha, self.head_sha, self.pr, self.repo, self.at]
+
+    @classmethod
+    def from_row(cls, r):
+        t, st, ts, sha, msha, hsha, pr, repo, at = r
+        return cls(EventType(t), Status(st), ts, _sha(sha), _sha(msha), _sha(hsha), pr, _sha(repo), at)
+
+    def __repr__(self):
+        return (f"Event({self.type.name}, {self.status.name}, ts={self.ts}, sha={self.sha}, "
+                f"pr={self.pr})")
+
+def records(events):
+    """Convert an iterable of raw dicts (non-dicts skipped) into Event records."""
+    for e in events:
+        if isinstance(e, dict):
+            yield Event.from_dict(e)
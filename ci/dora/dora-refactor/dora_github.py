@@ -0,0 +1,250 @@
+# ci/dora/dora-refactor/dora_github.py
+"""
+Small GitHub REST client for the collectors: pooled keep-alive
+connections, bounded concurrent pagination and an on-disk conditional-
+request cache.
+
+    gh = Client("https://api.github.com", token, cache_dir="~/.cache/dora-collect")
+    repo = gh.get("repos/o/r").json()
+    pulls = gh.paginate("repos/o/r/pulls", {"state": "closed", "per_page": 100})
+
+Every worker thread keeps one HTTP/1.1 connection to the base URL open
+for its requests. paginate() fetches page 1, reads the `last` page from
+its Link header and requests the rest concurrently (at most `workers` in
+flight); without a `last` link it follows `next` one page at a time.
+
+With a cache_dir, each 200 response's ETag / Last-Modified, Link and
+body are kept per URL (and token). The next request for that URL is
+conditional; GitHub answers an unchanged page with 304, which costs no
+rate limit, and the cached body is used. The base URL is a parameter so
+tests and dry runs can point at a local stand-in server.
+"""
+import hashlib, http.client, json, os, re, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+API = "https://api.github.com"
+ACCEPT = "application/vnd.github+json"
+API_VERSION = "2022-11-28"
+RETRIES = 4
+MAX_WAIT_S = 60.0
+_LINK = re.compile(r'<([^>]+)>;\s*rel="([^"]+)"')
+
+class GitHubError(Exception):
+    """A request that failed for good (non-2xx/304 after retries, or no connection)."""
+    def __init__(self, status, url, message):
+        super().__init__(f"{status} {url}: {message}")
+        self.status, self.url = status, url
+
+class Response:
+    __slots__ = ("status", "headers", "body", "cached")
+
+    def __init__(self, status, headers, body, cached=False):
+        self.status, self.headers, self.body, self.cached = status, headers, body, cached
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    def links(self):
+        """rel -> URL from the Link header."""
+        return {rel: url for url, rel in _LINK.findall(self.headers.get("link", ""))}
+
+class EtagCache:
+    """One JSON file per (URL, token): validators, Link header and body."""
+    __slots__ = ("root", "scope")
+
+    def __init__(self, root, token=None):
+        self.root = os.path.expanduser(root)
+        self.scope = hashlib.sha256((token or "").encode()).hexdigest()[:16]
+
+    def _file(self, url):
+        k = hashlib.sha256(f"{self.scope}\0{url}".encode()).hexdigest()
+        return os.path.join(self.root, k[:2], k + ".json")
+
+    def get(self, url):
+        try:
+            with open(self._file(url), "r", encoding="utf-8") as f:
+                ent = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return ent if ent.get("url") == url else None
+
+    def put(self, url, headers, body):
+        if not (headers.get("etag") or headers.get("last-modified")):
+            return
+        path = self._file(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        ent = {"url": url, "etag": headers.get("etag"), "last_modified": headers.get("last-modified"),
+               "link": headers.get("link", ""), "body": body.decode("utf-8")}
+        tmp = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(ent, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+class Client:
+    """
+    base: API root URL. token: bearer token (None = anonymous). workers:
+    concurrent requests (= pooled connections). cache_dir: EtagCache root,
+    or None. Counters: requests, not_modified, retried.
+    """
+    __slots__ = ("base", "prefix", "token", "cache", "workers", "timeout", "pool",
+                 "_local", "_lock", "requests", "not_modified", "retried")
+
+    def __init__(self, base=API, token=None, *, workers=8, cache_dir=None, timeout=30.0):
+        u = urlsplit(base.rstrip("/"))
+        if u.scheme not in ("http", "https") or not u.netloc:
+            raise ValueError(f"bad API base URL: {base!r}")
+        self.base = u
+        self.prefix = u.path
+        self.token = token
+        self.cache = EtagCache(cache_dir, token) if cache_dir else None
+        self.workers = max(1, int(workers))
+        self.timeout = timeout
+        self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="gh")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.requests = self.not_modified = self.retried = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+    # ---------- transport ----------
+    def _conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            cls = http.client.HTTPSConnection if self.base.scheme == "https" else http.client.HTTPConnection
+            c = self._local.conn = cls(self.base.netloc, timeout=self.timeout)
+        return c
+
+    def _drop_conn(self):
+        c = getattr(self._local, "conn", None)
+        if c is not None:
+            c.close()
+            self._local.conn = None
+
+    def url(self, path, params=None):
+        """Absolute URL for an API path (`repos/o/r/...`) or a Link-header URL."""
+        if path.startswith(("http://", "https://")):
+            return path
+        url = f"{self.base.scheme}://{self.base.netloc}{self.prefix}/{path.lstrip('/')}"
+        if params:
+            url += ("&" if "?" in url else "?") + urlencode(params)
+        return url
+
+    def _send(self, method, url, headers, body):
+        u = urlsplit(url)
+        if (u.scheme, u.netloc) != (self.base.scheme, self.base.netloc):
+            raise GitHubError(0, url, "link points off the API host")
+        target = u.path + (f"?{u.query}" if u.query else "")
+        for attempt in (0, 1):  # a kept-alive connection may have been closed by the server
+            conn = self._conn()
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                r = conn.getresponse()
+                data = r.read()
+                if r.getheader("connection", "").lower() == "close":
+                    self._drop_conn()
+                return r.status, {k.lower(): v for k, v in r.getheaders()}, data
+            except (http.client.HTTPException, OSError) as err:
+                self._drop_conn()
+                if attempt:
+                    raise GitHubError(0, url, str(err))
+
+    def request(self, method, path, params=None, body=None, conditional=True):
+        """conditional=False bypasses the cache (answers that must be live, e.g. rate_limit)."""
+        url = self.url(path, params)
+        headers = {"Accept": ACCEPT, "X-GitHub-Api-Version": API_VERSION, "User-Agent": "dora-collect"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        use_cache = self.cache is not None and method == "GET" and conditional
+        cached = self.cache.get(url) if use_cache else None
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        if body is not None:
+            body = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        for attempt in range(RETRIES + 1):
+            with self._lock:
+                self.requests += 1
+            status, hdrs, data = self._send(method, url, headers, body)
+            if status == 304 and cached:
+                with self._lock:
+                    self.not_modified += 1
+                hdrs["link"] = cached.get("link", "")
+                return Response(200, hdrs, cached["body"].encode("utf-8"), cached=True)
+            if 200 <= status < 300:
+                if use_cache:
+                    self.cache.put(url, hdrs, data)
+                return Response(status, hdrs, data)
+            wait = _retry_after(status, hdrs, attempt)
+            if wait is None or attempt == RETRIES:
+                raise GitHubError(status, url, _message(data))
+            with self._lock:
+                self.retried += 1
+            time.sleep(wait)
+
+    def get(self, path, params=None, conditional=True):
+        return self.request("GET", path, params, conditional=conditional)
+
+    # ---------- pagination ----------
+    def paginate(self, path, params=None):
+        """Every page of a list endpoint, in page order, as decoded JSON."""
+        return self.paginate_many([(path, params)])[0]
+
+    def paginate_many(self, requests):
+        """paginate() for several endpoints at once; one list of pages per (path, params)."""
+        firsts = list(self.pool.map(lambda pp: self.get(*pp), requests))
+        out, rest = [], []
+        for (path, params), first in zip(requests, firsts):
+            pages = [first.json()]
+            out.append(pages)
+            links = first.links()
+            last = _page_of(links.get("last"))
+            if last and last > 1:
+                base = dict(params or {})
+                rest.append((pages, [self.pool.submit(self.get, path, {**base, "page": n})
+                                     for n in range(2, last + 1)]))
+            elif links.get("next"):
+                rest.append((pages, links["next"]))
+        for pages, more in rest:
+            if isinstance(more, str):  # no `last`: walk `next`
+                nxt = more
+                while nxt:
+                    r = self.get(nxt)
+                    pages.append(r.json())
+                    nxt = r.links().get("next")
+            else:
+                pages.extend(f.result().json() for f in more)
+        return out
+
+def _page_of(url):
+    m = re.search(r"[?&]page=(\d+)", url or "")
+    return int(m.group(1)) if m else None
+
+def _message(data):
+    try:
+        return json.loads(data).get("message", "") or data[:200].decode("utf-8", "replace")
+    except (ValueError, AttributeError):
+        return data[:200].decode("utf-8", "replace")
+
+def _retry_after(status, headers, attempt):
+    """Seconds to wait before retrying, or None when the status is final."""
+    if status in (403, 429):
+        if headers.get("retry-after"):
+            return min(MAX_WAIT_S, float(headers["retry-after"]))
+        if headers.get("x-ratelimit-remaining") == "0":
+            reset = float(headers.get("x-ratelimit-reset", "0") or 0)
+            return min(MAX_WAIT_S, max(1.0, reset - time.time()))
+        return None
+    if status >= 500 or status == 0:
+        return min(MAX_WAIT_S, 0.5 * 2 ** attempt)
+    return None
@@ -1,4 +1,8 @@
-import json
+import json, os
+from json import JSONDecoder
+
+CHUNK_SIZE = 1 << 20  # chars per read; peak buffer ~ CHUNK_SIZE + largest single event
+
 def load_ndjson(path):
     out=[]; 
     with open(path,'r',encoding='utf-8') as f:
@@ -6,6 +10,83 @@ def load_ndjson(path):
             ln=ln.strip()
             if ln: out.append(json.loads(ln))
     return out
+
+def iter_events(path, chunk_size=CHUNK_SIZE):
+    """
+    Stream events from NDJSON, concatenated multi-line objects, or a single
+    top-level array. Reads fixed-size chunks; never holds the whole file.
+    A dora_store directory streams all its partitions, and `sqlite:DB`
+    all rows of a dora_sqlite database (windowed readers call their
+    iter_events with lo instead).
+    """
+    if isinstance(path, str) and path.startswith("sqlite:"):
+        from dora_sqlite import iter_events as sqlite_events
+        yield from sqlite_events(path[len("sqlite:"):])
+        return
+    if os.path.isdir(path):
+        from dora_store import iter_events as store_events
+        yield from store_events(path)
+        return
+    dec = JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf, i, eof = "", 0, False
+
+        def fill(buf, i):
+            # drop consumed prefix, append next chunk
+            chunk = f.read(chunk_size)
+            return buf[i:] + chunk, 0, not chunk
+
+        def skip_ws(buf, i, eof):
+            while True:
+                n = len(buf)
+                while i < n and buf[i].isspace():
+                    i += 1
+                if i < n or eof:
+                    return buf, i, eof
+                buf, i, eof = fill(buf, i)
+
+        def decode(buf, i, eof):
+            while True:
+                try:
+                    obj, j = dec.raw_decode(buf, i)
+                    # a bare number may be cut at the chunk edge; make sure it ended
+                    if j < len(buf) or eof or isinstance(obj, (dict, list, str)):
+                        return obj, buf, j, eof
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                buf, i, eof = fill(buf, i)
+
+        top = 0
+        while True:
+            buf, i, eof = skip_ws(buf, i, eof)
+            if i >= len(buf):
+                return
+            if top == 0 and buf[i] == "[":
+                # single top-level array: stream its elements
+                i += 1
+                buf, i, eof = skip_ws(buf, i, eof)
+                if i < len(buf) and buf[i] == "]":
+                    i += 1
+                else:
+                    while True:
+                        obj, buf, i, eof = decode(buf, i, eof)
+                        yield obj
+                        buf, i, eof = skip_ws(buf, i, eof)
+                        if i >= len(buf):
+                            raise json.JSONDecodeError("unterminated array", buf, i)
+                        if buf[i] == "]":
+                            i += 1
+                            break
+                        if buf[i] != ",":
+                            raise json.JSONDecodeError("expected ',' or ']'", buf, i)
+                        i += 1
+                        buf, i, eof = skip_ws(buf, i, eof)
+            else:
+                obj, buf, i, eof = decode(buf, i, eof)
+                yield obj
+            top += 1
+
 def dump_json(obj, fp=None):
     s=json.dumps(obj, indent=2)
     if fp: open(fp,'w',encoding='utf-8').write(s+'\n')
@@ -1,8 +1,9 @@
-from datetime import datetime, timezone
+from bisect import bisect_left, bisect_right
 import statistics as stats
 
+from dora_events import EventType, elapsed
+from dora_sketch import KLL
 
-def to_dt(s): return datetime.strptime(s,"%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
 
 def percentile(xs,p):
     if not xs: return None
@@ -10,19 +11,83 @@ def percentile(xs,p):
     return xs[i]+(xs[j]-xs[i])*(k-i)
 
 
-def lead_times_deployment(events, min_sec, pctl):
-    prs={e["sha"]:e for e in events if e.get("type")=="pr_merged"}
-    hours=[]
-    for d in (e for e in events if e.get("type")=="deployment"):
-        p=prs.get(d["sha"]); 
-        if not p: continue
-        dt=(to_dt(d["finished_at"])-to_dt(p["merged_at"])).total_seconds()
-        if dt>=min_sec: hours.append(dt/3600.0)
+class DeployIndex:
+    """
+    Deploy times sorted once per SHA and globally; pairing queries are bisects.
+    `times_by_sha` maps an already-normalized SHA key -> iterable of epoch seconds.
+    """
+    __slots__ = ("by_sha", "all")
+
+    def __init__(self, times_by_sha):
+        self.by_sha = {k: sorted(set(t for t in v if t)) for k, v in times_by_sha.items()}
+        self.all = sorted(t for lst in self.by_sha.values() for t in lst)
+
+    def first_after(self, sha, t, inclusive=False):
+        """Earliest deploy of `sha` strictly after t (or at/after t when inclusive)."""
+        xs = self.by_sha.get(sha)
+        if not xs: return None
+        i = (bisect_left if inclusive else bisect_right)(xs, t)
+        return xs[i] if i < len(xs) else None
+
+    def first_after_any(self, t, upper=None):
+        """Earliest deploy of any SHA strictly after t and not later than upper."""
+        i = bisect_right(self.all, t)
+        if i >= len(self.all): return None
+        f = self.all[i]
+        return f if upper is None or f <= upper else None
+
+
+def pair_first_deploy(index, sha, merged, min_lead_seconds=0,
+                      allow_fallback=False, max_fallback_hours=168.0):
+    """
+    First deploy more than min_lead_seconds after `merged` (epoch seconds): exact SHA first,
+    then (optionally) any deploy within max_fallback_hours.
+    Returns (deployed_at, "sha"|"fallback") or (None, None).
+    """
+    lower = merged + min_lead_seconds
+    first = index.first_after(sha, lower)
+    if first is not None:
+        return first, "sha"
+    if allow_fallback:
+        upper = merged + max_fallback_hours * 3600.0
+        first = index.first_after_any(max(lower, merged), upper)
+        if first is not None:
+            return first, "fallback"
+    return None, None
+
+
+def _lead_summary(hours, pctl):
+    if isinstance(hours, KLL):
+        return {"samples":hours.n,
+                "median_h": round(hours.quantile(0.5),4) if hours.n else None,
+                f"p{pctl}_h": round(hours.quantile(pctl/100),4) if hours.n else None,
+                "sketch": hours.to_dict()}
     return {"samples":len(hours),
             "median_h": round(stats.median(hours),4) if hours else None,
             f"p{pctl}_h": round(percentile(hours,pctl),4) if hours else None}
 
 
+def lead_times_deployment_from(pr_ts_by_sha, deploys, min_sec, pctl, samples=None):
+    """
+    pr_ts_by_sha: PR sha -> merged_at (last PR wins); deploys: iterable of (ts, sha).
+    samples: optional dora_sketch.KLL to collect hours into instead of a list.
+    """
+    hours=[] if samples is None else samples
+    for ts, sha in deploys:
+        p_ts=pr_ts_by_sha.get(sha)
+        if p_ts is None or ts is None: continue
+        dt=elapsed(p_ts, ts)
+        if dt>=min_sec: hours.append(dt/3600.0)
+    return _lead_summary(hours, pctl)
+
+
+def lead_times_deployment(events, min_sec, pctl):
+    # events: dora_events.Event records (epoch seconds)
+    prs={e.sha:e.ts for e in events if e.type is EventType.PR_MERGED}
+    deps=[(e.ts, e.sha) for e in events if e.type is EventType.DEPLOYMENT]
+    return lead_times_deployment_from(prs, deps, min_sec, pctl)
+
+
  
 def normalize_deploy_sha(events):
     """
@@ -30,49 +95,44 @@ def normalize_deploy_sha(events):
     Uses PR rows present in 'events' (head_sha -> merge_commit_sha).
     """
     head_to_merge = {
-        e["head_sha"]: e["merge_commit_sha"]
-        for e in events if e.get("type") == "pr_merged"
+        e.head_sha: e.merge_sha
+        for e in events if e.type is EventType.PR_MERGED
     }
     norm = {}
-    for d in (e for e in events if e.get("type") == "deployment"):
-        sha = d["sha"]
+    for d in (e for e in events if e.type is EventType.DEPLOYMENT):
+        sha = d.sha
         norm[sha] = head_to_merge.get(sha, sha)
     return norm
 
 
 
-def lead_times_change(events, min_sec=0, pctl=90):
-    norm = normalize_deploy_sha(events)
-
-    # PR merge time by merge SHA
-    pr_at = {
-        e["merge_commit_sha"]: to_dt(e["merged_at"])
-        for e in events if e.get("type") == "pr_merged"
-    }
-
-    earliest_dep_at = {}
-    for d in (e for e in events if e.get("type") == "deployment"):
-        msha = norm.get(d["sha"], d["sha"])  # normalize
-        m_at = pr_at.get(msha)
-        if not m_at:
-            continue
-        f_at = to_dt(d["finished_at"])
-        if f_at < m_at:
+def lead_times_change_from(pr_at, head_to_merge, deploys, min_sec=0, pctl=90, samples=None):
+    """
+    pr_at: merge SHA -> merged_at; head_to_merge: head SHA -> merge SHA;
+    deploys: iterable of (ts, sha). Deploy SHAs are normalized to merge SHAs.
+    samples: optional dora_sketch.KLL to collect hours into instead of a list.
+    """
+    dep_at = {}
+    for ts, sha in deploys:
+        msha = head_to_merge.get(sha, sha)  # normalize
+        if pr_at.get(msha) is not None and ts is not None:
+            dep_at.setdefault(msha, []).append(ts)
+    index = DeployIndex(dep_at)
+
+    hours = [] if samples is None else samples
+    for msha in dep_at:
+        f_at = index.first_after(msha, pr_at[msha], inclusive=True)  # earliest deploy at/after merge
+        if f_at is None:
             continue
-        prev = earliest_dep_at.get(msha)
-        if prev is None or f_at < prev:
-            earliest_dep_at[msha] = f_at
-
-    hours = []
-    for msha, f_at in earliest_dep_at.items():
-        dt = (f_at - pr_at[msha]).total_seconds()
+        dt = elapsed(pr_at[msha], f_at)
         if dt >= min_sec:
             hours.append(dt/3600.0)
 
-    return {
-        "samples": len(hours),
-        "median_h": round(stats.median(hours), 4) if hours else None,
-        f"p{pctl}_h": round(percentile(hours, pctl), 4) if hours else None,
-    }
+    return _lead_summary(hours, pctl)
 
 
+def lead_times_change(events, min_sec=0, pctl=90):
+    pr_at = {e.merge_sha: e.ts for e in events if e.type is EventType.PR_MERGED}
+    head_to_merge = {e.head_sha: e.merge_sha for e in events if e.type is EventType.PR_MERGED}
+    deps = [(e.ts, e.sha) for e in events if e.type is EventType.DEPLOYMENT]
+    return lead_times_change_from(pr_at, head_to_merge, deps, min_sec, pctl)
@@ -0,0 +1,149 @@
+# ci/dora/dora-refactor/dora_prindex.py
+"""
+Local SHA -> PR index for lead-time lookups (lt_from_sha.sh).
+
+lt_from_sha.sh used to find the PR behind a deployed SHA through the
+API: the last 100 closed PRs filtered by merge_commit_sha, then the
+commit's associated PRs. The pr_merged events the collectors already
+wrote answer the same question. This index maps every merge_commit_sha
+and head_sha in them to (repo, pr, merged_at, base_branch).
+
+The index is a SQLite sidecar (OUT.prindex.sqlite; STORE/prindex.sqlite
+for a dora_store) kept current the same way as dora_dedupe's key index.
+lookup() first folds in lines appended since the last call (a source
+that was rewritten is re-read), then does one indexed read. A `sqlite:DB`
+events database is queried directly, with no sidecar.
+
+A lookup prefers what the API fallbacks would find:
+  1. a PR whose merge commit is the SHA and whose base is `base`;
+  2. a PR whose merge commit is the SHA;
+  3. a PR whose head commit is the SHA.
+Ties go to the latest merged_at. The answer is shaped like a REST pull
+({number, merged_at, base: {ref}}) so callers can use it the same way.
+
+CLI:
+    dora_prindex.py refresh EVENTS|STORE                 bring the index up to date
+    dora_prindex.py lookup EVENTS|STORE|sqlite:DB SHA [REPO] [BASE]
+                                                         print the PR as JSON; exit 1 if unknown
+"""
+import json, os, sqlite3, sys
+
+import dora_sqlite
+from dora_dedupe import SourceIndex, sources
+
+SUFFIX = ".prindex.sqlite"
+STORE_INDEX = "prindex.sqlite"
+MERGE, HEAD = 0, 1
+
+def index_path(path):
+    return os.path.join(path, STORE_INDEX) if os.path.isdir(path) else path + SUFFIX
+
+def pr_rows(e):
+    """(sha, kind) pairs a pr_merged event answers for; sha falls back to head when equal to it."""
+    if e.get("type") != "pr_merged":
+        return []
+    g = lambda k: e[k].lower() if isinstance(e.get(k), str) and e[k] else None
+    out = {}
+    for sha, kind in ((g("merge_commit_sha"), MERGE), (g("head_sha"), HEAD), (g("sha"), MERGE)):
+        if sha:
+            out.setdefault(sha, kind)
+    return list(out.items())
+
+class PrIndex(SourceIndex):
+    """SHA -> PR rows of the pr_merged events in one or more source files."""
+    __slots__ = ()
+    TABLES = """
+        CREATE TABLE IF NOT EXISTS prs (
+            sha TEXT NOT NULL, kind INTEGER NOT NULL, repo TEXT NOT NULL,
+            pr, merged_at TEXT, base TEXT, src INTEGER NOT NULL);
+        CREATE INDEX IF NOT EXISTS prs_sha ON prs (sha);
+        CREATE INDEX IF NOT EXISTS prs_src ON prs (src);
+    """
+
+    def _rows(self, e, src):
+        repo, pr = e.get("repo") or "", e.get("pr")
+        if not isinstance(repo, str) or isinstance(pr, (dict, list)):
+            return []
+        m, b = e.get("merged_at"), e.get("base_branch")
+        m, b = (m if isinstance(m, str) else None), (b if isinstance(b, str) else None)
+        return [(sha, kind, repo, pr, m, b, src) for sha, kind in pr_rows(e)]
+
+    def _insert(self, rows):
+        self.db.executemany("INSERT INTO prs (sha, kind, repo, pr, merged_at, base, src)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def _forget(self, src):
+        self.db.execute("DELETE FROM prs WHERE src=?", (src,))
+
+    def refresh(self, path):
+        """Sync every source of `path` (and forget partitions that are gone); returns lines read."""
+        paths = sources(path)
+        have = set(map(os.path.abspath, paths))
+        return sum(self.sync(p) for p in paths + [p for p in self.known() if p not in have])
+
+    def candidates(self, sha, repo=None):
+        return self.db.execute(
+            "SELECT kind, repo, pr, merged_at, base FROM prs WHERE sha=? AND (? IS NULL OR repo IN ('', ?))",
+            (sha.lower(), repo, repo)).fetchall()
+
+def _sql_candidates(db, sha, repo=None):
+    conn = dora_sqlite.connect(db)
+    s = (sha.lower(), sha.upper())
+    try:
+        return conn.execute(
+            "SELECT CASE WHEN merge_commit_sha IN (?, ?) THEN 0 WHEN head_sha IN (?, ?) THEN 1 ELSE 0 END,"
+            " repo, json_extract(raw, '$.pr'), json_extract(raw, '$.merged_at'),"
+            " json_extract(raw, '$.base_branch')"
+            " FROM events WHERE type = ? AND (merge_commit_sha IN (?, ?) OR head_sha IN (?, ?) OR sha IN (?, ?))"
+            " AND (? IS NULL OR repo IS NULL OR repo = ?)",
+            s + s + (dora_sqlite.PR,) + s + s + s + (repo, repo)).fetchall()
+    finally:
+        conn.close()
+
+def best(rows, base=None):
+    """The row the API fallbacks would have found (see the module docstring), or None."""
+    rows = sorted(rows, key=lambda r: r[3] if isinstance(r[3], str) else "", reverse=True)
+    rows.sort(key=lambda r: (r[0], base is not None and r[4] != base))
+    return rows[0] if rows else None
+
+def lookup(path, sha, repo=None, base=None):
+    """PR for a deployed SHA as {number, merged_at, base: {ref}, repo, matched}, or None."""
+    db = dora_sqlite.db_of(path)
+    if db is not None:
+        row = best(_sql_candidates(db, sha, repo), base)
+    else:
+        with PrIndex(index_path(path)) as idx:
+            idx.refresh(path)
+            row = best(idx.candidates(sha, repo), base)
+    if row is None:
+        return None
+    kind, r, pr, merged_at, b = row
+    return {"number": pr, "merged_at": merged_at, "base": {"ref": b}, "repo": r or repo,
+            "matched": "merge_commit_sha" if kind == MERGE else "head_sha"}
+
+def main(argv):
+    if len(argv) < 3 or argv[1] not in ("refresh", "lookup") or (argv[1] == "lookup" and len(argv) < 4):
+        print("usage: dora_prindex.py refresh EVENTS|STORE | lookup EVENTS|STORE|sqlite:DB SHA [REPO] [BASE]",
+              file=sys.stderr)
+        return 64
+    path = argv[2]
+    try:
+        if argv[1] == "refresh":
+            with PrIndex(index_path(path)) as idx:
+                n = idx.refresh(path)
+                shas = idx.db.execute("SELECT count(DISTINCT sha) FROM prs").fetchone()[0]
+            print(f"prindex:{index_path(path)} read={n} shas={shas}", file=sys.stderr)
+            return 0
+        repo = argv[4] if len(argv) > 4 and argv[4] else None
+        base = argv[5] if len(argv) > 5 and argv[5] else None
+        pr = lookup(path, argv[3], repo, base)
+    except (OSError, ValueError, sqlite3.Error) as err:
+        print(f"ERR:prindex:{err}", file=sys.stderr)
+        return 2
+    if pr is None:
+        return 1
+    print(json.dumps(pr, separators=(",", ":")))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,191 @@
+# ci/dora/dora-refactor/dora_profile.py
+"""
+Opt-in per-stage profiling for the DORA front-ends (`--profile` / DORA_PROFILE).
+
+A Profiler records, per named stage: wall and CPU seconds, growth of the
+process's peak RSS, and an item count. Streaming stages that interleave
+(file decode -> record parse -> engine accumulate) are timed by wrapping
+their iterators with iter(); each wrapper also reports its self time (its
+time minus the wrapped inner iterator's).
+
+Disabled runs get NULL: stage() yields a scratch dict and iter() returns
+the iterable itself, so the per-event path is unchanged.
+
+Output is a dora-profile/v1 JSON sidecar, plus optional events/v1-style
+NDJSON rows (type "tool_stage") for the regular event pipeline.
+"""
+import json, os, resource, sys, time
+from contextlib import contextmanager
+
+from dora_events import iso_z
+
+SCHEMA = "dora-profile/v1"
+
+def _peak_rss_kb():
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.started = time.time()
+        self.run_id = f"{tool}-{int(self.started)}-{os.getpid()}"
+        self._cpu0 = time.process_time()
+        self._rss0 = _peak_rss_kb()
+        self.stages = []   # closed records, in start order
+        self._open = []    # stack of open stage records
+        self._seq = 0
+
+    def _record(self, name, **kw):
+        self._seq += 1
+        parent = self._open[-1]["stage"] if self._open else None
+        rec = {"stage": name, "parent": parent, "seq": self._seq, "items": None, **kw}
+        self.stages.append(rec)
+        return rec
+
+    # ---------- explicit stages ----------
+    def start(self, name):
+        rec = self._record(name, started_at=time.time())
+        rec["_t"] = (time.perf_counter(), time.process_time(), _peak_rss_kb())
+        self._open.append(rec)
+        return rec
+
+    def stop(self, rec, items=None):
+        w0, c0, m0 = rec.pop("_t")
+        rec["wall_s"] = time.perf_counter() - w0
+        rec["cpu_s"] = time.process_time() - c0
+        rec["peak_rss_delta_kb"] = _peak_rss_kb() - m0
+        if items is not None:
+            rec["items"] = items
+        self._open.remove(rec)
+
+    @contextmanager
+    def stage(self, name):
+        """with prof.stage("pair") as st: ...; st["items"] = n"""
+        rec = self.start(name)
+        try:
+            yield rec
+        finally:
+            self.stop(rec)
+
+    # ---------- streaming stages ----------
+    def iter(self, name, iterable, inner=None):
+        """
+        Time spent producing each item of `iterable` (wall only; per-item CPU
+        reads would dominate). `inner` names the wrapped timer whose share
+        is subtracted for self time.
+        """
+        rec = self._record(name, started_at=time.time(), wall_s=0.0, items=0, inner=inner)
+        return self._timed(rec, iterable)
+
+    @staticmethod
+    def _timed(rec, iterable):
+        pc = time.perf_counter
+        it = iter(iterable)
+        spent, n = 0.0, 0
+        try:
+            while True:
+                t0 = pc()
+                try:
+                    x = next(it)
+                except StopIteration:
+                    spent += pc() - t0
+                    break
+                spent += pc() - t0
+                n += 1
+                yield x
+        finally:
+            rec["wall_s"] += spent
+            rec["items"] += n
+
+    # ---------- output ----------
+    def report(self):
+        by_name = {r["stage"]: r for r in self.stages}
+        children = {}
+        for r in self.stages:
+            inner = r.get("inner")
+            if inner in by_name:
+                by_name[inner]["parent"] = r["stage"]  # decode nests under parse
+        for r in self.stages:
+            children.setdefault(r["parent"], []).append(r)
+        rows = []
+        for r in self.stages:
+            wall = r.get("wall_s")
+            if wall is None:
+                continue  # never stopped
+            kids = sum(c.get("wall_s") or 0.0 for c in children.get(r["stage"], ()))
+            rows.append({
+                "stage": r["stage"],
+                "parent": r["parent"],
+                "started_at": iso_z(int(r["started_at"])),
+                "wall_s": round(wall, 6),
+                "self_s": round(max(0.0, wall - kids), 6),
+                "cpu_s": round(r["cpu_s"], 6) if "cpu_s" in r else None,
+                "peak_rss_delta_kb": r.get("peak_rss_delta_kb"),
+                "items": r["items"],
+            })
+        return {
+            "schema": SCHEMA,
+            "tool": self.tool,
+            "run_id": self.run_id,
+            "started_at": iso_z(int(self.started)),
+            "wall_s": round(time.time() - self.started, 6),
+            "cpu_s": round(time.process_time() - self._cpu0, 6),
+            "peak_rss_kb": _peak_rss_kb(),
+            "peak_rss_delta_kb": _peak_rss_kb() - self._rss0,
+            "stages": rows,
+        }
+
+    def write(self, path, events_path=None):
+        """dora-profile/v1 JSON to `path`; with events_path, append one tool_stage row per stage."""
+        rep = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rep, f, indent=2)
+        if events_path:
+            with open(events_path, "a", encoding="utf-8") as f:
+                for row in event_rows(rep):
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        return rep
+
+def event_rows(rep):
+    """events/v1-style rows for a report (type tool_stage; ignored by the DORA engines and dora_validate)."""
+    for s in rep["stages"]:
+        start = s["started_at"]
+        yield {
+            "schema": "events/v1",
+            "type": "tool_stage",
+            "tool": rep["tool"],
+            "run_id": rep["run_id"],
+            "stage": s["stage"],
+            "parent": s["parent"],
+            "status": "success",
+            "started_at": start,
+            "duration_ms": round(s["wall_s"] * 1000, 3),
+            "self_ms": round(s["self_s"] * 1000, 3),
+            "cpu_ms": round(s["cpu_s"] * 1000, 3) if s["cpu_s"] is not None else None,
+            "peak_rss_delta_kb": s["peak_rss_delta_kb"],
+            "items": s["items"],
+        }
+
+class _Null:
+    enabled = False
+
+    def start(self, name):
+        return None
+
+    def stop(self, rec, items=None):
+        pass
+
+    @contextmanager
+    def stage(self, name):
+        yield {}
+
+    def iter(self, name, iterable, inner=None):
+        return iterable
+
+NULL = _Null()
+
+def profiler(enabled, tool):
+    return Profiler(tool) if enabled else NULL
@@ -0,0 +1,147 @@
+# ci/dora/dora-refactor/dora_results.py
+"""
+Content-addressed cache of compute-dora.py results (DORA_RESULT_CACHE).
+
+CI runs compute-dora.py several times over the same events file with
+the same settings: in the build job, in the report job and in VOI. A
+hit replays the stored dora.json, leadtime.csv and report text, so the
+run costs one sha256 over the input.
+
+An entry's key covers:
+  - the input bytes (sha256);
+  - Config.result_items(): the --show-env knobs that can change the
+    Result, not the I/O knobs;
+  - the window anchor day (lo // 86400);
+  - the engine version: a digest of the code of the loaded dora-refactor
+    modules and the calling script, so a code change is a miss rather
+    than a stale hit.
+
+The window start `lo` moves by the microsecond, so the key alone is not
+enough. An entry also records the lo it was computed for and
+Engine.earliest(). Any lo' with lo <= lo' <= earliest selects the same
+events, so the same Result. Outside that range the entry is a miss and
+is replaced.
+
+Layout: ROOT/<k[:2]>/<k>/{meta.json, report.txt, dora.json[, leadtime.csv]}.
+Entries are written to a temporary directory and renamed into place. A
+hit touches meta.json. After each put, the least recently used entries
+are removed until there are at most `max_entries` and they use at most
+`max_bytes`.
+"""
+import hashlib, json, os, shutil, sys, time
+
+SCHEMA = "dora-results/v1"
+META = "meta.json"
+REPORT = "report.txt"
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+def input_digest(path, chunk=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for b in iter(lambda: f.read(chunk), b""):
+            h.update(b)
+    return h.hexdigest()
+
+def code_digest(extra=()):
+    """sha256 over the source of every loaded dora-refactor module (+ `extra` files)."""
+    files = {os.path.abspath(m.__file__) for m in list(sys.modules.values())
+             if getattr(m, "__file__", None) and os.path.dirname(os.path.abspath(m.__file__)) == _HERE}
+    h = hashlib.sha256()
+    for p in sorted(files | {os.path.abspath(p) for p in extra}):
+        with open(p, "rb") as f:
+            h.update(os.path.basename(p).encode() + b"\0" + f.read() + b"\0")
+    return h.hexdigest()
+
+def result_key(digest, items, lo, code):
+    doc = {"schema": SCHEMA, "input": digest, "config": [[k, v] for k, v in items],
+           "anchor_day": None if lo is None else int(lo // 86400), "code": code}
+    return hashlib.sha256(json.dumps(doc, sort_keys=True).encode()).hexdigest()
+
+class ResultCache:
+    __slots__ = ("root", "max_bytes", "max_entries")
+
+    def __init__(self, root, max_bytes=256 << 20, max_entries=64):
+        self.root = os.path.expanduser(root)
+        self.max_bytes, self.max_entries = max_bytes, max_entries
+
+    def _dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key, lo):
+        """{"report": str, "files": {name: path}} for a valid entry, else None."""
+        d = self._dir(key)
+        try:
+            with open(os.path.join(d, META), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("schema") != SCHEMA:
+                return None
+            if lo is not None and not (meta["lo"] <= lo and (meta["earliest"] is None or lo <= meta["earliest"])):
+                return None
+            with open(os.path.join(d, REPORT), "r", encoding="utf-8") as f:
+                report = f.read()
+            files = {n: os.path.join(d, n) for n in meta["files"]}
+            if not all(map(os.path.isfile, files.values())):
+                return None
+            os.utime(os.path.join(d, META))
+        except (OSError, ValueError, KeyError):
+            return None
+        return {"report": report, "files": files}
+
+    def put(self, key, lo, earliest, report, files):
+        """Store `report` and copies of `files` ({name: path}); evict past the caps."""
+        d = self._dir(key)
+        tmp = f"{d}.tmp.{os.getpid()}"
+        try:
+            os.makedirs(tmp, exist_ok=True)
+            for name, src in files.items():
+                shutil.copyfile(src, os.path.join(tmp, name))
+            with open(os.path.join(tmp, REPORT), "w", encoding="utf-8") as f:
+                f.write(report)
+            with open(os.path.join(tmp, META), "w", encoding="utf-8") as f:
+                json.dump({"schema": SCHEMA, "lo": lo, "earliest": earliest, "files": sorted(files),
+                           "created": int(time.time())}, f)
+            if os.path.isdir(d):  # replacing an entry whose lo range ran out
+                shutil.rmtree(d, ignore_errors=True)
+            os.rename(tmp, d)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # lost a race, or the cache is unwritable: no entry
+            return False
+        self.evict()
+        return True
+
+    def entries(self):
+        """(last use, bytes, dir) per entry, least recently used first."""
+        out = []
+        try:
+            shards = os.listdir(self.root)
+        except OSError:
+            return out
+        for s in shards:
+            try:
+                names = os.listdir(os.path.join(self.root, s))
+            except OSError:
+                continue
+            for k in names:
+                d = os.path.join(self.root, s, k)
+                if ".tmp." in k:
+                    continue
+                try:
+                    used = os.stat(os.path.join(d, META)).st_mtime
+                    size = sum(e.stat().st_size for e in os.scandir(d))
+                except OSError:
+                    continue
+                out.append((used, size, d))
+        out.sort()
+        return out
+
+    def evict(self):
+        ents = self.entries()
+        total = sum(e[1] for e in ents)
+        removed = 0
+        for used, size, d in ents:
+            if len(ents) - removed <= self.max_entries and total <= self.max_bytes:
+                break
+            shutil.rmtree(d, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
@@ -0,0 +1,196 @@
+# ci/dora/dora-refactor/dora_rollup.py
+"""
+Parallel multi-repository rollup of the compute-dora.py (flat dora/v1) metrics.
+
+Two process-pool stages:
+  1. scan:   each NDJSON file is cut into newline-aligned byte ranges; a
+             worker parses one range and returns one engine state per repo
+             (events' `repo` field, else the file name). Files that are not
+             line-delimited (arrays, multi-line objects) fall back to one
+             whole-file task.
+  2. finish: per repo, the range states are restored in stream order into
+             one engine, paired and summarized.
+The org result merges per-repo histograms, counts and lead-time samples
+(exact lists, or KLL sketches with LEAD_SKETCH). A dora_store directory
+stands for its partitions that reach the window; events without a repo
+field are then named after the store directory. A `sqlite:DB` input is
+one task that loads each repo's engine with dora_sqlite.feed (indexed
+window queries) instead of parsing events.
+"""
+import json, os
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from dora_io import iter_events
+from dora_events import Event
+from dora_engine import flat_engine
+from dora_sketch import KLL
+from dora_assemble import assemble_dora_flat
+import dora_store
+import dora_sqlite
+
+SCHEMA = "dora-rollup/v1"
+MIN_CHUNK = 1 << 20
+
+class NotLineDelimited(ValueError):
+    """A range did not parse line by line; the file needs a whole-file scan."""
+
+def _default_repo(path):
+    root = dora_store.store_of(path)
+    if root is not None:
+        path = root
+    return os.path.basename(path).split(".")[0] or path
+
+def plan(paths, workers):
+    """Newline-aligned (path, start, end) ranges, about 4 per worker overall."""
+    sizes = [os.path.getsize(p) for p in paths]
+    chunk = max(MIN_CHUNK, sum(sizes) // max(1, workers * 4))
+    tasks = []
+    for p, size in zip(paths, sizes):
+        with open(p, "rb") as f:
+            start = 0
+            while start < size:
+                end = min(size, start + chunk)
+                if end < size:
+                    f.seek(end)
+                    f.readline()  # finish the line that straddles the cut
+                    end = f.tell()
+                tasks.append((p, start, end))
+                start = end
+        if not size:
+            tasks.append((p, 0, 0))
+    return tasks
+
+def _states(recs, default, lo):
+    by_repo = defaultdict(list)
+    for r in recs:
+        by_repo[r.repo or default].append(r)
+    out = {}
+    for repo, rs in by_repo.items():
+        eng = flat_engine(lo)
+        eng.add(rs)
+        out[repo] = eng.to_state()
+    return out
+
+def scan_range(path, start, end, lo):
+    """Worker: one byte range of an NDJSON file -> {repo: engine state}."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    def recs():
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                e = json.loads(line)
+            except ValueError:
+                raise NotLineDelimited(path)
+            if not isinstance(e, dict):  # e.g. a whole array on one line
+                raise NotLineDelimited(path)
+            yield Event.from_dict(e)
+    return _states(recs(), _default_repo(path), lo)
+
+def scan_file(path, lo):
+    """Worker: whole file via the streaming loader -> {repo: engine state}."""
+    recs = (Event.from_dict(e) for e in iter_events(path) if isinstance(e, dict))
+    return _states(recs, _default_repo(path), lo)
+
+def scan_sqlite(path, lo):
+    """Worker: one engine per repo straight from a dora_sqlite database."""
+    db = dora_sqlite.db_of(path)
+    default = _default_repo(db)
+    conn = dora_sqlite.connect(db)
+    try:
+        return {repo: dora_sqlite.feed(flat_engine(lo), conn, repo, default).to_state()
+                for repo in dora_sqlite.repos(conn, default)}
+    finally:
+        conn.close()
+
+def finish_repo(states, cfg):
+    """Worker: restore a repo's states in stream order, pair and summarize."""
+    eng = flat_engine(cfg["lo"])
+    for st in states:
+        eng.restore(st)
+    samples = KLL(cfg["sketch_k"]) if cfg["sketch_k"] else []
+    lead, _ = eng.pair_merges(cfg["min_lead_seconds"], allow_fallback=cfg["allow_fallback"],
+                              max_fallback_hours=cfg["max_fallback_hours"], samples=samples)
+    deployments, failed = eng.totals()
+    return {"daily": eng.histogram(), "deployments": deployments, "failed": failed, "lead": lead}
+
+def _summary(part, cfg):
+    return assemble_dora_flat(daily=part["daily"], deployments=part["deployments"],
+                              failed=part["failed"], lead=part["lead"],
+                              window_days=cfg["window_days"], pctl=cfg["pctl"])
+
+def _copy(xs):
+    return KLL.from_dict(xs.to_dict()) if isinstance(xs, KLL) else list(xs)
+
+def _merge_samples(xs, ys):
+    # xs is the org-owned copy: grow it in place
+    if isinstance(xs, KLL):
+        return xs.merge(ys)
+    xs.extend(ys)
+    return xs
+
+def merge_parts(parts):
+    """Org-level part: summed histograms/counts, concatenated samples or merged sketches."""
+    daily = Counter()
+    out = None
+    for part in parts:
+        for d, v in part["daily"].items():
+            daily[d] += v  # zero-valued (failure-only) days stay as keys
+        if out is None:
+            # copies: the per-repo parts are summarized after the org
+            out = {"deployments": 0, "failed": 0, "lead": _copy(part["lead"])}
+        else:
+            out["lead"] = _merge_samples(out["lead"], part["lead"])
+        out["deployments"] += part["deployments"]
+        out["failed"] += part["failed"]
+    if out is None:
+        return None
+    out["daily"] = dict(sorted(daily.items()))
+    return out
+
+def rollup(paths, cfg, workers=None):
+    """
+    cfg: lo, window_days, pctl, min_lead_seconds, allow_fallback,
+    max_fallback_hours, sketch_k (None = exact). Returns the dora-rollup/v1 dict.
+    """
+    workers = workers or os.cpu_count() or 1
+    inputs = list(paths)
+    paths = [f for p in inputs
+             for f in (dora_store.partitions(p, lo=cfg["lo"]) if dora_store.is_store(p) else [p])]
+    tasks = plan([p for p in paths if dora_sqlite.db_of(p) is None], workers)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futs = [(t, ex.submit(scan_range, *t, cfg["lo"])) for t in tasks]
+        futs += [((p, -1, None), ex.submit(scan_sqlite, p, cfg["lo"])) for p in paths if dora_sqlite.db_of(p)]
+        scanned, redo = {}, []
+        for (path, start, _), fut in futs:
+            try:
+                scanned[(path, start)] = fut.result()
+            except NotLineDelimited:
+                if path not in redo:
+                    redo.append(path)
+        for key in [k for k in scanned if k[0] in redo]:
+            del scanned[key]
+        for path, fut in [(p, ex.submit(scan_file, p, cfg["lo"])) for p in redo]:
+            scanned[(path, -1)] = fut.result()
+
+        # stream order: input file order, then byte offset
+        order = {p: i for i, p in enumerate(paths)}
+        by_repo = defaultdict(list)
+        for key in sorted(scanned, key=lambda k: (order[k[0]], k[1])):
+            for repo, st in scanned[key].items():
+                by_repo[repo].append(st)
+        repos = sorted(by_repo)
+        parts = dict(zip(repos, ex.map(finish_repo, (by_repo[r] for r in repos),
+                                       [cfg] * len(repos))))
+
+    org = merge_parts(parts[r] for r in repos)
+    return {
+        "schema": SCHEMA,
+        "window_days": int(cfg["window_days"]) if cfg["window_days"] else None,
+        "inputs": inputs,
+        "org": _summary(org, cfg) if org else None,
+        "repos": {r: _summary(parts[r], cfg) for r in repos},
+    }
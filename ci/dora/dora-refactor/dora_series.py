@@ -0,0 +1,153 @@
+# ci/dora/dora-refactor/dora_series.py
+"""
+Rolling compute-dora.py metrics for every day (or week) in one sweep.
+
+The row for day D equals compute-dora.py run at NOW = D 23:59:59Z over the
+events with ts <= NOW: the window is then exactly the UTC days
+D-WINDOW_DAYS+1 .. D.
+
+One flat engine ingests everything once (no window). Deploys become per-day
+ok/fail counters, so each step moves the window by one day with running
+sums. Each windowed merge is paired once against the all-time success
+index; with no future deploys visible its pair can only be the sha match
+(once that deploy has happened) or, before that, the fallback deploy. So it
+contributes one lead value over at most two day intervals. A Fenwick tree
+over the ranked lead values answers the median/pN for the current window.
+Cost: O(events log events + days).
+"""
+import math
+
+from dora_engine import flat_engine
+from dora_events import day, elapsed
+from dora_pair import pair_first_deploy
+
+SCHEMA = "dora-series/v1"
+FIELDS = ("date", "window_start", "window_days", "deploys_total", "deploy_failures",
+          "change_failure_rate", "days_with_deploys", "deploys_per_window_day",
+          "deploys_per_active_day", "lead_samples", "lead_median_h", "lead_pctl_h", "pctl")
+STEPS = {"day": 1, "week": 7}
+MIN_CFR_ATTEMPTS = 5  # compute-dora.py prints CFR as NA below this
+
+class _Ranks:
+    """Fenwick tree over value ranks: insert/remove and k-th smallest in O(log n)."""
+    __slots__ = ("values", "rank", "tree", "n", "top")
+
+    def __init__(self, values):
+        self.values = sorted(set(values))
+        self.rank = {v: i + 1 for i, v in enumerate(self.values)}
+        self.tree = [0] * (len(self.values) + 1)
+        self.n = 0
+        self.top = 1 << max(0, len(self.values).bit_length() - 1) if self.values else 0
+
+    def add(self, v, d):
+        i, tree = self.rank[v], self.tree
+        self.n += d
+        while i < len(tree):
+            tree[i] += d
+            i += i & -i
+
+    def kth(self, k):
+        """k-th smallest (0-based) of the current multiset."""
+        pos, tree, step = 0, self.tree, self.top
+        while step:
+            nxt = pos + step
+            if nxt < len(tree) and tree[nxt] <= k:
+                pos = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return self.values[pos]
+
+def _median(xs, n):
+    # statistics.median on the hour values
+    h = n // 2
+    if n % 2:
+        return xs(h)
+    return (xs(h - 1) + xs(h)) / 2
+
+def _percentile(xs, n, p):
+    # dora_assemble.percentile on the hour values
+    if n == 1:
+        return xs(0)
+    k = (p / 100) * (n - 1)
+    f, c = math.floor(k), math.ceil(k)
+    if f == c:
+        return xs(f)
+    return xs(f) + (xs(c) - xs(f)) * (k - f)
+
+def _lead_intervals(eng, cfg, last):
+    """(lead_seconds, first_day, last_day) per windowed merge; the value holds on those days."""
+    index = eng.success_index()
+    w = cfg["window_days"]
+    for _, sha, m, _ in eng.merges:
+        if m is None:
+            continue
+        m_day = int(m // 86400)
+        stop = min(last, m_day + w - 1) if w else last
+        sha_at, _ = pair_first_deploy(index, sha, m, cfg["min_lead_seconds"])
+        fb_at = None
+        if cfg["allow_fallback"]:
+            # what pair_first_deploy falls back to while the sha deploy is still ahead
+            lower = m + cfg["min_lead_seconds"]
+            fb_at = index.first_after_any(max(lower, m), m + cfg["max_fallback_hours"] * 3600.0)
+        sha_day = int(sha_at // 86400) if sha_at is not None else None
+        if fb_at is not None and fb_at - m > 0:
+            end = stop if sha_day is None else min(stop, sha_day - 1)
+            fb_day = int(fb_at // 86400)
+            if fb_day <= end:
+                yield elapsed(m, fb_at), fb_day, end
+        if sha_day is not None and sha_at - m > 0 and sha_day <= stop:
+            yield elapsed(m, sha_at), sha_day, stop
+
+def series(records, cfg):
+    """
+    records: Event records (any order). cfg: window_days, pctl, min_lead_seconds,
+    allow_fallback, max_fallback_hours, end_day (epoch day of the last row),
+    span_days, step ("day"|"week"). Yields one row dict per step, oldest first.
+    """
+    eng = flat_engine(None)
+    eng.add(records)
+    w, pctl = cfg["window_days"], cfg["pctl"]
+    last, step = cfg["end_day"], STEPS[cfg["step"]]
+    first = last - cfg["span_days"] + 1
+
+    intervals = [iv for iv in _lead_intervals(eng, cfg, last) if iv[2] >= first]
+    adds, drops = {}, {}
+    for iv in intervals:
+        adds.setdefault(max(iv[1], first), []).append(iv[0])
+        drops.setdefault(iv[2] + 1, []).append(iv[0])
+    ranks = _Ranks(iv[0] for iv in intervals)
+    hours = lambda k: ranks.kth(k) / 3600.0
+
+    daily_ok, daily_fail = eng.daily_ok, eng.daily_fail
+    start = min(list(daily_ok) + list(daily_fail) + [first])
+    ok = failed = active = 0
+    for d in range(start, last + 1):
+        ok += daily_ok.get(d, 0)
+        failed += daily_fail.get(d, 0)
+        active += (d in daily_ok or d in daily_fail)
+        if w and d - w >= start:
+            ok -= daily_ok.get(d - w, 0)
+            failed -= daily_fail.get(d - w, 0)
+            active -= (d - w in daily_ok or d - w in daily_fail)
+        for v in drops.get(d, ()):
+            ranks.add(v, -1)
+        for v in adds.get(d, ()):
+            ranks.add(v, 1)
+        if d < first or (last - d) % step:
+            continue
+        n, attempts = ranks.n, ok + failed
+        yield {
+            "date": day(d * 86400),
+            "window_start": day((d - w + 1) * 86400) if w else None,
+            "window_days": int(w) if w else None,
+            "deploys_total": ok,
+            "deploy_failures": failed,
+            "change_failure_rate": round(failed / attempts, 4) if attempts >= MIN_CFR_ATTEMPTS else None,
+            "days_with_deploys": active,
+            "deploys_per_window_day": round(ok / float(w), 4) if w and w > 0 else None,
+            "deploys_per_active_day": round(ok / max(active, 1), 4),
+            "lead_samples": n,
+            "lead_median_h": round(_median(hours, n), 4) if n else None,
+            "lead_pctl_h": round(_percentile(hours, n, pctl), 4) if n else None,
+            "pctl": pctl,
+        }
@@ -0,0 +1,277 @@
+# ci/dora/dora-refactor/dora_sink.py
+"""
+Batched delivery of NDJSON events to an HTTP sink (EVENT_SINK_URL).
+
+collect-events used to POST every line on its own, one request each.
+A Sink gathers lines into NDJSON bodies of at most `max_events` lines /
+`max_bytes` bytes (optionally gzip'd; Content-Encoding: gzip) and POSTs
+them over one kept-alive connection:
+
+    with Sink(url, spool="events.ndjson.sink-spool", gzip=True) as sink:
+        for ln in lines:
+            sink.add(ln)
+
+max_events=1 keeps the old wire format: one JSON document per POST,
+Content-Type application/json. Otherwise the body is
+application/x-ndjson and X-Event-Count carries the line count.
+
+Failed POSTs (connection errors, 408/429/5xx) are retried with
+exponential backoff, honouring Retry-After; a 413 halves the batch.
+A 400/413/422 is about the content: the batch is halved until the refused
+lines are alone, and each of those is set aside (appended to
+SPOOL.rejected, with a WARN) and counted as taken, so it cannot hold up
+the lines after it. Other 4xx (auth, wrong URL) fail the batch.
+
+With a spool, every line is appended to the spool file before it is
+sent, and SPOOL.acked records how many of its bytes the sink has taken.
+Once a batch fails for good, later lines are only spooled (order is
+kept). Opening a Sink on that spool resends the unacknowledged lines
+first. When everything is acknowledged the spool is truncated. Delivery
+is at-least-once: a batch whose answer was lost is sent again.
+
+CLI:
+    dora_sink.py send URL [FILE|-] [--batch N] [--max-bytes N] [--gzip] [--spool PATH]
+(`send URL --spool PATH < /dev/null` only resends what is spooled)
+"""
+import gzip as gz, http.client, os, sys, time
+from urllib.parse import urlsplit
+
+MAX_EVENTS = 500
+MAX_BYTES = 1 << 20
+RETRIES = 4
+MAX_WAIT_S = 30.0
+NDJSON = "application/x-ndjson"
+REJECTED = frozenset({400, 413, 422})  # the sink refuses these lines, not the request
+
+class Sink:
+    __slots__ = ("url", "max_events", "max_bytes", "gzip", "timeout", "retries", "backoff",
+                 "spool", "_conn", "_buf", "_size", "_fh", "_acked", "blocked", "error",
+                 "posts", "sent", "bytes_out", "retried", "dropped", "rejected")
+
+    def __init__(self, url, *, max_events=MAX_EVENTS, max_bytes=MAX_BYTES, gzip=False, spool=None,
+                 timeout=30.0, retries=RETRIES, backoff=0.5):
+        u = urlsplit(url)
+        if u.scheme not in ("http", "https") or not u.netloc:
+            raise ValueError(f"bad sink URL: {url!r}")
+        self.url = u
+        self.max_events = max(1, int(max_events))
+        self.max_bytes = max(1, int(max_bytes))
+        self.gzip = gzip
+        self.timeout, self.retries, self.backoff = timeout, retries, backoff
+        self.spool = spool
+        self._conn = self._fh = None
+        self._buf, self._size, self._acked = [], 0, 0
+        self.blocked, self.error = False, ""
+        self.posts = self.sent = self.bytes_out = self.retried = self.dropped = self.rejected = 0
+        if spool:
+            self._open_spool()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- spool ----------
+    def _open_spool(self):
+        try:
+            with open(self.spool + ".acked", "r", encoding="utf-8") as f:
+                self._acked = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            self._acked = 0
+        self._fh = open(self.spool, "a+b")
+        size = self._fh.seek(0, os.SEEK_END)
+        if self._acked > size:  # the spool was replaced under us
+            self._acked = 0
+        if size > self._acked:
+            self._fh.seek(self._acked)
+            pending = self._fh.read()
+            keep = pending.rfind(b"\n") + 1  # a line cut short by a crash is dropped
+            if keep < len(pending):
+                self._fh.truncate(self._acked + keep)
+            self._fh.seek(0, os.SEEK_END)
+            lines = pending[:keep].splitlines(keepends=True)
+            for i in range(0, len(lines), self.max_events):
+                self._deliver(lines[i:i + self.max_events])
+                if self.blocked:
+                    break
+
+    def _ack(self, n):
+        self._acked += n
+        if self._acked >= self._fh.seek(0, os.SEEK_END):
+            self._fh.truncate(0)
+            self._acked = 0
+        tmp = f"{self.spool}.acked.tmp.{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"{self._acked}\n")
+        os.replace(tmp, self.spool + ".acked")
+
+    @property
+    def pending(self):
+        """Lines spooled but not yet taken by the sink (0 without a spool)."""
+        if self._fh is None:
+            return 0
+        self._fh.flush()
+        with open(self.spool, "rb") as f:
+            f.seek(self._acked)
+            return f.read().count(b"\n")
+
+    # ---------- batching ----------
+    def add(self, line):
+        b = (line if isinstance(line, bytes) else line.encode("utf-8")).rstrip(b"\n") + b"\n"
+        if self._size and self._size + len(b) > self.max_bytes:
+            self.flush()
+        if self._fh is not None:
+            self._fh.write(b)
+        self._buf.append(b)
+        self._size += len(b)
+        if len(self._buf) >= self.max_events or self._size >= self.max_bytes:
+            self.flush()
+
+    def flush(self):
+        if not self._buf:
+            return
+        lines, self._buf, self._size = self._buf, [], 0
+        self._deliver(lines)
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def _deliver(self, lines):
+        if self._fh is not None:
+            self._fh.flush()
+        if self.blocked:  # keep order: nothing goes out past a failed batch
+            if self._fh is None:
+                self.dropped += len(lines)
+            return
+        if self._post(lines):
+            if self._fh is not None:
+                self._ack(sum(map(len, lines)))
+            return
+        self.blocked = True
+        if self._fh is None:
+            self.dropped += len(lines)
+
+    # ---------- transport ----------
+    def _post(self, lines):
+        body = b"".join(lines)
+        if len(lines) == 1 and self.max_events == 1:
+            body, ctype = body.rstrip(b"\n"), "application/json"
+        else:
+            ctype = NDJSON
+        headers = {"Content-Type": ctype, "User-Agent": "dora-sink", "X-Event-Count": str(len(lines))}
+        if self.gzip:
+            body = gz.compress(body, 6)
+            headers["Content-Encoding"] = "gzip"
+        for attempt in range(self.retries + 1):
+            status, retry_after = self._send(body, headers)
+            if 200 <= status < 300:
+                self.posts += 1
+                self.sent += len(lines)
+                self.bytes_out += len(body)
+                return True
+            if status in REJECTED:
+                if len(lines) > 1:  # narrow it down to the lines the sink refuses
+                    half = len(lines) // 2
+                    return self._post(lines[:half]) and self._post(lines[half:])
+                self._reject(lines[0], status)
+                return True
+            if not (status == 0 or status in (408, 429) or status >= 500) or attempt == self.retries:
+                self.error = f"HTTP {status}" if status else self.error
+                return False
+            self.retried += 1
+            time.sleep(min(MAX_WAIT_S, retry_after if retry_after is not None else self.backoff * 2 ** attempt))
+        return False
+
+    def _reject(self, line, status):
+        """Set aside a line the sink refuses for good; later lines go out as usual."""
+        self.rejected += 1
+        where = ""
+        if self.spool:
+            with open(self.spool + ".rejected", "ab") as f:
+                f.write(line)
+            where = f":kept in {self.spool}.rejected"
+        print(f"WARN:sink_rejected:HTTP {status}{where}", file=sys.stderr)
+
+    def _send(self, body, headers):
+        """(status, Retry-After seconds or None); status 0 = no answer."""
+        target = self.url.path or "/"
+        if self.url.query:
+            target += "?" + self.url.query
+        for attempt in (0, 1):  # the kept-alive connection may have been closed by the server
+            if self._conn is None:
+                cls = http.client.HTTPSConnection if self.url.scheme == "https" else http.client.HTTPConnection
+                self._conn = cls(self.url.netloc, timeout=self.timeout)
+            try:
+                self._conn.request("POST", target, body=body, headers=headers)
+                r = self._conn.getresponse()
+                r.read()
+                if (r.getheader("connection") or "").lower() == "close":
+                    self._conn.close()
+                    self._conn = None
+                try:
+                    after = float(r.getheader("retry-after") or "")
+                except ValueError:
+                    after = None
+                return r.status, after
+            except (http.client.HTTPException, OSError) as err:
+                self._conn.close()
+                self._conn = None
+                self.error = str(err)
+        return 0, None
+
+    def stats(self):
+        return (f"posts={self.posts} events={self.sent} bytes={self.bytes_out} retried={self.retried} "
+                f"pending={self.pending} dropped={self.dropped} rejected={self.rejected}")
+
+def _opt(argv, name, default=None):
+    if name in argv:
+        i = argv.index(name)
+        if i + 1 >= len(argv):
+            raise ValueError(f"{name} needs a value")
+        val = argv[i + 1]
+        del argv[i:i + 2]
+        return val
+    return default
+
+def main(argv):
+    argv = list(argv)
+    try:
+        batch = int(_opt(argv, "--batch", MAX_EVENTS))
+        max_bytes = int(_opt(argv, "--max-bytes", MAX_BYTES))
+        spool = _opt(argv, "--spool") or None
+    except ValueError as err:
+        print(f"ERR:sink:{err}", file=sys.stderr)
+        return 64
+    use_gzip = "--gzip" in argv
+    argv = [a for a in argv if a != "--gzip"]
+    if len(argv) < 3 or argv[1] != "send":
+        print("usage: dora_sink.py send URL [FILE|-] [--batch N] [--max-bytes N] [--gzip] [--spool PATH]",
+              file=sys.stderr)
+        return 64
+    src = argv[3] if len(argv) > 3 else "-"
+    try:
+        with Sink(argv[2], max_events=batch, max_bytes=max_bytes, gzip=use_gzip, spool=spool) as sink:
+            f = sys.stdin.buffer if src == "-" else open(src, "rb")
+            try:
+                for ln in f:
+                    if ln.strip():
+                        sink.add(ln)
+            finally:
+                if f is not sys.stdin.buffer:
+                    f.close()
+            sink.flush()
+            print(f"sink:{sink.stats()}" + (f" error={sink.error}" if sink.blocked else ""), file=sys.stderr)
+            return 1 if sink.blocked else 0
+    except (OSError, ValueError) as err:
+        print(f"ERR:sink:{err}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,145 @@
+# ci/dora/dora-refactor/dora_sketch.py
+"""
+Mergeable streaming quantile sketch (KLL) for lead-time percentiles.
+
+Memory is O(k log(n/k)) instead of O(n); the rank error is about 1.7/k
+(KLL with c=2/3), so eps=0.01 -> k=170. Until the first compaction every
+sample is held at weight 1 and quantile() equals the exact interpolated
+percentile. Sketches serialize to plain JSON (to_dict) so per-repo, per-day
+or per-shard results can be merged later without raw samples.
+
+Compaction uses an alternating coin rather than a random one, so the same
+input always produces the same sketch (stable CI diffs).
+"""
+import math
+
+C = 2.0 / 3.0
+
+def k_for_eps(eps):
+    """Compactor size giving roughly `eps` normalized rank error."""
+    return max(8, math.ceil(1.7 / eps))
+
+class KLL:
+    __slots__ = ("k", "levels", "n", "min", "max", "_size", "_cap", "_coin")
+
+    def __init__(self, k=200):
+        self.k = int(k)
+        self.levels = [[]]    # level h holds items of weight 2**h
+        self.n = 0            # total weight (samples seen)
+        self.min = self.max = None
+        self._size = 0        # items held
+        self._coin = 0
+        self._cap = self._capacity_total()
+
+    def _capacity(self, h):
+        depth = len(self.levels) - h - 1
+        return int(math.ceil(C ** depth * self.k)) + 1
+
+    def _capacity_total(self):
+        return sum(self._capacity(h) for h in range(len(self.levels)))
+
+    def update(self, x):
+        self.levels[0].append(x)
+        self.n += 1
+        self._size += 1
+        if self.min is None or x < self.min: self.min = x
+        if self.max is None or x > self.max: self.max = x
+        if self._size >= self._cap:
+            self._compress()
+
+    append = update  # drop-in where a plain sample list was used
+
+    def __len__(self):
+        return self.n
+
+    def _compress(self):
+        while self._size >= self._cap:
+            for h, items in enumerate(self.levels):
+                if len(items) >= self._capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append([])
+                        self._cap = self._capacity_total()
+                    items.sort()
+                    # odd count: the largest item stays behind
+                    keep = items.pop() if len(items) % 2 else None
+                    self._coin ^= 1
+                    self.levels[h + 1].extend(items[self._coin::2])
+                    self._size -= len(items) - len(items) // 2
+                    items[:] = [] if keep is None else [keep]
+                    break
+
+    def merge(self, other):
+        """Fold `other` into this sketch (in place); returns self."""
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, items in enumerate(other.levels):
+            self.levels[h].extend(items)
+        self.n += other.n
+        self._size += sum(len(x) for x in other.levels)
+        for v in (other.min, other.max):
+            if v is None:
+                continue
+            if self.min is None or v < self.min: self.min = v
+            if self.max is None or v > self.max: self.max = v
+        self._cap = self._capacity_total()
+        self._compress()
+        return self
+
+    def _weighted(self):
+        return sorted((x, 1 << h) for h, items in enumerate(self.levels) for x in items)
+
+    def quantile(self, q):
+        """Interpolated quantile, q in [0,1] (same rule as the exact percentile())."""
+        if not self.n:
+            return None
+        if q <= 0: return self.min
+        if q >= 1: return self.max
+        pts = self._weighted()
+        k = q * (self.n - 1)
+        f, c = math.floor(k), math.ceil(k)
+        lo = hi = None
+        acc = 0
+        for x, w in pts:
+            acc += w  # ranks [acc-w, acc) map to x
+            if lo is None and f < acc:
+                lo = x
+            if c < acc:
+                hi = x
+                break
+        if hi is None:
+            hi = pts[-1][0]
+        return lo if f == c else lo + (hi - lo) * (k - f)
+
+    def scaled(self, div):
+        """Copy with every item divided by `div` (unit conversion)."""
+        out = KLL(self.k)
+        out.levels = [[x / div for x in items] for items in self.levels]
+        out.n, out._size, out._cap, out._coin = self.n, self._size, self._cap, self._coin
+        out.min = None if self.min is None else self.min / div
+        out.max = None if self.max is None else self.max / div
+        return out
+
+    def to_dict(self):
+        return {"kind": "kll", "k": self.k, "n": self.n, "min": self.min, "max": self.max,
+                "levels": [list(items) for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, d):
+        if d.get("kind") != "kll":
+            raise ValueError(f"not a kll sketch: {d.get('kind')!r}")
+        s = cls(d["k"])
+        s.levels = [list(items) for items in d["levels"]] or [[]]
+        s.n, s.min, s.max = d["n"], d["min"], d["max"]
+        s._size = sum(len(x) for x in s.levels)
+        s._cap = s._capacity_total()
+        return s
+
+def merge_all(dicts, k=None):
+    """Merge serialized sketches; k defaults to the smallest k seen (the loosest bound)."""
+    dicts = [d for d in dicts if d]
+    if not dicts:
+        return None
+    out = KLL(k or min(d["k"] for d in dicts))
+    for d in dicts:
+        out.merge(KLL.from_dict(d))
+    return out
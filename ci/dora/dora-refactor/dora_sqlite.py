@@ -0,0 +1,274 @@
+# ci/dora/dora-refactor/dora_sqlite.py
+"""
+events/v1 in a local SQLite database, addressed as `sqlite:PATH` wherever
+the DORA tools take an events file.
+
+Each event is one row: its dora_events.Event fields as columns (type and
+status as EventType/Status codes; ts = the primary timestamp in epoch
+seconds, REAL when it has sub-second digits), the original JSON in `raw`,
+and id = stream order. Indexes on
+(type, ts), sha, merge_commit_sha and head_sha serve window and SHA
+lookups; the `types` and `statuses` tables name the codes for ad-hoc
+queries:
+
+    SELECT s.name, count(*) FROM events e JOIN statuses s ON s.code = e.status
+    WHERE e.type = 2 AND e.ts >= strftime('%s', 'now', '-14 days') GROUP BY 1;
+
+feed() loads a flat engine (dora_engine.flat_engine) from SQL instead of
+parsing dicts: the window is an index range, the daily histogram and
+failure counts are GROUP BYs, and merge SHAs are normalized (merge ->
+sha -> head, lowercased, 40 hex) in the query. Only windowed deploys and
+merges reach Python, and the accumulators equal feeding the same events.
+Readers that need every event (main.py's all-time PR maps) stream `raw`
+through dora_io.iter_events.
+
+`import DB FILE` is incremental: like dora_dedupe.KeyIndex, the database
+remembers how far into FILE it got (offset, inode, anchor digest) and
+re-imports FILE's rows from scratch if it was truncated or rewritten.
+
+CLI:
+    dora_sqlite.py import DB [FILE|-]    add events (FILE: only what is new since the last import)
+    dora_sqlite.py cat DB [SINCE]        print events (SINCE: YYYY-MM-DD, UTC)
+    dora_sqlite.py query DB SQL          print result rows as JSON arrays
+"""
+import calendar, json, os, sqlite3, sys, time
+
+import dora_checkpoint as ckpt
+from dora_events import Event, EventType, Status
+
+PREFIX = "sqlite:"
+SCHEMA = "dora-sqlite/v1"
+DEP, PR = int(EventType.DEPLOYMENT), int(EventType.PR_MERGED)
+BATCH = 5000
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL,
+    offset INTEGER NOT NULL, dev INTEGER, ino INTEGER, anchor TEXT);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    src INTEGER,
+    type INTEGER NOT NULL,
+    status INTEGER NOT NULL,
+    ts INTEGER,
+    sha TEXT,
+    merge_commit_sha TEXT,
+    head_sha TEXT,
+    pr,
+    repo TEXT,
+    raw TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS events_type_ts ON events (type, ts);
+CREATE INDEX IF NOT EXISTS events_sha ON events (sha);
+CREATE INDEX IF NOT EXISTS events_merge_commit_sha ON events (merge_commit_sha);
+CREATE INDEX IF NOT EXISTS events_head_sha ON events (head_sha);
+CREATE INDEX IF NOT EXISTS events_src ON events (src);
+CREATE TABLE IF NOT EXISTS types (code INTEGER PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS statuses (code INTEGER PRIMARY KEY, name TEXT NOT NULL);
+"""
+
+def db_of(path):
+    """The database file of a `sqlite:PATH` input, else None."""
+    return path[len(PREFIX):] if isinstance(path, str) and path.startswith(PREFIX) else None
+
+def connect(db, create=False):
+    if not create and not os.path.isfile(db):
+        raise FileNotFoundError(f"no such database: {db}")
+    conn = sqlite3.connect(db, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_DDL)
+    conn.execute("INSERT OR IGNORE INTO meta VALUES ('schema', ?)", (SCHEMA,))
+    got = conn.execute("SELECT value FROM meta WHERE key='schema'").fetchone()[0]
+    if got != SCHEMA:
+        conn.close()
+        raise ValueError(f"{db}: not a {SCHEMA} database")
+    conn.executemany("INSERT OR IGNORE INTO types VALUES (?, ?)", [(int(t), t.name.lower()) for t in EventType])
+    conn.executemany("INSERT OR IGNORE INTO statuses VALUES (?, ?)", [(int(s), s.name.lower()) for s in Status])
+    return conn
+
+# ---------- write ----------
+def _row(src, e):
+    r = Event.from_dict(e)
+    pr = r.pr
+    if not (pr.__class__ is str or (pr.__class__ is int and abs(pr) < 1 << 62)):
+        pr = None  # bool, float, null, ...: read back from raw
+    return (src, int(r.type), int(r.status), r.ts, r.sha, r.merge_sha, r.head_sha, pr, r.repo,
+            json.dumps(e, ensure_ascii=False, separators=(",", ":")))
+
+def _insert(conn, rows):
+    conn.executemany("INSERT INTO events (src, type, status, ts, sha, merge_commit_sha, head_sha,"
+                     " pr, repo, raw) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+def append(conn, events, src=None):
+    """Insert dicts (others skipped) in order; returns rows added."""
+    n, rows = 0, []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for e in events:
+            if isinstance(e, dict):
+                rows.append(_row(src, e))
+                if len(rows) >= BATCH:
+                    _insert(conn, rows)
+                    n, rows = n + len(rows), []
+        _insert(conn, rows)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return n + len(rows)
+
+def import_file(conn, path):
+    """
+    Bring FILE's rows up to date: append complete lines added since the
+    last import, or re-import all of it if it was rewritten. JSON arrays
+    and multi-line files are re-imported whole when they change.
+    Returns rows added.
+    """
+    from dora_io import iter_events
+    rel = os.path.abspath(path)
+    st = os.stat(path)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute("SELECT id, offset, dev, ino, anchor FROM sources WHERE path=?", (rel,)).fetchone()
+        if row is None:
+            src = conn.execute("INSERT INTO sources (path, offset) VALUES (?, 0)", (rel,)).lastrowid
+            offset = 0
+        else:
+            src, offset, dev, ino, anchor = row
+            if (dev, ino) != (st.st_dev, st.st_ino) or st.st_size < offset or (
+                    offset and ckpt.fingerprint(path, offset)["anchor"] != anchor):
+                conn.execute("DELETE FROM events WHERE src=?", (src,))
+                offset = 0
+        rows = []
+        try:
+            for e, end in ckpt.read_tail(path, offset):
+                if end is None:
+                    break  # partial last line: next import
+                if isinstance(e, dict):
+                    rows.append(_row(src, e))
+                offset = end
+        except ckpt.TailError:
+            conn.execute("DELETE FROM events WHERE src=?", (src,))
+            rows = [_row(src, e) for e in iter_events(path) if isinstance(e, dict)]
+            offset = st.st_size
+        _insert(conn, rows)
+        conn.execute("UPDATE sources SET offset=?, dev=?, ino=?, anchor=? WHERE id=?",
+                     (offset, st.st_dev, st.st_ino, ckpt.fingerprint(path, offset)["anchor"], src))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return len(rows)
+
+# ---------- read ----------
+def iter_events(db, lo=None, hi=None):
+    """Raw dicts in stream order; lo/hi (epoch seconds) bound ts and drop undated rows."""
+    conn = connect(db)
+    try:
+        q, args = "SELECT raw FROM events", ()
+        if lo is not None or hi is not None:
+            q += " WHERE ts >= ? AND ts <= ?"
+            args = (-(1 << 62) if lo is None else lo, (1 << 62) if hi is None else hi)
+        for (raw,) in conn.execute(q + " ORDER BY id", args):
+            yield json.loads(raw)
+    finally:
+        conn.close()
+
+def repos(conn, default):
+    """Distinct `repo or default` names, as dora_rollup groups them."""
+    return [r for (r,) in conn.execute("SELECT DISTINCT coalesce(repo, ?) FROM events", (default,))]
+
+# a deploy's source timestamp string: the first non-empty of finished_at, deploy_at
+_AT_DEP = ("coalesce(nullif(json_extract(raw, '$.finished_at'), ''), "
+           "json_extract(raw, '$.deploy_at'))")
+
+def _codes(statuses):
+    return ",".join(str(int(s)) for s in statuses) or "NULL"
+
+def _where(lo, require_sha, repo, default):
+    where, args = ["ts IS NOT NULL"], []
+    if lo is not None:
+        where.append("ts >= ?")
+        args.append(lo)
+    if require_sha:
+        where.append("sha IS NOT NULL")
+    if repo is not None:
+        where.append("coalesce(repo, ?) = ?")
+        args += [default, repo]
+    return " AND ".join(where), args
+
+def feed(engine, conn, repo=None, default=None):
+    """
+    Load `engine` (flat: no pr_index, validation or timeline) from the
+    database, as engine.feed() of its events would; `repo` restricts to
+    events whose `repo or default` is that name.
+    """
+    if engine.pr_at is not None or engine.validate or engine.timeline is not None:
+        raise ValueError("dora_sqlite.feed: only flat engines (stream raw rows for the others)")
+    cond, args = _where(engine.lo, engine.require_sha, repo, default)
+    pr_cond, pr_args = _where(engine.lo if engine.window_prs else None, engine.require_sha, repo, default)
+    hi, fail = engine.hi, engine.fail
+    in_hi = "" if hi is None else f" AND ts <= {int(hi)}"
+    known = "" if engine.ok is None else f" AND status IN ({_codes(engine.ok | fail)})"
+    q = conn.execute
+
+    # windowed deploys, stream order; the counted ones also by day and status class
+    ok_times = engine.ok_times
+    for ts, sha, st, at in q(f"SELECT ts, sha, status, {_AT_DEP} FROM events "
+                             f"WHERE type={DEP} AND {cond}{known} ORDER BY id", args):
+        st = Status(st)
+        engine.deploys.append((ts, sha, st, at))
+        if sha and st not in fail and (hi is None or ts <= hi):
+            ok_times[sha].append(ts)
+    secs = "(CAST(ts AS INTEGER) - (ts < CAST(ts AS INTEGER)))"  # floor(ts)
+    day = f"CASE WHEN ts >= 0 THEN {secs} / 86400 ELSE ({secs} - 86399) / 86400 END"
+    for d, failed, n in q(f"SELECT {day}, status IN ({_codes(fail)}), count(*) FROM events "
+                          f"WHERE type={DEP} AND {cond}{known}{in_hi} GROUP BY 1, 2", args):
+        (engine.daily_fail if failed else engine.daily_ok)[d] += n
+
+    if engine.merges is not None:
+        norm = "lower(coalesce(merge_commit_sha, sha, head_sha))"
+        for pr, m, ts, at, raw in q(f"SELECT pr, {norm}, ts, json_extract(raw, '$.merged_at'), "
+                                    f"CASE WHEN pr IS NULL THEN raw END FROM events "
+                                    f"WHERE type={PR} AND {pr_cond} AND length({norm}) = 40 "
+                                    f"AND {norm} NOT GLOB '*[^0-9a-f]*' ORDER BY id", pr_args):
+            engine.merges.append((json.loads(raw).get("pr") if raw is not None else pr, m, ts, at))
+    return engine
+
+def main(argv):
+    if len(argv) < 3 or argv[1] not in ("import", "cat", "query") or (argv[1] == "query" and len(argv) < 4):
+        print("usage: dora_sqlite.py import DB [FILE|-] | cat DB [SINCE] | query DB SQL", file=sys.stderr)
+        return 64
+    cmd, db = argv[1], argv[2]
+    try:
+        if cmd == "import":
+            src = argv[3] if len(argv) > 3 else "-"
+            conn = connect(db, create=True)
+            try:
+                if src == "-":
+                    n = append(conn, (json.loads(ln) for ln in sys.stdin if ln.strip()))
+                else:
+                    n = import_file(conn, src)
+                total = conn.execute("SELECT count(*) FROM events").fetchone()[0]
+            finally:
+                conn.close()
+            print(f"sqlite:{db} added={n} events={total}", file=sys.stderr)
+        elif cmd == "cat":
+            lo = calendar.timegm(time.strptime(argv[3], "%Y-%m-%d")) if len(argv) > 3 else None
+            for e in iter_events(db, lo=lo):
+                sys.stdout.write(json.dumps(e, ensure_ascii=False) + "\n")
+        else:
+            conn = connect(db)
+            try:
+                for row in conn.execute(argv[3]):
+                    sys.stdout.write(json.dumps(row, ensure_ascii=False) + "\n")
+            finally:
+                conn.close()
+    except (OSError, ValueError, sqlite3.Error) as err:
+        print(f"ERR:sqlite:{err}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,234 @@
+# ci/dora/dora-refactor/dora_store.py
+"""
+Date-partitioned events store: one NDJSON file per UTC day (or month)
+under a directory, plus manifest.json with each partition's event count
+and min/max timestamp.
+
+    STORE/manifest.json          schema dora-store/v1
+    STORE/2025/2025-10-18.ndjson granularity "day"  (month: 2025/2025-10.ndjson)
+    STORE/undated.ndjson         events without a parseable timestamp
+
+An event lands in the partition of its dora_events timestamp (merged_at,
+finished_at, ...). Readers ask for a window and open only partitions whose
+max_ts reaches it, so a 14-day query over years of history touches a few
+files. compute-dora.py, dora-refactor/main.py, dora-series.py and
+dora-rollup.py accept a store directory wherever they take an events file.
+
+Appends take an exclusive flock on STORE/.lock and de-duplicate with
+collect-events.sh's keys (pr|<merge sha>, dep|<sha>|<finished_at>) scoped
+by repo; PRs also match on their number, as event-append.sh does. Keys
+live in STORE/dedupe.sqlite (dora_dedupe.KeyIndex), so a check is one
+lookup and an upsert rewrites only the partitions that hold its sha.
+
+CLI (event-append.sh / collect-events.sh call these when EVENTS_STORE is set):
+    dora_store.py append STORE [FILE|-]    add NDJSON events, skipping duplicates
+    dora_store.py upsert STORE [FILE|-]    replace deployments with the same sha, then add
+    dora_store.py cat STORE [SINCE]        print events (SINCE: YYYY-MM-DD, UTC)
+"""
+import calendar, fcntl, json, os, sys, time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from dora_events import Event
+from dora_dedupe import KeyIndex, dedupe_keys, drop_deployments, index_path
+
+SCHEMA = "dora-store/v1"
+MANIFEST = "manifest.json"
+UNDATED = "undated"
+GRANULARITIES = {"day": "%Y-%m-%d", "month": "%Y-%m"}
+
+def is_store(path):
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+def store_of(path):
+    """Store root that partition file `path` belongs to, else None."""
+    d = os.path.dirname(os.path.abspath(path))
+    for root in (d, os.path.dirname(d)):
+        if is_store(root):
+            return root
+    return None
+
+def partition_key(ts, granularity):
+    return UNDATED if ts is None else time.strftime(GRANULARITIES[granularity], time.gmtime(ts))
+
+def partition_file(key):
+    return f"{UNDATED}.ndjson" if key == UNDATED else f"{key[:4]}/{key}.ndjson"
+
+# ---------- manifest ----------
+def load_manifest(root, granularity="day"):
+    """Current manifest; an empty one (not yet written) for a new store."""
+    try:
+        with open(os.path.join(root, MANIFEST), "r", encoding="utf-8") as f:
+            man = json.load(f)
+    except FileNotFoundError:
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"granularity must be one of {sorted(GRANULARITIES)}")
+        return {"schema": SCHEMA, "granularity": granularity, "partitions": {}}
+    if man.get("schema") != SCHEMA:
+        raise ValueError(f"{root}: not a {SCHEMA} store")
+    return man
+
+def _save_manifest(root, man):
+    man["partitions"] = dict(sorted(man["partitions"].items()))
+    tmp = os.path.join(root, f"{MANIFEST}.tmp.{os.getpid()}")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(man, f, indent=2)
+    os.replace(tmp, os.path.join(root, MANIFEST))
+
+@contextmanager
+def _locked(root):
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, ".lock"), "a") as lk:
+        fcntl.flock(lk, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lk, fcntl.LOCK_UN)
+
+# ---------- read ----------
+def partitions(root, lo=None, hi=None):
+    """
+    Partition files that can hold events in [lo, hi] (epoch seconds; None =
+    open), oldest first. Undated events come last and only for open windows:
+    every windowed engine drops them.
+    """
+    man = load_manifest(root)
+    out = []
+    for key, p in man["partitions"].items():
+        if key == UNDATED or p["max_ts"] is None:
+            continue  # undated, or emptied by upsert
+        if (lo is None or p["max_ts"] >= lo) and (hi is None or p["min_ts"] <= hi):
+            out.append(os.path.join(root, p["file"]))
+    if lo is None and hi is None and UNDATED in man["partitions"]:
+        out.append(os.path.join(root, man["partitions"][UNDATED]["file"]))
+    return out
+
+def _lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for ln in f:
+            ln = ln.strip()
+            if ln:
+                yield json.loads(ln)
+
+def iter_events(root, lo=None, hi=None):
+    """Events of the partitions overlapping [lo, hi]; append order within a partition."""
+    for path in partitions(root, lo, hi):
+        yield from _lines(path)
+
+# ---------- write ----------
+def _touch(entry, ts):
+    entry["events"] += 1
+    if ts is not None:
+        entry["min_ts"] = ts if entry["min_ts"] is None else min(entry["min_ts"], ts)
+        entry["max_ts"] = ts if entry["max_ts"] is None else max(entry["max_ts"], ts)
+
+def _add(root, man, idx, events, dedupe):
+    groups = defaultdict(list)
+    for e in events:
+        if isinstance(e, dict):
+            ts = Event.from_dict(e).ts
+            groups[partition_key(ts, man["granularity"])].append((ts, e))
+    added = skipped = 0
+    for key, rows in groups.items():
+        entry = man["partitions"].setdefault(key, {
+            "file": partition_file(key), "events": 0, "bytes": 0, "min_ts": None, "max_ts": None})
+        path = os.path.join(root, entry["file"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        idx.sync(path)  # catch up with anything written without the index
+        batch = set()
+        with open(path, "a", encoding="utf-8") as f:
+            for ts, e in rows:
+                if dedupe:
+                    keys = dedupe_keys(e)
+                    if idx.seen(keys) or any(k in batch for k in keys):
+                        skipped += 1
+                        continue
+                    batch.update(keys)
+                f.write(json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n")
+                _touch(entry, ts)
+                added += 1
+        idx.sync(path)
+        entry["bytes"] = os.path.getsize(path)
+    return added, skipped
+
+def append(root, events, granularity="day", dedupe=True):
+    """Route events into their partitions; returns (added, skipped as duplicates)."""
+    with _locked(root):
+        man = load_manifest(root, granularity)
+        with KeyIndex(index_path(root)) as idx:
+            added, skipped = _add(root, man, idx, events, dedupe)
+        _save_manifest(root, man)
+    return added, skipped
+
+def upsert(root, events, granularity="day"):
+    """
+    event-append.sh's deployment upsert: drop stored deployments with the
+    same sha (any date, env ignored), then add. Returns (added, removed).
+    """
+    events = [e for e in events if isinstance(e, dict)]
+    shas = {e.get("sha") for e in events if e.get("type") == "deployment" and e.get("sha")}
+    removed = 0
+    with _locked(root):
+        man = load_manifest(root, granularity)
+        by_file = {os.path.abspath(os.path.join(root, p["file"])): k
+                   for k, p in man["partitions"].items()}
+        with KeyIndex(index_path(root)) as idx:
+            for path in by_file:
+                idx.sync(path)
+            hit = {p for s in shas for p in idx.sources_with(f"depsha|{s}")}
+            for path in sorted(hit):
+                key = by_file.get(path)
+                if key is None:
+                    continue  # partition no longer in the manifest
+                entry = man["partitions"][key]
+                dropped, done = drop_deployments(path, shas)
+                idx.rewritten(path, dropped, done)
+                removed += len(dropped)
+                fresh = {"file": entry["file"], "events": 0, "bytes": os.path.getsize(path),
+                         "min_ts": None, "max_ts": None}
+                for e in _lines(path):
+                    _touch(fresh, Event.from_dict(e).ts)
+                man["partitions"][key] = fresh
+            added, _ = _add(root, man, idx, events, dedupe=False)
+        _save_manifest(root, man)
+    return added, removed
+
+def _read_input(src):
+    f = sys.stdin if src == "-" else open(src, "r", encoding="utf-8")
+    try:
+        for ln in f:
+            ln = ln.strip()
+            if ln:
+                yield json.loads(ln)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def main(argv):
+    if len(argv) < 3 or argv[1] not in ("append", "upsert", "cat"):
+        print("usage: dora_store.py {append|upsert} STORE [FILE|-] | cat STORE [SINCE]", file=sys.stderr)
+        return 64
+    cmd, root = argv[1], argv[2]
+    granularity = os.environ.get("DORA_STORE_GRANULARITY", "day").lower()
+    try:
+        if cmd == "cat":
+            lo = None
+            if len(argv) > 3:
+                lo = calendar.timegm(time.strptime(argv[3], "%Y-%m-%d"))
+            for e in iter_events(root, lo=lo):
+                sys.stdout.write(json.dumps(e, ensure_ascii=False) + "\n")
+            return 0
+        src = argv[3] if len(argv) > 3 else "-"
+        if cmd == "append":
+            added, skipped = append(root, _read_input(src), granularity)
+            print(f"store:{root} added={added} duplicates={skipped}", file=sys.stderr)
+        else:
+            added, removed = upsert(root, _read_input(src), granularity)
+            print(f"store:{root} added={added} replaced={removed}", file=sys.stderr)
+    except (OSError, ValueError) as err:
+        print(f"ERR:store:{err}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
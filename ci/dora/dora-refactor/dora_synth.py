@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# ci/dora/dora-refactor/dora_synth.py
+"""
+Deterministic synthetic events/v1 streams for benchmarks and scale tests.
+
+Same (n, seed, end, days) -> byte-identical output. Shape per merged PR,
+roughly as collect-events.sh / event-append.sh would record it:
+  - pr_merged with head/merge SHA split (merge commit, squash, or
+    fast-forward where merge == head); `sha` follows event-append.sh.
+  - pipeline_started/finished for ~90% of merges (~12% of runs fail).
+  - 0-3 deployments after the pipeline, usually of the merge SHA, some
+    of the head SHA, some redeploys of a recent older SHA (SHA reuse);
+    ~85% success with the usual failure/cancel mix, plus a few rows
+    outside the strict contract (timed_out, neutral, no status) that
+    compute-dora.py tolerates and STRICT validation reports.
+Merges arrive as a Poisson process over `days` ending at `end`, and rows
+are emitted in timestamp order, the way an append-only events file grows.
+About 3.7 rows per PR; generation stops at exactly n rows.
+"""
+import calendar, heapq, json, os, random, sys, time
+
+SCHEMA = "events/v1"
+REPOS = (("org/api", 5), ("org/web", 3), ("org/infra", 1))
+DEPLOY_STATUS = (("success", 85), ("failure", 7), ("cancelled", 3), ("timed_out", 1),
+                 ("failed", 2), ("neutral", 1), (None, 1))
+ROWS_PER_PR = 3.7
+
+def _iso(t):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(t))
+
+def _weighted(pairs):
+    vals, weights = zip(*pairs)
+    cum, acc = [], 0
+    for w in weights:
+        acc += w
+        cum.append(acc)
+    return vals, cum
+
+def parse_count(s):
+    """'10k' / '1M' / '2500' -> int."""
+    s = str(s).strip()
+    mult = {"k": 1000, "m": 1000000}.get(s[-1:].lower(), 1)
+    return int(float(s[:-1] if mult > 1 else s) * mult)
+
+def generate(n, seed=0, end=None, days=30):
+    """Yield n events/v1 dicts; `end` is epoch seconds (default: today 00:00Z)."""
+    rnd = random.Random(seed)
+    end = int(end if end is not None else time.time() // 86400 * 86400)
+    t = end - days * 86400
+    gap = days * 86400 / max(1.0, n / ROWS_PER_PR)
+    repos, repo_cum = _weighted(REPOS)
+    statuses, status_cum = _weighted(DEPLOY_STATUS)
+    recent = {r: [] for r in repos}  # repo -> recent merge SHAs (redeploys)
+    pending = []                     # (ts, seq, event) heap of future rows
+    seq = pr = emitted = 0
+    sha = lambda: "%040x" % rnd.getrandbits(160)
+
+    def later(ts, ev):
+        nonlocal seq
+        seq += 1
+        heapq.heappush(pending, (ts, seq, ev))
+
+    while emitted < n:
+        t += max(1, int(rnd.expovariate(1.0 / gap)))
+        while pending and pending[0][0] <= t and emitted < n:
+            yield heapq.heappop(pending)[2]
+            emitted += 1
+        if emitted >= n:
+            break
+        pr += 1
+        repo = rnd.choices(repos, cum_weights=repo_cum)[0]
+        head = sha()
+        style = rnd.random()
+        merge = head if style < 0.1 else sha()  # fast-forward keeps the head SHA
+        yield {"schema": SCHEMA, "type": "pr_merged", "repo": repo, "pr": pr,
+               "head_sha": head, "merge_commit_sha": merge, "sha": merge,
+               "base_branch": "main", "merged_at": _iso(t)}
+        emitted += 1
+        pool = recent[repo]
+        pool.append(merge)
+        if len(pool) > 50:
+            del pool[0]
+
+        ready = t
+        if rnd.random() < 0.9:
+            ps = t + rnd.randint(5, 300)
+            pf = ps + int(rnd.lognormvariate(6.3, 0.6))  # ~10 min median
+            ok = rnd.random() >= 0.12
+            later(ps, {"schema": SCHEMA, "type": "pipeline_started", "repo": repo,
+                       "sha": merge, "started_at": _iso(ps)})
+            later(pf, {"schema": SCHEMA, "type": "pipeline_finished", "repo": repo,
+                       "sha": merge, "status": "success" if ok else "failure",
+                       "finished_at": _iso(pf)})
+            ready = pf
+            if not ok and rnd.random() < 0.7:
+                continue  # red pipeline, nothing shipped
+        for _ in range(rnd.choices((0, 1, 2, 3), cum_weights=(6, 76, 96, 100))[0]):
+            # most ship within hours; some wait for a release train
+            delay = rnd.randint(60, 6 * 3600) if rnd.random() < 0.8 else rnd.randint(6 * 3600, 4 * 86400)
+            ready += delay
+            r = rnd.random()
+            dsha = merge if r < 0.85 else head if r < 0.95 else rnd.choice(pool)
+            st = rnd.choices(statuses, cum_weights=status_cum)[0]
+            ev = {"schema": SCHEMA, "type": "deployment", "repo": repo, "env": "production",
+                  "sha": dsha, "status": st, "finished_at": _iso(ready)}
+            if st is None:
+                del ev["status"]
+            later(ready, ev)
+            if st == "success":
+                break
+
+def write(path, n, seed=0, end=None, days=30):
+    """Write the stream as NDJSON; returns bytes written."""
+    size = 0
+    with open(path, "w", encoding="utf-8") as f:
+        buf = []
+        for ev in generate(n, seed, end, days):
+            buf.append(json.dumps(ev, separators=(",", ":")))
+            if len(buf) >= 10000:
+                s = "\n".join(buf) + "\n"
+                f.write(s)
+                size += len(s)
+                buf = []
+        if buf:
+            s = "\n".join(buf) + "\n"
+            f.write(s)
+            size += len(s)
+    return size
+
+def main(argv):
+    if len(argv) not in (2, 3):
+        print("usage: dora_synth.py <n|10k|1M> [out.ndjson]  (env SYNTH_SEED, SYNTH_DAYS, SYNTH_END=YYYY-MM-DD)",
+              file=sys.stderr)
+        return 64
+    n = parse_count(argv[1])
+    seed = int(os.getenv("SYNTH_SEED", "0"))
+    days = int(os.getenv("SYNTH_DAYS", "30"))
+    end = os.getenv("SYNTH_END")
+    end = calendar.timegm(time.strptime(end, "%Y-%m-%d")) if end else None
+    if len(argv) == 3:
+        size = write(argv[2], n, seed, end, days)
+        print(f"{argv[2]} rows={n} bytes={size}", file=sys.stderr)
+    else:
+        for ev in generate(n, seed, end, days):
+            sys.stdout.write(json.dumps(ev, separators=(",", ":")) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -3,53 +3,92 @@
 import re
 
 HEX40 = re.compile(r"^[0-9a-f]{40}$")
+TYPES = frozenset({"pr_merged", "deployment"})
+# rows tools append to the same events file (dora_profile.event_rows): not DORA input, not errors
+IGNORED_TYPES = frozenset({"tool_stage"})
 
 def _is_iso_z(s: str) -> bool:
     return isinstance(s, str) and s.endswith("Z") and "T" in s and len(s) >= 20
 
-def assert_ndjson(events):
+def violation(e):
+    """First hard-assertion failure for one event (message without row index), or None."""
+    if e.get("type") in IGNORED_TYPES:
+        return None
+    if e.get("schema") != "events/v1":
+        return "schema!=events/v1"
+    t = e.get("type")
+    if t not in TYPES:
+        return f"bad type:{t}"
+
+    if t == "pr_merged":
+        if not isinstance(e.get("pr"), int):
+            return "pr not int"
+        if not (isinstance(e.get("merge_commit_sha"), str) and HEX40.match(e["merge_commit_sha"])):
+            return "bad merge_commit_sha"
+        if not (isinstance(e.get("head_sha"), str) and HEX40.match(e["head_sha"])):
+            return "bad head_sha"
+        if not (isinstance(e.get("sha"), str) and HEX40.match(e["sha"])):
+            return "bad sha (copy of merge)"
+        if not _is_iso_z(e.get("merged_at", "")):
+            return "bad merged_at"
+
+    elif t == "deployment":
+        if not (isinstance(e.get("sha"), str) and HEX40.match(e["sha"])):
+            return "bad sha"
+        st = str(e.get("status", "")).lower()
+        if st not in {"success", "failure", "failed", "cancelled", "canceled"}:
+            return f"bad status:{st}"
+        if not _is_iso_z(e.get("finished_at", "")):
+            return "bad finished_at"
+    return None
+
+def assert_ndjson(events, start=0):
     """
     Hard assertions. Raise AssertionError on first violation.
+    `start` offsets the reported row index (for tails of a longer stream).
     """
-    for i, e in enumerate(events):
-        if e.get("schema") != "events/v1":
-            raise AssertionError(f"[{i}] schema!=events/v1")
-        t = e.get("type")
-        if t not in {"pr_merged", "deployment"}:
-            raise AssertionError(f"[{i}] bad type:{t}")
-
-        if t == "pr_merged":
-            if not isinstance(e.get("pr"), int):
-                raise AssertionError(f"[{i}] pr not int")
-            if not (isinstance(e.get("merge_commit_sha"), str) and HEX40.match(e["merge_commit_sha"])):
-                raise AssertionError(f"[{i}] bad merge_commit_sha")
-            if not (isinstance(e.get("head_sha"), str) and HEX40.match(e["head_sha"])):
-                raise AssertionError(f"[{i}] bad head_sha")
-            if not (isinstance(e.get("sha"), str) and HEX40.match(e["sha"])):
-                raise AssertionError(f"[{i}] bad sha (copy of merge)")
-            if not _is_iso_z(e.get("merged_at", "")):
-                raise AssertionError(f"[{i}] bad merged_at")
-
-        elif t == "deployment":
-            if not (isinstance(e.get("sha"), str) and HEX40.match(e["sha"])):
-                raise AssertionError(f"[{i}] bad sha")
-            st = str(e.get("status", "")).lower()
-            if st not in {"success", "failure", "failed", "cancelled", "canceled"}:
-                raise AssertionError(f"[{i}] bad status:{st}")
-            if not _is_iso_z(e.get("finished_at", "")):
-                raise AssertionError(f"[{i}] bad finished_at")
+    for i, e in enumerate(events, start):
+        msg = violation(e)
+        if msg:
+            raise AssertionError(f"[{i}] {msg}")
+
+SHAPE_KEYS = ("bad_schema", "bad_type", "bad_merge", "bad_fin")
+
+def shape_flags(e):
+    """Per-event soft-check flags, in SHAPE_KEYS order."""
+    t = e.get("type")
+    if t in IGNORED_TYPES:
+        return (False, False, False, False)
+    return (e.get("schema") != "events/v1",
+            t not in TYPES,
+            t == "pr_merged" and not _is_iso_z(e.get("merged_at", "")),
+            t == "deployment" and not _is_iso_z(e.get("finished_at", "")))
+
+def shape_counts(events):
+    """
+    Soft-check counters; additive, so tails of a stream can be summed.
+    """
+    events = [e for e in events if e.get("type") not in IGNORED_TYPES]
+    return {
+        "bad_schema": sum(1 for e in events if e.get("schema") != "events/v1"),
+        "bad_type":   sum(1 for e in events if e.get("type") not in TYPES),
+        "bad_merge":  sum(1 for e in events if e.get("type")=="pr_merged" and not _is_iso_z(e.get("merged_at",""))),
+        "bad_fin":    sum(1 for e in events if e.get("type")=="deployment" and not _is_iso_z(e.get("finished_at",""))),
+    }
+
+def warn_counts(c):
+    if c["bad_schema"]: print(f"WARN: bad schema rows: {c['bad_schema']}")
+    if c["bad_type"]:   print(f"WARN: bad type rows: {c['bad_type']}")
+    if c["bad_merge"]:  print(f"WARN: bad merged_at rows: {c['bad_merge']}")
+    if c["bad_fin"]:    print(f"WARN: bad finished_at rows: {c['bad_fin']}")
 
 def warn_shape(events):
     """
     Soft checks. Print counts; do not raise.
     """
-    bad_schema = sum(1 for e in events if e.get("schema") != "events/v1")
-    bad_type   = sum(1 for e in events if e.get("type") not in {"pr_merged", "deployment"})
-    if bad_schema: print(f"WARN: bad schema rows: {bad_schema}")
-    if bad_type:   print(f"WARN: bad type rows: {bad_type}")
+    c = shape_counts(events)
+    warn_counts({**c, "bad_merge": 0, "bad_fin": 0})
 
 def warn_timestamps(events):
-    bad_merge = sum(1 for e in events if e.get("type")=="pr_merged" and not _is_iso_z(e.get("merged_at","")))
-    bad_fin   = sum(1 for e in events if e.get("type")=="deployment" and not _is_iso_z(e.get("finished_at","")))
-    if bad_merge: print(f"WARN: bad merged_at rows: {bad_merge}")
-    if bad_fin:   print(f"WARN: bad finished_at rows: {bad_fin}")
+    c = shape_counts(events)
+    warn_counts({**c, "bad_schema": 0, "bad_type": 0})
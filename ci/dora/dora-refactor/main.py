@@ -3,25 +3,66 @@
 import os, sys, json
 from datetime import datetime, timedelta, timezone
 
-from dora_io import load_ndjson, dump_json
+from dora_io import iter_events, dump_json
 
-from dora_validate import warn_shape, warn_timestamps, assert_ndjson
+from dora_validate import warn_counts
 
-from dora_pair import lead_times_deployment, lead_times_change, to_dt
+import dora_checkpoint as ckpt
 
-from dora_aggregate import deployments_in_window, daily_histogram, failure_count
+import dora_cache
+
+from dora_engine import Engine
+
+from dora_sketch import KLL, k_for_eps
+
+from dora_aggregate import FAILURES
 
 from dora_assemble import assemble_dora
 
+from dora_profile import profiler, NULL
+
 def now_utc():
     return datetime.now(timezone.utc)
 
+def new_engine(start, end):
+    """
+    One pass: validation, deploy window [start, end] (epoch s), histogram,
+    failure count and the all-time PR maps the pairing stages need.
+    """
+    return Engine(lo=start, hi=end, fail=FAILURES, pr_index=True, validate=True)
+
+def collect_incremental(path, checkpoint, window_days, start, end, prof=NULL):
+    """
+    Resume from `checkpoint` and fold in only the lines appended since.
+    Deploys older than the window start are dropped: `end` only moves forward.
+    start/end are epoch seconds.
+    """
+    params = {"window_days": window_days, "state": 3}
+    offset, st = ckpt.load(checkpoint, path, "dora-refactor", params)
+    eng = new_engine(start, end)
+    if st and st.get("now", float("inf")) <= end:
+        eng.restore(st)
+    else:
+        offset = 0
+    tail, pending = [], None
+    for e, at in prof.iter("decode", ckpt.read_tail(path, offset)):
+        if at is None:
+            pending = e
+            break
+        tail.append(e)
+        offset = at
+    eng.feed(tail)
+    ckpt.save(checkpoint, path, "dora-refactor", params, offset, {"now": end, **eng.to_state()})
+    if pending is not None:
+        eng.feed([pending])
+    return eng
+
 def main():
     # ---- args ----
-    if len(sys.argv) < 2:
-        print("usage: compute-dora.py <events.ndjson>", file=sys.stderr); sys.exit(64)
-    path = sys.argv[1]
-    events = load_ndjson(path)
+    args = [a for a in sys.argv[1:] if a != "--profile"]
+    if not args:
+        print("usage: compute-dora.py <events.ndjson> [--profile]", file=sys.stderr); sys.exit(64)
+    path = args[0]
 
     # ---- env ----
     WINDOW_DAYS = int(os.getenv("WINDOW_DAYS", "14"))
@@ -29,39 +70,71 @@ def main():
     LT_MIN_LEAD_SECONDS = int(os.getenv("LT_MIN_LEAD_SECONDS", "300"))
     PAIR_MODE   = os.getenv("LT_PAIR_MODE", "change")  # change|deployment|both
     STRICT      = int(os.getenv("STRICT", "0"))
-
-    # ---- basic validation (non-fatal unless STRICT=1) ----
-    try:
-        assert_ndjson(events)
-    except AssertionError as e:
-        if STRICT: 
-            print(f"ERR:{e}", file=sys.stderr); sys.exit(65)
-    warn_shape(events)
-    warn_timestamps(events)
+    INCREMENTAL = os.getenv("DORA_INCREMENTAL", "false").lower() in {"1","true","yes","y"}
+    CHECKPOINT  = os.getenv("DORA_CHECKPOINT", "dora-rf.checkpoint.json")
+    CACHE       = os.getenv("DORA_CACHE", "read").lower()  # off|read|build
+    SKETCH      = os.getenv("LEAD_SKETCH", "false").lower() in {"1","true","yes","y"}
+    SKETCH_EPS  = float(os.getenv("LEAD_SKETCH_EPS", "0.01"))
+    PROFILE     = (os.getenv("DORA_PROFILE", "false").lower() in {"1","true","yes","y"}
+                   or "--profile" in sys.argv)
+    PROFILE_OUT = os.getenv("DORA_PROFILE_OUT", "dora-rf.profile.json")
+    PROFILE_EVENTS = os.getenv("DORA_PROFILE_EVENTS", "")
+    prof = profiler(PROFILE, "dora-refactor")
 
     # ---- window ----
     end   = now_utc()
     start = end - timedelta(days=WINDOW_DAYS)
+    start_s, end_s = start.timestamp(), end.timestamp()
+
+    # ---- load: checkpoint + appended tail, columnar sidecar, or full file ----
+    st = prof.start("load")
+    eng = None
+    # stores and sqlite: databases are read whole (all-time PR maps)
+    if INCREMENTAL and not os.path.isdir(path) and not path.startswith("sqlite:"):
+        try:
+            eng = collect_incremental(path, CHECKPOINT, WINDOW_DAYS, start_s, end_s, prof)
+        except ckpt.TailError as err:
+            print(f"WARN:incremental_disabled:{err}", file=sys.stderr)
+    if eng is None:
+        eng = new_engine(start_s, end_s)
+        cache = dora_cache.open_for(path, CACHE)
+        if cache is not None:
+            with cache:
+                # validation summary was computed on the dicts at build time
+                eng.n, eng.first_error = cache.meta["n"], cache.meta["first_error"]
+                eng.counts.update(cache.meta["counts"])
+                eng.add(prof.iter("cache.rows", cache.records()))
+        else:
+            eng.feed(prof.iter("decode", iter_events(path)))
+    prof.stop(st, items=eng.n)
 
-    # limit deploy-side metrics to window, allow PRs from all time for pairing
-    deploys = deployments_in_window(events, start, end)
-    daily   = daily_histogram(deploys)
-    failed  = failure_count(deploys)
-
-    # compose pairing input: all PRs + windowed deployments
-    pr_all = [e for e in events if e.get("type") == "pr_merged"]
-    ev_for_lt = pr_all + deploys
-
-    # ---- lead times ----
-    lt_change = lead_times_change(ev_for_lt, LT_MIN_LEAD_SECONDS, PCTL)
+    # ---- basic validation (non-fatal unless STRICT=1) ----
+    if eng.first_error and STRICT:
+        print(f"ERR:{eng.first_error}", file=sys.stderr); sys.exit(65)
+    warn_counts(eng.counts)
+
+    # deploy-side metrics limited to window; PRs from all time for pairing
+    with prof.stage("aggregate") as st:
+        daily = eng.histogram(count_fail=True)
+        ok, failed = eng.totals()
+        st["items"] = ok + failed
+
+    # ---- lead times (exact, or mergeable KLL sketches serialized into each section) ----
+    new = (lambda: KLL(k_for_eps(SKETCH_EPS))) if SKETCH else (lambda: None)
+    with prof.stage("pair.change") as st:
+        lt_change = eng.lead_change(LT_MIN_LEAD_SECONDS, PCTL, new())
+        st["items"] = lt_change["samples"]
     lt_deploy = None
     if PAIR_MODE in ("deployment", "both"):
-        lt_deploy = lead_times_deployment(ev_for_lt, LT_MIN_LEAD_SECONDS, PCTL)
+        with prof.stage("pair.deployment") as st:
+            lt_deploy = eng.lead_deployment(LT_MIN_LEAD_SECONDS, PCTL, new())
+            st["items"] = lt_deploy["samples"]
 
     # ---- assemble ----
+    st = prof.start("assemble")
     dora = assemble_dora(
-        events=ev_for_lt,
-        deploys=deploys,
+        events=None,
+        deploys=eng.window_deploys(),
         failed=failed,
         daily=daily,
         window_days=WINDOW_DAYS,
@@ -72,8 +145,15 @@ def main():
         lt_change=lt_change,
         lt_deploy=lt_deploy
     )
+    prof.stop(st)
+
+    with prof.stage("write.stdout"):
+        dump_json(dora)
 
-    dump_json(dora)
+    if prof.enabled:
+        # stdout carries dora.json: note the sidecar on stderr
+        prof.write(PROFILE_OUT, PROFILE_EVENTS)
+        print(f"- Wrote {PROFILE_OUT}", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# ci/dora/dora-rollup.py
+
+# CONTRACT-JSON-BEGIN
+# {
+#   "args": ["PATH...", "--show-env"],
+#   "env": {
+#     "PCTL": "int percentile, default 90",
+#     "MAX_FALLBACK_HOURS": "float fallback search window, default 6",
+#     "WINDOW_DAYS": "int lookback window; 0 disables, default 14",
+#     "LT_ALLOW_FALLBACK": "bool {1,true,yes,y} enables non-SHA fallback, default false",
+#     "LT_MIN_LEAD_SECONDS": "int minimum PR→deploy delta, default 300",
+#     "LEAD_SKETCH": "bool {1,true,yes,y} merges KLL sketches instead of raw lead samples, default false",
+#     "LEAD_SKETCH_EPS": "float target rank error for LEAD_SKETCH, default 0.01",
+#     "DORA_WORKERS": "int worker processes, default cpu count",
+#     "DORA_ROLLUP_OUT": "output path, default dora.rollup.json"
+#   },
+#   "reads": "one or more events files (NDJSON split into byte ranges; arrays/multi-line JSON scanned whole); events grouped by their repo field, else by file name; dora_store directories contribute only partitions reaching the window; sqlite:DB inputs are loaded per repo by indexed window queries; no network",
+#   "writes": [
+#     "stdout summary lines, one per repo plus org",
+#     "DORA_ROLLUP_OUT (schema dora-rollup/v1: org and per-repo dora/v1 objects as written by compute-dora.py)"
+#   ],
+#   "tools": ["python3"],
+#   "exit": { "ok": 0, "show_env": 0, "usage": 64, "io_or_parse_error": 1 },
+#   "notes": "Per-repo results match compute-dora.py on that repo's events. Org totals sum per-repo counts and histograms; org lead time uses all samples (exact) or merged sketches."
+# }
+# CONTRACT-JSON-END
+
+import os, sys, json, datetime as dt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dora-refactor"))
+from dora_engine import window_lo
+from dora_sketch import k_for_eps
+from dora_rollup import rollup
+
+PCTL = int(os.environ.get("PCTL", "90"))
+MAX_FALLBACK_HOURS = float(os.environ.get("MAX_FALLBACK_HOURS", "6"))
+WINDOW_DAYS = int(os.environ.get("WINDOW_DAYS", "14"))
+LT_ALLOW_FALLBACK = os.getenv("LT_ALLOW_FALLBACK", "false").lower() in {"1","true","yes","y"}
+LT_MIN_LEAD_SECONDS = int(os.environ.get("LT_MIN_LEAD_SECONDS", "300"))
+LEAD_SKETCH = os.getenv("LEAD_SKETCH", "false").lower() in {"1","true","yes","y"}
+LEAD_SKETCH_EPS = float(os.environ.get("LEAD_SKETCH_EPS", "0.01"))
+DORA_WORKERS = int(os.environ.get("DORA_WORKERS", "0")) or os.cpu_count() or 1
+DORA_ROLLUP_OUT = os.environ.get("DORA_ROLLUP_OUT", "dora.rollup.json")
+
+def dump_env():
+    print("## ENV CONFIG")
+    for k in ("PCTL", "MAX_FALLBACK_HOURS", "WINDOW_DAYS", "LT_ALLOW_FALLBACK", "LT_MIN_LEAD_SECONDS",
+              "LEAD_SKETCH", "LEAD_SKETCH_EPS", "DORA_WORKERS", "DORA_ROLLUP_OUT"):
+        print(f"- {k}={globals()[k]}")
+
+def _line(name, d):
+    m, lt = d["metrics"], d["lead_time"]
+    return (f"- {name}: deploys={m['deploys_total']} failures={m['deploy_failures']} "
+            f"lead_samples={lt['samples']} median_h={lt['median_h']} p{PCTL}_h={lt['pctl_h']}")
+
+def main(argv):
+    if "--show-env" in argv:
+        dump_env()
+        return 0
+    paths = argv[1:]
+    if not paths:
+        print("usage: dora-rollup.py <events.ndjson>...", file=sys.stderr)
+        return 64
+    now_s = dt.datetime.now(dt.timezone.utc).timestamp()
+    cfg = {
+        "lo": window_lo(now_s, WINDOW_DAYS),
+        "window_days": WINDOW_DAYS,
+        "pctl": PCTL,
+        "min_lead_seconds": LT_MIN_LEAD_SECONDS,
+        "allow_fallback": LT_ALLOW_FALLBACK,
+        "max_fallback_hours": MAX_FALLBACK_HOURS,
+        "sketch_k": k_for_eps(LEAD_SKETCH_EPS) if LEAD_SKETCH else None,
+    }
+    out = rollup(paths, cfg, DORA_WORKERS)
+
+    print(f"## DORA rollup ({len(out['repos'])} repos, {DORA_WORKERS} workers)")
+    for name, d in out["repos"].items():
+        print(_line(name, d))
+    if out["org"]:
+        print(_line("org", out["org"]))
+    with open(DORA_ROLLUP_OUT, "w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
+    print(f"- Wrote {DORA_ROLLUP_OUT}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# ci/dora/dora-series.py
+
+# CONTRACT-JSON-BEGIN
+# {
+#   "args": ["PATH (default events.ndjson)", "--show-env"],
+#   "env": {
+#     "PCTL": "int percentile, default 90",
+#     "MAX_FALLBACK_HOURS": "float fallback search window, default 6",
+#     "WINDOW_DAYS": "int lookback window per row; 0 = all history up to the row, default 14",
+#     "LT_ALLOW_FALLBACK": "bool {1,true,yes,y} enables non-SHA fallback, default false",
+#     "LT_MIN_LEAD_SECONDS": "int minimum PR→deploy delta, default 300",
+#     "DORA_CACHE": "off|read|build columnar sidecar PATH.dcache, default read",
+#     "DORA_SERIES_DAYS": "int days covered by the series, default 180",
+#     "DORA_SERIES_STEP": "day|week; week keeps every 7th row counting back from the end day, default day",
+#     "DORA_SERIES_END": "YYYY-MM-DD UTC day of the last row, default today",
+#     "DORA_SERIES_OUT": "output path; *.csv writes CSV, anything else NDJSON, default dora.series.ndjson"
+#   },
+#   "reads": "events file (NDJSON or JSON array/multi-line), or a dora_store directory (only partitions reaching the oldest row's window), or sqlite:DB (only rows in that window, by index); no network",
+#   "writes": [
+#     "stdout summary (rows written, last row)",
+#     "DORA_SERIES_OUT (one dora-series/v1 row per step: date, window, deploys, failures, CFR, per-day rates, lead median/pN hours)"
+#   ],
+#   "tools": ["python3"],
+#   "exit": { "ok": 0, "show_env": 0, "io_or_parse_error": 1 },
+#   "notes": "The row for day D equals compute-dora.py run at D 23:59:59Z over the events up to then. change_failure_rate is null below 5 attempts, like compute-dora's NA. One pass over the events for the whole series."
+# }
+# CONTRACT-JSON-END
+
+import os, sys, csv, json, datetime as dt
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dora-refactor"))
+from dora_io import iter_events
+from dora_events import records
+from dora_series import series, FIELDS, SCHEMA, STEPS
+import dora_cache
+import dora_store
+import dora_sqlite
+
+PCTL = int(os.environ.get("PCTL", "90"))
+MAX_FALLBACK_HOURS = float(os.environ.get("MAX_FALLBACK_HOURS", "6"))
+WINDOW_DAYS = int(os.environ.get("WINDOW_DAYS", "14"))
+LT_ALLOW_FALLBACK = os.getenv("LT_ALLOW_FALLBACK", "false").lower() in {"1","true","yes","y"}
+LT_MIN_LEAD_SECONDS = int(os.environ.get("LT_MIN_LEAD_SECONDS", "300"))
+DORA_CACHE = os.environ.get("DORA_CACHE", "read").lower()           # off|read|build
+DORA_SERIES_DAYS = int(os.environ.get("DORA_SERIES_DAYS", "180"))
+DORA_SERIES_STEP = os.environ.get("DORA_SERIES_STEP", "day").lower()
+DORA_SERIES_END = os.environ.get("DORA_SERIES_END", "")
+DORA_SERIES_OUT = os.environ.get("DORA_SERIES_OUT", "dora.series.ndjson")
+
+def dump_env():
+    print("## ENV CONFIG")
+    for k in ("PCTL", "MAX_FALLBACK_HOURS", "WINDOW_DAYS", "LT_ALLOW_FALLBACK", "LT_MIN_LEAD_SECONDS",
+              "DORA_CACHE", "DORA_SERIES_DAYS", "DORA_SERIES_STEP", "DORA_SERIES_END", "DORA_SERIES_OUT"):
+        print(f"- {k}={globals()[k]}")
+
+def end_day():
+    if DORA_SERIES_END:
+        d = dt.datetime.strptime(DORA_SERIES_END, "%Y-%m-%d").replace(tzinfo=dt.timezone.utc)
+    else:
+        d = dt.datetime.now(dt.timezone.utc)
+    return int(d.timestamp()) // 86400
+
+def write_rows(rows, path):
+    n, last = 0, None
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            w = csv.DictWriter(f, fieldnames=FIELDS)
+            w.writeheader()
+            for last in rows:
+                w.writerow(last)
+                n += 1
+        else:
+            for last in rows:
+                f.write(json.dumps({"schema": SCHEMA, **last}, ensure_ascii=False) + "\n")
+                n += 1
+    return n, last
+
+def main(argv):
+    if "--show-env" in argv:
+        dump_env()
+        return 0
+    if DORA_SERIES_STEP not in STEPS:
+        print(f"ERR: DORA_SERIES_STEP must be one of {sorted(STEPS)}", file=sys.stderr)
+        return 1
+    path = argv[1] if len(argv) > 1 else "events.ndjson"
+    cfg = {
+        "window_days": WINDOW_DAYS,
+        "pctl": PCTL,
+        "min_lead_seconds": LT_MIN_LEAD_SECONDS,
+        "allow_fallback": LT_ALLOW_FALLBACK,
+        "max_fallback_hours": MAX_FALLBACK_HOURS,
+        "end_day": end_day(),
+        "span_days": DORA_SERIES_DAYS,
+        "step": DORA_SERIES_STEP,
+    }
+    cache = dora_cache.open_for(path, DORA_CACHE)
+    # the oldest row's window opens at (first day + 1 - WINDOW_DAYS) 00:00Z
+    first = cfg["end_day"] - DORA_SERIES_DAYS + 1
+    lo = (first + 1 - WINDOW_DAYS) * 86400 if WINDOW_DAYS else None
+    db = dora_sqlite.db_of(path)
+    if db is not None:
+        n, last = write_rows(series(records(dora_sqlite.iter_events(db, lo=lo)), cfg), DORA_SERIES_OUT)
+    elif dora_store.is_store(path):
+        n, last = write_rows(series(records(dora_store.iter_events(path, lo=lo)), cfg), DORA_SERIES_OUT)
+    elif cache is None:
+        n, last = write_rows(series(records(iter_events(path)), cfg), DORA_SERIES_OUT)
+    else:
+        with cache:
+            n, last = write_rows(series(cache.records(), cfg), DORA_SERIES_OUT)
+
+    print(f"## DORA series ({DORA_SERIES_STEP}, window {WINDOW_DAYS}d)")
+    print(f"- Rows: {n}")
+    if last:
+        print(f"- Last ({last['date']}): deploys={last['deploys_total']} failures={last['deploy_failures']} "
+              f"lead_samples={last['lead_samples']} median_h={last['lead_median_h']} p{PCTL}_h={last['lead_pctl_h']}")
+    print(f"- Wrote {DORA_SERIES_OUT}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
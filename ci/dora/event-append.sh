@@ -8,8 +8,13 @@ export LC_ALL=C
 # ------------ config ------------
 OUT="${OUT:-events.ndjson}"
 SCHEMA="${SCHEMA:-events/v1}"
+EVENTS_STORE="${EVENTS_STORE:-}"   # optional date-partitioned store dir; written instead of OUT
+STORE_PY="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")" && pwd)/dora-refactor/dora_store.py"
+EVENTS_DEDUPE_INDEX="${EVENTS_DEDUPE_INDEX:-true}"  # OUT.dedupe.sqlite key index instead of scanning OUT
+DEDUPE_PY="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")" && pwd)/dora-refactor/dora_dedupe.py"
 
 # ------------ utils -------------
+is_true(){ case "$(printf '%s' "${1:-}" | tr '[:upper:]' '[:lower:]')" in 1|true|yes|y) return 0;; esac; return 1; }
 die(){ echo "ERR:$*" >&2; exit "${2:-2}"; }
 need(){ command -v "$1" >/dev/null 2>&1 || die "missing:$1" 70; }
 ts(){ date -u +%Y-%m-%dT%H:%M:%SZ; }
@@ -56,6 +61,13 @@ append() {
   echo "$json" | jq -e . >/dev/null || die "invalid_json"
   echo "$json" | jq -e --arg s "$SCHEMA" "$pred" >/dev/null || die "contract_failed"
 
+  # store: flock + de-dupe against the event's own day partition
+  if [[ -n "$EVENTS_STORE" ]]; then
+    need python3
+    printf '%s\n' "$json" | python3 "$STORE_PY" append "$EVENTS_STORE" - || die "store_append_failed"
+    return 0
+  fi
+
   # ensure dir exists
   mkdir -p -- "$(dirname -- "$OUT")"
 
@@ -65,6 +77,13 @@ append() {
     if mkdir "$lock" 2>/dev/null; then
       trap 'rmdir "$lock"' EXIT
 
+      # indexed: one key lookup against all of OUT (race-safe under the lock)
+      if is_true "$EVENTS_DEDUPE_INDEX" && command -v python3 >/dev/null 2>&1; then
+        printf '%s\n' "$json" | python3 "$DEDUPE_PY" append "$OUT" - || { rmdir "$lock"; trap - EXIT; die "dedupe_append_failed"; }
+        rmdir "$lock"; trap - EXIT
+        return 0
+      fi
+
       # re-check duplicates under lock (race-safe)
       if [[ -f "$OUT" ]] && jq -n -e --argjson j "$json" '
           def eqstr(a;b): (a//"")==(b//"");
@@ -122,12 +141,24 @@ upsert_event(){
     elif .type=="pr_merged" then '"$jq_pr"' 
     else false end' >/dev/null || die "contract_failed"
 
+  if [[ -n "$EVENTS_STORE" ]]; then
+    need python3
+    printf '%s\n' "$json" | python3 "$STORE_PY" upsert "$EVENTS_STORE" - || die "store_upsert_failed"
+    return 0
+  fi
+
   s="$(printf '%s\n' "$json" | jq -r '.sha // empty')"
   mkdir -p -- "$(dirname -- "$out")"
 
   for _ in $(seq 1 100); do
     if mkdir "$lock" 2>/dev/null; then
       trap 'rmdir "$lock"' EXIT
+      # indexed: rewrite OUT only when this sha was deployed before
+      if is_true "$EVENTS_DEDUPE_INDEX" && command -v python3 >/dev/null 2>&1; then
+        printf '%s\n' "$json" | python3 "$DEDUPE_PY" upsert "$out" - || { rmdir "$lock"; trap - EXIT; die "dedupe_upsert_failed"; }
+        rmdir "$lock"; trap - EXIT
+        return 0
+      fi
       tmp="$(mktemp)"
       { jq -c --arg s "$s" 'select(.type!="deployment" or .sha!=$s)' "$out" 2>/dev/null || true
         printf '%s\n' "$json"; } >"$tmp"
@@ -14,6 +14,9 @@ export LC_ALL=C
 # ---------- config ----------
 BASE_BRANCH="${HEAD_BRANCH:-main}"     # expected prod branch (override via env)
 SCHEMA="dora/lead_time/v1"
+# collected events (file, store dir or sqlite:DB) to resolve the SHA from before asking the API
+PR_INDEX_EVENTS="${PR_INDEX_EVENTS:-${EVENTS_STORE:-}}"
+PRINDEX_PY="$(cd -- "$(dirname -- "${BASH_SOURCE[0]}")" && pwd)/dora-refactor/dora_prindex.py"
 
 # ---------- utils ----------
 die()  { echo "ERR:$*" >&2; exit "${2:-1}"; }
@@ -39,6 +42,13 @@ pr_by_merge_commit() {
     -q "[.[] | select(.merge_commit_sha==\"$sha\")][0]"
 }
 
+pr_from_index() {
+  # local SHA -> PR index over PR_INDEX_EVENTS (dora_prindex.py); prints nothing when unknown
+  local repo="$1" sha="$2" base="$3"
+  [[ -n "$PR_INDEX_EVENTS" ]] && command -v python3 >/dev/null 2>&1 || return 0
+  python3 "$PRINDEX_PY" lookup "$PR_INDEX_EVENTS" "$sha" "$repo" "$base" 2>/dev/null || true
+}
+
 pr_by_commit_assoc() {
   local repo="$1" sha="$2"
   gh api -X GET -H 'Accept: application/vnd.github.groot-preview+json' \
@@ -127,11 +137,15 @@ main() {
   fi
   [[ -n "$sha" ]] || { echo "ERR:usage: $0 <sha> or set GITHUB_SHA" >&2; exit 2; }
 
-  assert_sha_exists "$repo" "$sha"
-
   local src pr_json prn merged_at pr_base
-  src="merge_commit_sha"
-  pr_json="$(pr_by_merge_commit "$repo" "$sha" "$BASE_BRANCH" || true)"
+  src="pr_index"
+  pr_json="$(pr_from_index "$repo" "$sha" "$BASE_BRANCH")"
+
+  if [[ -z "$pr_json" ]]; then   # not collected yet: ask the API
+    assert_sha_exists "$repo" "$sha"
+    src="merge_commit_sha"
+    pr_json="$(pr_by_merge_commit "$repo" "$sha" "$BASE_BRANCH" || true)"
+  fi
 
   if [[ -z "$pr_json" || "$pr_json" == "null" ]]; then
     src="commit_pulls"
@@ -2,17 +2,13 @@
 # ci/dora/test-lead.py
 # Local tester: read events.ndjson, compute lead time samples, print summary.
 
-import sys, os, json, datetime as dt
+import sys, os, json
 from collections import defaultdict
 from statistics import median
 
-def parse_ts(s: str):
-    if not s:
-        return None
-    try:
-        return dt.datetime.fromisoformat(s.replace("Z", "+00:00"))
-    except Exception:
-        return None
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "dora-refactor"))
+from dora_events import parse_epoch as parse_ts, iso_z
+from dora_pair import DeployIndex, pair_first_deploy
 
 # ---- input path ----
 path = sys.argv[1] if len(sys.argv) > 1 else "events.ndjson"
@@ -36,35 +32,26 @@ deploy_success_times = defaultdict(list)
 for e in events:
     if e.get("type") == "deployment" and e.get("status") == "success":
         t = parse_ts(e.get("finished_at") or e.get("updated_at") or e.get("created_at"))
-        if t:
+        if t is not None:
             deploy_success_times[e["sha"]].append(t)
 
-# ---- fixed compute_lead ----
-from datetime import timedelta
-
+# ---- fixed compute_lead (shared bisect index; epoch seconds) ----
 def compute_lead(events, success_times_by_sha, max_fallback_hours=168.0,
                  allow_fallback=False, min_lead_seconds=60):
-    norm = {k: sorted(set([t for t in v if t])) for k, v in success_times_by_sha.items()}
-    any_times = sorted(t for lst in norm.values() for t in lst)
+    index = DeployIndex(success_times_by_sha)
     lead, details = [], []
     for e in events:
         if e.get("type") != "pr_merged":
             continue
         sha = e.get("sha")
         m = parse_ts(e.get("merged_at"))
-        if not sha or not m:
+        if not sha or m is None:
             continue
-        exact = [t for t in norm.get(sha, []) if (t - m).total_seconds() > min_lead_seconds]
-        times, match = exact, "sha"
-        if not times and allow_fallback:
-            upper = m + timedelta(hours=max_fallback_hours)
-            times = [t for t in any_times
-                     if m < t <= upper and (t - m).total_seconds() > min_lead_seconds]
-            match = "fallback" if times else match
-        if not times:
+        first, match = pair_first_deploy(index, sha, m, min_lead_seconds,
+                                         allow_fallback, max_fallback_hours)
+        if first is None:
             continue
-        first = min(times)
-        delta_h = (first - m).total_seconds() / 3600.0
+        delta_h = (first - m) / 3600.0
         if delta_h <= 0:
             continue
         lead.append(delta_h)
@@ -72,7 +59,7 @@ def compute_lead(events, success_times_by_sha, max_fallback_hours=168.0,
             "pr": e.get("pr"),
             "sha": sha,
             "merged_at": e.get("merged_at"),
-            "deployed_at": first.isoformat().replace("+00:00", "Z"),
+            "deployed_at": iso_z(first),
             "lead_hours": round(delta_h, 2),
             "match": match,
         })
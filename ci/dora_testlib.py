@@ -0,0 +1,55 @@
+# ci/dora_testlib.py
+"""
+Fixed clock and event helpers the DORA tests build on
+(`from dora_testlib import END, write`); ci/conftest.py puts this
+directory and dora/dora-refactor on sys.path.
+"""
+import json
+import random
+from pathlib import Path
+
+from dora_events import iso_z
+from dora_synth import generate
+
+DORA = Path(__file__).parent / "dora"
+
+END = 1760745600  # 2025-10-18T00:00:00Z
+T0 = 1735689600   # 2025-01-01T00:00:00Z
+
+def synth(n, seed, end=END, **kw):
+    """dora_synth.generate() as a list; the stream ends at END unless told otherwise."""
+    return list(generate(n, seed=seed, end=end, **kw))
+
+def ndjson(events):
+    return "".join(json.dumps(e) + "\n" for e in events)
+
+def write(path, events, mode="w"):
+    """Write (mode="a": append) events to `path` as NDJSON; returns str(path)."""
+    with open(path, mode, encoding="utf-8") as f:
+        f.write(ndjson(events))
+    return str(path)
+
+def mixed(seed, n, days=20, repos=None):
+    """
+    Random merges and deploys in [T0, T0 + days] over a small SHA pool, with
+    the shapes every engine has to agree on: off-contract schemas and
+    statuses, missing statuses and empty deploy SHAs. `repos`: tag each
+    event with one of these.
+    """
+    rnd = random.Random(seed)
+    shas = [f"{i:040x}" for i in range(40)]
+    out = []
+    for i in range(n):
+        m, h = rnd.choice(shas), rnd.choice(shas)
+        t = iso_z(T0 + rnd.randint(0, days * 86400))
+        if rnd.random() < 0.45:
+            e = {"schema": "events/v1", "type": "pr_merged", "pr": i, "sha": m,
+                 "merge_commit_sha": m, "head_sha": h, "merged_at": t}
+        else:
+            e = {"schema": rnd.choice(["events/v1", "x"]), "type": "deployment",
+                 "sha": rnd.choice(shas + [""]), "finished_at": t,
+                 "status": rnd.choice(["success", "success", "failure", "canceled", "weird", None])}
+        if repos:
+            e["repo"] = rnd.choice(repos)
+        out.append(e)
+    return out
@@ -25,6 +25,11 @@ def _i(name, default=None, required=True):
     except Exception:
         raise SystemExit(f"Bad int for {name}: {v!r}")
 
+# ---- sweep mode: grids of inputs, every strategy (see roit_sweep.py) ----
+if os.environ.get("ROIT_SWEEP"):
+    from roit_sweep import main as sweep
+    raise SystemExit(sweep())
+
 # ---- inputs ----
 wd  = os.environ.get("WINDOW_DAYS", "")
 tb  = _f("TB")                      # sec/run baseline
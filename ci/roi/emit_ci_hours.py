@@ -2,9 +2,14 @@
 # Usage:
 #   python roi/emit_ci_hours.py toggl toggl_report.json > ci-hours.csv
 #   python roi/emit_ci_hours.py github runs.json > ci-hours.csv
-import sys, json
-from datetime import date
-from parsers import parse_toggl_json, durations_from_github_runs, daily_totals_from_durations
+#   python roi/emit_ci_hours.py github runs/ more-runs.json --workers 4 > ci-hours.csv
+#
+# Inputs are streamed, one entry/run decoded at a time. A directory stands for
+# its .json files (toggl: also .csv exports), sorted by name; a file may hold
+# several payloads back to back (gh api --paginate). Files are parsed in
+# parallel (--workers, default one per CPU) and their totals summed.
+import sys
+from parsers import MODES, parse_files
 
 def emit(totals):
     print("date,hours")
@@ -12,17 +17,17 @@ def emit(totals):
         print(f"{d.isoformat()},{totals[d]}")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3: sys.exit("usage: emit_ci_hours.py <toggl|github> <input.json>")
-    mode, path = sys.argv[1], sys.argv[2]
-    obj = json.load(open(path))
-    if mode == "toggl":
-        totals = parse_toggl_json(obj, tz="America/New_York")
-        emit(totals)
-    elif mode == "github":
-        runs = obj.get("workflow_runs") or []
-        dates = [(r.get("run_started_at") or r.get("created_at") or "")[:10] for r in runs]
-        secs = durations_from_github_runs(obj)
-        totals = daily_totals_from_durations(secs, dates, tz="UTC")
-        emit(totals)
-    else:
+    args, workers = sys.argv[1:], None
+    if "--workers" in args:
+        i = args.index("--workers")
+        try:
+            workers = int(args[i + 1])
+        except (IndexError, ValueError):
+            sys.exit("--workers needs a number")
+        del args[i:i + 2]
+    if len(args) < 2: sys.exit("usage: emit_ci_hours.py <toggl|github> <input.json|DIR>... [--workers N]")
+    mode, paths = args[0], args[1:]
+    if mode not in MODES:
         sys.exit("mode must be toggl or github")
+    tz = "America/New_York" if mode == "toggl" else "UTC"
+    emit(parse_files(paths, mode, tz=tz, workers=workers))
@@ -2,63 +2,234 @@
 from __future__ import annotations
 import csv
 import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, date, timedelta, timezone
-from typing import Dict, List, Iterable, Optional
+from typing import IO, Any, Dict, List, Iterable, Iterator, Optional, Tuple
 try:
     from zoneinfo import ZoneInfo  # py39+
 except ImportError:  # pragma: no cover
     from backports.zoneinfo import ZoneInfo  # type: ignore
+try:
+    import numpy as _np  # optional: batch splitting in DayBuckets
+except ImportError:  # pragma: no cover
+    _np = None
+
+_ZONES: Dict[str, ZoneInfo] = {}
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+_HOUR_US = 3_600_000_000
+_DAY_US = 86_400_000_000
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_MIN_DAY = date.min.toordinal() - _EPOCH_ORDINAL
+_MAX_DAY = date.max.toordinal() - _EPOCH_ORDINAL
+# batched entries start and end well inside the datetime range (no OverflowError to reproduce)
+_SAFE_MIN_US = (_MIN_DAY + 2) * _DAY_US
+_SAFE_MAX_US = (_MAX_DAY - 2) * _DAY_US
+_BATCH = 65536
+_MIXED = -(1 << 62)  # hour with an offset change inside
+
+
+def _zone(tz: str) -> ZoneInfo:
+    """ZoneInfo for tz, built once per process."""
+    z = _ZONES.get(tz)
+    if z is None:
+        z = _ZONES[tz] = ZoneInfo(tz)
+    return z
 
 
 def _to_zone(dt: datetime, tz: str) -> datetime:
     """Return timezone-aware datetime in target tz. Treat naive as UTC."""
-    z = ZoneInfo(tz)
+    z = _zone(tz)
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
     return dt.astimezone(z)
 
 
+def _epoch_us(dt: datetime) -> int:
+    """Microseconds since the epoch; naive is UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _US
+
+
+class DayBuckets:
+    """
+    {local date: hours} for one tz, fed one duration at a time; equal to
+    summing _bucket_hours_by_local_date() over the same entries in the same
+    order (same floats, same key order), without datetimes per slice.
+
+    That split runs in local wall-clock time: the start moves to tz once,
+    then each local day takes up to 86400 s until its midnight, whatever
+    DST does later. So only the UTC offset at the start matters. Offsets
+    are cached per UTC hour (tzdata never changes twice within one), and
+    the split is integer microseconds to the first midnight, then whole
+    days, with the reference's float operations in its order.
+
+    With NumPy installed (use_numpy=None), entries are queued and split in
+    batches; slices are still summed per date in entry order (ufunc.at).
+    Entries near the ends of the datetime range go one by one, so they
+    raise OverflowError exactly where the reference would.
+    """
+    __slots__ = ("tz", "zone", "totals", "_hours", "_starts", "_secs", "_numpy")
+
+    def __init__(self, tz: str, use_numpy: Optional[bool] = None):
+        self.tz = tz
+        self.zone: Optional[ZoneInfo] = None  # resolved on the first entry, like the reference
+        self.totals: Dict[int, float] = {}    # days since the epoch -> hours, first-seen order
+        self._hours: Dict[int, int] = {}      # UTC hour -> offset us (_MIXED: look up per entry)
+        self._starts: List[int] = []
+        self._secs: List[float] = []
+        self._numpy = _np is not None if use_numpy is None else (use_numpy and _np is not None)
+
+    # ---------- offsets ----------
+    def _offset_exact(self, epoch_us: int) -> int:
+        local = (_EPOCH + timedelta(microseconds=epoch_us)).astimezone(self.zone)
+        return local.utcoffset() // _US
+
+    def _hour_offset(self, hour: int) -> int:
+        off = self._hours.get(hour)
+        if off is None:
+            try:
+                a = self._offset_exact(hour * _HOUR_US)
+                b = self._offset_exact((hour + 1) * _HOUR_US - 1)
+            except (OverflowError, ValueError):
+                a, b = _MIXED, None
+            off = self._hours[hour] = a if a == b else _MIXED
+        return off
+
+    def _offset(self, epoch_us: int) -> int:
+        off = self._hour_offset(epoch_us // _HOUR_US)
+        return self._offset_exact(epoch_us) if off == _MIXED else off
+
+    # ---------- feeding ----------
+    def add(self, start: datetime, seconds: float) -> None:
+        """Bucket `seconds` starting at `start` (naive = UTC)."""
+        self.add_us(_epoch_us(start), seconds)
+
+    def add_us(self, epoch_us: int, seconds: float) -> None:
+        if seconds <= 0:
+            return
+        if self.zone is None:
+            self.zone = _zone(self.tz)
+        if not self._numpy or not (_SAFE_MIN_US <= epoch_us and epoch_us + seconds * 1e6 <= _SAFE_MAX_US):
+            if self._starts:
+                self.flush()
+            self._commit(self._split(epoch_us, seconds))
+            return
+        self._starts.append(epoch_us)
+        self._secs.append(seconds)
+        if len(self._starts) >= _BATCH:
+            self.flush()
+
+    def _split(self, epoch_us: int, seconds: float) -> List[Tuple[int, float]]:
+        """[(day, hours)] like _bucket_hours_by_local_date; OverflowError where it would raise."""
+        wall = epoch_us + self._offset(epoch_us)
+        day = wall // _DAY_US
+        if day < _MIN_DAY or day > _MAX_DAY:
+            raise OverflowError("date value out of range")
+        cap = (_DAY_US - wall % _DAY_US) / 1_000_000
+        out = []
+        remaining = seconds
+        while remaining > 0:
+            if day >= _MAX_DAY:  # the reference cannot build this day's end
+                raise OverflowError("date value out of range")
+            slice_sec = min(remaining, cap)
+            out.append((day, slice_sec / 3600.0))
+            remaining -= slice_sec
+            day += 1
+            cap = 86400.0
+        return out
+
+    def _commit(self, slices: List[Tuple[int, float]]) -> None:
+        totals = self.totals
+        for d, h in slices:
+            totals[d] = totals.get(d, 0.0) + h
+
+    def flush(self) -> None:
+        """Split and sum the queued entries (NumPy)."""
+        if not self._starts:
+            return
+        np = _np
+        starts = np.array(self._starts, dtype=np.int64)
+        secs = np.array(self._secs, dtype=np.float64)
+        self._starts, self._secs = [], []
+        hours, inv = np.unique(starts // _HOUR_US, return_inverse=True)
+        offs = np.array([self._hour_offset(int(h)) for h in hours], dtype=np.int64)[inv.reshape(-1)]
+        for i in np.flatnonzero(offs == _MIXED):
+            offs[i] = self._offset_exact(int(starts[i]))
+        wall = starts + offs
+        day = wall // _DAY_US
+        cap = (_DAY_US - wall % _DAY_US).astype(np.float64) / 1e6
+        # entries past their first midnight: the reference's loop, one step per day for all at once
+        multi = np.flatnonzero(secs > cap)
+        counts = np.ones(len(starts), dtype=np.int64)
+        rem = secs[multi] - cap[multi]
+        steps = []
+        while True:
+            live = np.flatnonzero(rem > 0)
+            if not len(live):
+                break
+            sl = np.minimum(rem[live], 86400.0)
+            rem[live] -= sl
+            counts[multi[live]] += 1
+            steps.append((live, sl))
+        pos = np.cumsum(counts) - counts
+        days = np.empty(int(counts.sum()), dtype=np.int64)
+        hrs = np.empty(len(days), dtype=np.float64)
+        days[pos] = day
+        hrs[pos] = np.minimum(secs, cap) / 3600.0
+        for k, (live, sl) in enumerate(steps, 1):
+            at = pos[multi[live]] + k
+            days[at] = day[multi[live]] + k
+            hrs[at] = sl / 3600.0
+        uniq, first, where = np.unique(days, return_index=True, return_inverse=True)
+        totals = self.totals
+        sums = np.array([totals.get(int(d), 0.0) for d in uniq], dtype=np.float64)
+        np.add.at(sums, where.reshape(-1), hrs)  # sequential: same sums, same order, as dict adds
+        for j in np.argsort(first, kind="stable"):
+            totals[int(uniq[j])] = float(sums[j])
+
+    def result(self) -> Dict[date, float]:
+        self.flush()
+        return {date.fromordinal(d + _EPOCH_ORDINAL): h for d, h in self.totals.items()}
+
+
 def _bucket_hours_by_local_date(start: datetime, seconds: float, tz: str) -> Dict[date, float]:
     """
     Bucket a duration (in seconds) by LOCAL calendar day(s) in tz.
     Splits across midnight if needed. Returns {local_date: hours}.
     """
-    if seconds <= 0:
-        return {}
-    start_local = _to_zone(start, tz)
-    remaining = seconds
-    out: Dict[date, float] = {}
-    current = start_local
-    while remaining > 0:
-        # end of current local day
-        day_end = datetime(
-            year=current.year, month=current.month, day=current.day,
-            hour=23, minute=59, second=59, tzinfo=current.tzinfo
-        ) + timedelta(seconds=1)  # first second of next day
-        slice_sec = min(remaining, (day_end - current).total_seconds())
-        out.setdefault(current.date(), 0.0)
-        out[current.date()] += slice_sec / 3600.0
-        current += timedelta(seconds=slice_sec)
-        remaining -= slice_sec
-    return out
+    b = DayBuckets(tz, use_numpy=False)
+    b.add(start, seconds)
+    return b.result()
 
 
 # --- Toggl CSV ---
 
-def parse_toggl_csv(csv_text: str, tz: str) -> Dict[date, float]:
-    """
-    Parse a Toggl CSV export text and return daily totals in HOURS, keyed by local date in tz.
-    Expects columns like: Start date, Start time, End date, End time, Duration.
-    Ignores zero/negative durations.
-    """
-    reader = csv.DictReader(csv_text.splitlines())
-    totals: Dict[date, float] = {}
+_CSV_COLUMNS = (("Start date", "Start Date"), ("Start time", "Start Time"),
+                ("End date", "End Date"), ("End time", "End Time"))
+
+
+def _toggl_csv_rows(lines: Iterable[str], buckets: DayBuckets) -> None:
+    """Feed the rows of a Toggl CSV export (any iterable of lines) into buckets."""
+    reader = csv.reader(lines)
+    header = next(reader, None) or []
+    # csv.DictReader semantics: the last column of a name wins, short rows read None
+    index = {name: i for i, name in enumerate(header)}
+    cols = [tuple(index.get(n) for n in names) for names in _CSV_COLUMNS]
+
+    def col(row: List[str], names: Tuple[Optional[int], ...]) -> Optional[str]:
+        for i in names:
+            v = row[i] if i is not None and i < len(row) else None
+            if v:
+                return v
+        return None
+
     for row in reader:
         try:
-            s_date = row.get("Start date") or row.get("Start Date")
-            s_time = row.get("Start time") or row.get("Start Time")
-            e_date = row.get("End date") or row.get("End Date")
-            e_time = row.get("End time") or row.get("End Time")
+            s_date, s_time, e_date, e_time = (col(row, c) for c in cols)
             if not (s_date and s_time and e_date and e_time):
                 continue
             # Treat CSV timestamps as UTC unless they carry TZ info.
@@ -71,25 +242,34 @@ def parse_toggl_csv(csv_text: str, tz: str) -> Dict[date, float]:
             seconds = (end - start).total_seconds()
             if seconds <= 0:
                 continue
-            by_day = _bucket_hours_by_local_date(start, seconds, tz)
-            for d, h in by_day.items():
-                totals[d] = totals.get(d, 0.0) + h
+            buckets.add(start, seconds)
         except Exception:
             # Robust to odd rows; skip
             continue
-    return totals
 
 
-# --- Toggl JSON (Reports API / detailed) ---
-
-def parse_toggl_json(obj: dict, tz: str) -> Dict[date, float]:
+def parse_toggl_csv(csv_text: str, tz: str) -> Dict[date, float]:
     """
-    Parse a Toggl JSON object with entries under obj['data'].
-    Uses 'start', 'stop', 'dur' (seconds). Ignores running entries (dur < 0) and non-positive durations.
-    Buckets by local date in tz. Splits across midnight when needed.
+    Parse a Toggl CSV export text and return daily totals in HOURS, keyed by local date in tz.
+    Expects columns like: Start date, Start time, End date, End time, Duration.
+    Ignores zero/negative durations.
     """
-    data = obj.get("data") or []
-    totals: Dict[date, float] = {}
+    buckets = DayBuckets(tz)
+    _toggl_csv_rows(csv_text.splitlines(), buckets)
+    return buckets.result()
+
+
+def parse_toggl_csv_stream(fh: IO[str], tz: str) -> Dict[date, float]:
+    """parse_toggl_csv() reading an open text file line by line (open it with newline="")."""
+    buckets = DayBuckets(tz)
+    _toggl_csv_rows(fh, buckets)
+    return buckets.result()
+
+
+# --- Toggl JSON (Reports API / detailed) ---
+
+def _toggl_json_entries(data: Iterable[dict], buckets: DayBuckets) -> None:
+    """Feed Toggl JSON time entries into buckets."""
     for e in data:
         dur = e.get("dur")
         start_s = e.get("start")
@@ -114,14 +294,46 @@ def parse_toggl_json(obj: dict, tz: str) -> Dict[date, float]:
             continue
 
 
-        by_day = _bucket_hours_by_local_date(start, seconds, tz)
-        for d, h in by_day.items():
-            totals[d] = totals.get(d, 0.0) + h
-    return totals
+        buckets.add(start, seconds)
+
+
+def parse_toggl_json(obj: dict, tz: str) -> Dict[date, float]:
+    """
+    Parse a Toggl JSON object with entries under obj['data'].
+    Uses 'start', 'stop', 'dur' (seconds). Ignores running entries (dur < 0) and non-positive durations.
+    Buckets by local date in tz. Splits across midnight when needed.
+    """
+    buckets = DayBuckets(tz)
+    _toggl_json_entries(obj.get("data") or [], buckets)
+    return buckets.result()
+
+
+def parse_toggl_json_stream(fh: IO[str], tz: str) -> Dict[date, float]:
+    """parse_toggl_json() over an open file, one entry of obj['data'] decoded at a time."""
+    buckets = DayBuckets(tz)
+    _toggl_json_entries(iter_json_items(fh, "data"), buckets)
+    return buckets.result()
 
 
 # --- GitHub run durations ---
 
+def _run_seconds(r: dict) -> Optional[int]:
+    """updated_at - run_started_at of a completed run, in whole SECONDS; None if unusable."""
+    if r.get("status") != "completed":
+        return None
+    start_s = r.get("run_started_at")
+    end_s = r.get("updated_at")
+    if not (start_s and end_s):
+        return None
+    try:
+        start = datetime.fromisoformat(start_s.replace("Z", "+00:00"))
+        end = datetime.fromisoformat(end_s.replace("Z", "+00:00"))
+        sec = int((end - start).total_seconds())
+    except Exception:
+        return None
+    return sec if sec > 0 else None
+
+
 def durations_from_github_runs(obj: dict) -> List[int]:
     """
     Extract completed run durations in SECONDS from a GitHub workflow_runs payload.
@@ -131,23 +343,39 @@ def durations_from_github_runs(obj: dict) -> List[int]:
     runs = obj.get("workflow_runs") or []
     out: List[int] = []
     for r in runs:
-        if r.get("status") != "completed":
-            continue
-        start_s = r.get("run_started_at")
-        end_s = r.get("updated_at")
-        if not (start_s and end_s):
-            continue
-        try:
-            start = datetime.fromisoformat(start_s.replace("Z", "+00:00"))
-            end = datetime.fromisoformat(end_s.replace("Z", "+00:00"))
-            sec = int((end - start).total_seconds())
-            if sec > 0:
-                out.append(sec)
-        except Exception:
-            continue
+        sec = _run_seconds(r)
+        if sec is not None:
+            out.append(sec)
     return out
 
 
+def _github_runs_daily(runs: Iterable[dict], totals: Dict[date, float]) -> None:
+    """Add each usable run's hours to the UTC date of its run_started_at, in one pass."""
+    for r in runs:
+        sec = _run_seconds(r)
+        if sec is not None:
+            d = date.fromisoformat(r["run_started_at"][:10])
+            totals[d] = totals.get(d, 0.0) + (sec / 3600.0)
+
+
+def parse_github_runs(obj: dict) -> Dict[date, float]:
+    """
+    Daily totals in HOURS of a workflow_runs payload, keyed by run_started_at's date.
+    Each run is paired with its own date, so runs without a duration (in progress,
+    cancelled before starting) are simply left out.
+    """
+    totals: Dict[date, float] = {}
+    _github_runs_daily(obj.get("workflow_runs") or [], totals)
+    return totals
+
+
+def parse_github_runs_stream(fh: IO[str]) -> Dict[date, float]:
+    """parse_github_runs() over an open file: one payload or several back to back (gh api --paginate)."""
+    totals: Dict[date, float] = {}
+    _github_runs_daily(iter_json_items(fh, "workflow_runs"), totals)
+    return totals
+
+
 def daily_totals_from_durations(
     secs: Iterable[int],
     dates: Iterable[str],
@@ -173,3 +401,151 @@ def daily_totals_from_durations(
             d = date.fromisoformat(ds)
         totals[d] = totals.get(d, 0.0) + (s / 3600.0)
     return totals
+
+
+# --- Streaming input ---
+
+_CHUNK = 1 << 20  # characters read at a time
+_WS = re.compile(r"[ \t\n\r]*")
+_AFTER_VALUE = frozenset(" \t\n\r,:]}")  # what may follow a complete value
+_DECODER = json.JSONDecoder()
+
+
+class _JsonReader:
+    """Just enough of an incremental JSON tokenizer for iter_json_items()."""
+    __slots__ = ("fh", "chunk", "buf", "pos", "eof")
+
+    def __init__(self, fh: IO[str], chunk: int = _CHUNK):
+        self.fh, self.chunk = fh, chunk
+        self.buf, self.pos, self.eof = "", 0, False
+
+    def _fill(self) -> bool:
+        # read at least as much as is buffered, so re-decoding a long value stays linear
+        data = "" if self.eof else self.fh.read(max(self.chunk, len(self.buf) - self.pos))
+        self.buf, self.pos = self.buf[self.pos:] + data, 0
+        self.eof = not data
+        return bool(data)
+
+    def peek(self) -> str:
+        """Next non-blank character, not consumed; "" at the end."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def take(self, allowed: str) -> str:
+        buf, pos = self.buf, self.pos
+        if pos < len(buf) and buf[pos] in allowed:  # usual case: no blank before it
+            self.pos = pos + 1
+            return buf[pos]
+        c = self.peek()
+        if not c or c not in allowed:
+            raise ValueError(f"expected one of {allowed!r} at {'end of input' if not c else repr(c)}")
+        self.pos += 1
+        return c
+
+    def value(self) -> Any:
+        """Decode one complete value (a number is only complete once a delimiter follows it)."""
+        if self.pos >= len(self.buf) or self.buf[self.pos] in " \t\n\r":
+            self.peek()
+        while True:
+            try:
+                v, end = _DECODER.raw_decode(self.buf, self.pos)
+                # "12" of "12.5" decodes too, so wait for the delimiter after it
+                if self.eof or (end < len(self.buf) and self.buf[end] in _AFTER_VALUE):
+                    self.pos = end
+                    return v
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+
+def iter_json_items(fh: IO[str], key: str, chunk: int = _CHUNK) -> Iterator[Any]:
+    """
+    Yield the items of the array under `key` in each top-level JSON object of
+    `fh`: one object, or several back to back as `gh api --paginate` writes
+    pages. Reads `chunk` characters at a time and holds one decoded item at a
+    time; other members are decoded and dropped, and a `key` that is missing,
+    null or not an array yields nothing (like obj.get(key) or []).
+    Malformed input raises ValueError.
+    """
+    r = _JsonReader(fh, chunk)
+    while r.peek():
+        r.take("{")
+        if r.peek() == "}":
+            r.take("}")
+            continue
+        while True:
+            name = r.value()
+            if not isinstance(name, str):
+                raise ValueError("object key is not a string")
+            r.take(":")
+            if name == key and r.peek() == "[":
+                r.take("[")
+                if r.peek() == "]":
+                    r.take("]")
+                else:
+                    while True:
+                        yield r.value()
+                        if r.take(",]") == "]":
+                            break
+            else:
+                r.value()
+            if r.take(",}") == "}":
+                break
+
+
+MODES = ("toggl", "github")
+_SUFFIXES = {"toggl": (".json", ".csv"), "github": (".json",)}
+
+
+def input_files(paths: Iterable[str], mode: str) -> List[str]:
+    """Paths with each directory replaced by its `mode` input files (.json; toggl also .csv), sorted."""
+    out: List[str] = []
+    for p in paths:
+        if os.path.isdir(p):
+            out += sorted(os.path.join(p, f) for f in os.listdir(p)
+                          if f.endswith(_SUFFIXES[mode]) and os.path.isfile(os.path.join(p, f)))
+        else:
+            out.append(p)
+    return out
+
+
+def parse_file(path: str, mode: str, tz: str = "UTC") -> Dict[date, float]:
+    """Daily totals of one input file, streamed: Toggl .csv / .json, or GitHub runs JSON."""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}")
+    if mode == "toggl" and path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as fh:
+            return parse_toggl_csv_stream(fh, tz)
+    with open(path, encoding="utf-8") as fh:
+        if mode == "toggl":
+            return parse_toggl_json_stream(fh, tz)
+        return parse_github_runs_stream(fh)
+
+
+def merge_totals(parts: Iterable[Dict[date, float]]) -> Dict[date, float]:
+    """Sum per-file daily totals, in the order given."""
+    out: Dict[date, float] = {}
+    for part in parts:
+        for d, h in part.items():
+            out[d] = out.get(d, 0.0) + h
+    return out
+
+
+def parse_files(paths: Iterable[str], mode: str, tz: str = "UTC",
+                workers: Optional[int] = None) -> Dict[date, float]:
+    """
+    Daily totals over many input files (directories expand via input_files()).
+    Files are parsed in up to `workers` processes (default: one per CPU) and
+    merged in input order, so the result does not depend on `workers`.
+    """
+    files = input_files(paths, mode)
+    workers = min(workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        return merge_totals(parse_file(f, mode, tz) for f in files)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return merge_totals(ex.map(parse_file, files, [mode] * len(files), [tz] * len(files)))
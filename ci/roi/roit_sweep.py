@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# roi/roit_sweep.py
+"""
+ROIT sensitivity sweep: compute_roit.py over a grid of inputs, in one process.
+
+Enabled by ROIT_SWEEP=TABLE (compute_roit.py hands over to main()). Each
+numeric input of compute_roit.py may then be a grid instead of a number:
+
+    120              one value
+    90,120,150       a list
+    60:180:25        25 evenly spaced values from 60 to 180, both included
+
+The sweep is the cartesian product of all inputs. Every point is evaluated
+under all four ROIT_MODE strategies (human, mixed, dual, legacy) with NumPy,
+ROIT_SWEEP_BATCH points at a time, using the single-scenario script's float
+operations in its order. A row therefore holds exactly the values
+compute_roit.py would compute for that point, before rounding.
+
+TABLE gets one row per point: the swept inputs as given, then
+<mode>_benefit / <mode>_roit for human, mixed and legacy, and
+dual_roit_runtime (dual's benefit and primary ROIT are human's). A .npy
+TABLE is a structured array (np.load, no pickle) with exact values; any
+other name is written as CSV with 10 significant digits. Summary
+statistics per strategy, and each strategy's best point, go to stdout and
+to ROI_JSON_PATH (default roit-sweep.json).
+
+Memory is O(ROIT_SWEEP_BATCH), whatever the grid size: the statistics are
+accumulated per batch. Counts, min and max are exact, the mean up to float
+rounding; percentiles come from a KLL sketch on NumPy arrays (the
+algorithm of dora-refactor/dora_sketch.py) with rank error ROIT_SWEEP_EPS
+(default 0.001), and are exact for grids of up to 1.7/EPS points.
+"""
+import json, math, os, sys, time
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+SCHEMA = "roit-sweep/v1"
+MODES = ("human", "mixed", "dual", "legacy")
+# (env, int?, default): compute_roit.py's inputs; None = required
+INPUTS = (
+    ("TB", False, None), ("TA", False, None), ("RUNS", True, None),
+    ("PB", False, None), ("PA", False, None), ("PRS", True, None),
+    ("R", False, None), ("H", False, None),
+    ("FLOOR_TA_SEC", False, 1.0), ("BLOCKING_FACTOR", False, 1.0),
+    ("PARALLELISM", False, 1.0), ("H_COMPUTE", False, 0.0),
+)
+OUTPUTS = tuple(f"{m}_{k}" for m in MODES for k in ("benefit", "roit")) + ("dual_roit_runtime",)
+COLUMNS = tuple(c for c in OUTPUTS if not c.startswith("dual_") or c == "dual_roit_runtime")
+CSV_FMT = "%.10g"
+PCTLS = (5, 25, 50, 75, 95)
+
+def parse_grid(name, value, is_int=False):
+    """Values of one input: N | A,B,... | LO:HI:COUNT. Ints truncate like compute_roit._i."""
+    try:
+        parts = value.split(":")
+        if len(parts) == 3:
+            n = int(parts[2])
+            if n < 1:
+                raise ValueError(value)
+            vals = np.linspace(float(parts[0]), float(parts[1]), n)
+        elif len(parts) == 1:
+            vals = np.array([float(v) for v in value.split(",")], dtype=np.float64)
+        else:
+            raise ValueError(value)
+    except ValueError:
+        raise SystemExit(f"Bad grid for {name}: {value!r}")
+    if is_int:
+        if not np.isfinite(vals).all() or np.abs(vals).max() >= 2.0 ** 63:
+            raise SystemExit(f"Bad int for {name}: {value!r}")
+        vals = np.trunc(vals).astype(np.int64)
+    return vals
+
+def grids_from_env(env=os.environ):
+    out = {}
+    for name, is_int, default in INPUTS:
+        v = env.get(name)
+        if v is None:
+            if default is None:
+                raise SystemExit(f"Missing env: {name}")
+            v = str(default)
+        out[name] = parse_grid(name, v, is_int)
+    return out
+
+def evaluate(p):
+    """
+    {column: array} for a batch of points; `p` maps every INPUTS name to an
+    array. Same operations as compute_roit.py, elementwise.
+    """
+    nan = np.nan
+    # sanitize: max(0, min(1, p)), max(ta, floor), max(C, 1) with Python's NaN handling
+    pb = np.fmax(np.fmin(p["PB"], 1.0), 0.0)
+    pa = np.fmax(np.fmin(p["PA"], 1.0), 0.0)
+    ta = np.where(p["FLOOR_TA_SEC"] > p["TA"], p["FLOOR_TA_SEC"], p["TA"])
+    C = np.where(1.0 > p["PARALLELISM"], 1.0, p["PARALLELISM"])
+    H, B, Hc = p["H"], p["BLOCKING_FACTOR"], p["H_COMPUTE"]
+    runs, prs = p["RUNS"].astype(np.float64), p["PRS"].astype(np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        time_delta_hours = ((p["TB"] - ta) * runs) / 3600.0
+        pr_benefit_hours = (pa - pb) * prs * p["R"]
+        per_h = lambda x: np.where(H > 0, x / H, nan)
+        mixed = (B / C) * time_delta_hours + pr_benefit_hours
+        legacy = time_delta_hours + pr_benefit_hours
+        cols = {
+            "human_benefit": pr_benefit_hours, "human_roit": per_h(pr_benefit_hours),
+            "mixed_benefit": mixed, "mixed_roit": per_h(mixed),
+            "dual_benefit": pr_benefit_hours, "dual_roit": per_h(pr_benefit_hours),
+            "legacy_benefit": legacy, "legacy_roit": per_h(legacy),
+            "dual_roit_runtime": np.where(Hc > 0, time_delta_hours / Hc, nan),
+        }
+    return cols
+
+def k_for_eps(eps):
+    """Compactor size giving roughly `eps` normalized rank error."""
+    return max(8, math.ceil(1.7 / eps))
+
+class _KLL:
+    """
+    KLL quantile sketch (c=2/3, alternating coin, so deterministic) whose
+    levels are arrays; update() takes a whole batch. Level h holds items of
+    weight 2**h; memory is O(k log(n/k)).
+    """
+    __slots__ = ("k", "levels", "n", "min", "max", "_coin")
+    C = 2.0 / 3.0
+
+    def __init__(self, k):
+        self.k = int(k)
+        self.levels = [np.empty(0)]
+        self.n, self.min, self.max, self._coin = 0, None, None, 0
+
+    def _capacity(self, h):
+        return int(math.ceil(self.C ** (len(self.levels) - h - 1) * self.k)) + 1
+
+    def update(self, x):
+        """Add a batch of non-NaN values."""
+        self.n += int(x.size)
+        lo, hi = float(x.min()), float(x.max())
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+        self.levels[0] = np.concatenate([self.levels[0], x])
+        while sum(a.size for a in self.levels) >= sum(map(self._capacity, range(len(self.levels)))):
+            h = next(h for h, a in enumerate(self.levels) if a.size >= self._capacity(h))
+            if h + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[h])
+            # odd count: the largest item stays behind
+            odd = items.size % 2
+            self.levels[h] = items[items.size - odd:]
+            self._coin ^= 1
+            self.levels[h + 1] = np.concatenate([self.levels[h + 1], items[self._coin:items.size - odd:2]])
+
+    def quantile(self, q):
+        """Interpolated quantile, q in [0,1] (the exact percentile rule below the first compaction)."""
+        if not self.n:
+            return None
+        if q <= 0: return self.min
+        if q >= 1: return self.max
+        xs = np.concatenate(self.levels)
+        ws = np.concatenate([np.full(a.size, 1 << h, dtype=np.int64) for h, a in enumerate(self.levels)])
+        order = np.argsort(xs, kind="stable")
+        xs, acc = xs[order], np.cumsum(ws[order])  # ranks [acc-w, acc) map to x
+        k = q * (self.n - 1)
+        f, c = math.floor(k), math.ceil(k)
+        lo = float(xs[np.searchsorted(acc, f, "right")])
+        hi = float(xs[min(int(np.searchsorted(acc, c, "right")), xs.size - 1)])
+        return lo if f == c else lo + (hi - lo) * (k - f)
+
+class _Stats:
+    """One column's summary, batch by batch."""
+    __slots__ = ("n", "ok", "positive", "total", "sketch")
+
+    def __init__(self, k):
+        self.n = self.ok = self.positive = 0
+        self.total = 0.0
+        self.sketch = _KLL(k)
+
+    def add(self, x):
+        ok = x[~np.isnan(x)]
+        self.n += int(x.size)
+        if ok.size:
+            self.ok += int(ok.size)
+            self.positive += int(np.count_nonzero(ok > 0))
+            self.total += float(ok.sum())
+            self.sketch.update(ok)
+
+    def result(self):
+        out = {"n": self.n, "na": self.n - self.ok}
+        if self.ok:
+            sk = self.sketch
+            out.update(min=sk.min, max=sk.max, mean=self.total / self.ok,
+                       positive=round(self.positive / self.ok, 6))
+            out.update({f"p{q}": float(sk.quantile(q / 100)) for q in PCTLS})
+        return out
+
+def _fmt(v):
+    return "NA" if v is None else f"{v:.2f}"
+
+class _Csv:
+    __slots__ = ("f", "inputs")
+
+    def __init__(self, path, names, grids):
+        self.f = open(path, "w", encoding="utf-8")
+        self.f.write(",".join(names) + "\n")
+        # an input has few distinct values: format each once
+        self.inputs = [[str(v) if g.dtype.kind == "i" else CSV_FMT % v for v in g.tolist()]
+                       for g in grids]
+
+    def write(self, block, coords):
+        fields = [[strs[i] for i in c.tolist()] for strs, c in zip(self.inputs, coords)]
+        fields += [list(map(CSV_FMT.__mod__, block[c].tolist())) for c in COLUMNS]
+        self.f.write("\n".join(map(",".join, zip(*fields))) + "\n")
+
+    def close(self):
+        self.f.close()
+
+class _Npy:
+    __slots__ = ("mm", "at")
+
+    def __init__(self, path, dtype, n):
+        self.mm = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(n,))
+        self.at = 0
+
+    def write(self, block, coords):
+        self.mm[self.at:self.at + len(block)] = block
+        self.at += len(block)
+
+    def close(self):
+        self.mm.flush()
+        del self.mm
+
+def sweep(grids, table, batch=1 << 18, eps=0.001):
+    """Evaluate the grid into `table`; returns the summary dict."""
+    names = [n for n, _, _ in INPUTS]
+    swept = [n for n in names if len(grids[n]) > 1]
+    shape = tuple(len(grids[n]) for n in names)
+    total = int(np.prod(shape, dtype=np.int64))
+    dtype = np.dtype([(n, grids[n].dtype) for n in swept] + [(c, np.float64) for c in COLUMNS])
+    out = (_Npy(table, dtype, total) if table.endswith(".npy")
+           else _Csv(table, dtype.names, [grids[n] for n in swept]))
+    k = k_for_eps(eps)
+    stats = {c: _Stats(k) for c in OUTPUTS if c not in ("dual_benefit", "dual_roit")}  # dual's are human's
+    best = {m: (-np.inf, None) for m in MODES}
+    try:
+        for lo in range(0, total, batch):
+            hi = min(lo + batch, total)
+            idx = np.unravel_index(np.arange(lo, hi, dtype=np.int64), shape)
+            p = {n: grids[n][i] for n, i in zip(names, idx)}
+            cols = evaluate(p)
+            block = np.empty(hi - lo, dtype=dtype)
+            for n in swept:
+                block[n] = p[n]
+            for c, st in stats.items():
+                st.add(cols[c])
+            for c in COLUMNS:
+                block[c] = cols[c]
+            for m in MODES:
+                r = cols[f"{m}_roit"]
+                if not np.isnan(r).all():
+                    j = int(np.nanargmax(r))
+                    if r[j] > best[m][0]:
+                        best[m] = (float(r[j]), {n: p[n][j].item() for n in names})
+            out.write(block, [i for n, i in zip(names, idx) if n in swept])
+    finally:
+        out.close()
+    summary = {
+        "schema": SCHEMA, "points": total, "table": table, "swept": {n: len(grids[n]) for n in swept},
+        "fixed": {n: grids[n][0].item() for n in names if n not in swept},
+        "percentiles": {"sketch": "kll", "k": k, "eps": eps},
+        "modes": {},
+    }
+    for m in MODES:
+        src = "human" if m == "dual" else m
+        s = {"roit": stats[f"{src}_roit"].result(), "benefit_hours": stats[f"{src}_benefit"].result(),
+             "best": best[m][1]}
+        if m == "dual":
+            s["roit_runtime"] = stats["dual_roit_runtime"].result()
+        summary["modes"][m] = s
+    return summary
+
+def main(env=os.environ):
+    if np is None:
+        raise SystemExit("ROIT_SWEEP needs numpy")
+    table = env["ROIT_SWEEP"]
+    try:
+        batch = int(env.get("ROIT_SWEEP_BATCH", "262144"))
+    except ValueError:
+        raise SystemExit(f"Bad int for ROIT_SWEEP_BATCH: {env.get('ROIT_SWEEP_BATCH')!r}")
+    try:
+        eps = float(env.get("ROIT_SWEEP_EPS", "0.001"))
+        if not 0 < eps < 1:
+            raise ValueError(eps)
+    except ValueError:
+        raise SystemExit(f"Bad ROIT_SWEEP_EPS: {env.get('ROIT_SWEEP_EPS')!r}")
+    json_path = env.get("ROI_JSON_PATH", "roit-sweep.json")
+    grids = grids_from_env(env)
+    t0 = time.time()
+    summary = sweep(grids, table, max(batch, 1), eps)
+    summary["seconds"] = round(time.time() - t0, 3)
+
+    print("## ROIT sweep (artifacts only)")
+    print(f"- Points: {summary['points']} | Swept: "
+          + (", ".join(f"{n}×{k}" for n, k in summary["swept"].items()) or "none"))
+    for m in MODES:
+        r = summary["modes"][m]["roit"]
+        print(f"- {m}: ROIT p5/p50/p95 = {_fmt(r.get('p5'))}/{_fmt(r.get('p50'))}/{_fmt(r.get('p95'))}"
+              f" | positive {r.get('positive', 0):.1%} | NA {r['na']}")
+    print(f"- Wrote {table} in {summary['seconds']:.2f}s")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(f"- Wrote {json_path}")
+    return 0
+
+if __name__ == "__main__":
+    if not os.environ.get("ROIT_SWEEP"):
+        sys.exit("usage: ROIT_SWEEP=table.csv|table.npy TB=... TA=... [grids] roit_sweep.py")
+    sys.exit(main())
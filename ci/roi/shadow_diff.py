@@ -1,47 +1,158 @@
 #!/usr/bin/env python3
+# Usage:
+#   shadow_diff.py <old.json> <new.json>
+#   shadow_diff.py --batch <dir|manifest> [--out FILE.ndjson] [--workers N] [--glob PATTERN]
+#
+# Batch mode diffs every consecutive pair of roit.json files in one process
+# (or a pool of --workers): the files under a directory named --glob
+# (default roit.json, so roit-sweep.json and friends stay out), sorted by
+# path, or the paths listed in a manifest (one per line, relative to it;
+# # comments). One NDJSON record per pair, in order, goes to --out (default
+# stdout). GITHUB_OUTPUT gets verdict (ERROR if any file could not be read or
+# has no benefit_hours, else REVIEW or ACCEPT), reviews and errors. Exit 2 if
+# MODE=fail and any pair needs review, else 1 if any pair errored.
 import os, sys, json, math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
-def load(path):
+def load(path, strict=False):
     with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+        doc = json.load(f)
+    # batch: no silent 0.0, a file without it is not a compute_roit.py output
+    if strict and (not isinstance(doc, dict) or "benefit_hours" not in doc):
+        raise ValueError(f"{path}: not a roit.json (no benefit_hours)")
+    return doc
 
-def sgn(x): 
+def sgn(x):
     return 0 if x == 0 else (1 if x > 0 else -1)
 
-if len(sys.argv) != 3:
-    sys.exit("usage: shadow_diff.py <old.json> <new.json>")
-
-old = load(sys.argv[1])
-new = load(sys.argv[2])
-
-tol  = float(os.getenv("SHADOW_TOL", "0.05"))   # 5% default
-mode = os.getenv("MODE", "warn")                # warn | fail
-
-bo = float(old.get("benefit_hours", 0.0))
-bn = float(new.get("benefit_hours", 0.0))
-to = float(old.get("benefit_time_hours", 0.0))
-tn = float(new.get("benefit_time_hours", 0.0))
-po = float(old.get("benefit_pr_hours", 0.0))
-pn = float(new.get("benefit_pr_hours", 0.0))
-
-den = abs(bo) if abs(bo) > 1e-9 else 1.0
-rel = abs(bn - bo) / den
-ok  = (rel <= tol) and (sgn(to) == sgn(tn)) and (sgn(po) == sgn(pn))
-verdict = "ACCEPT" if ok else "REVIEW"
-
-print("### ROI shadow diff")
-print(f"- benefit_hours old/new: {bo:.2f} → {bn:.2f} (Δ={bn-bo:.2f}, rel={rel:.2%}, tol={tol:.0%})")
-print(f"- time term sign: {sgn(to)} → {sgn(tn)}")
-print(f"- pr   term sign: {sgn(po)} → {sgn(pn)}")
-print(f"- Verdict: {verdict} ({'non-blocking' if mode!='fail' else 'blocking'})")
-
-# GitHub outputs
-out = os.getenv("GITHUB_OUTPUT")
-if out:
-    with open(out, "a", encoding="utf-8") as fh:
-        fh.write(f"verdict={verdict}\n")
-        fh.write(f"rel_delta={rel:.6f}\n")
-
-# Exit status
-if mode == "fail" and not ok:
-    sys.exit(2)
+def compare(old, new, tol):
+    bo = float(old.get("benefit_hours", 0.0))
+    bn = float(new.get("benefit_hours", 0.0))
+    to = float(old.get("benefit_time_hours", 0.0))
+    tn = float(new.get("benefit_time_hours", 0.0))
+    po = float(old.get("benefit_pr_hours", 0.0))
+    pn = float(new.get("benefit_pr_hours", 0.0))
+
+    den = abs(bo) if abs(bo) > 1e-9 else 1.0
+    rel = abs(bn - bo) / den
+    ok  = (rel <= tol) and (sgn(to) == sgn(tn)) and (sgn(po) == sgn(pn))
+    return {
+        "verdict": "ACCEPT" if ok else "REVIEW",
+        "rel_delta": rel,
+        "benefit_hours": [bo, bn],
+        "time_sign": [sgn(to), sgn(tn)],
+        "pr_sign": [sgn(po), sgn(pn)],
+    }
+
+# ---------- batch ----------
+def batch_inputs(spec, pattern):
+    """Files under directory `spec` named `pattern`, by path; or a manifest's paths (relative to it; # comments), in order."""
+    spec = Path(spec)
+    if spec.is_dir():
+        return sorted(p for p in spec.rglob(pattern) if p.is_file())
+    paths = []
+    for line in spec.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            p = Path(line)
+            paths.append(p if p.is_absolute() else spec.parent / p)
+    return paths
+
+def diff_pair(pair, tol):
+    old, new = pair
+    rec = {"old": str(old), "new": str(new)}
+    try:
+        rec.update(compare(load(old, strict=True), load(new, strict=True), tol))
+    except (OSError, ValueError, TypeError, AttributeError) as e:
+        rec["error"] = str(e)
+    return rec
+
+def run_batch(spec, out, tol, workers=1, pattern="roit.json"):
+    """diff_pair() every consecutive pair into NDJSON `out`; returns (pairs, reviews, errors)."""
+    paths = batch_inputs(spec, pattern)
+    pairs = list(zip(paths, paths[1:]))
+    counts = [0, 0, 0]
+    workers = max(1, min(workers, len(pairs)))
+    ex = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        tols = [tol] * len(pairs)
+        results = (ex.map(diff_pair, pairs, tols, chunksize=max(1, len(pairs) // (workers * 4))) if ex
+                   else map(diff_pair, pairs, tols))
+        for rec in results:
+            out.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            counts[0] += 1
+            counts[1] += rec.get("verdict") == "REVIEW"
+            counts[2] += "error" in rec
+    finally:
+        if ex:
+            ex.shutdown()
+    return tuple(counts)
+
+def main(argv):
+    tol  = float(os.getenv("SHADOW_TOL", "0.05"))   # 5% default
+    mode = os.getenv("MODE", "warn")                # warn | fail
+    out = os.getenv("GITHUB_OUTPUT")
+
+    if len(argv) > 1 and argv[1] == "--batch":
+        usage = "usage: shadow_diff.py --batch <dir|manifest> [--out FILE.ndjson] [--workers N] [--glob PATTERN]"
+        opts, rest = {"--out": "-", "--workers": "1", "--glob": "roit.json"}, argv[2:]
+        if not rest or rest[0].startswith("--"):
+            sys.exit(usage)
+        spec, rest = rest[0], rest[1:]
+        while rest:
+            if rest[0] not in opts or len(rest) < 2:
+                sys.exit(usage)
+            opts[rest[0]], rest = rest[1], rest[2:]
+        try:
+            workers = int(opts["--workers"])
+        except ValueError:
+            sys.exit(usage)
+        fh = sys.stdout if opts["--out"] == "-" else open(opts["--out"], "w", encoding="utf-8")
+        try:
+            pairs, reviews, errors = run_batch(spec, fh, tol, workers, opts["--glob"])
+        except OSError as e:
+            sys.exit(f"failed to read {spec}: {e}")
+        finally:
+            if fh is not sys.stdout:
+                fh.close()
+        # a pair that could not be compared is never an ACCEPT
+        verdict = "ERROR" if errors else "REVIEW" if reviews else "ACCEPT"
+        print(f"shadow-batch: pairs={pairs} reviews={reviews} errors={errors} verdict={verdict}", file=sys.stderr)
+        if out:
+            with open(out, "a", encoding="utf-8") as gh:
+                gh.write(f"verdict={verdict}\n")
+                gh.write(f"reviews={reviews}\n")
+                gh.write(f"errors={errors}\n")
+        if mode == "fail" and reviews:
+            return 2
+        return 1 if errors else 0
+
+    if len(argv) != 3:
+        sys.exit("usage: shadow_diff.py <old.json> <new.json>")
+
+    try:
+        r = compare(load(argv[1]), load(argv[2]), tol)
+    except (OSError, ValueError) as e:
+        sys.exit(f"shadow_diff: {e}")
+    (bo, bn), rel, verdict = r["benefit_hours"], r["rel_delta"], r["verdict"]
+
+    print("### ROI shadow diff")
+    print(f"- benefit_hours old/new: {bo:.2f} → {bn:.2f} (Δ={bn-bo:.2f}, rel={rel:.2%}, tol={tol:.0%})")
+    print(f"- time term sign: {r['time_sign'][0]} → {r['time_sign'][1]}")
+    print(f"- pr   term sign: {r['pr_sign'][0]} → {r['pr_sign'][1]}")
+    print(f"- Verdict: {verdict} ({'non-blocking' if mode!='fail' else 'blocking'})")
+
+    # GitHub outputs
+    if out:
+        with open(out, "a", encoding="utf-8") as fh:
+            fh.write(f"verdict={verdict}\n")
+            fh.write(f"rel_delta={rel:.6f}\n")
+
+    # Exit status
+    if mode == "fail" and verdict != "ACCEPT":
+        return 2
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
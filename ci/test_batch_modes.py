@@ -0,0 +1,111 @@
+import json
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+VOI = Path(__file__).parent / "voi" / "void_from_dora.py"
+SHADOW = Path(__file__).parent / "roi" / "shadow_diff.py"
+
+def run(*args, **env):
+    base = {k: v for k, v in os.environ.items() if not k.startswith(("VOI_", "SHADOW_", "MODE", "GITHUB_"))}
+    return subprocess.run([sys.executable, *map(str, args)], env={**base, **env}, capture_output=True, text=True)
+
+def nightly(root, days, seed):
+    rnd = random.Random(seed)
+    for d in range(days):
+        night = root / f"2025-10-{d + 1:02d}"
+        night.mkdir(parents=True)
+        total = rnd.randrange(0, 40)
+        (night / "dora.json").write_text(json.dumps({
+            "window_days": 14, "deploys": {"total": total, "fail": rnd.randrange(0, total + 1), "per_day": total / 14},
+            "lead_time": {"n": total, "p50": rnd.uniform(10, 300), "p90": rnd.uniform(100, 900)}}))
+        (night / "roit.json").write_text(json.dumps({"benefit_hours": rnd.uniform(-2, 20),
+                                                     "benefit_pr_hours": rnd.uniform(-1, 9)}))
+
+def records(text):
+    return [json.loads(line) for line in text.splitlines()]
+
+def strip(recs):
+    return [{**r, "meta": {**r["meta"], "generated_at": None}} if "meta" in r else r for r in recs]
+
+def test_voi_batch_matches_single_runs_in_any_pool(tmp_path):
+    nightly(tmp_path / "h", 12, seed=25)
+    (tmp_path / "h" / "2025-10-04" / "dora.json").write_text('{"deploys": {}}')
+    one = run(VOI, "--batch", tmp_path / "h")
+    assert one.returncode == 1 and "inputs=12 errors=1" in one.stderr
+    recs = records(one.stdout)
+    assert [Path(r["source"]).parent.name for r in recs] == [f"2025-10-{d:02d}" for d in range(1, 13)]
+    assert recs[3] == {"source": str(tmp_path / "h" / "2025-10-04" / "dora.json"),
+                       "error": "bad dora.json: missing 'lead_time'"}
+    pooled = run(VOI, "--batch", tmp_path / "h", "--workers", "3", "--out", tmp_path / "v.ndjson")
+    assert strip(records((tmp_path / "v.ndjson").read_text())) == strip(recs)
+
+    src = tmp_path / "h" / "2025-10-07" / "dora.json"
+    assert run(VOI, src, tmp_path / "single").returncode == 0
+    single = json.loads((tmp_path / "single" / "voi_items.json").read_text())
+    assert strip([{"source": str(src), "ranking": [i["id"] for i in single["items"]], **single}]) == strip([recs[6]])
+
+    (tmp_path / "h" / "list.txt").write_text("# two nights\n2025-10-09/dora.json\n\n2025-10-02/dora.json\n")
+    listed = records(run(VOI, "--batch", tmp_path / "h" / "list.txt").stdout)
+    assert strip(listed) == strip([recs[8], recs[1]])
+    assert run(VOI, "--batch", tmp_path / "h", VOI_FAIL_CONF="x").returncode == 64
+
+def test_shadow_batch_diffs_consecutive_pairs_like_single_runs(tmp_path):
+    nightly(tmp_path / "h", 8, seed=26)
+    paths = sorted((tmp_path / "h").rglob("roit.json"))
+    gh = tmp_path / "gh"
+    p = run(SHADOW, "--batch", tmp_path / "h", "--workers", "2", MODE="fail", SHADOW_TOL="0.4", GITHUB_OUTPUT=str(gh))
+    recs = records(p.stdout)
+    assert [(r["old"], r["new"]) for r in recs] == [(str(a), str(b)) for a, b in zip(paths, paths[1:])]
+    reviews = sum(r["verdict"] == "REVIEW" for r in recs)
+    assert 0 < reviews < len(recs) and p.returncode == 2
+    assert gh.read_text() == f"verdict=REVIEW\nreviews={reviews}\nerrors=0\n"
+    for r in recs[:3]:
+        single = run(SHADOW, r["old"], r["new"], MODE="fail", SHADOW_TOL="0.4")
+        assert f"- Verdict: {r['verdict']} (blocking)" in single.stdout
+        assert single.returncode == (2 if r["verdict"] == "REVIEW" else 0)
+    assert run(SHADOW, "--batch", tmp_path / "h", SHADOW_TOL="100").returncode == 0
+    paths[2].write_text("not json")
+    gh.unlink()
+    p = run(SHADOW, "--batch", tmp_path / "h", SHADOW_TOL="100", GITHUB_OUTPUT=str(gh))
+    assert p.returncode == 1 and sum("error" in r for r in records(p.stdout)) == 2
+    assert gh.read_text() == "verdict=ERROR\nreviews=0\nerrors=2\n"
+    for path in paths:  # nothing compared: still not an ACCEPT
+        path.write_text("{}")
+    gh.unlink()
+    p = run(SHADOW, "--batch", tmp_path / "h", GITHUB_OUTPUT=str(gh))
+    assert p.returncode == 1 and "verdict=ERROR" in p.stderr
+    assert gh.read_text() == f"verdict=ERROR\nreviews=0\nerrors={len(paths) - 1}\n"
+
+def test_batches_skip_sibling_artifacts_and_reject_non_roit_inputs(tmp_path):
+    nightly(tmp_path / "h", 4, seed=27)
+    want_voi = strip(records(run(VOI, "--batch", tmp_path / "h").stdout))
+    want_shadow = records(run(SHADOW, "--batch", tmp_path / "h").stdout)
+    for night in sorted((tmp_path / "h").iterdir()):
+        (night / "roit-sweep.json").write_text(json.dumps({"schema": "roit-sweep/v1", "points": 8}))
+        (night / "dora.profile.json").write_text(json.dumps({"schema": "dora-profile/v1", "stages": []}))
+        (night / "dora.checkpoint.json").write_text(json.dumps({"schema": "dora-checkpoint/v2"}))
+        (night / "dora-rf.profile.json").write_text("{}")
+    voi = run(VOI, "--batch", tmp_path / "h")
+    assert voi.returncode == 0 and strip(records(voi.stdout)) == want_voi and len(want_voi) == 4
+    shadow = run(SHADOW, "--batch", tmp_path / "h")
+    assert shadow.returncode == 0 and records(shadow.stdout) == want_shadow and len(want_shadow) == 3
+
+    roit = sorted((tmp_path / "h").rglob("roit.json"))[1]
+    roit.write_text(json.dumps({"schema": "roit-sweep/v1", "points": 8}))
+    shadow = run(SHADOW, "--batch", tmp_path / "h")
+    assert shadow.returncode == 1
+    assert [r.get("error") for r in records(shadow.stdout)][:2] == [f"{roit}: not a roit.json (no benefit_hours)"] * 2
+    single = run(SHADOW, roit, sorted((tmp_path / "h").rglob("roit.json"))[0])
+    # a single pair still reads a missing benefit_hours as 0.0
+    assert single.returncode == 0 and "benefit_hours old/new: 0.00 →" in single.stdout
+
+def test_scripts_run_without_the_dora_tree(tmp_path):
+    nightly(tmp_path / "h", 3, seed=28)
+    for script in (SHADOW, VOI):
+        (tmp_path / script.name).write_text(script.read_text())
+    old, new = sorted((tmp_path / "h").rglob("roit.json"))[:2]
+    assert run(tmp_path / SHADOW.name, old, new).returncode == 0
+    assert "inputs=3 errors=0" in run(tmp_path / VOI.name, "--batch", tmp_path / "h").stderr
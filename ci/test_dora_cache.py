@@ -0,0 +1,56 @@
+import json
+import os
+from pathlib import Path
+
+import dora_cache
+from dora_testlib import write
+from dora_events import records
+from dora_io import iter_events
+
+EVENTS = [
+  {"schema": "events/v1", "type": "pr_merged", "sha": "a" * 40, "merge_commit_sha": "a" * 40,
+   "head_sha": "c" * 40, "merged_at": "2025-01-01T00:00:00Z", "pr": 1, "repo": "o/r"},
+  {"schema": "events/v1", "type": "deployment", "sha": "a" * 40, "status": "success",
+   "finished_at": "2025-01-01T00:10:00Z"},
+  {"type": "deployment", "sha": "b" * 40, "deploy_at": "2025-01-01T00:20:00Z"},
+  {"type": "pipeline_started", "sha": "é" * 3, "started_at": "bogus"},
+]
+
+def test_sidecar_matches_json_records(tmp_path):
+    p = write(tmp_path / "events.ndjson", EVENTS)
+    dora_cache.build(p)
+    with dora_cache.open_cache(p, verify=True) as c:
+        got = [r.to_row() for r in c.records()]
+        assert c.meta["n"] == 4
+        assert c.meta["counts"]["bad_schema"] == 2
+        assert c.meta["first_error"] == "[2] schema!=events/v1"
+    assert got == [r.to_row() for r in records(iter_events(p))]
+
+def test_sidecar_invalidated_by_size_and_content(tmp_path):
+    p = write(tmp_path / "events.ndjson", EVENTS)
+    assert dora_cache.open_cache(p) is None
+    dora_cache.build(p)
+    with open(p, "a", encoding="utf-8") as f:
+        f.write(json.dumps(EVENTS[0]) + "\n")
+    assert dora_cache.open_cache(p) is None  # size moved
+
+    dora_cache.build(p)
+    st = os.stat(p)
+    text = Path(p).read_text(encoding="utf-8").replace('"pr": 1', '"pr": 7')
+    Path(p).write_text(text, encoding="utf-8")
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert dora_cache.open_cache(p) is None  # same size, new mtime, new content
+
+    dora_cache.build(p)
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10**9))
+    c = dora_cache.open_cache(p)  # touched only: content hash still matches
+    assert c is not None and c.n == 5
+    c.close()
+
+def test_open_for_modes(tmp_path):
+    p = write(tmp_path / "events.ndjson", EVENTS)
+    assert dora_cache.open_for(p, "read") is None
+    assert dora_cache.open_for(p, "off") is None
+    c = dora_cache.open_for(p, "build")
+    assert c is not None and c.n == 4
+    c.close()
@@ -0,0 +1,66 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import dora_cache
+import dora_sqlite
+from dora_testlib import DORA, END, synth, write
+from dora_compute import Config, compute
+
+CLI = DORA / "compute-dora.py"
+
+def test_config_from_env_and_defaults():
+    cfg = Config.from_env({"PCTL": "75", "LT_ALLOW_FALLBACK": "Yes", "LEAD_UNIT": "MINUTES"},
+                          argv=["x", "--profile"])
+    assert (cfg.pctl, cfg.allow_fallback, cfg.lead_unit, cfg.profile) == (75, True, "minutes", True)
+    assert (cfg.window_days, cfg.min_lead_seconds, cfg.cache) == (14, 300, "read")
+    assert dict(Config().env_items())["MAX_FALLBACK_HOURS"] == 6.0
+    with pytest.raises(TypeError):
+        Config(windows=3)
+
+def test_cli_is_a_shim_over_compute(tmp_path):
+    events = synth(3000, 2)
+    path = tmp_path / "events.ndjson"
+    write(path, events)
+    env = {**os.environ, "WINDOW_DAYS": "0", "LT_ALLOW_FALLBACK": "1", "DORA_CACHE": "off"}
+    out = subprocess.run([sys.executable, str(CLI), str(path)], cwd=tmp_path, env=env,
+                         capture_output=True, text=True, check=True).stdout
+
+    res = compute(events, Config.from_env(env), now=END)
+    assert json.loads((tmp_path / "dora.json").read_text()) == res.dora
+    assert out.splitlines()[:len(res.report())] == res.report()
+    res.write_leadtime_csv(str(tmp_path / "api.csv"))
+    assert (tmp_path / "api.csv").read_text() == (tmp_path / "leadtime.csv").read_text()
+
+def test_many_windows_in_one_process():
+    events = synth(4000, 3)
+    totals = [compute(events, Config(window_days=w), now=END).dora["metrics"]["deploys_total"]
+              for w in (1, 7, 30)]
+    assert totals[0] <= totals[1] <= totals[2] and totals[2] > 0
+
+def test_leadtime_rows_echo_source_timestamps(tmp_path):
+    a, b = "a" * 40, "b" * 40
+    events = [
+        {"type": "pr_merged", "pr": 1, "sha": a, "merged_at": "2025-10-17T10:00:00.250+00:00"},
+        {"type": "deployment", "sha": a, "status": "success", "finished_at": "2025-10-17T12:01:00.850+02:00"},
+        {"type": "pr_merged", "pr": 2, "sha": b, "merged_at": "2025-10-17T09:00:00Z"},
+        {"type": "deployment", "sha": b, "status": "success", "finished_at": "2025-10-17T09:01:00.600Z"},
+    ]
+    path = tmp_path / "events.ndjson"
+    write(path, events)
+    dora_cache.build(str(path))
+    conn = dora_sqlite.connect(str(tmp_path / "e.db"), create=True)
+    dora_sqlite.append(conn, events)
+    conn.close()
+    want = ("2,{b},2025-10-17T09:00:00Z,2025-10-17T09:01:00.600000Z,60,1.01,0.0168,sha\n"
+            "1,{a},2025-10-17T10:00:00.250+00:00,2025-10-17T12:01:00.850000+02:00,60,1.01,0.0168,sha\n"
+            ).format(a=a, b=b)
+    for src, cache in ((path, "off"), (path, "read"), ("sqlite:" + str(tmp_path / "e.db"), "off")):
+        env = {**os.environ, "WINDOW_DAYS": "0", "LT_MIN_LEAD_SECONDS": "0", "DORA_CACHE": cache}
+        subprocess.run([sys.executable, str(CLI), str(src)], cwd=tmp_path, env=env,
+                       capture_output=True, text=True, check=True)
+        assert (tmp_path / "leadtime.csv").read_text().split("\n", 1)[1] == want
+        assert json.loads((tmp_path / "dora.json").read_text())["lead_time"]["median_h"] == 0.0168
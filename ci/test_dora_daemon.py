@@ -0,0 +1,96 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+from dora_testlib import END, ndjson, synth, write
+from dora_compute import Config, compute
+from dora_daemon import Follower, make_server
+
+class Clock:
+    def __init__(self, t):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+def test_follows_appends_and_slides_the_window(tmp_path):
+    events = synth(6000, 6)
+    path = tmp_path / "events.ndjson"
+    write(path, events[:2000])
+    cfg, clock = Config(window_days=7, allow_fallback=True), Clock(END + 30)
+    f = Follower(str(path), cfg, step=60, clock=clock)
+    assert f.poll() == 2000 and f.poll() == 0
+    assert f.result().dora == compute(events[:2000], cfg, now=END).dora
+
+    # a half-written line waits for its newline
+    tail = ndjson(events[2000:5000])
+    with open(path, "a") as fh:
+        fh.write(tail[:-40])
+    f.poll()
+    assert f.result().dora == compute(events[:4999], cfg, now=END).dora
+    with open(path, "a") as fh:
+        fh.write(tail[-40:])
+    f.poll()
+    assert f.result().details == compute(events[:5000], cfg, now=END).details
+
+    # days later the window has moved; state is re-windowed, not re-read
+    clock.t = END + 3 * 86400 + 59
+    assert f.result().dora == compute(events[:5000], cfg, now=END + 3 * 86400).dora
+    assert (f.status()["rebases"], f.status()["reloads"]) == (1, 0)
+
+def test_truncation_reloads_and_json_arrays_reload_whole(tmp_path):
+    events = synth(3000, 7)
+    path = tmp_path / "events.ndjson"
+    write(path, events)
+    cfg = Config(window_days=0)
+    f = Follower(str(path), cfg, step=0, clock=Clock(END))
+    f.poll()
+    write(path, events[:500])  # collect-events.sh: `: > OUT` then append
+    f.poll()
+    assert f.status()["reloads"] == 1 and f.result().dora == compute(events[:500], cfg, now=END).dora
+    # truncated and refilled past the old offset between two polls: same inode, bigger file
+    offset = f.status()["offset"]
+    write(path, events[1000:1600])
+    assert path.stat().st_size > offset
+    f.poll()
+    assert f.status()["reloads"] == 2 and f.result().dora == compute(events[1000:1600], cfg, now=END).dora
+    with open(path, "a") as fh:
+        fh.write(ndjson(events[1600:1700]))
+    assert f.poll() == 100 and f.status()["reloads"] == 2  # a plain append still only reads the tail
+
+    arr = tmp_path / "events.json"
+    arr.write_text(json.dumps(events[:800], indent=1))
+    g = Follower(str(arr), cfg, step=0, clock=Clock(END))
+    assert g.poll() == 800 and g.status()["mode"] == "whole_file"
+    arr.write_text(json.dumps(events[:900], indent=1))
+    assert g.poll() == 900
+    assert g.result().dora == compute(events[:900], cfg, now=END).dora
+
+def test_http_serves_dora_json_with_etags(tmp_path):
+    events = synth(1500, 8)
+    path = tmp_path / "events.ndjson"
+    write(path, events)
+    cfg = Config(window_days=14)
+    f = Follower(str(path), cfg, step=60, clock=Clock(END))
+    f.poll()
+    srv = make_server(f, "127.0.0.1:0")
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = "http://127.0.0.1:%d" % srv.server_address[1]
+    try:
+        with urllib.request.urlopen(base + "/dora.json") as r:
+            body, tag = r.read().decode(), r.headers["ETag"]
+        assert body == json.dumps(compute(events, cfg, now=END).dora, indent=2)
+        req = urllib.request.Request(base + "/dora.json", headers={"If-None-Match": tag})
+        try:
+            urllib.request.urlopen(req)
+            assert False, "expected 304"
+        except urllib.error.HTTPError as err:
+            assert err.code == 304
+        with urllib.request.urlopen(base + "/report") as r:
+            assert r.read().decode().startswith("## DORA (basics)")
+        with urllib.request.urlopen(base + "/status") as r:
+            assert json.loads(r.read())["events"] == 1500
+    finally:
+        srv.shutdown()
+        srv.server_close()
@@ -0,0 +1,68 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import dora_dedupe
+from dora_testlib import synth
+
+def lines(events):
+    return [json.dumps(e) for e in events]
+
+def test_append_skips_duplicates_and_catches_up_with_other_writers(tmp_path):
+    events = synth(1500, 11, days=30)
+    out = tmp_path / "events.ndjson"
+    seen, unique = set(), 0
+    for e in events[:1000]:
+        keys = dora_dedupe.dedupe_keys(e)
+        unique += not seen.intersection(keys)
+        seen.update(keys)
+    assert dora_dedupe.append_file(str(out), lines(events[:1000] + events[:10])) == (unique, 1010 - unique)
+    # a writer that bypasses the index; the next call folds its lines in first
+    with open(out, "a") as f:
+        f.write("\n".join(lines(events[1000:1200])) + "\n")
+    assert dora_dedupe.append_file(str(out), lines(events[1000:1200]))[0] == 0
+    assert dora_dedupe.verify(str(out)) == (set(), set())
+
+    # collect-events.sh truncates and refills OUT: the index starts over
+    out.write_text("\n".join(lines(events[:5])) + "\n")
+    assert dora_dedupe.append_file(str(out), lines(events[5:6] + events[1200:1201]))[0] == 2
+    assert dora_dedupe.verify(str(out)) == (set(), set())
+
+def test_upsert_rewrites_only_for_a_known_sha(tmp_path):
+    out = tmp_path / "events.ndjson"
+    dep = {"schema": "events/v1", "type": "deployment", "repo": "o/a", "env": "production"}
+    a, b = "a" * 40, "b" * 40
+    dora_dedupe.append_file(str(out), lines([{**dep, "sha": a, "status": "success",
+                                              "finished_at": "2025-10-01T12:00:00Z"}]))
+    ino = out.stat().st_ino
+    assert dora_dedupe.upsert_file(str(out), lines([{**dep, "sha": b, "status": "success",
+                                                     "finished_at": "2025-10-02T12:00:00Z"}])) == (1, 0)
+    assert out.stat().st_ino == ino  # new sha: appended in place
+    assert dora_dedupe.upsert_file(str(out), lines([{**dep, "sha": a, "status": "failure",
+                                                     "finished_at": "2025-10-03T12:00:00Z"}])) == (1, 1)
+    got = [json.loads(ln) for ln in out.read_text().splitlines()]
+    assert [(e["sha"], e["status"]) for e in got] == [(b, "success"), (a, "failure")]
+    assert dora_dedupe.verify(str(out)) == (set(), set())
+
+def test_rebuild_repairs_a_stale_index(tmp_path):
+    events = synth(300, 12, days=10)
+    out = tmp_path / "events.ndjson"
+    dora_dedupe.append_file(str(out), lines(events))
+    Path(dora_dedupe.index_path(str(out))).unlink()
+    with dora_dedupe.KeyIndex(dora_dedupe.index_path(str(out))) as idx:
+        idx.db.execute("INSERT INTO sources (path, offset, dev, ino) VALUES ('events.ndjson', 0, 0, 0)")
+    missing, stale = dora_dedupe.verify(str(out))
+    assert missing and not stale
+    assert dora_dedupe.rebuild(str(out)) == 300
+    assert dora_dedupe.verify(str(out)) == (set(), set())
+    assert dora_dedupe.main(["dora_dedupe.py", "verify", str(out)]) == 0
+    assert dora_dedupe.main(["dora_dedupe.py", "bogus"]) == 64
+
+def test_source_index_is_abstract(tmp_path):
+    class Partial(dora_dedupe.SourceIndex):
+        def _rows(self, e, src):
+            return []
+    with pytest.raises(TypeError):
+        Partial(str(tmp_path / "i.db"))
+    assert not (tmp_path / "i.db").exists()
@@ -0,0 +1,81 @@
+import json
+import random
+from datetime import datetime, timedelta, timezone
+
+from dora_testlib import T0, mixed
+from dora_aggregate import FAILURES, deployments_in_window, daily_histogram, failure_count
+from dora_engine import Engine, window_lo
+from dora_events import parse_epoch, records
+from dora_pair import lead_times_change, lead_times_deployment
+from dora_validate import assert_ndjson, shape_counts
+
+def _reference(events, lo, hi, min_sec):
+    recs = list(records(events))
+    deploys = deployments_in_window([r for r in recs if r.ts is None or r.ts >= lo], lo, hi)
+    ev = [r for r in recs if r.type.name == "PR_MERGED"] + deploys
+    return (daily_histogram(deploys), len(deploys), failure_count(deploys),
+            lead_times_change(ev, min_sec, 90), lead_times_deployment(ev, min_sec, 90))
+
+def _engine_view(eng, min_sec):
+    ok, failed = eng.totals()
+    return (eng.histogram(count_fail=True), ok + failed, failed,
+            eng.lead_change(min_sec, 90), eng.lead_deployment(min_sec, 90))
+
+def test_fused_engine_matches_staged_functions():
+    for seed in range(5):
+        events = mixed(seed, 300)
+        lo, hi = T0 + 5 * 86400, T0 + 15 * 86400
+        eng = Engine(lo=lo, hi=hi, fail=FAILURES, pr_index=True, validate=True)
+        eng.feed(events)
+        assert _engine_view(eng, 300) == _reference(events, lo, hi, 300)
+        assert eng.counts == shape_counts(events)
+        try:
+            assert_ndjson(events)
+            first = None
+        except AssertionError as e:
+            first = str(e)
+        assert eng.first_error == first
+
+def test_restore_then_tail_equals_one_pass():
+    events = mixed(7, 300)
+    lo, hi = T0 + 3 * 86400, T0 + 18 * 86400
+    kw = dict(lo=lo, hi=hi, fail=FAILURES, pr_index=True, validate=True,
+              merges=True, timeline=True)
+    whole = Engine(**kw)
+    whole.feed(events)
+    head = Engine(**kw)
+    head.feed(events[:120])
+    st = json.loads(json.dumps(head.to_state()))
+    resumed = Engine(**kw)
+    resumed.restore(st)
+    resumed.feed(events[120:])
+    assert _engine_view(resumed, 0) == _engine_view(whole, 0)
+    assert resumed.pair_merges(60) == whole.pair_merges(60)
+    assert (resumed.n, resumed.first_error, resumed.counts) == (whole.n, whole.first_error, whole.counts)
+
+def test_prune_equals_restore_into_later_window():
+    for seed in range(4):
+        events = mixed(seed, 300)
+        for kw in (dict(fail=FAILURES, window_prs=True, merges=True, timeline=True, pipelines=True),
+                   dict(fail=FAILURES, hi=T0 + 12 * 86400, merges=True, timeline=True)):
+            eng = Engine(lo=T0 + 2 * 86400, **kw)
+            eng.feed(events)
+            ref = Engine(lo=T0 + 9 * 86400 + 7, **kw)
+            ref.restore(eng.to_state())
+            eng.prune(T0 + 9 * 86400 + 7)
+            assert (eng.lo, eng.deploys, eng.daily_ok, eng.daily_fail, eng.merges) == \
+                   (ref.lo, ref.deploys, ref.daily_ok, ref.daily_fail, ref.merges)
+            assert dict(eng.ok_times) == dict(ref.ok_times)
+            assert dict(eng.timeline) == dict(ref.timeline)
+            assert eng.pair_merges(60) == ref.pair_merges(60)
+
+def test_window_lo_keeps_what_whole_days_keep():
+    rnd = random.Random(6)
+    for _ in range(500):
+        now = datetime.fromtimestamp(1760745600, timezone.utc) + timedelta(microseconds=rnd.randrange(86400 * 10**6))
+        w = rnd.randrange(1, 30)
+        lo = window_lo(now.timestamp(), w)
+        for off in (-1, 0, 1, rnd.randrange(-999999, 999999)):
+            ts = now - timedelta(days=w, microseconds=off)
+            assert (parse_epoch(ts.isoformat()) >= lo) == ((now - ts).days < w)
+    assert window_lo(1760745600, 0) is None
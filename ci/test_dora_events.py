@@ -0,0 +1,38 @@
+import random
+from datetime import datetime, timezone
+
+from dora_events import Event, EventType, Status, elapsed, epoch, epoch_parts, parse_epoch, split_epoch, iso_z, day
+
+def test_parse_epoch_forms():
+    assert parse_epoch("2025-01-01T00:00:00Z") == 1735689600
+    assert parse_epoch("2025-01-01T00:00:00") == 1735689600
+    assert parse_epoch("2025-01-01T02:00:00+02:00") == 1735689600
+    assert parse_epoch("nope") is None
+    assert parse_epoch("") is None
+    assert iso_z(1735689600) == "2025-01-01T00:00:00Z"
+    assert day(1735689600 - 1) == "2024-12-31"
+
+def test_from_dict_and_row_roundtrip():
+    d = {"type": "deployment", "sha": "a" * 40, "status": "Failure",
+         "deploy_at": "2025-01-01T00:10:00Z", "repo": "o/r"}
+    e = Event.from_dict(d)
+    assert e.type is EventType.DEPLOYMENT
+    assert e.status is Status.FAILURE
+    assert e.ts == 1735689600 + 600
+    assert e.sha is Event.from_dict(dict(d)).sha  # interned
+    r = Event.from_row(e.to_row())
+    assert r.to_row() == e.to_row()
+    assert Event.from_dict({"type": "deployment"}).status is Status.NONE
+    assert Event.from_dict({"type": "x", "status": "weird"}).type is EventType.OTHER
+
+def test_elapsed_is_exact_like_timedelta():
+    rnd = random.Random(4)
+    drifted = 0
+    for _ in range(2000):
+        a, b = (datetime.fromtimestamp(rnd.randrange(1700000000, 1800000000), timezone.utc)
+                .replace(microsecond=rnd.choice([0, rnd.randrange(1000000)])) for _ in range(2))
+        ta, tb = (parse_epoch(d.isoformat()) for d in (a, b))
+        assert epoch_parts(ta) == split_epoch(a.isoformat()) and epoch(*epoch_parts(ta)) == ta
+        assert elapsed(ta, tb) == (b - a).total_seconds()
+        drifted += tb - ta != (b - a).total_seconds()
+    assert drifted  # plain float subtraction would not match
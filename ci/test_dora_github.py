@@ -0,0 +1,146 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from dora_testlib import DORA
+from dora_github import Client
+
+CLI = DORA / "collect-events.py"
+
+def iso(day, hour=12):
+    return "2025-10-%02dT%02d:00:00Z" % (day, hour)
+
+def pulls(n):
+    out = []
+    for i in range(n):
+        merged = iso(1 + i % 28) if i % 5 else None
+        out.append({"number": i + 1, "state": "closed", "merged_at": merged,
+                    "merge_commit_sha": None if i % 7 == 0 else "%040x" % (i + 1),
+                    "head": {"sha": "%040x" % (10 ** 6 + i)},
+                    "base": {"ref": "main", "repo": {"full_name": "o/r"}}})
+    out[3]["merge_commit_sha"] = out[2]["merge_commit_sha"]  # a duplicate key for the de-dupe
+    return out
+
+def deployments(n):
+    return [{"id": i, "sha": "%040x" % (i + 1), "created_at": iso(1 + i % 28, 13),
+             "updated_at": iso(1 + i % 28, 14), "statuses_url": "https://x/%d/statuses" % i}
+            for i in range(n)]
+
+class FakeGitHub(ThreadingHTTPServer):
+    """Just enough of the REST API for collect-events: Link pagination and ETags."""
+    daemon_threads = True
+
+    def __init__(self, n_pulls=250, n_deploys=130, delay=0.02):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.lists = {"/repos/o/r/pulls": pulls(n_pulls), "/repos/o/r/deployments": deployments(n_deploys)}
+        self.delay, self.hits, self.inflight, self.peak = delay, [], 0, 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d" % self.server_address[1]
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *a):
+        pass
+
+    def do_GET(self):
+        srv = self.server
+        u = urlsplit(self.path)
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        with srv.lock:
+            srv.inflight += 1
+            srv.peak = max(srv.peak, srv.inflight)
+        time.sleep(srv.delay)
+        headers = {}
+        if u.path == "/repos/o/r":
+            body = {"full_name": "o/r", "default_branch": "main"}
+        elif u.path == "/repos/o/r/branches/main":
+            body = {"name": "main"}
+        elif u.path == "/rate_limit":
+            body = {"resources": {"core": {"remaining": 5000}}}
+        elif u.path in srv.lists:
+            items, per = srv.lists[u.path], int(q.get("per_page", 30))
+            page, last = int(q.get("page", 1)), max(1, -(-len(srv.lists[u.path]) // per))
+            body = items[(page - 1) * per:page * per]
+            rest = "&".join(f"{k}={v}" for k, v in q.items() if k != "page")
+            headers["Link"] = ", ".join(f'<{srv.url}{u.path}?{rest}&page={n}>; rel="{rel}"'
+                                        for n, rel in ((page + 1, "next"), (last, "last")) if page < last)
+        else:
+            body = {"message": "Not Found"}
+        data = json.dumps(body).encode()
+        tag = '"%s"' % hashlib.sha1(data).hexdigest()
+        with srv.lock:
+            srv.inflight -= 1
+            srv.hits.append((u.path, self.headers.get("If-None-Match") == tag))
+        if self.headers.get("If-None-Match") == tag:
+            self.send_response(304)
+            self.send_header("ETag", tag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(404 if "message" in body else 200)
+        for k, v in {**headers, "ETag": tag, "Content-Type": "application/json",
+                     "Content-Length": str(len(data))}.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+def serve(**kw):
+    srv = FakeGitHub(**kw)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+def test_paginate_is_concurrent_and_revalidates_with_etags(tmp_path):
+    srv = serve(n_pulls=1000, delay=0.05)
+    try:
+        with Client(srv.url, "t", workers=6, cache_dir=str(tmp_path / "c")) as gh:
+            pages = gh.paginate("repos/o/r/pulls", {"state": "closed", "per_page": 100})
+            assert [p["number"] for page in pages for p in page] == list(range(1, 1001))
+            assert srv.peak > 1 and gh.not_modified == 0
+        with Client(srv.url, "t", workers=6, cache_dir=str(tmp_path / "c")) as gh:
+            assert gh.paginate("repos/o/r/pulls", {"state": "closed", "per_page": 100}) == pages
+            assert (gh.requests, gh.not_modified) == (10, 10)
+        with Client(srv.url, "other", cache_dir=str(tmp_path / "c")) as gh:  # cache is per token
+            gh.paginate("repos/o/r/pulls", {"state": "closed", "per_page": 100})
+            assert gh.not_modified == 0
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+def test_cli_matches_collect_events_filters_and_dedupe(tmp_path):
+    srv = serve()
+    env = {**os.environ, "GITHUB_API_URL": srv.url, "GITHUB_REPOSITORY": "o/r", "GH_TOKEN": "t",
+           "WINDOW_DAYS": "3650", "COLLECT_CACHE_DIR": str(tmp_path / "c")}
+    env.pop("EVENTS_STORE", None)
+    env.pop("EVENT_SINK_URL", None)
+    try:
+        run = lambda: subprocess.run([sys.executable, str(CLI), "out.ndjson"], cwd=tmp_path, env=env,
+                                     capture_output=True, text=True, check=True)
+        first = run()
+        events = [json.loads(ln) for ln in (tmp_path / "out.ndjson").read_text().splitlines()]
+        prs = [e for e in events if e["type"] == "pr_merged"]
+        merged = [p for p in pulls(250) if p["merged_at"]]
+        assert len(prs) == len({p["merge_commit_sha"] or "" for p in merged})
+        assert all(e["sha"] == (e["merge_commit_sha"] or e["head_sha"]) for e in prs)
+        deps = [e for e in events if e["type"] == "deployment"]
+        assert len(deps) == 130 and deps[0]["status"].startswith("https://x/")  # .state // .statuses_url
+        keys = ["pr|" + (e.get("merge_commit_sha") or "") if e["type"] == "pr_merged"
+                else "dep|%s|%s" % (e["sha"], e["finished_at"]) for e in events]
+        assert keys == sorted(keys)
+        before = (tmp_path / "out.ndjson").read_bytes()
+        second = run()
+        assert (tmp_path / "out.ndjson").read_bytes() == before
+        # repo + branch + 3 pulls pages + 2 deployments pages; rate_limit is always live
+        assert "requests=8 not_modified=7 " in second.stderr and "not_modified=0 " in first.stderr
+    finally:
+        srv.shutdown()
+        srv.server_close()
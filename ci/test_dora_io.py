@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import dora_checkpoint as ckpt
+from dora_testlib import DORA, synth
+from dora_io import iter_events
+
+EVENTS = [
+  {"type": "pr_merged", "sha": "a" * 40, "merged_at": "2025-01-01T00:00:00Z", "pr": 1},
+  {"type": "deployment", "sha": "a" * 40, "status": "success", "finished_at": "2025-01-01T00:10:00Z"},
+  {"type": "deployment", "sha": "b" * 40, "status": "failure", "finished_at": "2025-01-01T00:20:00Z"},
+]
+
+def _write(tmp_path, text):
+    p = tmp_path / "events.ndjson"
+    p.write_text(text, encoding="utf-8")
+    return p
+
+@pytest.mark.parametrize("chunk", [1, 5, 64, 1 << 20])
+def test_iter_events_ndjson(tmp_path, chunk):
+    p = _write(tmp_path, "\n".join(json.dumps(e) for e in EVENTS) + "\n")
+    assert list(iter_events(p, chunk)) == EVENTS
+
+@pytest.mark.parametrize("chunk", [1, 5, 64])
+def test_iter_events_multiline_objects(tmp_path, chunk):
+    p = _write(tmp_path, "\n".join(json.dumps(e, indent=2) for e in EVENTS))
+    assert list(iter_events(p, chunk)) == EVENTS
+
+@pytest.mark.parametrize("chunk", [1, 5, 64])
+def test_iter_events_top_level_array(tmp_path, chunk):
+    p = _write(tmp_path, json.dumps(EVENTS, indent=1))
+    assert list(iter_events(p, chunk)) == EVENTS
+
+def test_iter_events_empty_inputs(tmp_path):
+    assert list(iter_events(_write(tmp_path, ""), 4)) == []
+    assert list(iter_events(_write(tmp_path, " [ ] "), 1)) == []
+
+def test_iter_events_raises_on_truncated_object(tmp_path):
+    p = _write(tmp_path, json.dumps(EVENTS[0]) + "\n{\"type\":")
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_events(p, 8))
+
+def test_checkpoint_resumes_after_append_and_resets_on_rewrite(tmp_path):
+    src = _write(tmp_path, json.dumps(EVENTS[0]) + "\n")
+    ck = tmp_path / "dora.checkpoint.json"
+    tail = list(ckpt.read_tail(src, 0))
+    assert [e for e, _ in tail] == EVENTS[:1]
+    ckpt.save(ck, src, "t", {"w": 1}, tail[-1][1], {"seen": 1})
+
+    with open(src, "a", encoding="utf-8") as f:
+        f.write(json.dumps(EVENTS[1]) + "\n" + json.dumps(EVENTS[2])[:20])  # last line half-written
+    offset, state = ckpt.load(ck, src, "t", {"w": 1})
+    assert state == {"seen": 1}
+    assert [e for e, _ in ckpt.read_tail(src, offset)] == EVENTS[1:2]
+    assert ckpt.load(ck, src, "t", {"w": 2}) == (0, None)
+
+    src.write_text(json.dumps(EVENTS[2]) + "\n" + json.dumps(EVENTS[0]) + "\n", encoding="utf-8")
+    assert ckpt.load(ck, src, "t", {"w": 1}) == (0, None)
+
+def test_checkpoint_rejects_non_ndjson(tmp_path):
+    src = _write(tmp_path, json.dumps(EVENTS, indent=1))
+    with pytest.raises(ckpt.TailError):
+        list(ckpt.read_tail(src, 0))
+
+def test_non_object_line_raises_so_incremental_falls_back(tmp_path):
+    src = _write(tmp_path, json.dumps(EVENTS[0]) + "\n[1, 2]\n")
+    with pytest.raises(ckpt.TailError):
+        list(ckpt.read_tail(src, 0))
+    with pytest.raises(ckpt.TailError):
+        list(ckpt.read_tail(_write(tmp_path, json.dumps(EVENTS)), 0))  # pending tail
+
+@pytest.mark.parametrize("newline", ["", "\n"])
+def test_incremental_clis_read_a_one_line_array_in_full(tmp_path, newline):
+    src = _write(tmp_path, json.dumps(synth(400, 3, end=None, days=10)) + newline)
+    base = {**os.environ, "DORA_CACHE": "off", "DORA_INCREMENTAL": "0"}
+
+    def run(cli, **env):
+        return subprocess.run([sys.executable, str(cli), str(src)], cwd=tmp_path, env={**base, **env},
+                              capture_output=True, text=True, check=True)
+
+    dora = lambda out: json.loads(out[out.index("{"):])  # after main.py's WARN lines
+    lines = lambda out: [l for l in out.splitlines()
+                         if l.startswith(("- Deployments (window)", "- merge→deploy (samples)"))]
+    full = run(DORA / "compute-dora.py")
+    assert len(lines(full.stdout)) == 2 and "- Deployments (window): 0" not in full.stdout
+    total = dora(run(DORA / "dora-refactor" / "main.py").stdout)["metrics"]["deploys_total"]
+    assert total > 0
+    for _ in range(2):  # the second run would resume from a checkpoint, if one were written
+        inc = run(DORA / "compute-dora.py", DORA_INCREMENTAL="1")
+        assert lines(inc.stdout) == lines(full.stdout) and "WARN:incremental_disabled" in inc.stderr
+        inc = run(DORA / "dora-refactor" / "main.py", DORA_INCREMENTAL="1")
+        assert dora(inc.stdout)["metrics"]["deploys_total"] == total
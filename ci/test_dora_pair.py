@@ -0,0 +1,38 @@
+import random
+
+from dora_testlib import T0
+from dora_pair import DeployIndex, pair_first_deploy
+
+def _linear(norm, sha, m, min_lead, allow_fallback, hours):
+    # reference: the pre-index list scans from compute_lead()
+    any_times = sorted(t for lst in norm.values() for t in lst)
+    times = [t for t in norm.get(sha, []) if t - m > min_lead]
+    match = "sha"
+    if not times and allow_fallback:
+        upper = m + hours * 3600.0
+        times = [t for t in any_times if m < t <= upper and t - m > min_lead]
+        match = "fallback"
+    return (min(times), match) if times else (None, None)
+
+def test_pair_first_deploy_matches_linear_scan():
+    rnd = random.Random(3)
+    shas = [f"{i:040x}" for i in range(20)]
+    by_sha = {}
+    for _ in range(300):
+        by_sha.setdefault(rnd.choice(shas), []).append(T0 + rnd.randint(0, 20 * 86400))
+    index = DeployIndex(by_sha)
+    norm = {k: sorted(set(v)) for k, v in by_sha.items()}
+    for _ in range(500):
+        sha = rnd.choice(shas + ["f" * 40])
+        m = T0 + rnd.randint(-86400, 21 * 86400)
+        min_lead = rnd.choice([-60, 0, 300, 3600])
+        fb = rnd.random() < 0.5
+        hours = rnd.choice([1.0, 6.0, 48.0])
+        assert pair_first_deploy(index, sha, m, min_lead, fb, hours) == _linear(norm, sha, m, min_lead, fb, hours)
+
+def test_first_after_inclusive_boundary():
+    index = DeployIndex({"a": [T0, T0 + 300]})
+    assert index.first_after("a", T0, inclusive=True) == T0
+    assert index.first_after("a", T0) == T0 + 300
+    assert index.first_after("a", T0 + 300) is None
+    assert index.first_after("missing", T0) is None
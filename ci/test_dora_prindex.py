@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import dora_sqlite
+import dora_store
+from dora_testlib import synth, write
+from dora_prindex import PrIndex, index_path, lookup
+
+def pr(n, merge, head, merged_at, base="main", repo="o/r"):
+    return {"schema": "events/v1", "type": "pr_merged", "repo": repo, "pr": n, "head_sha": head,
+            "merge_commit_sha": merge, "sha": merge or head, "base_branch": base, "merged_at": merged_at}
+
+def test_lookup_prefers_what_the_api_fallbacks_find(tmp_path):
+    m, h = "a" * 40, "b" * 40
+    events = [pr(1, None, m, "2025-10-01T00:00:00Z"),                     # SHA only as a head commit
+              pr(2, m.upper(), "c" * 40, "2025-10-02T00:00:00Z", base="release"),
+              pr(3, m, "d" * 40, "2025-10-03T00:00:00Z"),
+              pr(4, m, "e" * 40, "2025-10-04T00:00:00Z", repo="o/other"),
+              pr(5, "f" * 40, h, "2025-10-05T00:00:00Z")]
+    src = tmp_path / "events.ndjson"
+    write(src, events)
+    want = {"number": 3, "merged_at": "2025-10-03T00:00:00Z", "base": {"ref": "main"}, "repo": "o/r",
+            "matched": "merge_commit_sha"}
+    db = tmp_path / "e.db"
+    conn = dora_sqlite.connect(str(db), create=True)
+    dora_sqlite.append(conn, events)
+    conn.close()
+    for path in (str(src), "sqlite:" + str(db)):
+        assert lookup(path, m, "o/r", "main") == want
+        assert lookup(path, m.upper(), "o/r", "release")["number"] == 2
+        assert lookup(path, m, "o/other")["number"] == 4
+        assert lookup(path, h, "o/r", "main")["matched"] == "head_sha"
+        assert lookup(path, "0" * 40, "o/r") is None
+    assert not Path(index_path("sqlite:" + str(db))).exists()
+
+def test_index_follows_appends_rewrites_and_stores(tmp_path):
+    events = synth(6000, 31, days=60)
+    merges = [e for e in events if e["type"] == "pr_merged" and e.get("merge_commit_sha")]
+    src = tmp_path / "events.ndjson"
+    write(src, events[:3000])
+    late = next(e for e in events[3000:] if e in merges)
+    assert lookup(str(src), late["merge_commit_sha"]) is None
+    write(src, events[3000:], "a")
+    got = lookup(str(src), late["merge_commit_sha"], late.get("repo"))
+    assert (got["number"], got["merged_at"]) == (late["pr"], late["merged_at"])
+    with PrIndex(index_path(str(src))) as idx:
+        assert idx.refresh(str(src)) == 0  # nothing new: nothing re-read
+    write(src, events[:10])  # rewritten: the old rows go
+    assert lookup(str(src), late["merge_commit_sha"]) is None
+    store = tmp_path / "store"
+    dora_store.append(str(store), events)
+    assert lookup(str(store), late["merge_commit_sha"], late.get("repo"))["number"] == late["pr"]
+    for p in dora_store.partitions(str(store)):
+        Path(p).unlink()
+    assert lookup(str(store), late["merge_commit_sha"]) is None  # removed partitions are forgotten
@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from dora_testlib import DORA
+from dora_events import iso_z, records
+from dora_profile import NULL, Profiler, event_rows, profiler
+from dora_validate import shape_counts
+
+MAIN = DORA / "dora-refactor" / "main.py"
+
+def test_disabled_profiler_passes_iterables_through():
+    src = iter([{"type": "deployment"}])
+    assert profiler(False, "t") is NULL
+    assert NULL.iter("decode", src) is src
+    with NULL.stage("x") as st:
+        st["items"] = 1
+    assert NULL.start("y") is None
+
+def test_nested_iterators_report_self_time(tmp_path):
+    prof = profiler(True, "compute-dora")
+    assert isinstance(prof, Profiler)
+    raw = [{"type": "deployment", "sha": "a" * 40, "finished_at": "2025-01-01T00:00:00Z"}] * 50
+    with prof.stage("load") as st:
+        recs = list(prof.iter("parse", records(prof.iter("decode", raw)), inner="decode"))
+        st["items"] = len(recs)
+    rec = prof.start("pair")
+    prof.stop(rec, items=7)
+
+    rep = prof.write(str(tmp_path / "p.json"), str(tmp_path / "ev.ndjson"))
+    stages = {s["stage"]: s for s in rep["stages"]}
+    assert json.loads((tmp_path / "p.json").read_text())["schema"] == "dora-profile/v1"
+    assert (stages["load"]["items"], stages["parse"]["items"], stages["pair"]["items"]) == (50, 50, 7)
+    assert (stages["decode"]["parent"], stages["parse"]["parent"]) == ("parse", "load")
+    assert stages["parse"]["self_s"] <= stages["parse"]["wall_s"]
+    assert abs(stages["load"]["self_s"] - max(0.0, stages["load"]["wall_s"] - stages["parse"]["wall_s"])) < 1e-5
+
+    rows = [json.loads(l) for l in (tmp_path / "ev.ndjson").read_text().splitlines()]
+    assert [r["stage"] for r in rows] == [s["stage"] for s in rep["stages"]]
+    assert rows == list(event_rows(rep))
+    assert {(r["schema"], r["type"], r["tool"]) for r in rows} == {("events/v1", "tool_stage", "compute-dora")}
+
+def test_tool_stage_rows_in_the_events_file_pass_strict_validation(tmp_path):
+    now = int(time.time())
+    sha = lambda i: f"{i:040x}"
+    events = tmp_path / "events.ndjson"
+    with open(events, "w") as f:
+        for i in range(1, 6):
+            f.write(json.dumps({"schema": "events/v1", "type": "pr_merged", "pr": i, "sha": sha(i),
+                                "merge_commit_sha": sha(i), "head_sha": sha(i + 100),
+                                "merged_at": iso_z(now - 86400 * i)}) + "\n")
+            f.write(json.dumps({"schema": "events/v1", "type": "deployment", "sha": sha(i), "status": "success",
+                                "finished_at": iso_z(now - 86400 * i + 3600)}) + "\n")
+    env = {**os.environ, "STRICT": "1", "DORA_PROFILE": "1", "DORA_PROFILE_EVENTS": str(events)}
+    outs = []
+    for _ in range(2):  # the second run reads the first run's tool_stage rows
+        p = subprocess.run([sys.executable, str(MAIN), str(events)], cwd=tmp_path, env=env,
+                           capture_output=True, text=True)
+        assert p.returncode == 0 and not p.stdout.startswith("WARN"), p.stderr
+        outs.append(json.loads(p.stdout)["metrics"]["deploys_total"])
+    rows = [json.loads(l) for l in events.read_text().splitlines()]
+    assert outs == [5, 5] and sum(r["type"] == "tool_stage" for r in rows) > 0
+    assert set(shape_counts(rows).values()) == {0}
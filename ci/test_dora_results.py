@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from dora_testlib import DORA, END, synth, write
+from dora_compute import Config, engine_for, finish
+from dora_engine import window_lo
+from dora_results import ResultCache, result_key
+
+CLI = DORA / "compute-dora.py"
+
+def test_result_holds_until_lo_passes_the_earliest_kept_event():
+    events = synth(5000, 41, days=60)
+    cfg = Config(window_days=14, allow_fallback=True)
+    engine = engine_for(cfg, END)
+    engine.feed(events)
+    base = finish(engine, cfg)
+    first = engine.earliest()
+    lo = window_lo(END, 14)
+    assert lo <= first
+    for now in (END + 1, END + (first - lo)):  # lo' up to earliest: same events, same Result
+        e = engine_for(cfg, now)
+        e.feed(events)
+        res = finish(e, cfg)
+        assert (res.dora, res.details, res.report()) == (base.dora, base.details, base.report())
+    e = engine_for(cfg, END + (first - lo) + 1)
+    e.feed(events)
+    assert finish(e, cfg).dora != base.dora
+
+def test_entries_are_range_checked_and_evicted_lru(tmp_path):
+    out = tmp_path / "dora.json"
+    out.write_text("{}")
+    rc = ResultCache(str(tmp_path / "c"), max_entries=2)
+    k = [result_key("d%d" % i, [("PCTL", 90)], 86400 * 5, "code") for i in range(3)]
+    assert len(set(k)) == 3
+    assert rc.put(k[0], 1000, 2000, "## r\n", {"dora.json": str(out)})
+    assert rc.get(k[0], 1500)["report"] == "## r\n"
+    assert rc.get(k[0], 999) is None and rc.get(k[0], 2001) is None
+    rc.put(k[1], 1000, None, "", {"dora.json": str(out)})
+    assert rc.get(k[1], 10 ** 9) is not None  # nothing kept: any later lo
+    os.utime(tmp_path / "c" / k[0][:2] / k[0] / "meta.json", (1, 1))  # k[0] used longest ago
+    rc.put(k[2], 1000, None, "", {"dora.json": str(out)})
+    assert rc.get(k[0], 1500) is None and rc.get(k[1], 1500) and rc.get(k[2], 1500)
+    assert len(rc.entries()) == 2
+
+def test_cli_replays_hits_and_misses_on_any_input_or_setting_change(tmp_path):
+    events = synth(3000, 42, end=int(time.time()) - 3600, days=30)
+    path = tmp_path / "events.ndjson"
+    write(path, events)
+    env = {**os.environ, "DORA_RESULT_CACHE": str(tmp_path / "cache"), "DORA_CACHE": "off"}
+
+    def run(**extra):
+        p = subprocess.run([sys.executable, str(CLI), str(path)], cwd=tmp_path, env={**env, **extra},
+                           capture_output=True, text=True, check=True)
+        return p.stdout, "result_cache=hit" in p.stderr, (tmp_path / "dora.json").read_bytes(), \
+            (tmp_path / "leadtime.csv").read_bytes()
+
+    first = run()
+    assert not first[1]
+    (tmp_path / "dora.json").unlink()
+    again = run()
+    assert again[1] and again[0] == first[0] and again[2:] == first[2:]
+    assert not run(PCTL="75")[1] and run(PCTL="75")[1]
+    assert run(DORA_PROFILE="1")[1]  # I/O-only knobs share the entry
+    with open(path, "a") as f:
+        f.write(json.dumps(events[0]) + "\n")
+    assert not run()[1]
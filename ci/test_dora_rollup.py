@@ -0,0 +1,49 @@
+import json
+
+import dora_rollup
+from dora_sketch import KLL
+from dora_testlib import T0, mixed, write
+
+CFG = dict(lo=T0 + 2 * 86400, window_days=14, pctl=90, min_lead_seconds=300,
+           allow_fallback=False, max_fallback_hours=6, sketch_k=None)
+
+def test_ranges_and_shards_match_single_repo_runs(tmp_path, monkeypatch):
+    events = mixed(1, 400, 14, ["o/a", "o/b", "o/c"])
+    whole = write(tmp_path / "all.ndjson", events)
+    monkeypatch.setattr(dora_rollup, "MIN_CHUNK", 2048)
+    assert len(dora_rollup.plan([whole], 2)) > 4
+    got = dora_rollup.rollup([whole], CFG, workers=2)
+
+    monkeypatch.setattr(dora_rollup, "MIN_CHUNK", 1 << 20)
+    for repo in ("o/a", "o/b", "o/c"):
+        only = write(tmp_path / "one.ndjson", [e for e in events if e["repo"] == repo])
+        assert got["repos"][repo] == dora_rollup.rollup([only], CFG, workers=1)["repos"][repo]
+    org = got["org"]["metrics"]
+    assert org["deploys_total"] == sum(r["metrics"]["deploys_total"] for r in got["repos"].values())
+    assert got["org"]["lead_time"]["samples"] == sum(r["lead_time"]["samples"] for r in got["repos"].values())
+
+def test_array_file_falls_back_to_whole_file_scan(tmp_path):
+    events = [dict(e, repo=None) for e in mixed(2, 400, 14, ["x"])]
+    nd = write(tmp_path / "svc.ndjson", events)
+    b = dora_rollup.rollup([nd], CFG, workers=1)
+    assert b["repos"]["svc"]["metrics"]["deploys_total"] > 0
+    for indent in (2, None):  # None: the whole array on one line
+        (tmp_path / str(indent)).mkdir()
+        arr = tmp_path / str(indent) / "svc.json"
+        arr.write_text(json.dumps(events, indent=indent))
+        a = dora_rollup.rollup([str(arr)], CFG, workers=1)
+        assert list(a["repos"]) == ["svc"]  # no repo field: grouped by file name
+        assert a["repos"] == b["repos"]
+
+def test_sketch_mode_merges_per_repo_sketches(tmp_path):
+    whole = write(tmp_path / "all.ndjson", mixed(3, 400, 14, ["o/a", "o/b"]))
+    exact = dora_rollup.rollup([whole], CFG, workers=1)
+    sk = dora_rollup.rollup([whole], dict(CFG, sketch_k=200), workers=1)
+    assert sk["org"]["lead_time"]["sketch"]["n"] == exact["org"]["lead_time"]["samples"]
+    # below k samples the sketch is exact
+    assert sk["org"]["lead_time"]["pctl_h"] == exact["org"]["lead_time"]["pctl_h"]
+    # serialized in hours, like the summary next to it (and main.py's sections)
+    merged = KLL.from_dict(sk["org"]["lead_time"]["sketch"])
+    assert round(merged.quantile(0.5), 4) == sk["org"]["lead_time"]["median_h"]
+    # flat engines have no stage samples: no orthogonal section
+    assert "orthogonal" not in sk["org"] and all("orthogonal" not in r for r in sk["repos"].values())
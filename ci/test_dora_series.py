@@ -0,0 +1,40 @@
+from dora_testlib import T0, mixed
+from dora_assemble import assemble_dora_flat
+from dora_engine import flat_engine, window_lo
+from dora_events import records
+from dora_series import series
+
+def _reference(recs, d, cfg):
+    """compute-dora.py at NOW = day d 23:59:59Z over the events seen by then."""
+    now = d * 86400 + 86399
+    eng = flat_engine(window_lo(now, cfg["window_days"]))
+    eng.add(r for r in recs if r.ts is not None and r.ts <= now)
+    lead, _ = eng.pair_merges(cfg["min_lead_seconds"], allow_fallback=cfg["allow_fallback"],
+                              max_fallback_hours=cfg["max_fallback_hours"])
+    ok, failed = eng.totals()
+    return assemble_dora_flat(daily=eng.histogram(), deployments=ok, failed=failed, lead=lead,
+                              window_days=cfg["window_days"], pctl=cfg["pctl"])
+
+def test_each_step_matches_a_compute_dora_run_at_that_day():
+    recs = list(records(mixed(3, 600, 40)))
+    for fallback, window in ((False, 7), (True, 7), (True, 0)):
+        cfg = dict(window_days=window, pctl=90, min_lead_seconds=300, allow_fallback=fallback,
+                   max_fallback_hours=30, end_day=T0 // 86400 + 42, span_days=40, step="day")
+        rows = list(series(recs, cfg))
+        assert len(rows) == 40
+        for i, row in enumerate(rows):
+            ref = _reference(recs, cfg["end_day"] - 39 + i, cfg)
+            m, lt = ref["metrics"], ref["lead_time"]
+            assert (row["deploys_total"], row["deploy_failures"], row["days_with_deploys"],
+                    row["deploys_per_window_day"], row["deploys_per_active_day"]) == \
+                   (m["deploys_total"], m["deploy_failures"], m["days_with_deploys"],
+                    m["deploys_per_window_day"], m["deploys_per_active_day"])
+            assert (row["lead_samples"], row["lead_median_h"], row["lead_pctl_h"]) == \
+                   (lt["samples"], lt["median_h"], lt["pctl_h"])
+
+def test_week_step_keeps_the_end_day():
+    recs = list(records(mixed(4, 600, 40)))
+    cfg = dict(window_days=14, pctl=50, min_lead_seconds=0, allow_fallback=False,
+               max_fallback_hours=6, end_day=T0 // 86400 + 30, span_days=28, step="week")
+    days = [r["date"] for r in series(recs, cfg)]
+    assert days == ["2025-01-10", "2025-01-17", "2025-01-24", "2025-01-31"]
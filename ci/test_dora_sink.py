@@ -0,0 +1,143 @@
+import gzip
+import json
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from dora_testlib import DORA, synth
+from dora_sink import Sink
+
+CLI = DORA / "dora-refactor" / "dora_sink.py"
+
+class FakeSink(ThreadingHTTPServer):
+    """
+    Records every POST; `answers` is a queue of statuses to give before 200s.
+    A body containing `refuse` always gets a 400.
+    """
+    daemon_threads = True
+
+    def __init__(self, answers=(), max_events=None, refuse=None):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.answers, self.max_events, self.refuse = list(answers), max_events, refuse
+        self.bodies, self.types, self.peers = [], [], set()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:%d/ingest" % self.server_address[1]
+
+    def lines(self):
+        return [ln for b in self.bodies for ln in b.decode().splitlines()]
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *a):
+        pass
+
+    def do_POST(self):
+        srv = self.server
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        n = int(self.headers.get("X-Event-Count", "1"))
+        status = srv.answers.pop(0) if srv.answers else 200
+        if srv.max_events and n > srv.max_events:
+            status = 413
+        if srv.refuse and srv.refuse.encode() in body:
+            status = 400
+        if status == 200:
+            srv.bodies.append(body)
+            srv.types.append(self.headers["Content-Type"])
+            srv.peers.add(self.client_address)
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+def serve(**kw):
+    srv = FakeSink(**kw)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+def lines(n, seed=21):
+    return [json.dumps(e) for e in synth(n, seed, days=30)]
+
+def test_batches_are_bounded_gzipped_and_share_one_connection():
+    srv = serve(answers=[503, 503])
+    want = lines(1234)
+    try:
+        with Sink(srv.url, max_events=100, max_bytes=20000, gzip=True, backoff=0) as sink:
+            for ln in want:
+                sink.add(ln)
+        assert srv.lines() == want
+        assert all(len(b.splitlines()) <= 100 and len(b) <= 20000 for b in srv.bodies)
+        assert sink.posts == len(srv.bodies) < 100 and sink.retried == 2 and not sink.blocked
+        assert len(srv.peers) == 1 and set(srv.types) == {"application/x-ndjson"}
+        assert sink.bytes_out < sum(map(len, srv.bodies)) / 3
+        # the old wire format: one JSON document per POST
+        srv.bodies, srv.types = [], []
+        with Sink(srv.url, max_events=1) as sink:
+            for ln in want[:5]:
+                sink.add(ln)
+        assert [b.decode() for b in srv.bodies] == want[:5] and set(srv.types) == {"application/json"}
+        # a sink that only takes small bodies splits on 413
+        srv.bodies, srv.max_events = [], 30
+        with Sink(srv.url, max_events=200) as sink:
+            for ln in want:
+                sink.add(ln)
+        assert srv.lines() == want and not sink.blocked
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+def test_spool_keeps_what_was_not_delivered_and_resends_it_in_order(tmp_path):
+    spool = str(tmp_path / "out.sink-spool")
+    want = lines(900, seed=22)
+    down = serve(answers=[200, 200] + [500] * 20)
+    try:
+        with Sink(down.url, max_events=100, spool=spool, retries=1, backoff=0) as sink:
+            for ln in want:
+                sink.add(ln)
+            sink.flush()
+            assert sink.blocked and sink.pending == 700 and sink.posts == 2
+        assert down.lines() == want[:200]
+    finally:
+        down.shutdown()
+        down.server_close()
+    with open(spool, "a") as f:
+        f.write(want[0][:25])  # a crash mid-write
+    up = serve()
+    try:
+        proc = subprocess.run([sys.executable, str(CLI), "send", up.url, "--spool", spool, "--batch", "250"],
+                              input="", capture_output=True, text=True)
+        assert proc.returncode == 0, proc.stderr
+        assert up.lines() == want[200:] and "pending=0 " in proc.stderr
+        assert Path(spool).stat().st_size == 0 and Path(spool + ".acked").read_text() == "0\n"
+    finally:
+        up.shutdown()
+        up.server_close()
+
+def test_a_refused_line_is_set_aside_not_resent_forever(tmp_path, capsys):
+    spool = str(tmp_path / "out.sink-spool")
+    want = lines(600, seed=23)
+    bad = json.dumps({"schema": "events/v1", "type": "deployment", "sha": "not-a-sha"})
+    srv = serve(refuse="not-a-sha")
+    try:
+        with Sink(srv.url, max_events=100, spool=spool, backoff=0) as sink:
+            for ln in want[:130] + [bad] + want[130:]:
+                sink.add(ln)
+            sink.flush()
+            assert not sink.blocked and sink.pending == 0 and sink.rejected == 1 and sink.retried == 0
+        assert srv.lines() == want
+        assert Path(spool + ".rejected").read_text() == bad + "\n" and Path(spool).stat().st_size == 0
+        assert "WARN:sink_rejected:HTTP 400" in capsys.readouterr().err
+
+        srv.bodies = []
+        with Sink(srv.url, max_events=1) as sink:  # one document per POST, no spool
+            for ln in [bad] + want[:3]:
+                sink.add(ln)
+        assert [b.decode() for b in srv.bodies] == want[:3] and (sink.rejected, sink.dropped) == (1, 0)
+    finally:
+        srv.shutdown()
+        srv.server_close()
@@ -0,0 +1,41 @@
+import bisect
+import json
+import random
+import statistics
+
+from dora_pair import percentile
+from dora_sketch import KLL, k_for_eps, merge_all
+
+def test_small_inputs_are_exact():
+    rnd = random.Random(5)
+    xs = [rnd.uniform(0, 500) for _ in range(101)]
+    s = KLL(200)
+    for x in xs:
+        s.append(x)
+    assert s.quantile(0.5) == statistics.median(xs)
+    assert s.quantile(0.9) == percentile(xs, 90)
+    assert (s.quantile(0), s.quantile(1)) == (min(xs), max(xs))
+    assert KLL().quantile(0.5) is None
+
+def test_merged_shards_stay_within_error_bound():
+    rnd = random.Random(11)
+    xs = [rnd.expovariate(1 / 3600) for _ in range(60000)]
+    eps = 0.01
+    shards = [KLL(k_for_eps(eps)) for _ in range(6)]
+    for i, x in enumerate(xs):
+        shards[i % 6].append(x)
+    merged = merge_all([json.loads(json.dumps(s.to_dict())) for s in shards])
+    assert merged.n == len(xs)
+    assert sum(len(lvl) for lvl in merged.levels) < 2000
+    ys = sorted(xs)
+    for q in (0.1, 0.5, 0.9, 0.99):
+        rank = bisect.bisect_left(ys, merged.quantile(q)) / len(ys)
+        assert abs(rank - q) <= 2 * eps
+
+def test_sketch_is_deterministic_and_scales():
+    a, b = KLL(32), KLL(32)
+    for x in range(5000):
+        a.append(x * 60)
+        b.append(x * 60)
+    assert a.to_dict() == b.to_dict()
+    assert a.scaled(60.0).quantile(0.5) == a.quantile(0.5) / 60.0
@@ -0,0 +1,71 @@
+import json
+
+import dora_sqlite
+from dora_testlib import END, ndjson, synth, write
+from dora_compute import Config, engine_for, finish, compute
+from dora_engine import flat_engine
+from dora_io import iter_events
+from dora_rollup import _states, scan_sqlite
+from dora_events import records
+
+# shapes the SQL has to normalize exactly like Event.from_dict + Engine.add
+ODD = [
+    {"type": "deployment", "sha": "ABC" + "0" * 37, "status": "SUCCESS", "finished_at": "2025-10-17T00:00:00Z"},
+    {"type": "deployment", "sha": "abc" + "0" * 37, "status": "weird", "finished_at": "2025-10-17T01:00:00Z"},
+    {"type": "deployment", "sha": "", "status": "success", "finished_at": "2025-10-17T01:00:00Z"},
+    {"type": "pr_merged", "sha": "abc" + "0" * 37, "merge_commit_sha": "ABC" + "0" * 37, "pr": True,
+     "merged_at": "2025-10-16T00:00:00Z"},
+    {"type": "pr_merged", "sha": "x", "head_sha": "d" * 40, "pr": 1.5, "merged_at": "2025-10-16T00:00:00Z"},
+    {"type": "pr_merged", "sha": "e" * 40, "merged_at": "bad"},
+    {"type": "deployment", "sha": "f" * 40, "status": "failure", "deploy_at": "1969-12-31T12:00:00Z"},
+    5,
+]
+
+def test_sql_fed_engine_equals_feeding_the_events(tmp_path):
+    events = synth(8000, 13, days=90)
+    events = events[:4000] + ODD + events[4000:]
+    conn = dora_sqlite.connect(str(tmp_path / "e.db"), create=True)
+    assert dora_sqlite.append(conn, events) == len(events) - 1
+    for w, fallback in ((0, False), (3, True), (14, False), (60, True)):
+        cfg = Config(window_days=w, allow_fallback=fallback)
+        want = engine_for(cfg, END)
+        want.feed(events)
+        got = dora_sqlite.feed(engine_for(cfg, END), conn)
+        assert got.to_state() == want.to_state()
+        assert (got.daily_ok, got.daily_fail, dict(got.ok_times)) == \
+               (want.daily_ok, want.daily_fail, dict(want.ok_times))
+        a, b = finish(got, cfg), finish(want, cfg)
+        assert (a.dora, a.details, a.report()) == (b.dora, b.details, b.report())
+    # sqlite: streams raw rows for everything else
+    assert list(iter_events("sqlite:" + str(tmp_path / "e.db"))) == [e for e in events if isinstance(e, dict)]
+    conn.close()
+
+def test_import_is_incremental_and_restarts_on_rewrite(tmp_path):
+    events = synth(3000, 14, days=30)
+    src, db = tmp_path / "events.ndjson", str(tmp_path / "e.db")
+    src.write_text(ndjson(events[:2000]) + json.dumps(events[2000])[:30])
+    conn = dora_sqlite.connect(db, create=True)
+    assert dora_sqlite.import_file(conn, str(src)) == 2000  # the half-written line waits
+    with open(src, "a") as f:
+        f.write(json.dumps(events[2000])[30:] + "\n" + ndjson(events[2001:]))
+    assert dora_sqlite.import_file(conn, str(src)) == 1000
+    assert dora_sqlite.import_file(conn, str(src)) == 0
+    write(src, events[:10])  # `: > OUT` and refill
+    assert dora_sqlite.import_file(conn, str(src)) == 10
+    cfg = Config(window_days=0)
+    assert finish(dora_sqlite.feed(engine_for(cfg, END), conn), cfg).dora == compute(events[:10], cfg, now=END).dora
+    conn.close()
+
+def test_rollup_loads_each_repo_from_sql(tmp_path):
+    events = synth(4000, 15, days=30)
+    for e in events[::7]:
+        e.pop("repo", None)
+    db = tmp_path / "team.db"
+    conn = dora_sqlite.connect(str(db), create=True)
+    dora_sqlite.append(conn, events)
+    conn.close()
+    lo = END - 14 * 86400
+    assert scan_sqlite("sqlite:" + str(db), lo) == _states(records(events), "team", lo)
+    assert set(scan_sqlite("sqlite:" + str(db), lo)) > {"team"}
+    assert flat_engine(lo).to_state() == dora_sqlite.feed(flat_engine(lo), dora_sqlite.connect(str(db)),
+                                                           repo="nope", default="team").to_state()
@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+
+import dora_store
+from dora_testlib import END, synth
+from dora_compute import Config, compute, engine_for, finish
+from dora_events import records
+from dora_io import iter_events
+
+def test_partitions_manifest_and_dedupe(tmp_path):
+    events = synth(2000, 9, days=60)
+    root = tmp_path / "store"
+    assert dora_store.append(str(root), events) == (2000, 0)
+    assert dora_store.append(str(root), events[:300]) == (0, 300)
+    man = json.loads((root / "manifest.json").read_text())
+    assert man["schema"] == "dora-store/v1" and sum(p["events"] for p in man["partitions"].values()) == 2000
+    assert (root / "2025" / "2025-10-16.ndjson").exists()
+    assert sorted(map(json.dumps, iter_events(str(root)))) == sorted(map(json.dumps, events))
+
+    lo = END - 7 * 86400
+    files = dora_store.partitions(str(root), lo=lo)
+    recent = {dora_store.partition_key(r.ts, "day") for r in records(events) if r.ts and r.ts >= lo}
+    assert [Path(f).stem for f in files] == sorted(recent) and len(files) < len(man["partitions"]) / 5
+    monthly = tmp_path / "monthly"
+    dora_store.append(str(monthly), events, granularity="month")
+    assert {p["file"][5:12] for p in dora_store.load_manifest(str(monthly))["partitions"].values()} == \
+           {k[:7] for k in man["partitions"]}
+
+def test_windowed_read_matches_the_flat_file(tmp_path):
+    events = synth(6000, 10, days=120)
+    root = str(tmp_path / "store")
+    dora_store.append(root, events)
+    for w in (3, 14, 0):
+        cfg = Config(window_days=w, allow_fallback=True)
+        eng = engine_for(cfg, END)
+        eng.feed(dora_store.iter_events(root, lo=eng.lo))
+        assert finish(eng, cfg).dora == compute(events, cfg, now=END).dora
+
+def test_upsert_replaces_deployments_of_a_sha_on_any_day(tmp_path):
+    root = str(tmp_path / "s")
+    sha = "a" * 40
+    dep = {"schema": "events/v1", "type": "deployment", "repo": "o/a", "sha": sha, "status": "success"}
+    dora_store.append(root, [{**dep, "finished_at": "2025-10-01T12:00:00Z"}])
+    assert dora_store.upsert(root, [{**dep, "status": "failure", "finished_at": "2025-10-03T12:00:00Z"}]) == (1, 1)
+    assert [e["status"] for e in iter_events(root)] == ["failure"]
+    assert dora_store.partitions(root) == [str(tmp_path / "s" / "2025" / "2025-10-03.ndjson")]
@@ -0,0 +1,34 @@
+import json
+
+from dora_testlib import END, synth
+from dora_events import records, EventType
+from dora_io import iter_events
+from dora_synth import parse_count, write
+from dora_validate import violation
+
+def test_stream_is_deterministic_and_sized(tmp_path):
+    a, b = tmp_path / "a.ndjson", tmp_path / "b.ndjson"
+    write(a, 3000, seed=4, end=END)
+    write(b, 3000, seed=4, end=END)
+    assert a.read_bytes() == b.read_bytes()
+    assert sum(1 for _ in iter_events(str(a))) == 3000
+    assert synth(50, 5) != synth(50, 4)
+    assert [parse_count(s) for s in ("10k", "1M", "2500")] == [10000, 1000000, 2500]
+
+def test_rows_are_valid_ordered_and_shaped_like_collected_events():
+    events = synth(5000, 1)
+    bad = {violation(e) for e in events if e["type"] in ("pr_merged", "deployment")}
+    # only the deliberate off-contract statuses GitHub also reports
+    assert bad == {None, "bad status:", "bad status:timed_out", "bad status:neutral"}
+    recs = list(records(events))
+    ts = [r.ts for r in recs]
+    assert ts == sorted(ts)
+    kinds = {t: sum(r.type is t for r in recs) for t in EventType}
+    assert kinds[EventType.PR_MERGED] > kinds[EventType.DEPLOYMENT] / 2
+    assert kinds[EventType.PIPELINE_STARTED] > 0 and kinds[EventType.PIPELINE_FINISHED] > 0
+    prs = [r for r in recs if r.type is EventType.PR_MERGED]
+    assert any(r.head_sha != r.merge_sha for r in prs) and any(r.head_sha == r.merge_sha for r in prs)
+    deploys = [e for e in events if e["type"] == "deployment"]
+    assert {"success", "failure"} <= {e.get("status") for e in deploys}
+    assert len({e["sha"] for e in deploys}) < len(deploys)  # redeploys reuse SHAs
+    assert json.loads(json.dumps(events[0])) == events[0]
@@ -0,0 +1,55 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict
+from zoneinfo import ZoneInfo
+
+import pytest
+from roi import parsers
+from roi.parsers import DayBuckets, parse_toggl_csv, parse_toggl_json
+
+def reference(start: datetime, seconds: float, tz: str) -> Dict[date, float]:
+    """The per-entry loop DayBuckets replaced."""
+    if seconds <= 0:
+        return {}
+    current = (start.replace(tzinfo=timezone.utc) if start.tzinfo is None else start).astimezone(ZoneInfo(tz))
+    remaining, out = seconds, {}
+    while remaining > 0:
+        day_end = datetime(current.year, current.month, current.day, 23, 59, 59,
+                           tzinfo=current.tzinfo) + timedelta(seconds=1)
+        slice_sec = min(remaining, (day_end - current).total_seconds())
+        out.setdefault(current.date(), 0.0)
+        out[current.date()] += slice_sec / 3600.0
+        current += timedelta(seconds=slice_sec)
+        remaining -= slice_sec
+    return out
+
+def entries(n, seed):
+    rnd = random.Random(seed)
+    t0 = datetime(2025, 3, 1, tzinfo=timezone.utc)  # covers the spring-forward and fall-back days
+    for _ in range(n):
+        start = t0 + timedelta(seconds=rnd.randrange(260 * 86400), microseconds=rnd.randrange(10 ** 6))
+        seconds = rnd.choice([rnd.randrange(1, 4 * 3600), rnd.uniform(0, 3 * 86400), rnd.randrange(-60, 60)])
+        yield (start.replace(tzinfo=None) if rnd.random() < 0.3 else start), seconds
+
+@pytest.mark.parametrize("tz", ["America/New_York", "Asia/Kolkata", "UTC", "Australia/Lord_Howe"])
+@pytest.mark.parametrize("use_numpy", [False, True])
+def test_day_buckets_match_the_per_entry_loop(tz, use_numpy, monkeypatch):
+    if use_numpy and parsers._np is None:
+        pytest.skip("numpy not installed")
+    monkeypatch.setattr(parsers, "_BATCH", 997)  # several flushes, some entries split across them
+    want: Dict[date, float] = {}
+    buckets = DayBuckets(tz, use_numpy=use_numpy)
+    for start, seconds in entries(5000, seed=tz):
+        for d, h in reference(start, seconds, tz).items():
+            want[d] = want.get(d, 0.0) + h
+        buckets.add(start, seconds)
+    got = buckets.result()
+    assert got == want and list(got) == list(want)
+
+def test_invalid_zone_is_skipped_by_csv_and_raised_by_json():
+    csv = '"Start date","Start time","End date","End time"\n"2025-09-04","00:30:00","2025-09-04","01:00:00"\n'
+    assert parse_toggl_csv(csv, tz="Nowhere/Nothing") == {}
+    assert parse_toggl_csv(csv, tz="UTC") == {date(2025, 9, 4): 0.5}
+    with pytest.raises(Exception):
+        parse_toggl_json({"data": [{"start": "2025-09-04T10:00:00Z", "dur": 60}]}, tz="Nowhere/Nothing")
+    assert parse_toggl_json({"data": [{"start": "2025-09-04T10:00:00Z", "dur": -1}]}, tz="Nowhere/Nothing") == {}
@@ -0,0 +1,76 @@
+import io
+import json
+import random
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+from roi.parsers import (iter_json_items, parse_file, parse_files, parse_github_runs, parse_toggl_csv,
+                         parse_toggl_json)
+
+EMIT = Path(__file__).parent / "roi" / "emit_ci_hours.py"
+
+def runs(n, seed):
+    rnd = random.Random(seed)
+    for i in range(n):
+        day, start = rnd.randrange(1, 29), rnd.randrange(0, 80000)
+        started = "2025-09-%02dT%02d:%02d:%02dZ" % (day, start // 3600, start // 60 % 60, start % 60)
+        end = start + rnd.randrange(0, 6000)
+        updated = "2025-09-%02dT%02d:%02d:%02dZ" % (day, end // 3600, end // 60 % 60, end % 60)
+        yield {"id": i, "status": rnd.choice(["completed"] * 5 + ["in_progress"]), "run_started_at": started,
+               "updated_at": updated, "name": 'say "}{]["', "n": rnd.random() * 1e6, "ok": rnd.random() < 0.5}
+
+def test_items_come_out_whole_at_any_chunk_boundary():
+    pages = [{"total_count": 9, "workflow_runs": list(runs(40, seed=s)), "tail": {"workflow_runs": [1]}}
+             for s in range(3)]
+    pages.insert(1, {"workflow_runs": None})
+    pages.insert(2, {})
+    text = "\n".join(json.dumps(p, indent=i % 2 or None) for i, p in enumerate(pages))
+    want = [r for p in pages for r in p.get("workflow_runs") or []]
+    for chunk in (1, 7, 64, 1 << 20):
+        assert list(iter_json_items(io.StringIO(text), "workflow_runs", chunk=chunk)) == want
+    for bad in ('{"workflow_runs": [1, 2}', '{"workflow_runs": [1, 2', '[{"workflow_runs": []}]', '{"a" 1}'):
+        with pytest.raises(ValueError):
+            list(iter_json_items(io.StringIO(bad), "workflow_runs", chunk=4))
+
+def test_numbers_split_across_chunks_decode_whole():
+    text = '{"x": 12.5, "y": -1.25e3, "data": [1, 12.5, 1.25e-7, -0.5, 100]}'
+    for chunk in range(1, len(text) + 1):
+        assert list(iter_json_items(io.StringIO(text), "data", chunk=chunk)) == [1, 12.5, 1.25e-7, -0.5, 100]
+
+def test_files_stream_and_merge_like_the_in_memory_parsers(tmp_path):
+    all_runs = list(runs(3000, seed=22))
+    for i in range(3):
+        with open(tmp_path / f"runs-{i}.json", "w") as f:  # gh api --paginate: pages back to back
+            for j in range(i * 1000, (i + 1) * 1000, 100):
+                f.write(json.dumps({"workflow_runs": all_runs[j:j + 100]}))
+    one = parse_github_runs({"workflow_runs": all_runs[:1000]})
+    assert parse_file(str(tmp_path / "runs-0.json"), "github") == one
+    merged = parse_files([str(tmp_path)], "github", workers=1)
+    assert parse_files([str(tmp_path)], "github", workers=3) == merged
+    assert merged == pytest.approx(parse_github_runs({"workflow_runs": all_runs}), rel=1e-12)
+    assert sorted(merged) == sorted({date.fromisoformat(r["run_started_at"][:10]) for r in all_runs
+                                     if r["status"] == "completed" and r["updated_at"] > r["run_started_at"]})
+
+    csv = ('"Start date","Start time","End date","End time"\n\n'
+           '"2025-09-03","23:00:00","2025-09-04","01:30:00"\n"2025-09-05","09:00:00"\n')
+    (tmp_path / "t.csv").write_text(csv)
+    entries = {"data": [{"start": "2025-09-04T03:00:00Z", "dur": 7200000}, {"start": "x", "dur": 5}]}
+    (tmp_path / "t.json").write_text(json.dumps(entries))
+    assert parse_file(str(tmp_path / "t.csv"), "toggl", "Asia/Kolkata") == parse_toggl_csv(csv, "Asia/Kolkata")
+    assert parse_file(str(tmp_path / "t.json"), "toggl", "UTC") == parse_toggl_json(entries, "UTC")
+    both = {date(2025, 9, 3): 1.0, date(2025, 9, 4): 3.5}  # other .json files hold no "data"
+    assert parse_files([str(tmp_path)], "toggl", "UTC", workers=2) == both
+
+def test_cli_takes_directories_and_files(tmp_path):
+    all_runs = list(runs(500, seed=5))
+    (tmp_path / "d").mkdir()
+    (tmp_path / "d" / "a.json").write_text(json.dumps({"workflow_runs": all_runs[:250]}))
+    (tmp_path / "b.json").write_text(json.dumps({"workflow_runs": all_runs[250:]}))
+    out = subprocess.run([sys.executable, str(EMIT), "github", str(tmp_path / "d"), str(tmp_path / "b.json"),
+                          "--workers", "2"], capture_output=True, text=True, check=True).stdout.splitlines()
+    assert out[0] == "date,hours"
+    got = {date.fromisoformat(line.split(",")[0]): float(line.split(",")[1]) for line in out[1:]}
+    assert got == pytest.approx(parse_github_runs({"workflow_runs": all_runs}), rel=1e-12)
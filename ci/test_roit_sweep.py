@@ -0,0 +1,87 @@
+import csv
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+ROIT = Path(__file__).parent / "roi" / "compute_roit.py"
+GRID = {"TB": "100,200", "TA": "0.5,150", "RUNS": "10", "PB": "0.2,1.5", "PA": "0.9", "PRS": "30.7",
+        "R": "2", "H": "0,10", "PARALLELISM": "0.5,4", "BLOCKING_FACTOR": "0:1:3", "H_COMPUTE": "0,3"}
+
+def roit(tmp_path, **env):
+    full = {k: v for k, v in os.environ.items() if k not in GRID and not k.startswith("ROI")}
+    return subprocess.run([sys.executable, str(ROIT)], cwd=tmp_path, env={**full, **env},
+                          capture_output=True, text=True, check=True)
+
+def test_every_row_is_what_the_single_scenario_script_computes(tmp_path):
+    roit(tmp_path, ROIT_SWEEP="t.npy", ROIT_SWEEP_BATCH="50", **GRID)
+    roit(tmp_path, ROIT_SWEEP="t.csv", ROI_JSON_PATH="csv.json", **GRID)
+    table = np.load(tmp_path / "t.npy")
+    assert len(table) == 2 ** 6 * 3 and "RUNS" not in table.dtype.names
+    with open(tmp_path / "t.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == list(table.dtype.names) and len(rows) == len(table)
+    for row, rec in zip(rows, table):
+        for name in table.dtype.names:
+            a, b = float(row[name]), float(rec[name])
+            assert (math.isnan(a) and math.isnan(b)) or a == pytest.approx(b, rel=1e-9)
+    summary = json.loads((tmp_path / "roit-sweep.json").read_text())
+    assert summary["points"] == len(table) and summary["fixed"] == {"RUNS": 10, "PA": 0.9, "PRS": 30, "R": 2.0,
+                                                                    "FLOOR_TA_SEC": 1.0}
+    assert summary["modes"]["human"]["roit"]["na"] == len(table) // 2  # H=0: NA, as in the script
+    other = json.loads((tmp_path / "csv.json").read_text())["modes"]  # one batch instead of four
+    for mode, stats in summary["modes"].items():
+        assert other[mode]["best"] == stats.pop("best")
+        assert {k: pytest.approx(v, rel=1e-12) for k, v in stats.items()} == \
+               {k: v for k, v in other[mode].items() if k != "best"}
+
+    for rec in random.Random(23).sample(list(table), 6):
+        point = {n: f"{float(rec[n])!r}" for n in table.dtype.names if n in GRID}
+        env = {**{k: v for k, v in GRID.items() if "," not in v and ":" not in v}, **point}
+        for mode in ("human", "mixed", "dual", "legacy"):
+            roit(tmp_path, ROIT_MODE=mode, ROI_JSON_PATH="one.json", **env)
+            one = json.loads((tmp_path / "one.json").read_text())
+            src = "human" if mode == "dual" else mode
+            assert one["benefit_hours"] == round(float(rec[f"{src}_benefit"]), 4)
+            want = float(rec[f"{src}_roit"])
+            assert one["roit"] == (None if math.isnan(want) else round(want, 4))
+            if mode == "dual":
+                want = float(rec["dual_roit_runtime"])
+                assert one["roit_runtime"] == (None if math.isnan(want) else round(want, 4))
+    bad = subprocess.run([sys.executable, str(ROIT)], cwd=tmp_path, capture_output=True, text=True,
+                         env={**os.environ, **GRID, "ROIT_SWEEP": "x.csv", "PRS": "1:nan:2"})
+    assert bad.returncode != 0 and "PRS" in bad.stderr
+
+def test_summary_streams_in_batch_memory(tmp_path):
+    sys.path.insert(0, str(ROIT.parent))
+    import tracemalloc
+    from roit_sweep import COLUMNS, PCTLS, grids_from_env, sweep
+    env = {**GRID, "TB": "60:900:200", "TA": "1:600:40", "PB": "0:1:10", "H": "0:20:5", "H_COMPUTE": "3"}
+    grids = grids_from_env(env)
+    tracemalloc.start()
+    try:
+        summary = sweep(grids, str(tmp_path / "t.npy"), batch=20000, eps=0.005)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    table = np.load(tmp_path / "t.npy")
+    assert summary["points"] == len(table) == 200 * 40 * 10 * 5 * 2 * 3
+    assert peak < len(table) * 8  # less than one float64 column of the grid
+    for c in COLUMNS:
+        mode, _, what = c.partition("_")
+        got = summary["modes"][mode][{"benefit": "benefit_hours", "roit_runtime": "roit_runtime"}.get(what, what)]
+        col = table[c]
+        ok = col[~np.isnan(col)]
+        assert (got["n"], got["na"], got["min"], got["max"]) == (len(col), len(col) - len(ok), ok.min(), ok.max())
+        assert got["mean"] == pytest.approx(ok.mean(), rel=1e-9)
+        assert got["positive"] == round(float((ok > 0).mean()), 6)
+        ranks = np.sort(ok)
+        for q in PCTLS:  # within the sketch's rank error
+            lo, hi = np.searchsorted(ranks, got[f"p{q}"], "left"), np.searchsorted(ranks, got[f"p{q}"], "right")
+            assert lo / len(ok) - 0.01 <= q / 100 <= hi / len(ok) + 0.01
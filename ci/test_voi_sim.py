@@ -0,0 +1,54 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+VOI = Path(__file__).parent / "voi" / "void_from_dora.py"
+DORA = {"window_days": 14, "deploys": {"total": 12, "fail": 2, "per_day": 0.5},
+        "lead_time": {"n": 10, "p50": 90.0, "p90": 400.0}}
+PREFIXES = ("VOI_FAIL", "VOI_LEAD", "VOI_FREQ", "VOI_INSTR")
+
+def voi(tmp_path, check=True, **env):
+    (tmp_path / "dora.json").write_text(json.dumps(DORA))
+    base = {k: v for k, v in os.environ.items() if not k.startswith("VOI_")}
+    p = subprocess.run([sys.executable, str(VOI), str(tmp_path / "dora.json"), str(tmp_path / "out")],
+                       env={**base, **env}, capture_output=True, text=True, check=check)
+    return json.loads((tmp_path / "out" / "voi_items.json").read_text()) if check else p
+
+def test_fixed_distributions_reproduce_the_point_estimates(tmp_path):
+    point = voi(tmp_path)
+    assert "simulation" not in point["meta"] and all("sim" not in it for it in point["items"])
+    fixed = {f"{p}_{k}_DIST": "fixed" for p in PREFIXES for k in ("P_CHANGE", "CONF", "COST_HOURS", "DELAY_D")}
+    fixed.update(VOI_SIM_CFR_DIST="fixed", VOI_SIM_DEP_PER_DAY_DIST="fixed", VOI_SIM_LEAD_GAP_DIST="fixed")
+    sim = voi(tmp_path, VOI_SIM_N="1000", VOI_SIM_BATCH="300", **fixed)
+    assert len(sim["items"]) == len(point["items"]) == 4
+    by_id = {it["id"]: it for it in sim["items"]}
+    for it in point["items"]:
+        s = by_id[it["id"]]["sim"]
+        assert s["VOI_adj"]["mean"] == pytest.approx(it["VOI_adj"], abs=0.011)
+        assert s["VOI_adj"]["sd"] == 0 and s["voi_per_hour"]["p5"] == s["voi_per_hour"]["p95"]
+        assert s["voi_per_hour"]["mean"] == pytest.approx(it["voi_per_hour"], abs=0.011)
+        assert {k: v for k, v in by_id[it["id"]].items() if k != "sim"} == it
+    # every draw is the same world: the point ranking, certainly
+    assert [it["id"] for it in sim["items"]] == [it["id"] for it in point["items"]]
+    assert [it["sim"]["p_best"] for it in sim["items"]] == [1.0, 0.0, 0.0, 0.0]
+    assert [it["sim"]["rank_mean"] for it in sim["items"]] == [1.0, 2.0, 3.0, 4.0]
+
+def test_draws_are_seeded_ranked_by_p_best_and_checked(tmp_path):
+    a = voi(tmp_path, VOI_SIM_N="200000", VOI_SIM_SEED="7", VOI_FAIL_COST_HOURS_DIST="triangular:2,6,20")
+    b = voi(tmp_path, VOI_SIM_N="200000", VOI_SIM_SEED="7", VOI_FAIL_COST_HOURS_DIST="triangular:2,6,20")
+    assert a["items"] == b["items"] and a["meta"]["simulation"]["n"] == 200000
+    p_best = [it["sim"]["p_best"] for it in a["items"]]
+    assert p_best == sorted(p_best, reverse=True) and sum(p_best) == pytest.approx(1.0, abs=1e-3)
+    assert 0 < p_best[0] < 1  # uncertain enough that the ranking is not a sure thing
+    for it in a["items"]:
+        s = it["sim"]["VOI_adj"]
+        assert s["p5"] <= s["p25"] <= s["p50"] <= s["p75"] <= s["p95"] and s["sd"] > 0
+    for bad in ({"VOI_FAIL_CONF_DIST": "beta:0,1"}, {"VOI_SIM_CFR_DIST": "poisson:3"},
+                {"VOI_LEAD_DELAY_D_DIST": "uniform:1"}):
+        p = voi(tmp_path, check=False, VOI_SIM_N="10", **bad)
+        assert p.returncode == 64 and "bad VOI_SIM distribution" in p.stderr
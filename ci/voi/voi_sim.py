@@ -0,0 +1,168 @@
+"""
+voi_sim.py
+Monte Carlo VOI for void_from_dora.py (VOI_SIM_N > 0).
+
+The point estimate scores each lever once, from single guesses. Here each
+lever knob (p_change, confidence, cost_hours, delay_days) and each observed
+input (cfr, dep_per_day, the p90-p50 lead gap) is a distribution. N joint
+draws are scored with item()'s formula, in NumPy batches of VOI_SIM_BATCH.
+One draw of the observed inputs is shared by all levers, so the levers in
+draw i compete in the same world.
+
+Distributions, per knob env name X (e.g. VOI_FAIL_P_CHANGE) via X_DIST, or
+VOI_SIM_CFR_DIST / VOI_SIM_DEP_PER_DAY_DIST / VOI_SIM_LEAD_GAP_DIST:
+  fixed                   the point value
+  beta[:A,B]              default: mean = point, concentration VOI_SIM_KAPPA
+  lognormal[:MEDIAN,S]    default: median = point, S = VOI_SIM_SIGMA
+  gamma[:SHAPE,SCALE]
+  normal:MU,SD | uniform:LO,HI | triangular:LO,MODE,HI
+Defaults: beta for p_change/confidence, lognormal for cost/delay; cfr is
+Beta(fail+1/2, ok+1/2) (Jeffreys), dep_per_day and the lead gap are Gamma
+around the observed value with CV 1/sqrt(deploys) and 1/sqrt(lead n).
+Probabilities are clamped to [0,1]; costs, delays, rates and gaps at 0.
+
+Per lever: mean, sd, percentiles and P(>0) of VOI_adj and voi_per_hour,
+P(best) (highest voi_per_hour in a draw; ties go to the first lever) and
+the mean rank.
+"""
+import os
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+KNOBS = (("p_change", "P_CHANGE", "beta"), ("conf", "CONF", "beta"),
+         ("cost_hours", "COST_HOURS", "lognormal"), ("delay_d", "DELAY_D", "lognormal"))
+PCTLS = (5, 25, 50, 75, 95)
+ARITY = {"beta": 2, "lognormal": 2, "gamma": 2, "normal": 2, "uniform": 2, "triangular": 3}
+
+class SpecError(ValueError):
+    pass
+
+def parse_dist(spec, default):
+    """'kind[:a,b,...]' -> (kind, params or None); `default` kind when spec is empty."""
+    spec = (spec or default).strip().lower()
+    kind, _, rest = spec.partition(":")
+    if kind == "fixed" and not rest:
+        return kind, None
+    if kind not in ARITY:
+        raise SpecError(f"unknown distribution {spec!r}")
+    if not rest:
+        if kind not in ("beta", "lognormal", "gamma"):
+            raise SpecError(f"{kind} needs parameters: {spec!r}")
+        return kind, None
+    try:
+        params = tuple(float(p) for p in rest.split(","))
+    except ValueError:
+        raise SpecError(f"bad parameters in {spec!r}")
+    if len(params) != ARITY[kind]:
+        raise SpecError(f"{kind} takes {ARITY[kind]} parameters: {spec!r}")
+    return kind, params
+
+def _sampler(kind, params, point, kappa, sigma, count=None):
+    """f(rng, size) -> draws. Without params: centred on `point` (count: CV 1/sqrt(count) for gamma)."""
+    point = float(point)
+    if kind == "fixed":
+        return lambda rng, size: np.full(size, point)
+    if params is None:
+        if kind == "beta":
+            m = min(max(point, 0.0), 1.0)
+            if m in (0.0, 1.0):
+                return lambda rng, size: np.full(size, m)
+            params = (m * kappa, (1.0 - m) * kappa)
+        elif kind == "lognormal":
+            if point <= 0:
+                return lambda rng, size: np.full(size, point)
+            params = (point, sigma)
+        else:  # gamma
+            k = float(count or 0)
+            if point <= 0 or k <= 0:
+                return lambda rng, size: np.full(size, point)
+            params = (k, point / k)
+    a, b = params[0], params[1]
+    if kind == "beta":
+        if a <= 0 or b <= 0:
+            raise SpecError(f"beta parameters must be > 0: {params}")
+        return lambda rng, size: rng.beta(a, b, size)
+    if kind == "lognormal":
+        if a <= 0 or b < 0:
+            raise SpecError(f"lognormal needs median > 0 and sigma >= 0: {params}")
+        mu = float(np.log(a))
+        return lambda rng, size: rng.lognormal(mu, b, size)
+    if kind == "gamma":
+        if a <= 0 or b <= 0:
+            raise SpecError(f"gamma parameters must be > 0: {params}")
+        return lambda rng, size: rng.gamma(a, b, size)
+    if kind == "normal":
+        return lambda rng, size: rng.normal(a, b, size)
+    if kind == "uniform":
+        return lambda rng, size: rng.uniform(a, b, size)
+    lo, mode, hi = params
+    if not lo <= mode <= hi or lo == hi:
+        raise SpecError(f"triangular needs lo <= mode <= hi, lo < hi: {params}")
+    return lambda rng, size: rng.triangular(lo, mode, hi, size)
+
+def _stats(x):
+    out = {"mean": round(float(x.mean()), 2), "sd": round(float(x.std()), 2)}
+    out.update({f"p{q}": round(float(v), 2) for q, v in zip(PCTLS, np.percentile(x, PCTLS))})
+    out["p_positive"] = round(float((x > 0).mean()), 4)
+    return out
+
+def simulate(levers, observed, rate_h, monthly_disc, n, seed=0, batch=1 << 18, kappa=20.0, sigma=0.25,
+             env=os.environ):
+    """
+    levers: [{"id", "prefix" (knob env prefix), "knobs": {p_change, conf, cost_hours, delay_d},
+    "delta": f(obs) -> USD}], where obs maps cfr, dep_per_day, exp_deploys, added_deploys and
+    lead_gap to arrays. observed: point values of those plus dep_total, dep_fail, lead_n,
+    horizon_days, target_dep_per_day. Returns ({id: sim block}, meta).
+    """
+    rng = np.random.default_rng(seed)
+    horizon, target = observed["horizon_days"], observed["target_dep_per_day"]
+    total, fail = observed["dep_total"], observed["dep_fail"]
+    cfr_kind, cfr_params = parse_dist(env.get("VOI_SIM_CFR_DIST"), "beta")
+    if cfr_kind == "beta" and cfr_params is None and total > 0:
+        cfr_params = (fail + 0.5, max(total - fail, 0) + 0.5)
+    obs_draw = {
+        "cfr": _sampler(cfr_kind, cfr_params, observed["cfr"], kappa, sigma),
+        "dep_per_day": _sampler(*parse_dist(env.get("VOI_SIM_DEP_PER_DAY_DIST"), "gamma"),
+                                observed["dep_per_day"], kappa, sigma, count=total),
+        "lead_gap": _sampler(*parse_dist(env.get("VOI_SIM_LEAD_GAP_DIST"), "gamma"),
+                             observed["lead_gap"], kappa, sigma, count=observed["lead_n"]),
+    }
+    knob_draw = [{k: _sampler(*parse_dist(env.get(f"{lv['prefix']}_{suffix}_DIST"), default),
+                              lv["knobs"][k], kappa, sigma)
+                  for k, suffix, default in KNOBS} for lv in levers]
+
+    L = len(levers)
+    adj = np.empty((L, n))
+    per_h = np.empty((L, n))
+    best = np.zeros(L, dtype=np.int64)
+    rank_sum = np.zeros(L)
+    for lo in range(0, n, batch):
+        size = min(batch, n - lo)
+        obs = {k: f(rng, size) for k, f in obs_draw.items()}
+        obs["cfr"] = np.clip(obs["cfr"], 0.0, 1.0)
+        obs["dep_per_day"] = np.maximum(obs["dep_per_day"], 0.0)
+        obs["lead_gap"] = np.maximum(obs["lead_gap"], 0.0)
+        obs["exp_deploys"] = obs["dep_per_day"] * horizon
+        obs["added_deploys"] = np.maximum(target - obs["dep_per_day"], 0.0) * horizon
+        for i, lv in enumerate(levers):
+            k = {name: f(rng, size) for name, f in knob_draw[i].items()}
+            cost = np.maximum(k["cost_hours"], 0.0)
+            p_eff = np.clip(k["p_change"], 0.0, 1.0) * np.clip(k["conf"], 0.0, 1.0)
+            ev = p_eff * lv["delta"](obs) - cost * rate_h
+            ev_adj = ev * (1.0 / (1.0 + monthly_disc) ** (np.maximum(k["delay_d"], 0.0) / 30.0))
+            adj[i, lo:lo + size] = ev_adj
+            per_h[i, lo:lo + size] = ev_adj / np.maximum(cost, 0.25)
+        block = per_h[:, lo:lo + size]
+        best += np.bincount(block.argmax(axis=0), minlength=L)
+        # rank 1 = best; stable, so ties rank in lever order like argmax
+        rank_sum += (np.argsort(np.argsort(-block, axis=0, kind="stable"), axis=0) + 1).sum(axis=1)
+
+    out = {}
+    for i, lv in enumerate(levers):
+        out[lv["id"]] = {"VOI_adj": _stats(adj[i]), "voi_per_hour": _stats(per_h[i]),
+                         "p_best": round(float(best[i] / n), 4), "rank_mean": round(float(rank_sum[i] / n), 3)}
+    meta = {"n": n, "seed": seed, "batch": batch, "kappa": kappa, "sigma": sigma, "ranked_by": "p_best"}
+    return out, meta
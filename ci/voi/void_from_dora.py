@@ -8,6 +8,15 @@ Pipeline intent:
 
 Usage:
   python voi_from_dora.py <dora.json> <outdir>
+  python voi_from_dora.py --batch <dir|manifest> [--out FILE.ndjson] [--workers N] [--glob PATTERN]
+
+Batch mode evaluates many dora.json files in one process (or a pool of
+--workers): every file under a directory named --glob (default dora.json,
+which leaves dora.profile.json, dora.checkpoint.json and dora-rf.*.json
+out), sorted by path, or the paths listed in a manifest (one per line,
+relative to it; # comments). It writes one NDJSON record per input,
+in input order, to --out (default stdout): {"source", "ranking": [ids],
+"meta", "items"} or {"source", "error"}. Exit 1 if any input failed.
 
 Env knobs:
   VOI_RATE_PER_HOUR=50
@@ -45,8 +54,18 @@ Env knobs:
   VOI_INSTR_DELAY_D=1
   VOI_INSTR_DELTA_USD_IF_FAILS=60
   VOI_INSTR_DELTA_USD_IF_ZERO_FAILS=100
+
+  # Monte Carlo (voi_sim.py; needs numpy): items gain a "sim" block
+  VOI_SIM_N=0                      # draws per lever; 0 → point estimates only
+  VOI_SIM_SEED=0
+  VOI_SIM_BATCH=262144
+  VOI_SIM_KAPPA=20                 # beta concentration around p_change/confidence
+  VOI_SIM_SIGMA=0.25               # lognormal sigma around cost/delay
+  <KNOB>_DIST=beta:A,B|lognormal:MEDIAN,S|gamma:K,THETA|normal:MU,SD|uniform:LO,HI|triangular:LO,MODE,HI|fixed
+  VOI_SIM_CFR_DIST / VOI_SIM_DEP_PER_DAY_DIST / VOI_SIM_LEAD_GAP_DIST
 """
 import os, sys, json
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
 
@@ -54,12 +73,18 @@ from datetime import datetime, timezone
 def die(msg, code=64):
     print(msg, file=sys.stderr); sys.exit(code)
 
+class InputError(Exception):
+    """A dora.json this script cannot read (one input's problem)."""
+
+class ConfigError(Exception):
+    """A bad VOI_* setting (every input's problem)."""
+
 def float_env(name, default):
     val = os.getenv(name, str(default))
     try:
         return float(val)
     except ValueError:
-        die(f"bad env {name}={val!r}")
+        raise ConfigError(f"bad env {name}={val!r}")
 
 def clamp01(x): return max(0.0, min(1.0, float(x)))
 
@@ -89,119 +114,241 @@ def read_json(path: Path):
         with path.open("r", encoding="utf-8") as f:
             return json.load(f)
     except Exception as e:
-        die(f"failed to read {path}: {e}")
+        raise InputError(f"failed to read {path}: {e}")
 
 def need(d: dict, key: str):
     if key not in d:
-        die(f"bad dora.json: missing '{key}'")
+        raise InputError(f"bad dora.json: missing '{key}'")
 
-# ---------- main ----------
-if len(sys.argv) < 3:
-    die("usage: voi_from_dora.py <dora.json> <outdir>")
-
-in_path = Path(sys.argv[1])
-outdir = Path(sys.argv[2]); outdir.mkdir(parents=True, exist_ok=True)
-dora = read_json(in_path)
-
-# Strict schema (fail fast)
-need(dora, "deploys"); need(dora, "lead_time")
-need(dora["deploys"], "total"); need(dora["deploys"], "fail"); need(dora["deploys"], "per_day")
-need(dora["lead_time"], "n"); need(dora["lead_time"], "p50"); need(dora["lead_time"], "p90")
-window_days = float(dora.get("window_days", 14.0))
-
-dep_total    = int(dora["deploys"]["total"])
-dep_fail     = int(dora["deploys"]["fail"])
-dep_per_day  = float(dora["deploys"]["per_day"])
-lead_n       = int(dora["lead_time"]["n"])
-lead_p50_min = float(dora["lead_time"]["p50"])
-lead_p90_min = float(dora["lead_time"]["p90"])
-cfr = (dep_fail / dep_total) if dep_total > 0 else 0.0
-
-# Economics + horizon
-RATE_H            = float_env("VOI_RATE_PER_HOUR", 50)
-MONTHLY_DISCOUNT  = float_env("VOI_MONTHLY_DISCOUNT", 0.05)
-TARGET_DEP_PD     = float_env("VOI_TARGET_DEP_PER_DAY", 5.0/7.0)
-HORIZON_DAYS      = float_env("VOI_HORIZON_DAYS", 30)
-exp_deploys       = dep_per_day * HORIZON_DAYS
-
-items = []
-
-# A) Reduce change failure rate
-H_FAIL_SAVED = float_env("VOI_FAIL_HOURS_SAVED", 3.0)
-C_FAIL_H     = float_env("VOI_FAIL_COST_HOURS", 6.0)
-P_FAIL       = float_env("VOI_FAIL_P_CHANGE", 0.55)
-CONF_FAIL    = float_env("VOI_FAIL_CONF", 0.65)
-DELAY_FAIL_D = float_env("VOI_FAIL_DELAY_D", 5.0)
-avoided_fails = cfr * exp_deploys  # potential avoided failures if CFR→0
-delta_fail_usd = avoided_fails * H_FAIL_SAVED * RATE_H
-items.append(item("reduce_change_failure","release",delta_fail_usd,C_FAIL_H,P_FAIL,CONF_FAIL,DELAY_FAIL_D,RATE_H,MONTHLY_DISCOUNT,"CFR↓ over horizon"))
-
-# B) Trim lead-time tail (p90→p50)
-LEAD_ALPHA   = float_env("VOI_LEAD_ALPHA", 1.0)
-H_DEPLOY     = float_env("VOI_LEAD_HORIZON_DEPLOYS", 0.0)  # if 0, use exp_deploys
-C_LEAD_H     = float_env("VOI_LEAD_COST_HOURS", 4.0)
-P_LEAD       = float_env("VOI_LEAD_P_CHANGE", 0.5)
-CONF_LEAD    = float_env("VOI_LEAD_CONF", 0.6)
-DELAY_LEAD_D = float_env("VOI_LEAD_DELAY_D", 7.0)
-deploy_count = exp_deploys if H_DEPLOY <= 0 else H_DEPLOY
-gap_min = max(0.0, lead_p90_min - lead_p50_min)
-delta_lead_usd = (gap_min/60.0) * RATE_H * deploy_count * LEAD_ALPHA
-if gap_min > 0 and deploy_count > 0:
-    items.append(item("trim_p90_lead_time","delivery",delta_lead_usd,C_LEAD_H,P_LEAD,CONF_LEAD,DELAY_LEAD_D,RATE_H,MONTHLY_DISCOUNT,"p90→p50 over horizon"))
-
-# C) Increase deploy frequency toward target
-C_FREQ_H     = float_env("VOI_FREQ_COST_HOURS", 4.0)
-P_FREQ       = float_env("VOI_FREQ_P_CHANGE", 0.5)
-CONF_FREQ    = float_env("VOI_FREQ_CONF", 0.6)
-DELAY_FREQ_D = float_env("VOI_FREQ_DELAY_D", 7.0)
-VAL_PER_DEPLOY_H = float_env("VOI_FREQ_VALUE_PER_DEPLOY_H", 0.25)
-gap_pd = max(0.0, TARGET_DEP_PD - dep_per_day)
-added_deploys = gap_pd * HORIZON_DAYS
-delta_freq_usd = added_deploys * VAL_PER_DEPLOY_H * RATE_H
-if added_deploys > 0:
-    items.append(item("increase_deploy_frequency","release",delta_freq_usd,C_FREQ_H,P_FREQ,CONF_FREQ,DELAY_FREQ_D,RATE_H,MONTHLY_DISCOUNT,"deploy/day↑ to target"))
-
-# D) Optional instrumentation
-if int(float_env("VOI_INSTR_ENABLE", 1)) == 1:
-    C_INSTR_H   = float_env("VOI_INSTR_COST_HOURS", 2.0)
-    P_INSTR     = float_env("VOI_INSTR_P_CHANGE", 0.8)
-    CONF_INSTR  = float_env("VOI_INSTR_CONF", 0.7)
-    DELAY_INSTR = float_env("VOI_INSTR_DELAY_D", 1.0)
-    DELTA_IF_F  = float_env("VOI_INSTR_DELTA_USD_IF_FAILS", 60.0)
-    DELTA_IF_Z  = float_env("VOI_INSTR_DELTA_USD_IF_ZERO_FAILS", 100.0)
-    delta_instr = DELTA_IF_F if dep_fail > 0 else DELTA_IF_Z
-    items.append(item("instrument_deploy_events","release",delta_instr,C_INSTR_H,P_INSTR,CONF_INSTR,DELAY_INSTR,RATE_H,MONTHLY_DISCOUNT,"observability enablement"))
-
-# Rank
-items.sort(key=lambda r: (r["voi_per_hour"], r["VOI_adj"]), reverse=True)
-
-# Output
-out = {
-    "meta": {
-        "schema": "voi/v1",
-        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
-        "source": str(in_path),
-        "horizon_days": HORIZON_DAYS,
-        "rate_per_hour": RATE_H,
-        "discount_monthly": MONTHLY_DISCOUNT,
-        "target_dep_per_day": TARGET_DEP_PD,
-        "window_days_observed": window_days,
-        "observed": {
-            "deploys_total": dep_total,
-            "deploys_fail": dep_fail,
-            "deploys_per_day": dep_per_day,
-            "lead_n": lead_n,
-            "lead_p50_min": lead_p50_min,
-            "lead_p90_min": lead_p90_min,
-            "cfr": round(cfr, 4),
-            "expected_deploys_in_horizon": round(exp_deploys, 2),
+# ---------- one dora.json ----------
+def build(dora: dict, source) -> dict:
+    """The voi_items.json document for one dora.json; InputError/ConfigError on bad input/env."""
+    # Strict schema (fail fast)
+    need(dora, "deploys"); need(dora, "lead_time")
+    need(dora["deploys"], "total"); need(dora["deploys"], "fail"); need(dora["deploys"], "per_day")
+    need(dora["lead_time"], "n"); need(dora["lead_time"], "p50"); need(dora["lead_time"], "p90")
+    window_days = float(dora.get("window_days", 14.0))
+
+    dep_total    = int(dora["deploys"]["total"])
+    dep_fail     = int(dora["deploys"]["fail"])
+    dep_per_day  = float(dora["deploys"]["per_day"])
+    lead_n       = int(dora["lead_time"]["n"])
+    lead_p50_min = float(dora["lead_time"]["p50"])
+    lead_p90_min = float(dora["lead_time"]["p90"])
+    cfr = (dep_fail / dep_total) if dep_total > 0 else 0.0
+
+    # Economics + horizon
+    RATE_H            = float_env("VOI_RATE_PER_HOUR", 50)
+    MONTHLY_DISCOUNT  = float_env("VOI_MONTHLY_DISCOUNT", 0.05)
+    TARGET_DEP_PD     = float_env("VOI_TARGET_DEP_PER_DAY", 5.0/7.0)
+    HORIZON_DAYS      = float_env("VOI_HORIZON_DAYS", 30)
+    exp_deploys       = dep_per_day * HORIZON_DAYS
+    obs = {  # the observed inputs the lever deltas read (VOI_SIM_N redraws them)
+        "cfr": cfr, "dep_per_day": dep_per_day, "exp_deploys": exp_deploys,
+        "lead_gap": max(0.0, lead_p90_min - lead_p50_min),
+        "added_deploys": max(0.0, TARGET_DEP_PD - dep_per_day) * HORIZON_DAYS,
+    }
+
+    SIM_N     = int(float_env("VOI_SIM_N", 0))
+    SIM_SEED  = int(float_env("VOI_SIM_SEED", 0))
+    SIM_BATCH = max(1, int(float_env("VOI_SIM_BATCH", 1 << 18)))
+    SIM_KAPPA = float_env("VOI_SIM_KAPPA", 20.0)
+    SIM_SIGMA = float_env("VOI_SIM_SIGMA", 0.25)
+
+    items = []
+    levers = []  # what VOI_SIM_N redraws: knobs, env prefix, delta as a function of the observed inputs
+
+    def lever(prefix, delta, cost_hours, p_change, conf, delay_d, *args):
+        it = item(*args[:2], delta(obs), cost_hours, p_change, conf, delay_d, *args[2:])
+        items.append(it)
+        levers.append({"id": it["id"], "prefix": prefix, "delta": delta,
+                       "knobs": {"cost_hours": cost_hours, "p_change": p_change, "conf": conf, "delay_d": delay_d}})
+
+    # A) Reduce change failure rate
+    H_FAIL_SAVED = float_env("VOI_FAIL_HOURS_SAVED", 3.0)
+    C_FAIL_H     = float_env("VOI_FAIL_COST_HOURS", 6.0)
+    P_FAIL       = float_env("VOI_FAIL_P_CHANGE", 0.55)
+    CONF_FAIL    = float_env("VOI_FAIL_CONF", 0.65)
+    DELAY_FAIL_D = float_env("VOI_FAIL_DELAY_D", 5.0)
+    # potential avoided failures if CFR→0
+    delta_fail_usd = lambda o: (o["cfr"] * o["exp_deploys"]) * H_FAIL_SAVED * RATE_H
+    lever("VOI_FAIL",delta_fail_usd,C_FAIL_H,P_FAIL,CONF_FAIL,DELAY_FAIL_D,"reduce_change_failure","release",RATE_H,MONTHLY_DISCOUNT,"CFR↓ over horizon")
+
+    # B) Trim lead-time tail (p90→p50)
+    LEAD_ALPHA   = float_env("VOI_LEAD_ALPHA", 1.0)
+    H_DEPLOY     = float_env("VOI_LEAD_HORIZON_DEPLOYS", 0.0)  # if 0, use exp_deploys
+    C_LEAD_H     = float_env("VOI_LEAD_COST_HOURS", 4.0)
+    P_LEAD       = float_env("VOI_LEAD_P_CHANGE", 0.5)
+    CONF_LEAD    = float_env("VOI_LEAD_CONF", 0.6)
+    DELAY_LEAD_D = float_env("VOI_LEAD_DELAY_D", 7.0)
+    deploy_count = exp_deploys if H_DEPLOY <= 0 else H_DEPLOY
+    gap_min = max(0.0, lead_p90_min - lead_p50_min)
+    delta_lead_usd = lambda o: (o["lead_gap"]/60.0) * RATE_H * (o["exp_deploys"] if H_DEPLOY <= 0 else H_DEPLOY) * LEAD_ALPHA
+    if gap_min > 0 and deploy_count > 0:
+        lever("VOI_LEAD",delta_lead_usd,C_LEAD_H,P_LEAD,CONF_LEAD,DELAY_LEAD_D,"trim_p90_lead_time","delivery",RATE_H,MONTHLY_DISCOUNT,"p90→p50 over horizon")
+
+    # C) Increase deploy frequency toward target
+    C_FREQ_H     = float_env("VOI_FREQ_COST_HOURS", 4.0)
+    P_FREQ       = float_env("VOI_FREQ_P_CHANGE", 0.5)
+    CONF_FREQ    = float_env("VOI_FREQ_CONF", 0.6)
+    DELAY_FREQ_D = float_env("VOI_FREQ_DELAY_D", 7.0)
+    VAL_PER_DEPLOY_H = float_env("VOI_FREQ_VALUE_PER_DEPLOY_H", 0.25)
+    gap_pd = max(0.0, TARGET_DEP_PD - dep_per_day)
+    added_deploys = gap_pd * HORIZON_DAYS
+    delta_freq_usd = lambda o: o["added_deploys"] * VAL_PER_DEPLOY_H * RATE_H
+    if added_deploys > 0:
+        lever("VOI_FREQ",delta_freq_usd,C_FREQ_H,P_FREQ,CONF_FREQ,DELAY_FREQ_D,"increase_deploy_frequency","release",RATE_H,MONTHLY_DISCOUNT,"deploy/day↑ to target")
+
+    # D) Optional instrumentation
+    if int(float_env("VOI_INSTR_ENABLE", 1)) == 1:
+        C_INSTR_H   = float_env("VOI_INSTR_COST_HOURS", 2.0)
+        P_INSTR     = float_env("VOI_INSTR_P_CHANGE", 0.8)
+        CONF_INSTR  = float_env("VOI_INSTR_CONF", 0.7)
+        DELAY_INSTR = float_env("VOI_INSTR_DELAY_D", 1.0)
+        DELTA_IF_F  = float_env("VOI_INSTR_DELTA_USD_IF_FAILS", 60.0)
+        DELTA_IF_Z  = float_env("VOI_INSTR_DELTA_USD_IF_ZERO_FAILS", 100.0)
+        delta_instr = DELTA_IF_F if dep_fail > 0 else DELTA_IF_Z
+        lever("VOI_INSTR",lambda o: delta_instr,C_INSTR_H,P_INSTR,CONF_INSTR,DELAY_INSTR,"instrument_deploy_events","release",RATE_H,MONTHLY_DISCOUNT,"observability enablement")
+
+    # Simulate
+    sim_meta = None
+    if SIM_N > 0 and levers:
+        try:
+            import voi_sim
+        except ImportError as e:
+            raise ConfigError(f"VOI_SIM_N needs numpy: {e}")
+        if voi_sim.np is None:
+            raise ConfigError("VOI_SIM_N needs numpy")
+        observed = dict(obs, dep_total=dep_total, dep_fail=dep_fail, lead_n=lead_n,
+                        horizon_days=HORIZON_DAYS, target_dep_per_day=TARGET_DEP_PD)
+        try:
+            sims, sim_meta = voi_sim.simulate(levers, observed, RATE_H, MONTHLY_DISCOUNT, SIM_N, seed=SIM_SEED,
+                                              batch=SIM_BATCH, kappa=SIM_KAPPA, sigma=SIM_SIGMA)
+        except voi_sim.SpecError as e:
+            raise ConfigError(f"bad VOI_SIM distribution: {e}")
+        for it in items:
+            it["sim"] = sims[it["id"]]
+
+    # Rank
+    items.sort(key=lambda r: (r["voi_per_hour"], r["VOI_adj"]), reverse=True)
+    if sim_meta:  # risk-adjusted: most often best first
+        items.sort(key=lambda r: (r["sim"]["p_best"], r["sim"]["voi_per_hour"]["mean"]), reverse=True)
+
+    # Output
+    out = {
+        "meta": {
+            "schema": "voi/v1",
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "source": str(source),
+            "horizon_days": HORIZON_DAYS,
+            "rate_per_hour": RATE_H,
+            "discount_monthly": MONTHLY_DISCOUNT,
+            "target_dep_per_day": TARGET_DEP_PD,
+            "window_days_observed": window_days,
+            "observed": {
+                "deploys_total": dep_total,
+                "deploys_fail": dep_fail,
+                "deploys_per_day": dep_per_day,
+                "lead_n": lead_n,
+                "lead_p50_min": lead_p50_min,
+                "lead_p90_min": lead_p90_min,
+                "cfr": round(cfr, 4),
+                "expected_deploys_in_horizon": round(exp_deploys, 2),
+            },
         },
-    },
-    "items": items,
-}
+        "items": items,
+    }
+    if sim_meta:
+        out["meta"]["simulation"] = sim_meta
+    return out
+
+
+# ---------- batch ----------
+def batch_inputs(spec: Path, pattern: str) -> list:
+    """Files under directory `spec` named `pattern`, by path; or a manifest's paths (relative to it; # comments), in order."""
+    spec = Path(spec)
+    if spec.is_dir():
+        return sorted(p for p in spec.rglob(pattern) if p.is_file())
+    paths = []
+    for line in spec.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            p = Path(line)
+            paths.append(p if p.is_absolute() else spec.parent / p)
+    return paths
+
+def evaluate(path: Path) -> dict:
+    """One NDJSON record: the ranking and voi_items.json document of `path`, or its error."""
+    try:
+        doc = build(read_json(path), path)
+    except (InputError, ValueError, TypeError, KeyError, AttributeError) as e:
+        return {"source": str(path), "error": str(e)}
+    return {"source": str(path), "ranking": [it["id"] for it in doc["items"]], **doc}
+
+def run_batch(spec: Path, out, workers: int = 1, pattern: str = "dora.json") -> int:
+    """evaluate() every input into NDJSON `out` (in input order); returns the error count."""
+    try:
+        paths = batch_inputs(spec, pattern)
+    except OSError as e:
+        die(f"failed to read {spec}: {e}")
+    records = errors = 0
+    workers = max(1, min(workers, len(paths)))
+    ex = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        results = ex.map(evaluate, paths, chunksize=max(1, len(paths) // (workers * 4))) if ex else map(evaluate, paths)
+        for rec in results:
+            out.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            records += 1
+            errors += "error" in rec
+    finally:
+        if ex:
+            ex.shutdown()
+    print(f"voi-batch: inputs={records} errors={errors} workers={workers}", file=sys.stderr)
+    return errors
+
+# ---------- main ----------
+USAGE = ("usage: voi_from_dora.py <dora.json> <outdir>\n"
+         "       voi_from_dora.py --batch <dir|manifest> [--out FILE.ndjson] [--workers N] [--glob PATTERN]")
+
+def main(argv):
+    if len(argv) > 1 and argv[1] == "--batch":
+        opts, rest = {"--out": "-", "--workers": "1", "--glob": "dora.json"}, argv[2:]
+        if not rest or rest[0].startswith("--"):
+            die(USAGE)
+        spec, rest = Path(rest[0]), rest[1:]
+        while rest:
+            if rest[0] not in opts or len(rest) < 2:
+                die(USAGE)
+            opts[rest[0]], rest = rest[1], rest[2:]
+        try:
+            workers = int(opts["--workers"])
+        except ValueError:
+            die(USAGE)
+        out = sys.stdout if opts["--out"] == "-" else open(opts["--out"], "w", encoding="utf-8")
+        try:
+            errors = run_batch(spec, out, workers, opts["--glob"])
+        except ConfigError as e:
+            die(str(e))
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        return 1 if errors else 0
+
+    if len(argv) < 3:
+        die(USAGE.splitlines()[0])
+    in_path = Path(argv[1])
+    outdir = Path(argv[2]); outdir.mkdir(parents=True, exist_ok=True)
+    try:
+        out = build(read_json(in_path), in_path)
+    except (InputError, ConfigError) as e:
+        die(str(e))
+
+    out_path = outdir / "voi_items.json"
+    with out_path.open("w", encoding="utf-8") as f:
+        json.dump(out, f, indent=2)
 
-out_path = outdir / "voi_items.json"
-with out_path.open("w", encoding="utf-8") as f:
-    json.dump(out, f, indent=2)
+    print(str(out_path))
+    return 0
 
-print(str(out_path))
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
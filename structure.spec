@@ -93,21 +93,45 @@ file: ./ci/check_layering.sh
 file: ./ci/check_predicates.sh
 file: ./ci/check_queries.sh
 file: ./ci/checklib.sh
+file: ./ci/conftest.py
 file: ./ci/contract/hints.json
 file: ./ci/contract/inject.sh
 file: ./ci/contract/jq/normalize_v1.jq
 file: ./ci/contract/normalize.sh
 file: ./ci/contract/stage0_autogen.sh
+file: ./ci/dora/collect-events.py
 file: ./ci/dora/collect-events.sh
 file: ./ci/dora/compute-dora.py
+file: ./ci/dora/dora-bench.py
+file: ./ci/dora/dora-daemon.py
 file: ./ci/dora/dora-refactor/compute-dora.rf.py
 file: ./ci/dora/dora-refactor/dora_aggregate.py
 file: ./ci/dora/dora-refactor/dora_assemble.py
+file: ./ci/dora/dora-refactor/dora_cache.py
+file: ./ci/dora/dora-refactor/dora_checkpoint.py
+file: ./ci/dora/dora-refactor/dora_compute.py
+file: ./ci/dora/dora-refactor/dora_daemon.py
+file: ./ci/dora/dora-refactor/dora_dedupe.py
+file: ./ci/dora/dora-refactor/dora_engine.py
+file: ./ci/dora/dora-refactor/dora_events.py
+file: ./ci/dora/dora-refactor/dora_github.py
 file: ./ci/dora/dora-refactor/dora_io.py
 file: ./ci/dora/dora-refactor/dora_pair.py
+file: ./ci/dora/dora-refactor/dora_prindex.py
+file: ./ci/dora/dora-refactor/dora_profile.py
+file: ./ci/dora/dora-refactor/dora_results.py
+file: ./ci/dora/dora-refactor/dora_rollup.py
+file: ./ci/dora/dora-refactor/dora_series.py
+file: ./ci/dora/dora-refactor/dora_sink.py
+file: ./ci/dora/dora-refactor/dora_sketch.py
+file: ./ci/dora/dora-refactor/dora_sqlite.py
+file: ./ci/dora/dora-refactor/dora_store.py
+file: ./ci/dora/dora-refactor/dora_synth.py
 file: ./ci/dora/dora-refactor/dora_validate.py
 file: ./ci/dora/dora-refactor/invariants.py
 file: ./ci/dora/dora-refactor/main.py
+file: ./ci/dora/dora-rollup.py
+file: ./ci/dora/dora-series.py
 file: ./ci/dora/event-append.sh
 file: ./ci/dora/fetch_window_events.sh
 file: ./ci/dora/health.sh
@@ -116,6 +140,7 @@ file: ./ci/dora/prepare-events.sh
 file: ./ci/dora/probe-pairs2.sh
 file: ./ci/dora/probe_pairs.sh
 file: ./ci/dora/test-lead.py
+file: ./ci/dora_testlib.py
 file: ./ci/enforce_contract.sh
 file: ./ci/enviornment/.gitkeep
 file: ./ci/enviornment/_isolate_core.sh
@@ -143,15 +168,41 @@ file: ./ci/roi/fetch_artifacts.sh
 file: ./ci/roi/first-pass.sh
 file: ./ci/roi/gen_ci_hours.sh
 file: ./ci/roi/parsers.py
+file: ./ci/roi/roit_sweep.py
 file: ./ci/roi/run_stats.jq
 file: ./ci/roi/shadow_diff.py
 file: ./ci/run.sh
 file: ./ci/setup.sh
 file: ./ci/test.sh
+file: ./ci/test_batch_modes.py
+file: ./ci/test_dora_cache.py
+file: ./ci/test_dora_compute.py
+file: ./ci/test_dora_daemon.py
+file: ./ci/test_dora_dedupe.py
+file: ./ci/test_dora_engine.py
+file: ./ci/test_dora_events.py
+file: ./ci/test_dora_github.py
+file: ./ci/test_dora_io.py
+file: ./ci/test_dora_pair.py
+file: ./ci/test_dora_prindex.py
+file: ./ci/test_dora_profile.py
+file: ./ci/test_dora_results.py
+file: ./ci/test_dora_rollup.py
+file: ./ci/test_dora_series.py
+file: ./ci/test_dora_sink.py
+file: ./ci/test_dora_sketch.py
+file: ./ci/test_dora_sqlite.py
+file: ./ci/test_dora_store.py
+file: ./ci/test_dora_synth.py
 file: ./ci/test_github_timings.py
+file: ./ci/test_roi_bucketing.py
+file: ./ci/test_roi_streaming.py
+file: ./ci/test_roit_sweep.py
 file: ./ci/test_toggl_parser.py
+file: ./ci/test_voi_sim.py
 file: ./ci/triage.sh
 file: ./ci/verify_contract.sh
+file: ./ci/voi/voi_sim.py
 file: ./ci/voi/void_from_dora.py
 file: ./config/policy.rules.yml
 file: ./config/runtime.cfg
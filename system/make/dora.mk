@@ -1,5 +1,5 @@
 # included from root Makefile
-.PHONY: exact clean dora-env
+.PHONY: exact clean dora-env dora-cache dora-rollup dora-series dora-bench dora-daemon dora-store dora-dedupe dora-sqlite dora-collect dora-sink dora-prindex
 
 exact:
 	test/exact.sh
@@ -7,5 +7,53 @@ exact:
 dora-env:
 	env -i PATH="$$PATH" TZ=UTC LC_ALL=C python3 ci/dora/compute-dora.py --show-env
 
+# columnar sidecar (EVENTS.dcache) reused by compute-dora.py and dora-refactor/main.py
+dora-cache:
+	python3 ci/dora/dora-refactor/dora_cache.py '$(EVENTS)'
+
+# org + per-repo dora/v1 over one or more events files (DORA_WORKERS processes)
+dora-rollup:
+	python3 ci/dora/dora-rollup.py $(EVENTS)
+
+# rolling per-day dora metrics (DORA_SERIES_DAYS/STEP/OUT) in one pass
+dora-series:
+	python3 ci/dora/dora-series.py '$(EVENTS)'
+
+# synthetic events/v1 scale runs; BENCH_SIZES e.g. "10k 1M 10M"
+BENCH_SIZES ?= 10k
+dora-bench:
+	python3 ci/dora/dora-bench.py $(BENCH_SIZES)
+
+# serve live dora/v1 while EVENTS grows (DORA_DAEMON_LISTEN, default 127.0.0.1:8787)
+dora-daemon:
+	python3 ci/dora/dora-daemon.py '$(EVENTS)'
+
+# load EVENTS into the date-partitioned store STORE (what EVENTS_STORE points the collectors at)
+STORE ?= events.store
+dora-store:
+	python3 ci/dora/dora-refactor/dora_store.py append '$(STORE)' '$(EVENTS)'
+
+# re-read EVENTS (file or store) into its de-dup key index, then check it
+dora-dedupe:
+	python3 ci/dora/dora-refactor/dora_dedupe.py rebuild '$(EVENTS)'
+	python3 ci/dora/dora-refactor/dora_dedupe.py verify '$(EVENTS)'
+
+# import EVENTS into the SQLite database DB (only what is new); then compute-dora.py sqlite:$(DB)
+DB ?= events.db
+dora-sqlite:
+	python3 ci/dora/dora-refactor/dora_sqlite.py import '$(DB)' '$(EVENTS)'
+
+# collect PR/deployment events from the GitHub API into EVENTS (concurrent, ETag-cached)
+dora-collect:
+	python3 ci/dora/collect-events.py '$(EVENTS)'
+
+# POST EVENTS to SINK in NDJSON batches; what the sink does not take waits in $(EVENTS).sink-spool
+dora-sink:
+	python3 ci/dora/dora-refactor/dora_sink.py send '$(SINK)' '$(EVENTS)' --spool '$(EVENTS).sink-spool'
+
+# bring the SHA -> PR index of EVENTS (file or store) up to date; lt_from_sha.sh reads it via PR_INDEX_EVENTS
+dora-prindex:
+	python3 ci/dora/dora-refactor/dora_prindex.py refresh '$(EVENTS)'
+
 clean:
 	rm -rf ./.tmp.dora